@@ -46,13 +46,19 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "core.modules.db_router.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.modules.sharding.TenantShardMiddleware",
+    "core.modules.profiling.ProfilingMiddleware",
+    "core.modules.querylog.QueryLogMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.modules.audit.AuditContextMiddleware",
+    "core.modules.sqlite.SQLiteWriteQueueMiddleware",
 ]
 
 ROOT_URLCONF = "HMS.urls"
@@ -73,6 +79,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "HMS.wsgi.application"
+ASGI_APPLICATION = "HMS.asgi.application"
 
 
 # Database
@@ -82,7 +89,54 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+        # Production SQLite profile; pragmas are applied by core/modules/sqlite.py
+        "CONN_MAX_AGE": 600,  # persistent connections keep the page cache and mmap warm
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # Take the write lock at BEGIN: a deferred transaction that reads
+            # and then writes fails with "database is locked" immediately
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+    },
+    # Read replicas are extra aliases listed in DATABASE_ROUTING["REPLICAS"], e.g.
+    # "replica1": {..., "TEST": {"MIRROR": "default"}},
+}
+
+# SQLite connection pragmas and the in-process write queue (see core/modules/sqlite.py)
+SQLITE: dict[str, object] = {
+    "JOURNAL_MODE": "WAL",
+    "SYNCHRONOUS": "NORMAL",  # durable across app crashes; WAL makes FULL unnecessary
+    "BUSY_TIMEOUT_MS": 5000,
+    "MMAP_SIZE": 256 * 1024 * 1024,
+    "CACHE_SIZE": -64000,  # 64 MiB page cache per connection
+    "TEMP_STORE": "MEMORY",
+    "JOURNAL_SIZE_LIMIT": 64 * 1024 * 1024,
+    "WRITE_QUEUE": True,  # serialize writers within a process
+    "WRITE_QUEUE_TIMEOUT": 30,  # seconds before a writer proceeds unserialized
+    "WRITE_QUEUE_EXEMPT": ["/api/v1/auth/"],  # views that queue only their own writes
+}
+
+# Tenant sharding and primary/replica routing
+# (see core/modules/sharding.py and core/modules/db_router.py)
+DATABASE_ROUTERS = [
+    "core.modules.sharding.TenantRouter",
+    "core.modules.db_router.ReplicaRouter",
+]
+DATABASE_ROUTING: dict[str, object] = {
+    "REPLICAS": [],  # aliases in DATABASES; empty keeps everything on "default"
+    "APPS": ["core"],  # apps whose reads may go to a replica
+    "STICKY_SECONDS": 5,  # read-your-writes window after a client's write
+    "COOKIE_NAME": "hms_use_primary",
+}
+# Opt-in: every alias in SHARDS holds the core tables of the hospitals mapped to it.
+# Manage with `python manage.py shards migrate|seed|move|list`.
+SHARDING: dict[str, object] = {
+    "ENABLED": False,
+    "SHARDS": ["default"],
+    "DEFAULT_SHARD": "default",  # hospitals not in the directory live here
+    "DIRECTORY_TTL": 30,  # seconds a process caches the hospital -> shard directory
+    "ID_BLOCK_SIZE": 10**12,  # integer ids reserved per shard so rows can move
 }
 
 
@@ -137,10 +191,120 @@ SIMPLE_JWT: dict[str, object] = {
     "AUTH_HEADER_TYPES": ("Bearer",),
     "ROTATE_REFRESH_TOKENS": True,  # rotates refresh tokens on each use
     "BLACKLIST_AFTER_ROTATION": True,  # Required for logout to work
+    "TOKEN_REFRESH_SERIALIZER": "jwt_auth.serializers.FilteredTokenRefreshSerializer",
 }
 # for logout we just blacklist token
 INSTALLED_APPS += ["rest_framework_simplejwt.token_blacklist"]
 
+# In-memory bloom filter in front of the blacklist table (see jwt_auth/blacklist.py)
+TOKEN_BLACKLIST_FILTER: dict[str, float] = {
+    "REBUILD_SECONDS": 300,  # full rebuild, drops pruned tokens
+    "SYNC_SECONDS": 2,  # pull tokens blacklisted by other processes
+    "FALSE_POSITIVE_RATE": 0.001,
+    "MIN_CAPACITY": 10_000,
+    "SYNC_ID_MARGIN": 500,  # ids below the last seen one re-read per sync (late commits)
+}
+
+# Real-time events (see core/modules/realtime.py)
+# Use "core.modules.realtime.RedisBackplane" when running more than one process.
+REALTIME: dict[str, object] = {
+    "BACKPLANE": "core.modules.realtime.LocalBackplane",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "CHANNEL": "hms:events",
+    "QUEUE_SIZE": 100,  # per-connection buffer; oldest events dropped first
+    "HISTORY_SIZE": 200,  # per-hospital replay buffer for SSE/long-poll cursors
+    "KEEPALIVE_SECONDS": 15,
+    "LONG_POLL_SECONDS": 25,
+    "STERILIZATION_WATCH_SECONDS": 300,  # 0 disables the in-process watcher
+    "STERILIZATION_WARNING_MINUTES": 60,
+}
+
+# Offline sync (see core/modules/snapshots.py)
+SYNC: dict[str, object] = {
+    "SNAPSHOT_DIR": BASE_DIR / "var" / "snapshots",
+    "SCHEDULE_HORIZON_DAYS": 14,
+    "COMPRESSION_LEVEL": 6,
+    # /sync/changes entries kept; older cursors must bootstrap again (see core/modules/changelog.py)
+    "CHANGELOG_RETENTION_DAYS": 30,
+}
+
+# Audit trail, written in batches by a background thread (see core/modules/audit.py)
+AUDIT: dict[str, object] = {
+    "BATCH_SIZE": 500,
+    "FLUSH_SECONDS": 1.0,
+    "QUEUE_SIZE": 10_000,  # when full, entries are written inline, never dropped
+    "SYNCHRONOUS": False,  # write inline, e.g. for tests
+}
+
+# Hot/cold archival, run `manage.py archive` daily (see core/modules/archive.py)
+ARCHIVE: dict[str, object] = {
+    "AFTER_DAYS": 21,  # finished schedules and read notifications older than this
+    "SCHEDULE_STATUSES": ["completed", "cancelled"],
+    "CHUNK_SIZE": 500,  # rows moved per transaction
+}
+
+# On-demand request profiling, artifacts served at /profiles (see core/modules/profiling.py)
+PROFILING: dict[str, object] = {
+    "ENABLED": True,
+    "HEADER": "X-Profile",  # admins send "X-Profile: 1" (or cprofile/sampling)
+    "SAMPLE_RATE": 0.0,  # fraction of requests profiled for any user, e.g. 0.001
+    "SAMPLE_PATHS": ["/api/"],  # path prefixes eligible for sampling
+    "SAMPLE_EXCLUDE_PATHS": ["/api/v1/auth/"],  # never sampled (credentials)
+    "PROFILER": "cprofile",  # or "sampling": lower overhead, no pstats file
+    "SAMPLE_INTERVAL_MS": 2,  # stack sampling period for the flame graph
+    "OUTPUT_DIR": BASE_DIR / "var" / "profiles",
+    "KEEP": 200,  # newest profiles kept on disk
+}
+
+# Equipment reservation ledger (see core/modules/reservations.py)
+RESERVATIONS: dict[str, object] = {
+    "MAX_HOURS": 24,  # longest reservation; bounds the interval index scan
+    "RELEASE_STATUSES": ["cancelled", "bumped"],  # schedules in these give their equipment back
+}
+
+# In-process shift index for /staff/on-duty and /staff/on-call (see core/modules/shifts.py)
+SHIFTS: dict[str, int] = {
+    "PAST_DAYS": 1,  # days before today kept in memory
+    "FUTURE_DAYS": 7,  # days after today kept in memory; other times query the database
+}
+
+# Sterilization planner, `manage.py plan_sterilization` (see core/modules/sterilization.py)
+STERILIZATION: dict[str, object] = {
+    "STERILIZERS": 2,  # machines per hospital, one cycle at a time each
+    "VALID_HOURS": 72,  # how long an item stays sterile after a cycle
+    "HORIZON_HOURS": 48,  # surgeries planned ahead
+}
+
+# Slow-query log and N+1 detection, logged to "core.modules.querylog" (see core/modules/querylog.py)
+QUERYLOG: dict[str, object] = {
+    "ENABLED": True,
+    "SLOW_MS": 200,  # log queries slower than this with the view and app stack
+    "DUPLICATE_THRESHOLD": 5,  # same statement shape this often in one request = N+1
+    "REPORT_SECONDS": 300,  # report each N+1 finding per endpoint at most this often
+    "STACK_DEPTH": 6,  # application frames kept per finding
+    "STRUCTURED": False,  # log JSON objects instead of text
+}
+
+# Background jobs, run `manage.py run_workers` (see core/modules/jobs.py)
+JOBS: dict[str, object] = {
+    "POLL_SECONDS": 1.0,  # idle worker sleep between claims
+    "LEASE_SECONDS": 600,  # a running job not finished by then is retried
+    "MAX_ATTEMPTS": 3,
+    "RETRY_SECONDS": 30,  # first retry delay, doubled per attempt
+    "KEEP_DAYS": 7,  # finished jobs kept for /jobs
+    "PERIODIC": {  # task -> seconds between runs per hospital, 0 = off
+        "escalate_queue": 24 * 3600,
+        "sterilization_sweep": 15 * 60,
+        "prune_changelog": 24 * 3600,
+    },
+}
+
+# Waiting-list escalation, run nightly as a job (see core/modules/escalation.py)
+ESCALATION: dict[str, object] = {
+    "AFTER_DAYS": {"elective": 30, "urgent": 3, "emergency": 1},  # wait before escalating
+    "DEADLINE_HOURS": 24,  # escalate when the latest allowed time is this close
+}
+
 CSRF_COOKIE_HTTPONLY = False  # frontend can read CSRF token
 SESSION_COOKIE_HTTPONLY = True
 
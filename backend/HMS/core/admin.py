@@ -1,4 +1,12 @@
+from typing import Any, Optional
+
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+from django.http import HttpRequest
+from django.utils.functional import cached_property
+
 from core.models import (
     Hospital,
     OperatingRoom,
@@ -12,22 +20,241 @@ from core.models import (
     SurgeryQueue,
     SurgeryEquipmentRequirement,
     Equipment,
+    EquipmentReservation,
     EquipmentSterilization,
     Notification,
 )
+from core.modules.tenancy import HOSPITAL_PATHS
+
+# Unfiltered change lists above this many rows show the planner's estimate
+ESTIMATE_COUNT_ABOVE = 100_000
+
+# Hospital scope of superusers
+ALL_HOSPITALS = object()
+
+
+def estimated_count(model: type, alias: str) -> Optional[int]:
+    """
+    Row count from the database statistics, or None when there are none
+    (SQLite before ANALYZE, other vendors).
+    """
+    connection = connections[alias]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            elif connection.vendor == "sqlite":
+                # First number of each stat row is the rows in that table/index
+                cursor.execute(
+                    "SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s", [table]
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the statistics estimate instead of COUNT(*) for unfiltered
+    querysets of huge tables.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > ESTIMATE_COUNT_ABOVE:
+                return estimate
+        return super().count
+
+
+def hospital_scope(request: HttpRequest) -> Any:
+    """
+    Hospital id a staff user administers, ALL_HOSPITALS for superusers, or
+    None (sees nothing).
+    """
+    if request.user.is_superuser:
+        return ALL_HOSPITALS
+    profile = getattr(request.user, "baseuserprofile", None)
+    return profile.hospital_id if profile is not None else None
+
+
+class HospitalScopedAdmin(admin.ModelAdmin):
+    """
+    Staff see and pick only their own hospital's rows; superusers see all.
+    """
+
+    list_per_page = 50
+    show_full_result_count = False
+
+    def _scope(self, queryset: QuerySet, model: type, request: HttpRequest) -> QuerySet:
+        scope = hospital_scope(request)
+        if scope is ALL_HOSPITALS or model not in HOSPITAL_PATHS:
+            return queryset
+        if scope is None:
+            return queryset.none()
+        return queryset.filter(**{HOSPITAL_PATHS[model]: scope})
+
+    def get_queryset(self, request: HttpRequest) -> QuerySet:
+        queryset = self._scope(super().get_queryset(request), self.model, request)
+        # Also covers autocomplete results and raw id popups, which render __str__
+        if isinstance(self.list_select_related, (list, tuple)) and self.list_select_related:
+            queryset = queryset.select_related(*self.list_select_related)
+        return queryset
+
+    def formfield_for_foreignkey(self, db_field, request: HttpRequest, **kwargs: Any):
+        # Raw id fields are scoped too, so a typed-in id is validated against it
+        model = db_field.related_model
+        if "queryset" not in kwargs and model in HOSPITAL_PATHS:
+            kwargs["queryset"] = self._scope(model._default_manager.all(), model, request)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def formfield_for_manytomany(self, db_field, request: HttpRequest, **kwargs: Any):
+        model = db_field.related_model
+        if "queryset" not in kwargs and model in HOSPITAL_PATHS:
+            kwargs["queryset"] = self._scope(model._default_manager.all(), model, request)
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
+
+
+class LargeTableAdmin(HospitalScopedAdmin):
+    paginator = EstimatedCountPaginator
+
+
+@admin.register(Hospital)
+class HospitalAdmin(HospitalScopedAdmin):
+    list_display = ("name", "code", "timezone", "is_active", "created_at")
+    list_filter = ("is_active",)
+    search_fields = ("name", "=code")
+    ordering = ("name",)
+
+
+@admin.register(OperatingRoom)
+class OperatingRoomAdmin(HospitalScopedAdmin):
+    list_display = ("name", "hospital", "operating_room_type", "is_available", "maintenance_until")
+    list_select_related = ("hospital",)
+    list_filter = ("hospital",)
+    search_fields = ("name",)
+    ordering = ("hospital", "name")
+    autocomplete_fields = ("hospital",)
+
+
+@admin.register(BaseUserProfile)
+class BaseUserProfileAdmin(LargeTableAdmin):
+    list_display = ("django_user", "role", "hospital", "unread_notifications")
+    list_select_related = ("django_user", "hospital")
+    list_filter = ("hospital",)
+    search_fields = ("=django_user__username",)
+    raw_id_fields = ("django_user",)
+    autocomplete_fields = ("hospital",)
+
+
+@admin.register(SurgeonProfile)
+class SurgeonProfileAdmin(HospitalScopedAdmin):
+    list_display = ("__str__", "specialization")
+    list_select_related = ("base_profile__django_user",)
+    search_fields = ("=base_profile__django_user__username", "specialization")
+    raw_id_fields = ("base_profile",)
+
+
+@admin.register(StaffProfile)
+class StaffProfileAdmin(LargeTableAdmin):
+    list_display = ("__str__", "start_time", "end_time", "is_on_call")
+    list_select_related = ("base_profile__django_user",)
+    search_fields = ("=base_profile__django_user__username",)
+    raw_id_fields = ("base_profile",)
+
+
+@admin.register(Patient)
+class PatientAdmin(LargeTableAdmin):
+    list_display = ("full_name", "medical_record_number", "date_of_birth", "gender", "hospital")
+    list_select_related = ("hospital",)
+    list_filter = ("hospital",)
+    # MRN is unique (indexed); name search is a prefix match
+    search_fields = ("=medical_record_number", "^full_name")
+    autocomplete_fields = ("hospital",)
+
+
+@admin.register(SurgeryRequest)
+class SurgeryRequestAdmin(LargeTableAdmin):
+    list_display = ("id", "patient", "procedure_name", "priority", "approved", "requested_at", "latest_allowed_time")
+    list_select_related = ("patient",)
+    list_filter = ("hospital", "priority")
+    search_fields = ("=id", "=patient__medical_record_number")
+    raw_id_fields = ("patient", "preferred_surgeon")
+    autocomplete_fields = ("hospital",)
+
+
+@admin.register(SurgerySchedule)
+class SurgeryScheduleAdmin(LargeTableAdmin):
+    list_display = ("__str__", "start_time", "end_time", "status")
+    list_select_related = ("surgery_request__patient", "operating_room")
+    list_filter = ("status", "operating_room__hospital")
+    search_fields = ("=surgery_request__id", "=surgery_request__patient__medical_record_number")
+    raw_id_fields = ("surgery_request",)
+    autocomplete_fields = ("operating_room", "surgeons")
+
+
+@admin.register(RescheduleEvent)
+class RescheduleEventAdmin(LargeTableAdmin):
+    list_display = ("__str__", "reason", "timestamp")
+    list_select_related = ("affected_schedule__surgery_request__patient",)
+    search_fields = ("=triggered_by__id",)
+    raw_id_fields = ("triggered_by", "affected_schedule")
+
+
+@admin.register(SurgeryQueue)
+class SurgeryQueueAdmin(LargeTableAdmin):
+    list_display = ("__str__", "current_priority", "wait_days", "escalated")
+    list_select_related = ("surgery_request__patient",)
+    list_filter = ("escalated",)
+    search_fields = ("=surgery_request__id",)
+    raw_id_fields = ("surgery_request",)
+
+
+@admin.register(SurgeryEquipmentRequirement)
+class SurgeryEquipmentRequirementAdmin(LargeTableAdmin):
+    list_display = ("__str__", "equipment", "quantity_required")
+    list_select_related = ("equipment", "surgery_request__patient")
+    search_fields = ("=surgery_request__id",)
+    raw_id_fields = ("surgery_request",)
+    autocomplete_fields = ("equipment",)
+
+
+@admin.register(Equipment)
+class EquipmentAdmin(HospitalScopedAdmin):
+    list_display = ("name", "equipment_type", "location", "is_available", "sterile_until", "needs_sterilization", "hospital")
+    list_select_related = ("hospital",)
+    list_filter = ("hospital",)
+    search_fields = ("name",)
+    ordering = ("hospital", "name")
+    autocomplete_fields = ("hospital",)
+
+
+@admin.register(EquipmentSterilization)
+class EquipmentSterilizationAdmin(LargeTableAdmin):
+    list_display = ("__str__", "sterilized_at", "valid_until")
+    list_select_related = ("equipment",)
+    search_fields = ("=equipment__name",)
+    autocomplete_fields = ("equipment",)
+
+
+@admin.register(EquipmentReservation)
+class EquipmentReservationAdmin(LargeTableAdmin):
+    list_display = ("equipment_type", "quantity", "start_time", "end_time", "schedule_id")
+    list_filter = ("hospital",)
+    search_fields = ("=equipment_type",)
+    raw_id_fields = ("schedule",)
+    autocomplete_fields = ("hospital",)
 
 
-admin.site.register(Hospital)
-admin.site.register(OperatingRoom)
-admin.site.register(BaseUserProfile)
-admin.site.register(SurgeonProfile)
-admin.site.register(StaffProfile)
-admin.site.register(Patient)
-admin.site.register(SurgeryRequest)
-admin.site.register(SurgerySchedule)
-admin.site.register(RescheduleEvent)
-admin.site.register(SurgeryQueue)
-admin.site.register(SurgeryEquipmentRequirement)
-admin.site.register(Equipment)
-admin.site.register(EquipmentSterilization)
-admin.site.register(Notification)
+@admin.register(Notification)
+class NotificationAdmin(LargeTableAdmin):
+    list_display = ("__str__", "severity", "is_read", "created_at")
+    list_select_related = ("base_profile__django_user",)
+    search_fields = ("=base_profile__django_user__username",)
+    raw_id_fields = ("base_profile",)
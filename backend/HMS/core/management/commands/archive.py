@@ -0,0 +1,62 @@
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.models import Notification, SurgerySchedule
+from core.modules import archive, sharding
+
+
+class Command(BaseCommand):
+    help = (
+        "Move completed/cancelled schedules (with their reschedule events) and "
+        "read notifications older than ARCHIVE['AFTER_DAYS'] from the hot tables "
+        "to the archive tables, in chunks. Safe to run while the app is serving; "
+        "schedule it daily."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Archive rows older than this many days (default: ARCHIVE['AFTER_DAYS']).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help="Rows moved per transaction (default: ARCHIVE['CHUNK_SIZE']).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count what would be archived.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        before = archive.cutoff(options["days"])
+        chunk_size: Optional[int] = options["chunk_size"] and max(1, options["chunk_size"])
+        self.stdout.write(f"Archiving rows older than {before:%Y-%m-%d %H:%M} UTC...")
+
+        for alias in sharding.each_shard():
+            if options["dry_run"]:
+                schedules = SurgerySchedule.objects.filter(
+                    status__in=archive.get_setting("SCHEDULE_STATUSES"), end_time__lt=before
+                ).count()
+                notifications = Notification.objects.filter(
+                    is_read=True, created_at__lt=before
+                ).count()
+                self.stdout.write(
+                    f"{alias}: would archive {schedules} schedule(s) and {notifications} notification(s)."
+                )
+                continue
+
+            schedules, events = archive.archive_schedules(before, chunk_size)
+            notifications = archive.archive_notifications(before, chunk_size)
+            self.stdout.write(
+                f"{alias}: archived {schedules} schedule(s), {events} reschedule event(s), "
+                f"{notifications} notification(s); {SurgerySchedule.objects.count()} "
+                f"schedule(s) and {Notification.objects.count()} notification(s) remain hot."
+            )
+        if not options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS("Archival done."))
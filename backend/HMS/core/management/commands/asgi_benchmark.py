@@ -0,0 +1,315 @@
+import importlib.util
+import json
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.management.base import CommandError, CommandParser
+
+from core.management.commands.loadtest import API, PASSWORD, Client, Command as LoadTestCommand
+from core.modules import sharding
+
+# Same paths on both servers: the async views run on the event loop under
+# ASGI and on a per-request loop under WSGI; the DRF twins run on a worker
+# thread either way.
+ENDPOINTS = [
+    "/calendar/day",
+    "/calendar/week",
+    "/priority-queue?limit=50",
+    "/async/schedule",
+    "/async/notifications?limit=20",
+    "/schedule/",
+    "/notifications/?limit=20",
+]
+SERVERS = {
+    # runserver serves every request on its own thread, like a threaded WSGI worker
+    "wsgi": "{python} {manage} runserver 127.0.0.1:{port} --noreload",
+    "asgi": "{python} -m uvicorn HMS.asgi:application --host 127.0.0.1 --port {port} --no-access-log",
+}
+
+
+def _proc_status(pid: int) -> Optional[dict[str, int]]:
+    """
+    VmRSS (KiB) and thread count of `pid`, from /proc (Linux only).
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+    except OSError:
+        return None
+    return {"rss_kb": int(fields["VmRSS"].split()[0]), "threads": int(fields["Threads"])}
+
+
+class Command(LoadTestCommand):
+    help = (
+        "Compare the thread-per-request WSGI deployment with the ASGI one. Starts "
+        "each server against the current database, parks --idle open dashboard "
+        "event streams on it, then drives the calendar, priority-queue, schedule "
+        "and notification reads (async views and their DRF twins) and reports "
+        "throughput, latency, peak memory and peak thread count per server. "
+        "Needs uvicorn for the ASGI side. runserver starts a thread per connection; "
+        "for a bounded pool like production, pass e.g. --wsgi-cmd "
+        "'gunicorn HMS.wsgi -k gthread --threads 32 -b 127.0.0.1:{port}'."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--servers",
+            default="wsgi,asgi",
+            help="Comma-separated servers to run: wsgi, asgi.",
+        )
+        parser.add_argument("--wsgi-cmd", default=SERVERS["wsgi"], help="WSGI server command ({port} template).")
+        parser.add_argument("--asgi-cmd", default=SERVERS["asgi"], help="ASGI server command ({port} template).")
+        parser.add_argument("--concurrency", type=int, default=16, help="Clients sending reads (threads).")
+        parser.add_argument(
+            "--idle",
+            type=int,
+            default=200,
+            help="Open /events/stream connections held for the whole run.",
+        )
+        parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load per server.")
+        parser.add_argument(
+            "--hospital",
+            default=None,
+            help="Hospital code to test against. Default: the one with the most patients.",
+        )
+        parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds.")
+        parser.add_argument("--json", dest="json_path", default=None, help="Also write the report to this file.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        servers = [name.strip() for name in options["servers"].split(",") if name.strip()]
+        unknown = set(servers) - set(SERVERS)
+        if unknown or not servers:
+            raise CommandError(f"--servers takes {', '.join(SERVERS)}.")
+        if (
+            "asgi" in servers
+            and options["asgi_cmd"] == SERVERS["asgi"]
+            and importlib.util.find_spec("uvicorn") is None
+        ):
+            raise CommandError("uvicorn is not installed; pip install uvicorn or pass --asgi-cmd.")
+
+        concurrency = max(1, options["concurrency"])
+        hospital = self._hospital(options["hospital"])
+        with sharding.use_shard(sharding.shard_for_hospital(hospital.id)):
+            # The dashboard reads are admin-only; one admin per client
+            usernames = self._ensure_users(hospital, concurrency)["admin"]
+        self.stdout.write(
+            f"Hospital {hospital.code}: {concurrency} clients, {options['idle']} idle streams, "
+            f"{options['duration']:.0f}s per server"
+        )
+
+        reports = []
+        for name in servers:
+            server, port = self._start(name, options[f"{name}_cmd"])
+            try:
+                reports.append(self._bench(name, server, port, usernames, concurrency, options))
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+
+        self._report_servers(reports)
+        if options["json_path"]:
+            with open(options["json_path"], "w") as out:
+                json.dump(reports, out, indent=2)
+            self.stdout.write(f"Report written to {options['json_path']}")
+
+    def _start(self, name: str, command: str) -> tuple[subprocess.Popen, int]:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        argv = shlex.split(
+            command.format(
+                python=shlex.quote(sys.executable),
+                manage=shlex.quote(os.path.join(settings.BASE_DIR, "manage.py")),
+                port=port,
+            )
+        )
+        server = subprocess.Popen(
+            argv,
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE},
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"{name} server exited during startup: {command}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                self.stdout.write(f"Started {name} server on 127.0.0.1:{port} (pid {server.pid})")
+                return server, port
+            except OSError:
+                time.sleep(0.2)
+        server.kill()
+        raise CommandError(f"{name} server did not start within 30 seconds.")
+
+    def _open_streams(self, port: int, tokens: list[str], count: int) -> list[socket.socket]:
+        """
+        Open `count` event streams and leave them idle, like dashboards left open.
+        """
+        streams = []
+        for index in range(count):
+            try:
+                stream = socket.create_connection(("127.0.0.1", port), timeout=5)
+                stream.sendall(
+                    f"GET {API}/events/stream?token={tokens[index % len(tokens)]} HTTP/1.1\r\n"
+                    f"Host: 127.0.0.1:{port}\r\nAccept: text/event-stream\r\n\r\n".encode()
+                )
+            except OSError:
+                break
+            streams.append(stream)
+        # Let the server pick them all up before measuring
+        time.sleep(1.0)
+        return streams
+
+    def _bench(
+        self,
+        name: str,
+        server: subprocess.Popen,
+        port: int,
+        usernames: list[str],
+        concurrency: int,
+        options: dict,
+    ) -> dict:
+        url = f"http://127.0.0.1:{port}"
+        lock = threading.Lock()
+        latencies: dict[str, list[float]] = {}
+        errors: dict[str, int] = {}
+        measuring = threading.Event()
+
+        def record(label: str, seconds: float, status: int) -> None:
+            if not measuring.is_set():
+                return
+            with lock:
+                latencies.setdefault(label, []).append(seconds)
+                if status == 0 or status >= 400:
+                    errors[label] = errors.get(label, 0) + 1
+
+        clients = []
+        for username in usernames:
+            client = Client(url, options["timeout"], record)
+            status, body = client.request(
+                "login", "POST", "/auth/login/", {"username": username, "password": PASSWORD}
+            )
+            if status != 200 or not body:
+                raise CommandError(f"Login of {username} failed on the {name} server ({status}).")
+            client.tokens["admin"] = body["access"]
+            clients.append(client)
+
+        baseline = _proc_status(server.pid)
+        peak = dict(baseline or {})
+        sampling = threading.Event()
+
+        def sample() -> None:
+            while not sampling.is_set():
+                current = _proc_status(server.pid)
+                if current:
+                    for key, value in current.items():
+                        peak[key] = max(peak.get(key, 0), value)
+                sampling.wait(0.1)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        streams = self._open_streams(port, [client.tokens["admin"] for client in clients], options["idle"])
+        idle = _proc_status(server.pid)
+        self.stdout.write(f"  {name}: {len(streams)} idle streams open, running load...")
+
+        stop = threading.Event()
+
+        def drive(client: Client, offset: int) -> None:
+            position = offset
+            while not stop.is_set():
+                path = ENDPOINTS[position % len(ENDPOINTS)]
+                client.request(f"GET {path.split('?')[0]}", "GET", path, role="admin")
+                position += 1
+
+        threads = [
+            threading.Thread(target=drive, args=(client, index), daemon=True)
+            for index, client in enumerate(clients)
+        ]
+        measuring.set()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options["duration"])
+        stop.set()
+        for thread in threads:
+            thread.join(options["timeout"] + 5)
+        elapsed = time.perf_counter() - started
+        sampling.set()
+        sampler.join()
+        for stream in streams:
+            stream.close()
+        for client in clients:
+            client.close()
+
+        def pct(values: list[float], p: float) -> float:
+            return values[min(len(values) - 1, int(p * len(values)))] * 1000
+
+        endpoints = {}
+        for label, values in sorted(latencies.items()):
+            values.sort()
+            endpoints[label] = {
+                "requests": len(values),
+                "rps": len(values) / elapsed,
+                "errors": errors.get(label, 0),
+                "p50_ms": pct(values, 0.50),
+                "p95_ms": pct(values, 0.95),
+            }
+        every = sorted(value for values in latencies.values() for value in values)
+        return {
+            "server": name,
+            "concurrency": concurrency,
+            "idle_streams": len(streams),
+            "duration_s": elapsed,
+            "requests": len(every),
+            "rps": len(every) / elapsed if elapsed else 0.0,
+            "errors": sum(errors.values()),
+            "p50_ms": pct(every, 0.50) if every else None,
+            "p95_ms": pct(every, 0.95) if every else None,
+            "rss_start_kb": (baseline or {}).get("rss_kb"),
+            "rss_idle_kb": (idle or {}).get("rss_kb"),
+            "rss_peak_kb": peak.get("rss_kb"),
+            "threads_start": (baseline or {}).get("threads"),
+            "threads_idle": (idle or {}).get("threads"),
+            "threads_peak": peak.get("threads"),
+            "endpoints": endpoints,
+        }
+
+    def _report_servers(self, reports: list[dict]) -> None:
+        def mib(kb: Optional[int]) -> str:
+            return "-" if kb is None else f"{kb / 1024:.0f}M"
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"  {'server':6} {'idle':>5} {'req/s':>8} {'err':>5} {'p50':>8} {'p95':>8} "
+            f"{'rss':>6} {'+idle':>6} {'peak':>6} {'thr':>5} {'+idle':>6} {'peak':>5}"
+        ))
+        for report in reports:
+            line = (
+                f"  {report['server']:6} {report['idle_streams']:>5} {report['rps']:>8.1f} "
+                f"{report['errors']:>5} {report['p50_ms'] or 0:>8.1f} {report['p95_ms'] or 0:>8.1f} "
+                f"{mib(report['rss_start_kb']):>6} {mib(report['rss_idle_kb']):>6} {mib(report['rss_peak_kb']):>6} "
+                f"{report['threads_start'] or '-':>5} {report['threads_idle'] or '-':>6} {report['threads_peak'] or '-':>5}"
+            )
+            self.stdout.write(self.style.ERROR(line) if report["errors"] else line)
+        for report in reports:
+            self.stdout.write(f"  {report['server']}:")
+            for label, data in report["endpoints"].items():
+                self.stdout.write(
+                    f"    {label:32} {data['requests']:>7} {data['rps']:>8.1f} req/s "
+                    f"{data['errors']:>5} err  p50 {data['p50_ms']:>7.1f}  p95 {data['p95_ms']:>7.1f}"
+                )
+        self.stdout.write(
+            "  latencies in ms; rss = at start, with the idle streams open, and at peak; "
+            "thr = server threads at the same points"
+        )
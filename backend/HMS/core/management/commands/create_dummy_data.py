@@ -8,20 +8,38 @@ Features:
 - _clean_all() always runs first (removes data for the models we create).
 - Per-model creation functions named _create_X().
 - Command-line options to specify counts: --hospital 10, --patient 20, etc.
+- --scale multiplies the per-hospital patient and surgery request counts
+  (--scale 50000 gives 10^6 surgery requests with the default counts).
+- --seed makes runs reproducible: the same seed gives the same data whatever
+  --workers is (ids and times relative to now still differ).
+- --workers generates chunks in parallel processes.
 - Option --clean-only to only perform cleanup.
-- Uses Faker for realistic data.
+- Uses Faker for realistic data, drawn from small per-chunk pools.
+- Inserts in batches: the hospital structure with bulk_create in one
+  transaction, then patients, surgery requests and everything hanging off
+  them as executemany batches in chunks of --chunk-size requests, one
+  transaction per chunk (SQLite and PostgreSQL). Model signals do not fire,
+  so generated rows write no change log, audit or realtime events.
 - Creates several Django users with password 'testuser123'.
 - Creates a superuser at the end with username 'super' and password 'super@123'.
 - Prints progress to stdout.
 """
 
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import multiprocessing
 import random
 import sys
-from datetime import date, timedelta, datetime
-
-from django.core.management.base import BaseCommand, CommandParser
-from django.db import transaction
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import timedelta, datetime
+from uuid import UUID
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connections, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 from django.contrib.auth.models import User
 
@@ -29,6 +47,9 @@ from faker import Faker
 
 # Import models from your app - adjust the import path if your app name differs
 from core.models import (
+    ArchivedNotification,
+    ArchivedRescheduleEvent,
+    ArchivedSurgerySchedule,
     Hospital,
     OperatingRoom,
     BaseUserProfile,
@@ -40,12 +61,376 @@ from core.models import (
     SurgeryRequest,
     SurgeryQueue,
     Equipment,
+    EquipmentReservation,
     EquipmentSterilization,
     Notification,
     SurgerySchedule,
 )
+from core.modules import sharding, sterilization
+from core.modules.uuids import uuid7
+from core.modules.tenancy import raw_delete, tenant_db
+
+PASSWORD = "testuser123"
+POOL_SIZE = 500  # Faker values generated per chunk; Faker is slower than the inserts
+
+ROOM_TYPES = ["general", "cardiac", "neuro", "ortho"]
+SPECIALIZATIONS = ["Cardiac", "Neurosurgery", "Orthopedics", "General"]
+EQUIPMENT_TYPES = ["Ventilator", "Monitor", "Sterile Tray", "C-arm", "Anesthesia Machine"]
+PROCEDURE_TYPES = ["general", "cardiac", "neuro", "ortho"]
+PRIORITIES = ["emergency", "urgent", "elective"]
+ANESTHESIA_TYPES = ["general", "regional", "local"]
+RESCHEDULE_REASONS = [
+    "Equipment maintenance",
+    "Surgeon unavailable",
+    "Emergency case bumped schedule",
+    "Staff shortage",
+]
+
+
+@dataclass
+class HospitalPlan:
+    """
+    What chunk generation needs to know about a hospital. Plain values only,
+    so it can be sent to worker processes.
+    """
+
+    index: int
+    hospital_id: UUID
+    room_ids: List[int]
+    surgeons: List[Tuple[int, str]]  # (profile id, user's full name)
+    equipment_ids: List[int]
+    equipment_types: Dict[int, str]
+    admin_profile_id: Optional[int]
+
+
+@dataclass
+class Chunk:
+    alias: str
+    seed: int
+    hospital: HospitalPlan
+    index: int
+    first_patient: int
+    patients: int
+    requests: int
+    now: datetime
+
+
+def _reserve_ids(cursor: Any, connection: Any, model: Any, count: int) -> List[int]:
+    """
+    Take `count` unused primary keys of `model` so rows can be inserted with
+    explicit ids and referenced without reading them back.
+    """
+    table = model._meta.db_table
+    if not count:
+        return []
+    if connection.vendor == "postgresql":
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+            [table, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+    # SQLite: bump the AUTOINCREMENT counter. Being a write, it takes the
+    # database write lock first, so no other writer can hand out these ids.
+    quoted = connection.ops.quote_name(table)
+    cursor.execute(
+        f"UPDATE sqlite_sequence SET seq = MAX(seq, (SELECT COALESCE(MAX(id), 0) FROM {quoted})) + %s "
+        "WHERE name = %s",
+        [count, table],
+    )
+    if not cursor.rowcount:
+        cursor.execute(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT %s, COALESCE(MAX(id), 0) + %s FROM {quoted}",
+            [table, count],
+        )
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", [table])
+    last = cursor.fetchone()[0]
+    return list(range(last - count + 1, last + 1))
+
+
+def _insert(
+    cursor: Any, connection: Any, model: Any, columns: List[str], rows: List[tuple], now: datetime
+) -> int:
+    """
+    INSERT `rows` (values for `columns`, already in database form) with one
+    executemany. Other concrete fields get their default, or `now` for
+    auto_now(_add) fields, so new model fields with defaults need no changes here.
+    """
+    if not rows:
+        return 0
+    extra_columns: List[str] = []
+    extra_values: List[Any] = []
+    for field in model._meta.local_concrete_fields:
+        if field.attname in columns or (field.primary_key and field.attname not in columns):
+            continue
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+            value = now
+        else:
+            value = field.get_default()
+        extra_columns.append(field.column)
+        extra_values.append(field.get_db_prep_save(value, connection))
+    if extra_values:
+        extra = tuple(extra_values)
+        rows = [row + extra for row in rows]
+
+    qn = connection.ops.quote_name
+    names = [model._meta.get_field(column).column for column in columns] + extra_columns
+    cursor.executemany(
+        f"INSERT INTO {qn(model._meta.db_table)} ({', '.join(qn(name) for name in names)}) "
+        f"VALUES ({', '.join(['%s'] * len(names))})",
+        rows,
+    )
+    return len(rows)
+
+
+def generate_chunk(chunk: Chunk) -> Dict[str, int]:
+    """
+    Build one chunk of patients and surgery requests with their queue entries,
+    notifications, schedules (and surgeon assignments), reschedule events and
+    equipment requirements (held in the reservation ledger), then insert it
+    in one transaction.
+
+    The random stream depends only on the seed, hospital and chunk index, so
+    the output is the same whichever process runs the chunk. Rows are built as
+    plain tuples and written with executemany: model instances and
+    bulk_create cost more per row than the database does.
+    """
+    plan = chunk.hospital
+    rng = random.Random(f"{chunk.seed}:{plan.index}:{chunk.index}")
+    chance = rng.random
+
+    def pick(seq: Any) -> Any:
+        # rng.choice() is several times slower (rejection sampling)
+        return seq[int(chance() * len(seq))]
+
+    fake = Faker()
+    fake.seed_instance(rng.getrandbits(32))
+    connection = connections[chunk.alias]
+    ops = connection.ops
+    now = chunk.now
+
+    def db_uuid(value: UUID) -> Any:
+        return value if connection.features.has_native_uuid_field else value.hex
+
+    # Values are drawn from small pools, so adapt each one to its database form once
+    names = [fake.name() for _ in range(POOL_SIZE)]
+    words = [fake.word() for _ in range(POOL_SIZE)]
+    birthdays = [
+        ops.adapt_datefield_value(fake.date_of_birth(minimum_age=0, maximum_age=90))
+        for _ in range(POOL_SIZE)
+    ]
+    deadlines = [ops.adapt_datetimefield_value(now + timedelta(days=days)) for days in range(31)]
+    slots = [
+        (
+            ops.adapt_datetimefield_value(start),
+            [ops.adapt_datetimefield_value(start + timedelta(hours=length)) for length in range(1, 5)],
+        )
+        for start in (
+            now + timedelta(days=days, hours=hours) for days in range(6) for hours in range(8, 17)
+        )
+    ]
+    hospital_id = db_uuid(plan.hospital_id)
+    surgeons = plan.surgeons
+    surgeon_ids = [surgeon_id for surgeon_id, _ in surgeons]
+    rooms = plan.room_ids
+    equipment_ids = plan.equipment_ids
+    equipment_types = plan.equipment_types
+
+    patient_count = chunk.patients
+    patients = [
+        (
+            hospital_id,
+            f"MRN-{plan.index + 1:04d}-{chunk.first_patient + i + 1:07d}",
+            pick(names),
+            pick(birthdays),
+            "male" if chance() < 0.5 else "female",
+        )
+        for i in range(patient_count)
+    ]
+
+    # Children refer to patients and schedules by position until ids are reserved
+    requests: List[tuple] = []
+    queue: List[tuple] = []
+    notifications: List[tuple] = []
+    schedules: List[tuple] = []
+    assignments: List[tuple] = []
+    events: List[tuple] = []
+    requirements: List[tuple] = []
+    reservations: List[tuple] = []
+    for _ in range(chunk.requests if patients else 0):
+        request_id = db_uuid(uuid7())
+        proc_type = pick(PROCEDURE_TYPES)
+        priority = pick(PRIORITIES)
+        preferred = pick(surgeons) if surgeons else None
+        procedure_name = f"{proc_type.title()} procedure - {pick(words)}"
+        approved = chance() < 0.5
+        requests.append(
+            (
+                request_id,
+                hospital_id,
+                int(chance() * patient_count),
+                procedure_name,
+                proc_type,
+                int(chance() * 5) + 1,
+                priority,
+                preferred[1] if preferred else None,
+                pick(ANESTHESIA_TYPES),
+                preferred[0] if preferred else None,
+                pick(deadlines),
+                approved,
+            )
+        )
+        queue.append((request_id, priority, int(chance() * 21), chance() < 0.5))
+        if not approved and plan.admin_profile_id:
+            notifications.append(
+                (plan.admin_profile_id, f"Surgery {procedure_name} needs approval.", "warning")
+            )
+
+        window = None
+        if approved and rooms:
+            start_time, end_times = pick(slots)
+            position = len(schedules)
+            window = (position, start_time, pick(end_times))
+            schedules.append(
+                (
+                    request_id,
+                    pick(rooms),
+                    start_time,
+                    window[2],
+                    "scheduled",
+                    f"Auto-generated schedule for {procedure_name}",
+                )
+            )
+            # Assign surgeons (1-2 randomly)
+            if surgeon_ids:
+                for surgeon_id in rng.sample(surgeon_ids, min(len(surgeon_ids), 1 + (chance() < 0.5))):
+                    assignments.append((position, surgeon_id))
+            # Simulate bumps for about half of the schedules
+            if chance() < 0.5:
+                events.append((request_id, position, pick(RESCHEDULE_REASONS)))
+
+        # Each surgery requires 1-3 equipment items
+        if equipment_ids:
+            needs: Dict[str, int] = {}
+            for equipment_id in rng.sample(
+                equipment_ids, min(len(equipment_ids), int(chance() * 3) + 1)
+            ):
+                quantity = 1 + (chance() < 0.5)
+                requirements.append((request_id, equipment_id, quantity))
+                equipment_type = equipment_types[equipment_id]
+                needs[equipment_type] = needs.get(equipment_type, 0) + quantity
+            # Scheduled surgeries hold their equipment in the reservation ledger
+            if window:
+                reservations.extend(
+                    (hospital_id, window[0], equipment_type, quantity, window[1], window[2])
+                    for equipment_type, quantity in sorted(needs.items())
+                )
 
-fake = Faker()
+    Surgeons = SurgerySchedule.surgeons.through
+    with sharding.use_shard(chunk.alias), transaction.atomic(
+        using=chunk.alias
+    ), connection.cursor() as cursor:
+        patient_ids = _reserve_ids(cursor, connection, Patient, len(patients))
+        schedule_ids = _reserve_ids(cursor, connection, SurgerySchedule, len(schedules))
+        counts = {
+            "patients": _insert(
+                cursor,
+                connection,
+                Patient,
+                ["id", "hospital_id", "medical_record_number", "full_name", "date_of_birth", "gender"],
+                [(patient_id, *row) for patient_id, row in zip(patient_ids, patients)],
+                now,
+            ),
+            "surgery requests": _insert(
+                cursor,
+                connection,
+                SurgeryRequest,
+                [
+                    "id",
+                    "hospital_id",
+                    "patient_id",
+                    "procedure_name",
+                    "procedure_type",
+                    "complexity",
+                    "priority",
+                    "required_specialization",
+                    "anesthesia_type",
+                    "preferred_surgeon_id",
+                    "latest_allowed_time",
+                    "approved",
+                ],
+                [(*row[:2], patient_ids[row[2]], *row[3:]) for row in requests],
+                now,
+            ),
+            "queue entries": _insert(
+                cursor,
+                connection,
+                SurgeryQueue,
+                ["surgery_request_id", "current_priority", "wait_days", "escalated"],
+                queue,
+                now,
+            ),
+            "notifications": _insert(
+                cursor,
+                connection,
+                Notification,
+                ["base_profile_id", "message", "severity"],
+                notifications,
+                now,
+            ),
+            "surgery schedules": _insert(
+                cursor,
+                connection,
+                SurgerySchedule,
+                [
+                    "id",
+                    "surgery_request_id",
+                    "operating_room_id",
+                    "start_time",
+                    "end_time",
+                    "status",
+                    "notes",
+                ],
+                [(schedule_id, *row) for schedule_id, row in zip(schedule_ids, schedules)],
+                now,
+            ),
+            "surgeon assignments": _insert(
+                cursor,
+                connection,
+                Surgeons,
+                ["surgeryschedule_id", "surgeonprofile_id"],
+                [(schedule_ids[position], surgeon_id) for position, surgeon_id in assignments],
+                now,
+            ),
+            "reschedule events": _insert(
+                cursor,
+                connection,
+                RescheduleEvent,
+                ["triggered_by_id", "affected_schedule_id", "reason"],
+                [(request_id, schedule_ids[position], reason) for request_id, position, reason in events],
+                now,
+            ),
+            "equipment requirements": _insert(
+                cursor,
+                connection,
+                SurgeryEquipmentRequirement,
+                ["surgery_request_id", "equipment_id", "quantity_required"],
+                requirements,
+                now,
+            ),
+            "equipment reservations": _insert(
+                cursor,
+                connection,
+                EquipmentReservation,
+                ["hospital_id", "schedule_id", "equipment_type", "quantity", "start_time", "end_time"],
+                [(row[0], schedule_ids[row[1]], *row[2:]) for row in reservations],
+                now,
+            ),
+        }
+        if notifications:
+            BaseUserProfile.objects.filter(id=plan.admin_profile_id).update(
+                unread_notifications=F("unread_notifications") + len(notifications)
+            )
+    return counts
 
 
 class Command(BaseCommand):
@@ -94,6 +479,30 @@ class Command(BaseCommand):
             default=6,
             help="Number of plain django users (testuserX) to create.",
         )
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="Multiply the per-hospital patient and surgery request counts.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Random seed; the same seed generates the same data. Random if omitted.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes generating chunks in parallel.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10_000,
+            help="Surgery requests generated and inserted per transaction.",
+        )
         parser.add_argument(
             "--clean-only",
             action="store_true",
@@ -101,17 +510,28 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args: Any, **options: Any) -> None:
+        scale: float = max(0.0, float(options.get("scale", 1.0)))
         counts: Dict[str, int] = {
             "hospital": int(options.get("hospital", 0)),
             "operatingroom": int(options.get("operatingroom", 0)),
             "surgeon": int(options.get("surgeon", 0)),
             "staff": int(options.get("staff", 0)),
-            "patient": int(options.get("patient", 0)),
+            "patient": round(int(options.get("patient", 0)) * scale),
             "equipment": int(options.get("equipment", 0)),
-            "surgeryrequest": int(options.get("surgeryrequest", 0)),
+            "surgeryrequest": round(int(options.get("surgeryrequest", 0)) * scale),
             "users": int(options.get("users", 0)),
         }
         clean_only: bool = bool(options.get("clean_only", False))
+        workers: int = max(1, int(options.get("workers", 1)))
+        chunk_size: int = max(1, int(options.get("chunk_size", 10_000)))
+        seed: int = (
+            options["seed"]
+            if options.get("seed") is not None
+            else random.SystemRandom().randrange(2**32)
+        )
+
+        if connections[tenant_db()].vendor not in ("sqlite", "postgresql"):
+            raise CommandError("Dummy data generation supports SQLite and PostgreSQL only.")
 
         # Always perform clean
         self.stdout.write("Starting cleanup of dummy data for targeted models...")
@@ -122,34 +542,69 @@ class Command(BaseCommand):
             self.stdout.write("Exiting because --clean-only was provided.")
             return
 
-        # Begin creation within a transaction for safety
-        with transaction.atomic():
-            hospitals = self._create_hospitals(counts["hospital"])
-            # For each hospital create other things
+        self.stdout.write(f"Using seed {seed} (pass --seed {seed} to repeat this dataset).")
+        rng = random.Random(seed)
+        fake = Faker()
+        fake.seed_instance(seed)
+        started = time.perf_counter()
+        alias = tenant_db()
+        # Everyone shares the same password, so hash it once instead of per user
+        self.password_hash = make_password(PASSWORD)
+
+        # Hospital structure: small, created in one transaction
+        with transaction.atomic(using=alias):
+            hospitals = self._create_hospitals(counts["hospital"], rng, fake)
+            plans: List[HospitalPlan] = []
             for idx, hospital in enumerate(hospitals, start=1):
                 self.stdout.write(
                     f"Populating hospital {idx}/{len(hospitals)}: {hospital.name}"
                 )
-                self._create_operating_rooms(hospital, counts["operatingroom"])
-                surgeons = self._create_surgeons(hospital, counts["surgeon"])
-                self._create_staff(hospital, counts["staff"])
-                patients = self._create_patients(hospital, counts["patient"])
-                equipment_items = self._create_equipment(hospital, counts["equipment"])
-                self._create_equipment_sterilization(equipment_items)
-                self._create_surgery_requests(
-                    hospital, patients, surgeons, counts["surgeryrequest"]
+                room_ids = self._create_operating_rooms(hospital, counts["operatingroom"], rng)
+                surgeons = self._create_surgeons(hospital, counts["surgeon"], rng, fake)
+                self._create_staff(hospital, counts["staff"], rng, fake)
+                equipment_items = self._create_equipment(hospital, counts["equipment"], rng, fake)
+                self._create_equipment_sterilization(equipment_items, rng)
+                admin_profile_id = (
+                    BaseUserProfile.objects.filter(hospital=hospital, role="admin")
+                    .values_list("id", flat=True)
+                    .first()
+                )
+                plans.append(
+                    HospitalPlan(
+                        index=idx - 1,
+                        hospital_id=hospital.id,
+                        room_ids=room_ids,
+                        surgeons=surgeons,
+                        equipment_ids=[item.id for item in equipment_items],
+                        equipment_types={item.id: item.equipment_type for item in equipment_items},
+                        admin_profile_id=admin_profile_id,
+                    )
                 )
-                self._create_surgery_schedules(hospital)
-                self._create_reschedule_events(hospital)
-                self._create_surgery_equipment_requirements(hospital)
 
             # Create extra plain Django users
-            self._create_plain_users(counts["users"])
+            self._create_plain_users(counts["users"], fake)
 
             # Finally create superuser
             self._create_superuser()
 
-        self.stdout.write(self.style.SUCCESS("Dummy data generation complete."))
+        # Patients, requests and everything hanging off them, in chunks
+        now = timezone.now()
+        chunks = [
+            chunk
+            for plan in plans
+            for chunk in self._plan_chunks(
+                alias, seed, plan, counts["patient"], counts["surgeryrequest"], chunk_size, now
+            )
+        ]
+        totals = self._run_chunks(chunks, workers)
+        for desc, total in totals.items():
+            self.stdout.write(f"  {total} {desc}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Dummy data generation complete in {time.perf_counter() - started:.1f}s."
+            )
+        )
 
     # ---------------------
     # Cleaning
@@ -159,11 +614,18 @@ class Command(BaseCommand):
         Remove data from all models touched by this generator.
         This function always runs at the start of the command.
         """
-        # Order matters for FK constraints
+        # Children before parents. Raw deletes skip the cascade collector and
+        # per-row signals, which made cleaning a large dataset slower than
+        # generating it.
         models_and_desc: List[Tuple[Any, str]] = [
+            (SurgerySchedule.surgeons.through, "surgeon assignments"),
+            (RescheduleEvent, "reschedule events"),
+            (SurgeryEquipmentRequirement, "surgery equipment requirements"),
+            (EquipmentReservation, "equipment reservations"),
+            (SurgerySchedule, "surgery schedules"),
+            (SurgeryQueue, "surgery queues"),
             (Notification, "notifications"),
             (EquipmentSterilization, "equipment sterilization"),
-            (SurgeryQueue, "surgery queues"),
             (SurgeryRequest, "surgery requests"),
             (Equipment, "equipment"),
             (Patient, "patients"),
@@ -172,22 +634,27 @@ class Command(BaseCommand):
             (BaseUserProfile, "base user profiles"),
             (OperatingRoom, "operating rooms"),
             (Hospital, "hospitals"),
-            (RescheduleEvent, "reschedule events"),
-            (SurgerySchedule, "surgery schedules"),
-            (SurgeryEquipmentRequirement, "surgery equipment requirements"),
+            (ArchivedRescheduleEvent, "archived reschedule events"),
+            (ArchivedSurgerySchedule, "archived surgery schedules"),
+            (ArchivedNotification, "archived notifications"),
             # Do not delete User superusers automatically unless they were created by this script.
             # We'll remove test users below.
         ]
-        for model, desc in models_and_desc:
-            deleted_count: int = model.objects.all().count()
-            model.objects.all().delete()
-            self.stdout.write(f"Deleted {deleted_count} {desc}.")
-
-        # Remove users created by previous runs that match our test pattern
-        users_to_remove = User.objects.filter(username__startswith="testuser")
+        alias = tenant_db()
+        with transaction.atomic(using=alias):
+            for model, desc in models_and_desc:
+                deleted_count: int = raw_delete(model._base_manager.using(alias).all(), alias)
+                self.stdout.write(f"Deleted {deleted_count} {desc}.")
+
+        # Remove users created by previous runs that match our test patterns
+        users_to_remove = User.objects.filter(
+            Q(username__startswith="testuser")
+            | Q(username__startswith="surgeon_HOSP-")
+            | Q(username__startswith="staff_HOSP-")
+        )
         removed_users_count: int = users_to_remove.count()
         users_to_remove.delete()
-        self.stdout.write(f"Deleted {removed_users_count} testuser users.")
+        self.stdout.write(f"Deleted {removed_users_count} testuser/surgeon/staff users.")
 
         # Optionally remove any non-staff superuser named 'super' from prior runs so we can recreate
         User.objects.filter(username="super").delete()
@@ -196,293 +663,204 @@ class Command(BaseCommand):
     # ---------------------
     # Creation helpers
     # ---------------------
-    def _create_hospitals(self, count: int) -> List[Hospital]:
+    def _create_hospitals(self, count: int, rng: random.Random, fake: Faker) -> List[Hospital]:
         """Create `count` hospitals and return created list."""
-        created: List[Hospital] = []
-        for i in range(count):
-            name: str = f"{fake.company()} Hospital"
-            code: str = f"HOSP-{fake.unique.bothify(text='####')}"
-            tz: str = random.choice(
-                ["UTC", "Asia/Karachi", "Europe/London", "America/New_York"]
-            )
-            hospital = Hospital.objects.create(
-                name=name, code=code, timezone=tz, is_active=True
-            )
-            created.append(hospital)
+        digits = max(4, len(str(count * 10)))
+        numbers = rng.sample(range(10**digits), count)
+        hospitals = Hospital.objects.bulk_create(
+            [
+                Hospital(
+                    name=f"{fake.company()} Hospital",
+                    code=f"HOSP-{number:0{digits}d}",
+                    timezone=rng.choice(
+                        ["UTC", "Asia/Karachi", "Europe/London", "America/New_York"]
+                    ),
+                    is_active=True,
+                )
+                for number in numbers
+            ]
+        )
+        for i, hospital in enumerate(hospitals):
             self.stdout.write(
                 f"  [Hospital {i+1}/{count}] {hospital.name} ({hospital.code})"
             )
-        return created
-
-    def _create_operating_rooms(self, hospital: Hospital, count: int) -> None:
-        """Create operating rooms for given hospital."""
-        room_types = ["general", "cardiac", "neuro", "ortho"]
-        for i in range(count):
-            name: str = f"OR-{hospital.code}-{i+1}"
-            operating_room_type: str = random.choice(room_types)
-            OperatingRoom.objects.create(
-                hospital=hospital,
-                name=name,
-                operating_room_type=operating_room_type,
-                is_available=True,
-                has_anesthesia=True,
-                has_imaging=random.choice([True, False]),
-                maintenance_until=None,
-            )
-            self._print_progress(i + 1, count, prefix="    Creating ORs")
+        return hospitals
+
+    def _create_operating_rooms(self, hospital: Hospital, count: int, rng: random.Random) -> List[int]:
+        """Create operating rooms for given hospital and return their ids."""
+        rooms = OperatingRoom.objects.bulk_create(
+            [
+                OperatingRoom(
+                    hospital=hospital,
+                    name=f"OR-{hospital.code}-{i+1}",
+                    operating_room_type=rng.choice(ROOM_TYPES),
+                    is_available=True,
+                    has_anesthesia=True,
+                    has_imaging=rng.random() < 0.5,
+                    maintenance_until=None,
+                )
+                for i in range(count)
+            ]
+        )
+        self.stdout.write(f"    Created {len(rooms)} ORs")
+        return [room.id for room in rooms]
+
+    def _create_users(self, usernames: List[str], fake: Faker) -> List[User]:
+        return User.objects.bulk_create(
+            [
+                User(username=username, email=fake.email(), password=self.password_hash)
+                for username in usernames
+            ]
+        )
 
-    def _create_surgeons(self, hospital: Hospital, count: int) -> List[SurgeonProfile]:
+    def _create_surgeons(
+        self, hospital: Hospital, count: int, rng: random.Random, fake: Faker
+    ) -> List[Tuple[int, str]]:
         """Create surgeons (BaseUserProfile + SurgeonProfile) for hospital."""
-        created: List[SurgeonProfile] = []
-        for i in range(count):
-            username: str = f"surgeon_{hospital.code}_{i+1}"
-            django_user = User.objects.create_user(
-                username=username, email=fake.email(), password="testuser123"
-            )
-            base_profile = BaseUserProfile.objects.create(
-                django_user=django_user, hospital=hospital, role="surgeon"
-            )
-            specialization: str = random.choice(
-                ["Cardiac", "Neurosurgery", "Orthopedics", "General"]
-            )
-            surgeon = SurgeonProfile.objects.create(
-                base_profile=base_profile,
-                specialization=specialization,
-                max_daily_hours=random.randint(6, 12),
-            )
-            created.append(surgeon)
-            self._print_progress(i + 1, count, prefix="    Creating surgeons")
-        return created
+        users = self._create_users([f"surgeon_{hospital.code}_{i+1}" for i in range(count)], fake)
+        profiles = BaseUserProfile.objects.bulk_create(
+            [BaseUserProfile(django_user=user, hospital=hospital, role="surgeon") for user in users]
+        )
+        SurgeonProfile.objects.bulk_create(
+            [
+                SurgeonProfile(
+                    base_profile=profile,
+                    specialization=rng.choice(SPECIALIZATIONS),
+                    max_daily_hours=rng.randint(6, 12),
+                )
+                for profile in profiles
+            ]
+        )
+        self.stdout.write(f"    Created {len(profiles)} surgeons")
+        # Requests point at surgeons through SurgeonProfile ids
+        surgeons = SurgeonProfile.objects.filter(base_profile__in=profiles).order_by("id")
+        return [
+            (surgeon.id, surgeon.base_profile.django_user.get_full_name())
+            for surgeon in surgeons.select_related("base_profile__django_user")
+        ]
 
-    def _create_staff(self, hospital: Hospital, count: int) -> None:
+    def _create_staff(self, hospital: Hospital, count: int, rng: random.Random, fake: Faker) -> None:
         """Create staff profiles for hospital."""
-        for i in range(count):
-            username: str = f"staff_{hospital.code}_{i+1}"
-            django_user = User.objects.create_user(
-                username=username, email=fake.email(), password="testuser123"
-            )
-            base_profile = BaseUserProfile.objects.create(
-                django_user=django_user, hospital=hospital, role="nurse"
-            )
-            start: datetime = timezone.now().replace(
-                hour=8, minute=0, second=0, microsecond=0
-            )
-            end: datetime = start + timedelta(hours=8)
-            StaffProfile.objects.create(
-                base_profile=base_profile,
-                start_time=start,
-                end_time=end,
-                is_on_call=random.choice([False, True]),
-            )
-            self._print_progress(i + 1, count, prefix="    Creating staff")
-
-    def _create_patients(self, hospital: Hospital, count: int) -> List[Patient]:
-        """Create patients for hospital."""
-        created: List[Patient] = []
-        for i in range(count):
-            mrn: str = fake.unique.bothify(text="MRN-####-??")
-            dob: date = fake.date_of_birth(minimum_age=0, maximum_age=90)
-            gender: str = random.choice(["male", "female"])
-            patient = Patient.objects.create(
-                hospital=hospital,
-                medical_record_number=mrn,
-                full_name=fake.name(),
-                date_of_birth=dob,
-                gender=gender,
-            )
-            created.append(patient)
-            self._print_progress(i + 1, count, prefix="    Creating patients")
-        return created
+        users = self._create_users([f"staff_{hospital.code}_{i+1}" for i in range(count)], fake)
+        profiles = BaseUserProfile.objects.bulk_create(
+            [BaseUserProfile(django_user=user, hospital=hospital, role="nurse") for user in users]
+        )
+        start: datetime = timezone.now().replace(
+            hour=8, minute=0, second=0, microsecond=0
+        )
+        end: datetime = start + timedelta(hours=8)
+        StaffProfile.objects.bulk_create(
+            [
+                StaffProfile(
+                    base_profile=profile,
+                    start_time=start,
+                    end_time=end,
+                    is_on_call=rng.random() < 0.5,
+                )
+                for profile in profiles
+            ]
+        )
+        self.stdout.write(f"    Created {len(profiles)} staff")
 
-    def _create_equipment(self, hospital: Hospital, count: int) -> List[Equipment]:
+    def _create_equipment(
+        self, hospital: Hospital, count: int, rng: random.Random, fake: Faker
+    ) -> List[Equipment]:
         """Create equipment items for hospital."""
-        created: List[Equipment] = []
-        equipment_types = [
-            "Ventilator",
-            "Monitor",
-            "Sterile Tray",
-            "C-arm",
-            "Anesthesia Machine",
-        ]
-        for i in range(count):
-            name: str = f"{random.choice(equipment_types)} {fake.bothify(text='###')}"
-            eq_type: str = random.choice(equipment_types)
-            item = Equipment.objects.create(
-                hospital=hospital,
-                name=name,
-                equipment_type=eq_type,
-                location="Central Store",
-                is_available=True,
-            )
-            created.append(item)
-            self._print_progress(i + 1, count, prefix="    Creating equipment")
+        created = Equipment.objects.bulk_create(
+            [
+                Equipment(
+                    hospital=hospital,
+                    name=f"{rng.choice(EQUIPMENT_TYPES)} {fake.bothify(text='###')}",
+                    equipment_type=rng.choice(EQUIPMENT_TYPES),
+                    location="Central Store",
+                    is_available=True,
+                )
+                for _ in range(count)
+            ]
+        )
+        self.stdout.write(f"    Created {len(created)} equipment items")
         return created
 
-    def _create_equipment_sterilization(self, equipment_items: List[Equipment]) -> None:
-        """Create sterilization records for a subset of equipment."""
-        if not equipment_items:
-            return
-        count: int = len(equipment_items)
-        for idx, item in enumerate(equipment_items, start=1):
-            sterilized_at: datetime = timezone.now() - timedelta(
-                days=random.randint(0, 3)
-            )
-            valid_until: datetime = sterilized_at + timedelta(days=random.randint(1, 7))
-            EquipmentSterilization.objects.create(
-                equipment=item, sterilized_at=sterilized_at, valid_until=valid_until
-            )
-            self._print_progress(idx, count, prefix="    Sterilizing equipment")
-
-    def _create_surgery_requests(
-        self,
-        hospital: Hospital,
-        patients: List[Patient],
-        surgeons: List[SurgeonProfile],
-        count: int,
+    def _create_equipment_sterilization(
+        self, equipment_items: List[Equipment], rng: random.Random
     ) -> None:
-        """Create surgery requests and optionally queues/notifications."""
-        procedure_types = ["general", "cardiac", "neuro", "ortho"]
-        priority_choices = ["emergency", "urgent", "elective"]
-        patients_cycle: Iterable[Patient] = patients if patients else []
-        for i in range(count):
-            patient = random.choice(patients_cycle) if patients_cycle else None
-            if patient is None:
-                break
-            proc_type: str = random.choice(procedure_types)
-            complexity: int = random.randint(1, 5)
-            priority: str = random.choice(priority_choices)
-            latest_allowed: datetime = timezone.now() + timedelta(
-                days=random.randint(0, 30)
-            )
-            preferred_surgeon: Optional[SurgeonProfile] = (
-                random.choice(surgeons) if surgeons else None
-            )
-            sr = SurgeryRequest.objects.create(
-                hospital=hospital,
-                patient=patient,
-                procedure_name=f"{proc_type.title()} procedure - {fake.word()}",
-                procedure_type=proc_type,
-                complexity=complexity,
-                priority=priority,
-                required_specialization=(
-                    preferred_surgeon.base_profile.django_user.get_full_name()
-                    if preferred_surgeon
-                    else None
-                ),
-                anesthesia_type=random.choice(["general", "regional", "local"]),
-                preferred_surgeon=preferred_surgeon,
-                latest_allowed_time=latest_allowed,
-                approved=random.choice([True, False]),
-            )
-            # Create queue entry
-            SurgeryQueue.objects.create(
-                surgery_request=sr,
-                current_priority=priority,
-                wait_days=random.randint(0, 20),
-                escalated=random.choice([False, True]),
-            )
-            # Optionally create a notification to an admin user if approval false
-            if not sr.approved:
-                # pick any admin base profile in hospital (if present), otherwise skip
-                admin_profile = BaseUserProfile.objects.filter(
-                    hospital=hospital, role="admin"
-                ).first()
-                if admin_profile:
-                    Notification.objects.create(
-                        base_profile=admin_profile,
-                        message=f"Surgery {sr.procedure_name} needs approval.",
-                        severity="warning",
-                    )
-            self._print_progress(i + 1, count, prefix="    Creating surgery requests")
-
-    def _create_surgery_schedules(self, hospital: Hospital) -> None:
-        """Create SurgerySchedule entries for approved surgery requests."""
-        surgery_requests = SurgeryRequest.objects.filter(
-            hospital=hospital, approved=True
-        )
-        operating_rooms = list(OperatingRoom.objects.filter(hospital=hospital))
-        if not operating_rooms:
-            return
-
-        for i, sr in enumerate(surgery_requests, start=1):
-            oroom = random.choice(operating_rooms)
-            start_time = timezone.now() + timedelta(
-                days=random.randint(0, 5), hours=random.randint(8, 16)
-            )
-            end_time = start_time + timedelta(hours=random.randint(1, 4))
-            sched = SurgerySchedule.objects.create(
-                surgery_request=sr,
-                operating_room=oroom,
-                start_time=start_time,
-                end_time=end_time,
-                status="scheduled",
-                notes=f"Auto-generated schedule for {sr.procedure_name}",
-            )
-            # Assign surgeons (1-2 randomly)
-            surgeons = SurgeonProfile.objects.filter(base_profile__hospital=hospital)
-            if surgeons:
-                sched.surgeons.set(
-                    random.sample(
-                        list(surgeons), min(len(surgeons), random.randint(1, 2))
-                    )
+        """Create a sterilization record for every equipment item."""
+        records: List[EquipmentSterilization] = []
+        for item in equipment_items:
+            sterilized_at: datetime = timezone.now() - timedelta(days=rng.randint(0, 3))
+            valid_until: datetime = sterilized_at + timedelta(days=rng.randint(1, 7))
+            records.append(
+                EquipmentSterilization(
+                    equipment=item, sterilized_at=sterilized_at, valid_until=valid_until
                 )
-            self._print_progress(
-                i, surgery_requests.count(), prefix="    Creating surgery schedules"
             )
+        EquipmentSterilization.objects.bulk_create(records)
+        sterilization.refresh_validity(item.id for item in equipment_items)
+        self.stdout.write(f"    Sterilized {len(records)} equipment items")
 
-    def _create_reschedule_events(self, hospital: Hospital) -> None:
-        """Create some reschedule events for schedules (simulate bumps)."""
-        schedules = SurgerySchedule.objects.filter(operating_room__hospital=hospital)
-        for i, sched in enumerate(schedules, start=1):
-            # Randomly decide to create a reschedule
-            if random.choice([True, False]):
-                reason = random.choice(
-                    [
-                        "Equipment maintenance",
-                        "Surgeon unavailable",
-                        "Emergency case bumped schedule",
-                        "Staff shortage",
-                    ]
-                )
-                RescheduleEvent.objects.create(
-                    triggered_by=sched.surgery_request,
-                    affected_schedule=sched,
-                    reason=reason,
-                )
-            self._print_progress(
-                i, schedules.count(), prefix="    Creating reschedule events"
-            )
-
-    def _create_surgery_equipment_requirements(self, hospital: Hospital) -> None:
-        """Assign random equipment requirements to surgery requests."""
-        surgery_requests = SurgeryRequest.objects.filter(hospital=hospital)
-        equipment_items = list(Equipment.objects.filter(hospital=hospital))
-        for i, sr in enumerate(surgery_requests, start=1):
-            if equipment_items:
-                # Each surgery requires 1-3 equipment items
-                required_eqs = random.sample(
-                    equipment_items, min(len(equipment_items), random.randint(1, 3))
-                )
-                for eq in required_eqs:
-                    qty = random.randint(1, 2)
-                    SurgeryEquipmentRequirement.objects.create(
-                        surgery_request=sr, equipment=eq, quantity_required=qty
-                    )
-            self._print_progress(
-                i,
-                surgery_requests.count(),
-                prefix="    Creating equipment requirements",
+    def _plan_chunks(
+        self,
+        alias: str,
+        seed: int,
+        plan: HospitalPlan,
+        patients: int,
+        requests: int,
+        chunk_size: int,
+        now: datetime,
+    ) -> List[Chunk]:
+        """
+        Split a hospital's patients and requests into chunks. Requests only
+        reference patients of their own chunk, so every chunk has at least one.
+        """
+        if not patients:
+            return []
+        count = max(1, min(patients, math.ceil(max(patients, requests) / chunk_size)))
+        return [
+            Chunk(
+                alias=alias,
+                seed=seed,
+                hospital=plan,
+                index=index,
+                first_patient=patients * index // count,
+                patients=patients * (index + 1) // count - patients * index // count,
+                requests=requests * (index + 1) // count - requests * index // count,
+                now=now,
             )
+            for index in range(count)
+        ]
 
-    def _create_plain_users(self, count: int) -> None:
+    def _run_chunks(self, chunks: List[Chunk], workers: int) -> Dict[str, int]:
+        """Generate every chunk, in worker processes when workers > 1."""
+        totals: Dict[str, int] = {}
+
+        def done(idx: int, result: Dict[str, int]) -> None:
+            for desc, count in result.items():
+                totals[desc] = totals.get(desc, 0) + count
+            self._print_progress(idx, len(chunks), prefix="    Generating chunks")
+
+        if workers == 1 or len(chunks) <= 1:
+            for idx, chunk in enumerate(chunks, start=1):
+                done(idx, generate_chunk(chunk))
+            return totals
+
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            raise CommandError("--workers needs the 'fork' start method; use --workers 1.")
+        # Forked workers must open their own database connections
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=connections.close_all
+        ) as pool:
+            futures = [pool.submit(generate_chunk, chunk) for chunk in chunks]
+            for idx, future in enumerate(as_completed(futures), start=1):
+                done(idx, future.result())
+        return totals
+
+    def _create_plain_users(self, count: int, fake: Faker) -> None:
         """Create plain Django users with password 'testuser123'."""
-        for i in range(count):
-            username: str = f"testuser{i+1}"
-            email: str = fake.email()
-            User.objects.create_user(
-                username=username, email=email, password="testuser123"
-            )
-            self._print_progress(i + 1, count, prefix="  Creating plain django users")
+        users = self._create_users([f"testuser{i+1}" for i in range(count)], fake)
+        self.stdout.write(f"  Created {len(users)} plain django users")
 
     def _create_superuser(self) -> None:
         """Create the final superuser with fixed credentials."""
@@ -0,0 +1,487 @@
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db.models import Count
+from django.utils import timezone
+
+from core.models import BaseUserProfile, Hospital, Patient
+from core.modules import sharding
+
+PASSWORD = "loadtest123"
+API = "/api/v1"
+
+# name -> (roles allowed to run it, default weight)
+SCENARIOS: dict[str, tuple[tuple[str, ...], int]] = {
+    "calendar": (("admin",), 30),
+    "create_request": (("admin",), 15),
+    "emergency": (("admin",), 5),
+    "notifications": (("admin", "surgeon", "nurse", "scheduler", "room_manager"), 50),
+}
+ROLES = ("admin", "surgeon", "nurse")
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[int, int] = field(default_factory=dict)
+
+
+class Client:
+    """
+    One virtual user: a keep-alive HTTP connection and a JWT per role.
+    """
+
+    def __init__(self, url: str, timeout: float, record) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.record = record
+        self.tokens: dict[str, str] = {}
+        self._connection: Optional[http.client.HTTPConnection] = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._connection = cls(self.host, self.port, timeout=self.timeout)
+        return self._connection
+
+    def request(
+        self, label: str, method: str, path: str, body: Any = None, role: Optional[str] = None
+    ) -> tuple[int, Any]:
+        headers = {"Accept": "application/json"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if role is not None:
+            headers["Authorization"] = f"Bearer {self.tokens[role]}"
+        started = time.perf_counter()
+        try:
+            connection = self._connect()
+            connection.request(method, self.prefix + API + path, body=payload, headers=headers)
+            response = connection.getresponse()
+            raw = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            # Drop the connection; the next request reconnects
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = None
+            self.record(label, time.perf_counter() - started, 0)
+            return 0, None
+        self.record(label, time.perf_counter() - started, status)
+        try:
+            return status, json.loads(raw) if raw else None
+        except ValueError:
+            return status, None
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "HTTP load test. Starts the app (runserver) against the current database, "
+        "or targets --url, logs load-test users of each role in through LoginView, "
+        "then drives a weighted mix of scenarios (calendar, create_request, "
+        "emergency, notifications) and reports throughput, error rate and latency "
+        "percentiles per endpoint. Use --url against a production-like server "
+        "(gunicorn/uvicorn) for capacity numbers; runserver is single-process."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--url",
+            default=None,
+            help="Base URL of a running server sharing this database. Default: start runserver.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=8, help="Virtual users (threads)."
+        )
+        parser.add_argument(
+            "--duration", type=float, default=30.0, help="Seconds to run after logging in."
+        )
+        parser.add_argument(
+            "--mix",
+            default=None,
+            help="Scenario weights, e.g. calendar=30,create_request=15,emergency=5,notifications=50.",
+        )
+        parser.add_argument(
+            "--think-ms",
+            type=float,
+            default=0.0,
+            help="Pause between a virtual user's scenarios (0 = closed loop).",
+        )
+        parser.add_argument(
+            "--hospital",
+            default=None,
+            help="Hospital code to test against. Default: the one with the most patients.",
+        )
+        parser.add_argument(
+            "--dataset-scale",
+            type=float,
+            default=None,
+            help="Reseed first with create_dummy_data --scale (destroys existing dummy data).",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=None, help="Seed for the dataset and the scenario mix."
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=30.0, help="Per-request timeout in seconds."
+        )
+        parser.add_argument(
+            "--json", dest="json_path", default=None, help="Also write the report to this file."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        mix = self._parse_mix(options["mix"])
+        concurrency = max(1, options["concurrency"])
+        if options["dataset_scale"] is not None:
+            seed_args = ["--scale", str(options["dataset_scale"])]
+            if options["seed"] is not None:
+                seed_args += ["--seed", str(options["seed"])]
+            call_command("create_dummy_data", *seed_args, stdout=self.stdout)
+
+        hospital = self._hospital(options["hospital"])
+        with sharding.use_shard(sharding.shard_for_hospital(hospital.id)):
+            patient_ids = [
+                str(pk)
+                for pk in Patient.objects.filter(hospital=hospital).values_list("id", flat=True)[:10_000]
+            ]
+            usernames = self._ensure_users(hospital, concurrency)
+        if not patient_ids and (mix.get("create_request") or mix.get("emergency")):
+            raise CommandError(f"Hospital {hospital.code} has no patients; seed it first.")
+        self.stdout.write(
+            f"Hospital {hospital.code}: {len(patient_ids)} patients, "
+            f"{concurrency} virtual users x roles {', '.join(ROLES)}"
+        )
+
+        server = None
+        url = options["url"]
+        if url is None:
+            server, url = self._start_server()
+        try:
+            report = self._run(
+                url, mix, usernames, patient_ids, concurrency, options
+            )
+        finally:
+            if server is not None:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+
+        self._report(report)
+        if options["json_path"]:
+            with open(options["json_path"], "w") as out:
+                json.dump(report, out, indent=2)
+            self.stdout.write(f"Report written to {options['json_path']}")
+
+    # ---------------------
+    # Setup
+    # ---------------------
+    def _parse_mix(self, value: Optional[str]) -> dict[str, int]:
+        if not value:
+            return {name: weight for name, (_, weight) in SCENARIOS.items()}
+        mix: dict[str, int] = {}
+        for part in value.split(","):
+            name, _, weight = part.partition("=")
+            name = name.strip()
+            if name not in SCENARIOS:
+                raise CommandError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}.")
+            try:
+                mix[name] = int(weight)
+            except ValueError:
+                raise CommandError(f"Weight of {name} must be an integer.")
+        if not any(mix.values()):
+            raise CommandError("--mix needs at least one positive weight.")
+        return mix
+
+    def _hospital(self, code: Optional[str]) -> Hospital:
+        hospitals = Hospital.objects.all()
+        if code:
+            hospital = hospitals.filter(code=code).first()
+        else:
+            hospital = hospitals.annotate(patients=Count("patient")).order_by("-patients", "code").first()
+        if hospital is None:
+            raise CommandError("No hospital to test; run create_dummy_data or pass --dataset-scale.")
+        return hospital
+
+    def _ensure_users(self, hospital: Hospital, count: int) -> dict[str, list[str]]:
+        """
+        Make `count` load-test users per role in `hospital` (reused between runs).
+        """
+        password = make_password(PASSWORD)
+        usernames: dict[str, list[str]] = {}
+        for role in ROLES:
+            names = [f"loadtest_{hospital.code}_{role}_{i + 1}" for i in range(count)]
+            existing = set(User.objects.filter(username__in=names).values_list("username", flat=True))
+            User.objects.bulk_create(
+                [User(username=name, password=password) for name in names if name not in existing]
+            )
+            users = User.objects.filter(username__in=names)
+            User.objects.filter(username__in=names).update(password=password)
+            with_profile = set(
+                BaseUserProfile.objects.filter(django_user__in=users).values_list("django_user_id", flat=True)
+            )
+            BaseUserProfile.objects.bulk_create(
+                [
+                    BaseUserProfile(django_user=user, hospital=hospital, role=role)
+                    for user in users
+                    if user.id not in with_profile
+                ]
+            )
+            usernames[role] = names
+        return usernames
+
+    def _start_server(self) -> tuple[subprocess.Popen, str]:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        manage = os.path.join(settings.BASE_DIR, "manage.py")
+        server = subprocess.Popen(
+            [sys.executable, manage, "runserver", f"127.0.0.1:{port}", "--noreload"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            # Same settings (and so the same database) as this process, even with --settings
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE},
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("runserver exited during startup.")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                self.stdout.write(f"Started runserver on 127.0.0.1:{port}")
+                return server, f"http://127.0.0.1:{port}"
+            except OSError:
+                time.sleep(0.2)
+        server.kill()
+        raise CommandError("runserver did not start within 30 seconds.")
+
+    # ---------------------
+    # Load
+    # ---------------------
+    def _run(
+        self,
+        url: str,
+        mix: dict[str, int],
+        usernames: dict[str, list[str]],
+        patient_ids: list[str],
+        concurrency: int,
+        options: dict,
+    ) -> dict:
+        lock = threading.Lock()
+        stats: dict[str, EndpointStats] = {}
+        scenario_counts: dict[str, int] = {}
+        measuring = threading.Event()
+
+        def record(label: str, seconds: float, status: int) -> None:
+            # Logins are always recorded; everything else once the clock starts
+            if not measuring.is_set() and not label.startswith("POST /auth/login"):
+                return
+            with lock:
+                endpoint = stats.setdefault(label, EndpointStats())
+                endpoint.latencies.append(seconds)
+                endpoint.statuses[status] = endpoint.statuses.get(status, 0) + 1
+                if status == 0 or status >= 400:
+                    endpoint.errors += 1
+
+        names = [name for name, weight in mix.items() if weight > 0]
+        weights = [mix[name] for name in names]
+        think = options["think_ms"] / 1000
+        seed = options["seed"]
+        stop = threading.Event()
+        ready = threading.Barrier(concurrency + 1)
+        login_failures = [0]
+
+        def virtual_user(index: int) -> None:
+            rng = random.Random(None if seed is None else f"{seed}:{index}")
+            client = Client(url, options["timeout"], record)
+            for role in ROLES:
+                status, body = client.request(
+                    "POST /auth/login/",
+                    "POST",
+                    "/auth/login/",
+                    {"username": usernames[role][index], "password": PASSWORD},
+                )
+                if status == 200 and body:
+                    client.tokens[role] = body["access"]
+                else:
+                    with lock:
+                        login_failures[0] += 1
+            ready.wait()
+            while not stop.is_set():
+                name = rng.choices(names, weights)[0]
+                roles = [role for role in SCENARIOS[name][0] if role in client.tokens]
+                if roles:
+                    getattr(self, f"_scenario_{name}")(client, rng.choice(roles), rng, patient_ids)
+                    with lock:
+                        scenario_counts[name] = scenario_counts.get(name, 0) + 1
+                if think:
+                    time.sleep(think)
+            client.close()
+
+        threads = [threading.Thread(target=virtual_user, args=(i,), daemon=True) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        if login_failures[0]:
+            self.stderr.write(f"{login_failures[0]} login(s) failed; those roles are skipped.")
+        self.stdout.write(f"Logged in; running for {options['duration']:.0f}s...")
+        measuring.set()
+        started = time.perf_counter()
+        time.sleep(options["duration"])
+        stop.set()
+        for thread in threads:
+            thread.join(options["timeout"] + 5)
+        elapsed = time.perf_counter() - started
+
+        return self._summarize(stats, scenario_counts, elapsed, url, concurrency, mix)
+
+    # Each scenario is one user action; some issue more than one request
+    def _scenario_calendar(self, client: Client, role: str, rng: random.Random, patient_ids: list) -> None:
+        client.request("GET /schedule/", "GET", "/schedule/", role=role)
+
+    def _request_body(self, rng: random.Random, patient_ids: list, priority: str) -> dict:
+        procedure_type = rng.choice(["general", "cardiac", "neuro", "ortho"])
+        return {
+            "patient": rng.choice(patient_ids),
+            "procedure_name": f"Load test {procedure_type} procedure",
+            "procedure_type": procedure_type,
+            "complexity": rng.randint(1, 5),
+            "priority": priority,
+            "anesthesia_type": "general",
+            "latest_allowed_time": (timezone.now() + timedelta(days=rng.randint(0, 30))).isoformat(),
+        }
+
+    def _scenario_create_request(
+        self, client: Client, role: str, rng: random.Random, patient_ids: list
+    ) -> None:
+        client.request(
+            "POST /surgery-requests/",
+            "POST",
+            "/surgery-requests/",
+            self._request_body(rng, patient_ids, rng.choice(["urgent", "elective"])),
+            role=role,
+        )
+
+    def _scenario_emergency(self, client: Client, role: str, rng: random.Random, patient_ids: list) -> None:
+        # Emergency requests fan notifications out to every clinical user
+        client.request(
+            "POST /surgery-requests/ (emergency)",
+            "POST",
+            "/surgery-requests/",
+            self._request_body(rng, patient_ids, "emergency"),
+            role=role,
+        )
+
+    def _scenario_notifications(
+        self, client: Client, role: str, rng: random.Random, patient_ids: list
+    ) -> None:
+        client.request("GET /notifications/unread-count/", "GET", "/notifications/unread-count/", role=role)
+        status, body = client.request("GET /notifications/", "GET", "/notifications/?limit=20", role=role)
+        results = (body or {}).get("results") if status == 200 else None
+        if results and rng.random() < 0.2:
+            client.request(
+                "POST /notifications/mark-read/",
+                "POST",
+                "/notifications/mark-read/",
+                {"up_to_id": results[0]["id"]},
+                role=role,
+            )
+
+    # ---------------------
+    # Report
+    # ---------------------
+    def _summarize(
+        self,
+        stats: dict[str, EndpointStats],
+        scenario_counts: dict[str, int],
+        elapsed: float,
+        url: str,
+        concurrency: int,
+        mix: dict[str, int],
+    ) -> dict:
+        def pct(latencies: list[float], p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        endpoints = {}
+        for label, endpoint in sorted(stats.items()):
+            latencies = sorted(endpoint.latencies)
+            login = label.startswith("POST /auth/login")
+            endpoints[label] = {
+                "requests": len(latencies),
+                "rps": None if login else len(latencies) / elapsed,
+                "errors": endpoint.errors,
+                "error_rate": endpoint.errors / len(latencies),
+                "statuses": {str(status): count for status, count in sorted(endpoint.statuses.items())},
+                "p50_ms": pct(latencies, 0.50),
+                "p90_ms": pct(latencies, 0.90),
+                "p95_ms": pct(latencies, 0.95),
+                "p99_ms": pct(latencies, 0.99),
+                "max_ms": latencies[-1] * 1000,
+                "mean_ms": sum(latencies) / len(latencies) * 1000,
+            }
+        measured = {label: data for label, data in endpoints.items() if data["rps"] is not None}
+        total = sum(data["requests"] for data in measured.values())
+        errors = sum(data["errors"] for data in measured.values())
+        return {
+            "url": url,
+            "concurrency": concurrency,
+            "duration_s": elapsed,
+            "mix": mix,
+            "scenarios": scenario_counts,
+            "requests": total,
+            "rps": total / elapsed if elapsed else 0.0,
+            "errors": errors,
+            "error_rate": errors / total if total else 0.0,
+            "endpoints": endpoints,
+        }
+
+    def _report(self, report: dict) -> None:
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{report['requests']} requests in {report['duration_s']:.1f}s at concurrency "
+            f"{report['concurrency']}: {report['rps']:.1f} req/s, "
+            f"{report['error_rate'] * 100:.2f}% errors"
+        ))
+        self.stdout.write(
+            "  scenarios: " + ", ".join(f"{name} {count}" for name, count in sorted(report["scenarios"].items()))
+        )
+        self.stdout.write(
+            f"  {'endpoint':40} {'reqs':>7} {'req/s':>8} {'err%':>6} "
+            f"{'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+        )
+        for label, data in report["endpoints"].items():
+            rps = "-" if data["rps"] is None else f"{data['rps']:.1f}"
+            line = (
+                f"  {label:40} {data['requests']:>7} {rps:>8} {data['error_rate'] * 100:>6.2f} "
+                f"{data['p50_ms']:>8.1f} {data['p90_ms']:>8.1f} {data['p95_ms']:>8.1f} "
+                f"{data['p99_ms']:>8.1f} {data['max_ms']:>8.1f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if data["errors"] else line)
+            if data["errors"]:
+                self.stdout.write(f"    statuses: {data['statuses']}")
+        self.stdout.write("  latencies in ms; logins happen before the clock starts")
@@ -0,0 +1,98 @@
+import json
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from core.models import Hospital
+from core.modules import sharding, sterilization
+from core.modules.tenancy import tenant_db
+
+
+class Command(BaseCommand):
+    help = (
+        "Plan sterilizer cycles for upcoming surgeries (see core.modules.sterilization) "
+        "and list surgeries whose equipment will not be sterile in time. Items whose "
+        "sterilization has expired are flagged for reprocessing first. With --record, "
+        "book the planned cycles. Run it at least once per shift."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--hospital",
+            default=None,
+            help="Hospital code. Default: every hospital.",
+        )
+        parser.add_argument(
+            "--hours",
+            type=float,
+            default=None,
+            help="Planning horizon (default: STERILIZATION['HORIZON_HOURS']).",
+        )
+        parser.add_argument(
+            "--record",
+            action="store_true",
+            help="Book the planned cycles as sterilization records.",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the plans as JSON instead of a table.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        horizon = timedelta(hours=options["hours"]) if options["hours"] else None
+        plans = []
+        expired = 0
+        for alias in sharding.each_shard():
+            hospitals = Hospital.objects.filter(is_active=True).order_by("code")
+            if options["hospital"]:
+                hospitals = hospitals.filter(code=options["hospital"])
+            for hospital in hospitals:
+                if sharding.enabled() and sharding.shard_for_hospital(hospital.id) != alias:
+                    continue
+                expired += sterilization.expire(hospital.id)
+                with transaction.atomic(using=tenant_db()):
+                    plan = sterilization.plan(hospital.id, horizon=horizon)
+                    if options["record"] and plan.jobs:
+                        sterilization.record(plan.jobs)
+                plans.append((hospital, plan))
+        if options["hospital"] and not plans:
+            raise CommandError(f"No active hospital with code {options['hospital']}.")
+
+        if options["json"]:
+            self.stdout.write(
+                json.dumps([plan.as_dict() for _, plan in plans], cls=DjangoJSONEncoder, indent=2)
+            )
+            return
+
+        if expired:
+            self.stdout.write(self.style.WARNING(
+                f"Flagged {expired} item(s) with expired sterilization for reprocessing."
+            ))
+        for hospital, plan in plans:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{hospital.code}: {len(plan.jobs)} cycle(s) on {plan.sterilizers} sterilizer(s) "
+                f"until {plan.horizon_end:%Y-%m-%d %H:%M} UTC"
+                + (" (booked)" if options["record"] and plan.jobs else "")
+            ))
+            for job in plan.jobs:
+                line = (
+                    f"  sterilizer {job.sterilizer}  {job.start:%m-%d %H:%M} -> {job.end:%m-%d %H:%M}  "
+                    f"{job.equipment_name} (#{job.equipment_id})"
+                )
+                if job.needed_by is not None:
+                    line += f"  needed {job.needed_by:%m-%d %H:%M} by schedule {job.schedule_id}"
+                self.stdout.write(self.style.ERROR(line) if job.late else line)
+            for risk in plan.at_risk:
+                detail = (
+                    f"ready {risk.ready_at:%m-%d %H:%M}" if risk.ready_at else "no free unit"
+                )
+                self.stdout.write(self.style.ERROR(
+                    f"  AT RISK schedule {risk.schedule_id} at {risk.start_time:%m-%d %H:%M}: "
+                    f"{risk.equipment_type} {risk.reason} ({detail})"
+                ))
+        if not any(plan.at_risk for _, plan in plans):
+            self.stdout.write(self.style.SUCCESS("Every planned surgery has sterile equipment in time."))
@@ -0,0 +1,115 @@
+import signal
+import threading
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections, connections
+
+from core.modules import jobs
+
+# Seconds between periodic enqueues, lease reaping and pruning on the main thread
+PERIODIC_EVERY = 60
+REAP_EVERY = 30
+PRUNE_EVERY = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs (see core.modules.jobs) with a pool of --concurrency "
+        "worker threads. Jobs are claimed atomically, so any number of these "
+        "processes can run side by side. Also enqueues the JOBS['PERIODIC'] tasks, "
+        "requeues jobs of dead workers and prunes old jobs. Stops on SIGTERM/SIGINT "
+        "after the running jobs finish."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--concurrency", type=int, default=4, help="Worker threads.")
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run until the queue has no runnable job, then exit.",
+        )
+        parser.add_argument(
+            "--no-periodic",
+            action="store_true",
+            help="Do not enqueue the JOBS['PERIODIC'] tasks from this process.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        concurrency = max(1, options["concurrency"])
+        stop = threading.Event()
+        counts: dict[str, int] = {}
+        lock = threading.Lock()
+        idle = [False] * concurrency
+
+        def work(index: int) -> None:
+            worker = jobs.worker_name(index)
+            try:
+                while not stop.is_set():
+                    close_old_connections()
+                    try:
+                        job = jobs.claim(worker)
+                        if job is not None:
+                            outcome = jobs.run(job)
+                    except Exception:
+                        # Keep the worker alive through a database hiccup; a
+                        # job it held is retried once its lease expires
+                        jobs.logger.exception("Worker %s failed", worker)
+                        stop.wait(jobs.get_setting("POLL_SECONDS"))
+                        continue
+                    if job is None:
+                        idle[index] = True
+                        if options["once"] and all(idle):
+                            stop.set()
+                        stop.wait(jobs.get_setting("POLL_SECONDS"))
+                        continue
+                    idle[index] = False
+                    with lock:
+                        counts[outcome] = counts.get(outcome, 0) + 1
+                    if options["verbosity"] > 1:
+                        self.stdout.write(f"{worker}: job {job.id} ({job.task}) {outcome}")
+            finally:
+                connections.close_all()
+
+        def shutdown(signum: int, frame: Any) -> None:
+            self.stdout.write("Stopping after the running jobs finish...")
+            stop.set()
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, shutdown)
+
+        threads = [
+            threading.Thread(target=work, args=(index,), name=f"job-worker-{index}", daemon=True)
+            for index in range(concurrency)
+        ]
+        self.stdout.write(f"Starting {concurrency} job worker(s) as {jobs.worker_name().rsplit(':', 1)[0]}")
+        if not options["no_periodic"]:
+            jobs.enqueue_periodic()
+        jobs.reap()
+        for thread in threads:
+            thread.start()
+
+        last = {"periodic": time.monotonic(), "reap": time.monotonic(), "prune": 0.0}
+        while not stop.wait(1.0):
+            now = time.monotonic()
+            try:
+                if not options["no_periodic"] and now - last["periodic"] >= PERIODIC_EVERY:
+                    last["periodic"] = now
+                    jobs.enqueue_periodic()
+                if now - last["reap"] >= REAP_EVERY:
+                    last["reap"] = now
+                    jobs.reap()
+                if now - last["prune"] >= PRUNE_EVERY:
+                    last["prune"] = now
+                    jobs.prune()
+            except Exception:
+                jobs.logger.exception("Job maintenance failed")
+            finally:
+                close_old_connections()
+
+        for thread in threads:
+            thread.join()
+        connections.close_all()
+        summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items())) or "no jobs"
+        self.stdout.write(self.style.SUCCESS(f"Workers stopped: {summary}."))
@@ -0,0 +1,279 @@
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import IntegrityError, connections, models, transaction
+
+from core.models import (
+    ArchivedNotification,
+    ArchivedRescheduleEvent,
+    ArchivedSurgerySchedule,
+    BaseUserProfile,
+    ChangeLogEntry,
+    Equipment,
+    EquipmentReservation,
+    EquipmentSterilization,
+    Hospital,
+    Notification,
+    OperatingRoom,
+    Patient,
+    RescheduleEvent,
+    StaffProfile,
+    SurgeonProfile,
+    SurgeryEquipmentRequirement,
+    SurgeryQueue,
+    SurgeryRequest,
+    SurgerySchedule,
+    TenantShard,
+)
+from core.modules import sharding
+from core.modules.tenancy import HOSPITAL_PATHS, raw_delete
+
+# Parents before children, so rows can be inserted in this order and
+# deleted in reverse.
+MOVE_ORDER: list[tuple[type[models.Model], str]] = [
+    (model, HOSPITAL_PATHS[model])
+    for model in [
+        Hospital,
+        OperatingRoom,
+        BaseUserProfile,
+        SurgeonProfile,
+        StaffProfile,
+        Patient,
+        Equipment,
+        SurgeryRequest,
+        SurgerySchedule,
+    ]
+] + [
+    (SurgerySchedule.surgeons.through, "surgeryschedule__operating_room__hospital_id"),
+] + [
+    (model, HOSPITAL_PATHS[model])
+    for model in [
+        RescheduleEvent,
+        SurgeryQueue,
+        SurgeryEquipmentRequirement,
+        EquipmentSterilization,
+        EquipmentReservation,
+        Notification,
+        ArchivedSurgerySchedule,
+        ArchivedRescheduleEvent,
+        ArchivedNotification,
+    ]
+] + [
+    (ChangeLogEntry, "hospital_id"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Manage tenant shards (SHARDING setting): migrate every shard, seed the "
+        "hospital directory and per-shard id ranges, move a hospital between "
+        "shards, or list where hospitals live."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        actions = parser.add_subparsers(dest="action", required=True)
+        actions.add_parser("migrate", help="Apply migrations to every shard.")
+        actions.add_parser(
+            "seed",
+            help="Register the hospitals found on each shard in the directory and "
+            "reserve a separate integer id range per shard.",
+        )
+        actions.add_parser("list", help="Show each shard's hospitals.")
+        move = actions.add_parser(
+            "move",
+            help="Copy a hospital's rows to another shard, repoint the directory, "
+            "then delete them from the old shard. Run in a maintenance window: "
+            "writes to the hospital during the move are lost.",
+        )
+        move.add_argument("hospital", help="Hospital id or code.")
+        move.add_argument("target", help="Destination shard alias.")
+        move.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Rows read and inserted per batch.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        shards: list[str] = sharding.get_setting("SHARDS")
+        for alias in shards:
+            if alias not in connections:
+                raise CommandError(f"Shard {alias!r} is not in DATABASES.")
+
+        action = options["action"]
+        if action == "migrate":
+            for alias in shards:
+                self.stdout.write(f"Migrating {alias}...")
+                call_command(
+                    "migrate",
+                    database=alias,
+                    interactive=False,
+                    verbosity=max(0, options["verbosity"] - 1),
+                )
+            self.stdout.write(self.style.SUCCESS(f"Migrated {len(shards)} shard(s)."))
+            return
+
+        if not sharding.enabled():
+            raise CommandError("Sharding is disabled; set SHARDING['ENABLED'] first.")
+        if action == "seed":
+            self._seed(shards)
+        elif action == "list":
+            self._list(shards)
+        else:
+            self._move(shards, options["hospital"], options["target"], max(1, options["chunk_size"]))
+
+    # ---------------------
+    # seed / list
+    # ---------------------
+    def _seed(self, shards: list[str]) -> None:
+        default_shard = sharding.get_setting("DEFAULT_SHARD")
+        for alias in shards:
+            hospital_ids = list(Hospital.objects.using(alias).values_list("id", flat=True))
+            if alias == default_shard:
+                TenantShard.objects.filter(hospital_id__in=hospital_ids).delete()
+            else:
+                for hospital_id in hospital_ids:
+                    TenantShard.objects.update_or_create(
+                        hospital_id=hospital_id, defaults={"alias": alias}
+                    )
+            self.stdout.write(f"{alias}: {len(hospital_ids)} hospital(s) registered.")
+        sharding.invalidate_directory()
+
+        block = sharding.get_setting("ID_BLOCK_SIZE")
+        for index, alias in enumerate(shards):
+            if index:
+                self._reserve_ids(alias, index * block)
+        self.stdout.write(self.style.SUCCESS("Directory and id ranges seeded."))
+
+    def _reserve_ids(self, alias: str, start: int) -> None:
+        """
+        Make new integer ids on `alias` start at `start` (never lowers them).
+        """
+        connection = connections[alias]
+        tables = [
+            model._meta.db_table
+            for model, _ in MOVE_ORDER
+            if isinstance(model._meta.pk, models.AutoField)
+        ]
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            for table in tables:
+                if connection.vendor == "sqlite":
+                    cursor.execute(
+                        "UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s",
+                        [start, table],
+                    )
+                    if not cursor.rowcount:
+                        cursor.execute(
+                            "INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)",
+                            [table, start],
+                        )
+                elif connection.vendor == "postgresql":
+                    cursor.execute(
+                        f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                        f"GREATEST(%s, (SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(table)})))",
+                        [table, start],
+                    )
+                else:
+                    self.stderr.write(
+                        f"{alias}: cannot reserve ids on {connection.vendor}; "
+                        "make sure shards do not share id ranges."
+                    )
+                    return
+        self.stdout.write(f"{alias}: new ids start above {start}.")
+
+    def _list(self, shards: list[str]) -> None:
+        for alias in shards:
+            hospitals = Hospital.objects.using(alias).order_by("code").values_list("code", "id")
+            self.stdout.write(f"{alias}:")
+            for code, hospital_id in hospitals:
+                marker = "" if sharding.shard_for_hospital(hospital_id) == alias else "  (stale copy)"
+                self.stdout.write(f"  {code} {hospital_id}{marker}")
+
+    # ---------------------
+    # move
+    # ---------------------
+    def _move(self, shards: list[str], key: str, target: str, chunk_size: int) -> None:
+        if target not in shards:
+            raise CommandError(f"{target!r} is not one of SHARDS {shards}.")
+        hospital_id = self._find_hospital(shards, key)
+        source = sharding.shard_for_hospital(hospital_id)
+        if source == target:
+            raise CommandError(f"Hospital {key} already lives on {target}.")
+
+        self.stdout.write(f"Moving hospital {hospital_id} from {source} to {target}...")
+        try:
+            with transaction.atomic(using=target):
+                for model, lookup in MOVE_ORDER:
+                    copied = self._copy(model, lookup, hospital_id, source, target, chunk_size)
+                    self.stdout.write(f"  copied {copied} {model._meta.verbose_name_plural}")
+        except IntegrityError as exc:
+            raise CommandError(
+                f"Copy failed, nothing was changed ({exc}). If ids clash, run "
+                "`shards seed` so every shard uses its own id range."
+            )
+
+        if target == sharding.get_setting("DEFAULT_SHARD"):
+            TenantShard.objects.filter(hospital_id=hospital_id).delete()
+        else:
+            TenantShard.objects.update_or_create(hospital_id=hospital_id, defaults={"alias": target})
+        sharding.invalidate_directory()
+
+        # Raw deletes: no signals, so no change log, audit or realtime noise
+        with transaction.atomic(using=source):
+            for model, lookup in reversed(MOVE_ORDER):
+                raw_delete(model._base_manager.using(source).filter(**{lookup: hospital_id}), source)
+        self.stdout.write(self.style.SUCCESS(f"Hospital {hospital_id} now lives on {target}."))
+
+    def _find_hospital(self, shards: list[str], key: str) -> Any:
+        try:
+            lookup = {"id": Hospital._meta.pk.to_python(key)}
+        except ValidationError:
+            lookup = {"code": key}
+        for alias in shards:
+            hospital_id = (
+                Hospital.objects.using(alias).filter(**lookup).values_list("id", flat=True).first()
+            )
+            if hospital_id is not None and sharding.shard_for_hospital(hospital_id) == alias:
+                return hospital_id
+        raise CommandError(f"Hospital {key!r} not found.")
+
+    def _copy(
+        self,
+        model: type[models.Model],
+        lookup: str,
+        hospital_id: Any,
+        source: str,
+        target: str,
+        chunk_size: int,
+    ) -> int:
+        fields = model._meta.local_concrete_fields
+        ops = connections[target].ops
+        rows = (
+            model._base_manager.using(source)
+            .filter(**{lookup: hospital_id})
+            .order_by("pk")
+            .iterator(chunk_size=chunk_size)
+        )
+        copied = 0
+        batch: list[models.Model] = []
+
+        def flush() -> None:
+            size = max(1, ops.bulk_batch_size(fields, batch))
+            for start in range(0, len(batch), size):
+                # raw=True keeps auto_now/auto_now_add values as they are
+                model._base_manager._insert(
+                    batch[start : start + size], fields=fields, using=target, raw=True
+                )
+
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                flush()
+                copied += len(batch)
+                batch = []
+        if batch:
+            flush()
+            copied += len(batch)
+        return copied
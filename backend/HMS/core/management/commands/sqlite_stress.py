@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.modules.sqlite import WriteQueue, configure_connection, serialized_writes
+
+# baseline: old defaults; pragmas: WAL + BEGIN IMMEDIATE only; tuned: pragmas + write queue
+PROFILES = ("baseline", "pragmas", "tuned")
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrency stress test for the SQLite production profile. Runs the same "
+        "read-modify-write workload on a scratch database with the old defaults "
+        "(rollback journal, deferred transactions), with the pragmas and BEGIN "
+        "IMMEDIATE only, and with the full profile including the in-process write "
+        "queue."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--threads", type=int, default=16, help="Concurrent writer threads."
+        )
+        parser.add_argument(
+            "--ops", type=int, default=200, help="Write transactions per writer thread."
+        )
+        parser.add_argument(
+            "--readers", type=int, default=4, help="Concurrent reader threads."
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=5.0,
+            help="sqlite3 busy timeout in seconds (Django's default is 5).",
+        )
+        parser.add_argument(
+            "--profile",
+            choices=[*PROFILES, "all"],
+            default="all",
+            help="Which profile to run; 'all' runs baseline, pragmas and tuned in turn.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        profiles = PROFILES if options["profile"] == "all" else (options["profile"],)
+        for profile in profiles:
+            with tempfile.TemporaryDirectory() as tmp:
+                result = self._run(
+                    os.path.join(tmp, "stress.sqlite3"),
+                    tuned=profile != "baseline",
+                    queued=profile == "tuned",
+                    threads=max(1, options["threads"]),
+                    ops=max(1, options["ops"]),
+                    readers=max(0, options["readers"]),
+                    timeout=options["timeout"],
+                )
+            self._report(profile, result)
+
+    def _connect(self, path: str, tuned: bool, timeout: float) -> sqlite3.Connection:
+        connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        if tuned:
+            configure_connection(connection)
+        return connection
+
+    def _run(
+        self,
+        path: str,
+        tuned: bool,
+        queued: bool,
+        threads: int,
+        ops: int,
+        readers: int,
+        timeout: float,
+    ) -> dict:
+        setup = self._connect(path, tuned, timeout)
+        setup.execute("CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)")
+        setup.execute("INSERT INTO counter (id, value) VALUES (1, 0)")
+        setup.execute(
+            "CREATE TABLE event (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "payload TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        setup.close()
+
+        queue: Optional[WriteQueue] = WriteQueue() if queued else None
+        begin = "BEGIN IMMEDIATE" if tuned else "BEGIN"
+        latencies: list[float] = []
+        errors: dict[str, int] = {}
+        reads = [0]
+        read_errors = [0]
+        lock = threading.Lock()
+        writers_done = threading.Event()
+
+        def record_error(exc: Exception) -> None:
+            with lock:
+                errors[str(exc)] = errors.get(str(exc), 0) + 1
+
+        def writer(index: int) -> None:
+            connection = self._connect(path, tuned, timeout)
+            for op in range(ops):
+                started = time.perf_counter()
+                try:
+                    # Typical ORM pattern: read, then write in the same transaction
+                    with serialized_writes(queue) if queue else nullcontext():
+                        connection.execute(begin)
+                        try:
+                            (value,) = connection.execute(
+                                "SELECT value FROM counter WHERE id = 1"
+                            ).fetchone()
+                            connection.execute("UPDATE counter SET value = ? WHERE id = 1", (value + 1,))
+                            connection.execute(
+                                "INSERT INTO event (payload, created) VALUES (?, ?)",
+                                (f"writer {index} op {op}", time.time()),
+                            )
+                            connection.execute("COMMIT")
+                        except Exception:
+                            connection.execute("ROLLBACK")
+                            raise
+                except sqlite3.OperationalError as exc:
+                    record_error(exc)
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+            connection.close()
+
+        def reader() -> None:
+            connection = self._connect(path, tuned, timeout)
+            while not writers_done.is_set():
+                try:
+                    connection.execute("SELECT COUNT(*) FROM event").fetchone()
+                    connection.execute("SELECT * FROM event ORDER BY id DESC LIMIT 20").fetchall()
+                    with lock:
+                        reads[0] += 1
+                except sqlite3.OperationalError:
+                    with lock:
+                        read_errors[0] += 1
+            connection.close()
+
+        reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+        writer_threads = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for thread in reader_threads + writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        writers_done.set()
+        for thread in reader_threads:
+            thread.join()
+
+        check = sqlite3.connect(path)
+        (counter,) = check.execute("SELECT value FROM counter WHERE id = 1").fetchone()
+        check.close()
+        return {
+            "attempted": threads * ops,
+            "latencies": latencies,
+            "errors": errors,
+            "elapsed": elapsed,
+            "reads": reads[0],
+            "read_errors": read_errors[0],
+            "counter": counter,
+        }
+
+    def _report(self, profile: str, result: dict) -> None:
+        latencies = sorted(result["latencies"])
+        committed = len(latencies)
+        failed = sum(result["errors"].values())
+
+        def pct(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{profile}:"))
+        self.stdout.write(
+            f"  writes: {committed}/{result['attempted']} committed, {failed} failed, "
+            f"{committed / result['elapsed']:.0f} commits/s over {result['elapsed']:.2f}s"
+        )
+        if latencies:
+            self.stdout.write(
+                f"  write latency ms: p50 {pct(0.50):.1f}  p95 {pct(0.95):.1f}  "
+                f"p99 {pct(0.99):.1f}  max {latencies[-1] * 1000:.1f}  "
+                f"mean {statistics.mean(latencies) * 1000:.1f}"
+            )
+        for message, count in sorted(result["errors"].items(), key=lambda item: -item[1]):
+            self.stdout.write(f"  error x{count}: {message}")
+        self.stdout.write(f"  reads: {result['reads']} ok, {result['read_errors']} failed")
+        consistent = result["counter"] == committed
+        style = self.style.SUCCESS if consistent else self.style.ERROR
+        self.stdout.write(style(f"  counter {result['counter']} == committed {committed}: {consistent}"))
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from typing import Any, Callable
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.modules.sqlite import configure_connection
+from core.modules.uuids import uuid7
+
+GENERATORS: dict[str, Callable[[], uuid.UUID]] = {
+    "uuid4": uuid.uuid4,
+    "uuid7": uuid7,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare random uuid4 and time-ordered uuid7 primary keys on a scratch "
+        "SQLite database laid out like core_surgeryrequest/core_surgeryschedule: "
+        "bulk insert throughput, primary-key index size and fill, and the "
+        "schedule -> request join."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--rows", type=int, default=200_000, help="Surgery requests to insert."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Rows per INSERT transaction."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rows = max(1, options["rows"])
+        batch_size = max(1, options["batch_size"])
+        results = {}
+        for name, generate in GENERATORS.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                results[name] = self._run(
+                    os.path.join(tmp, "bench.sqlite3"), generate, rows, batch_size
+                )
+
+        self.stdout.write(f"{rows} rows, {batch_size} per batch")
+        header = f"{'':24}" + "".join(f"{name:>14}" for name in results)
+        self.stdout.write(header)
+        for label, key, fmt in [
+            ("inserts/s", "insert_rate", "{:>14,.0f}"),
+            ("last 10% inserts/s", "tail_rate", "{:>14,.0f}"),
+            ("pk index pages", "index_pages", "{:>14,}"),
+            ("pk index MiB", "index_mib", "{:>14.2f}"),
+            ("pk index leaf fill %", "leaf_fill", "{:>14.1f}"),
+            ("join ms", "join_ms", "{:>14.1f}"),
+            ("db file MiB", "file_mib", "{:>14.2f}"),
+        ]:
+            self.stdout.write(f"{label:24}" + "".join(fmt.format(r[key]) for r in results.values()))
+
+    def _run(self, path: str, generate: Callable[[], uuid.UUID], rows: int, batch_size: int) -> dict:
+        connection = sqlite3.connect(path, isolation_level=None)
+        configure_connection(connection)
+        # Same column types Django uses for UUIDField on SQLite
+        connection.execute(
+            "CREATE TABLE request (id char(32) NOT NULL PRIMARY KEY, "
+            "hospital_id char(32) NOT NULL, procedure_name varchar(255) NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE schedule (id integer NOT NULL PRIMARY KEY AUTOINCREMENT, "
+            "surgery_request_id char(32) NOT NULL UNIQUE, start_time real NOT NULL)"
+        )
+        hospital = uuid.uuid4().hex
+
+        ids: list[str] = []
+        tail_started = 0.0
+        tail_rows = 0
+        started = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            if not tail_started and offset >= rows * 0.9:
+                tail_started = time.perf_counter()
+            batch = [generate().hex for _ in range(min(batch_size, rows - offset))]
+            connection.execute("BEGIN")
+            connection.executemany(
+                "INSERT INTO request (id, hospital_id, procedure_name) VALUES (?, ?, ?)",
+                [(request_id, hospital, "procedure") for request_id in batch],
+            )
+            connection.execute("COMMIT")
+            if tail_started:
+                tail_rows += len(batch)
+            ids.extend(batch)
+        elapsed = time.perf_counter() - started
+        tail_elapsed = time.perf_counter() - tail_started if tail_started else elapsed
+
+        connection.execute("BEGIN")
+        connection.executemany(
+            "INSERT INTO schedule (surgery_request_id, start_time) VALUES (?, ?)",
+            [(request_id, float(i)) for i, request_id in enumerate(ids)],
+        )
+        connection.execute("COMMIT")
+
+        index = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'request'"
+        ).fetchone()[0]
+        pages, size, leaf_used, leaf_size = connection.execute(
+            "SELECT COUNT(*), SUM(pgsize), "
+            "SUM(CASE WHEN pagetype = 'leaf' THEN pgsize - unused ELSE 0 END), "
+            "SUM(CASE WHEN pagetype = 'leaf' THEN pgsize ELSE 0 END) "
+            "FROM dbstat WHERE name = ?",
+            [index],
+        ).fetchone()
+
+        # Recent schedules joined to their requests, like the calendar views
+        join_started = time.perf_counter()
+        connection.execute(
+            "SELECT COUNT(*), MAX(r.procedure_name) FROM schedule s "
+            "JOIN request r ON r.id = s.surgery_request_id WHERE s.start_time >= ?",
+            [rows * 0.5],
+        ).fetchone()
+        join_ms = (time.perf_counter() - join_started) * 1000
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.close()
+
+        return {
+            "insert_rate": rows / elapsed,
+            "tail_rate": tail_rows / tail_elapsed if tail_elapsed else 0.0,
+            "index_pages": pages,
+            "index_mib": size / 2**20,
+            "leaf_fill": 100 * leaf_used / leaf_size if leaf_size else 0.0,
+            "join_ms": join_ms,
+            "file_mib": os.path.getsize(path) / 2**20,
+        }
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:10
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_unread_counts(apps, schema_editor):
+    BaseUserProfile = apps.get_model("core", "BaseUserProfile")
+    counts = BaseUserProfile.objects.annotate(
+        unread=Count("notification", filter=Q(notification__is_read=False))
+    ).filter(unread__gt=0)
+    for profile in counts:
+        BaseUserProfile.objects.filter(pk=profile.pk).update(
+            unread_notifications=profile.unread
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_baseuserprofile_django_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='baseuserprofile',
+            name='unread_notifications',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['base_profile', 'is_read', 'id'], name='notification_inbox_idx'),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
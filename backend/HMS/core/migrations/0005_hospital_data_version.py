@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_notification_unread_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hospital',
+            name='data_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
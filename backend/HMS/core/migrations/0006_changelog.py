@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:14
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_hospital_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('hospital_id', models.UUIDField()),
+                ('seq', models.PositiveBigIntegerField()),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.CharField(max_length=64)),
+                ('operation', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('data', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('audience_profile_id', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hospital_id', 'model', 'object_id', 'seq'], name='changelog_object_idx')],
+                'constraints': [models.UniqueConstraint(fields=('hospital_id', 'seq'), name='changelog_hospital_seq_uniq')],
+            },
+        ),
+    ]
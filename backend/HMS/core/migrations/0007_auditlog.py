@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:17
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_changelog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('hospital_id', models.UUIDField(blank=True, null=True)),
+                ('actor_username', models.CharField(blank=True, max_length=150)),
+                ('action', models.CharField(max_length=50)),
+                ('resource_type', models.CharField(blank=True, max_length=50)),
+                ('resource_id', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(choices=[('SUCCESS', 'Success'), ('FAILURE', 'Failure')], default='SUCCESS', max_length=20)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('details', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('actor', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hospital_id', '-id'], name='audit_hospital_idx'), models.Index(fields=['hospital_id', 'actor', '-id'], name='audit_actor_idx'), models.Index(fields=['hospital_id', 'resource_type', 'resource_id', '-id'], name='audit_resource_idx'), models.Index(fields=['hospital_id', 'timestamp'], name='audit_time_idx')],
+            },
+        ),
+    ]
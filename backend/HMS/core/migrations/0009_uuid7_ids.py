@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:28
+
+import core.modules.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_tenant_shards'),
+    ]
+
+    # Only the Python-side default changes; the column stays a UUID, so skip
+    # the table rebuild SQLite would otherwise do for an AlterField.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='hospital',
+                    name='id',
+                    field=models.UUIDField(default=core.modules.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='surgeryrequest',
+                    name='id',
+                    field=models.UUIDField(default=core.modules.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+            database_operations=[],
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_uuid7_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRescheduleEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('hospital_id', models.UUIDField()),
+                ('triggered_by_id', models.UUIDField()),
+                ('affected_schedule_id', models.BigIntegerField(db_index=True)),
+                ('reason', models.TextField()),
+                ('timestamp', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('hospital_id', models.UUIDField(blank=True, null=True)),
+                ('base_profile_id', models.BigIntegerField()),
+                ('message', models.TextField()),
+                ('severity', models.CharField(max_length=20)),
+                ('is_read', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['base_profile_id', 'id'], name='archived_notification_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSurgerySchedule',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('hospital_id', models.UUIDField()),
+                ('surgery_request_id', models.UUIDField()),
+                ('operating_room_id', models.BigIntegerField()),
+                ('surgeon_ids', models.JSONField(default=list)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('status', models.CharField(max_length=20)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hospital_id', 'start_time'], name='archived_schedule_time_idx'), models.Index(fields=['surgery_request_id'], name='archived_schedule_request_idx')],
+            },
+        ),
+    ]
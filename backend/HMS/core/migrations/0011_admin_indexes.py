@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='surgeryrequest',
+            index=models.Index(fields=['hospital', 'priority'], name='request_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='surgeryschedule',
+            index=models.Index(fields=['status', 'end_time'], name='schedule_status_end_idx'),
+        ),
+    ]
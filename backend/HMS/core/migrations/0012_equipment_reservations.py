@@ -0,0 +1,88 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:54
+
+from collections import defaultdict
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# reservations.DEFAULTS at the time of this migration
+MAX_HOURS = 24
+RELEASE_STATUSES = ["cancelled", "bumped"]
+BATCH_SIZE = 1000
+
+
+def backfill_reservations(apps, schema_editor):
+    """
+    Existing schedules hold their equipment like new ones do; windows the
+    ledger cannot hold (empty or longer than MAX_HOURS) are left out.
+    """
+    SurgerySchedule = apps.get_model("core", "SurgerySchedule")
+    SurgeryEquipmentRequirement = apps.get_model("core", "SurgeryEquipmentRequirement")
+    EquipmentReservation = apps.get_model("core", "EquipmentReservation")
+
+    schedules = (
+        SurgerySchedule.objects.exclude(status__in=RELEASE_STATUSES)
+        .values_list("id", "surgery_request_id", "operating_room__hospital_id", "start_time", "end_time")
+        .order_by("id")
+    )
+    batch = []
+    for schedule_id, request_id, hospital_id, start, end in schedules.iterator(chunk_size=BATCH_SIZE):
+        batch.append((schedule_id, request_id, hospital_id, start, end))
+        if len(batch) >= BATCH_SIZE:
+            _reserve_batch(batch, SurgeryEquipmentRequirement, EquipmentReservation)
+            batch = []
+    if batch:
+        _reserve_batch(batch, SurgeryEquipmentRequirement, EquipmentReservation)
+
+
+def _reserve_batch(batch, SurgeryEquipmentRequirement, EquipmentReservation):
+    needs = defaultdict(lambda: defaultdict(int))
+    requirements = SurgeryEquipmentRequirement.objects.filter(
+        surgery_request_id__in=[request_id for _, request_id, _, _, _ in batch]
+    ).values_list("surgery_request_id", "equipment__equipment_type", "quantity_required")
+    for request_id, equipment_type, quantity in requirements:
+        needs[request_id][equipment_type] += quantity
+    EquipmentReservation.objects.bulk_create(
+        [
+            EquipmentReservation(
+                hospital_id=hospital_id,
+                schedule_id=schedule_id,
+                equipment_type=equipment_type,
+                quantity=quantity,
+                start_time=start,
+                end_time=end,
+            )
+            for schedule_id, request_id, hospital_id, start, end in batch
+            if start < end <= start + timedelta(hours=MAX_HOURS)
+            for equipment_type, quantity in sorted(needs[request_id].items())
+            if quantity > 0
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipment_type', models.CharField(max_length=100)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('hospital', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.hospital')),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='equipment_reservations', to='core.surgeryschedule')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hospital', 'equipment_type', 'start_time'], name='reservation_type_time_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_reservations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_equipment_reservations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='sterilization_cycle_hours',
+            field=models.PositiveSmallIntegerField(default=3, help_text='Sterilizer time needed to reprocess the item after use'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:59
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_sterile_until(apps, schema_editor):
+    Equipment = apps.get_model("core", "Equipment")
+    EquipmentSterilization = apps.get_model("core", "EquipmentSterilization")
+    latest = EquipmentSterilization.objects.filter(equipment=OuterRef("pk")).order_by("-valid_until")
+    Equipment.objects.update(sterile_until=Subquery(latest.values("valid_until")[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_equipment_sterilization_cycle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='sterile_until',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_sterile_until, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_equipment_sterile_until'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['start_time', 'end_time'], name='staff_shift_time_idx'),
+        ),
+    ]
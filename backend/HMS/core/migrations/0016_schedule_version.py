@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-19 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_staff_shift_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surgeryschedule',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='surgeryschedule',
+            index=models.Index(fields=['operating_room', 'start_time'], name='schedule_room_time_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-19 14:25
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+
+def backfill_sterile_window(apps, schema_editor):
+    Equipment = apps.get_model("core", "Equipment")
+    EquipmentSterilization = apps.get_model("core", "EquipmentSterilization")
+    # Only finished cycles count; booked ones are picked up when they end
+    latest = EquipmentSterilization.objects.filter(
+        equipment=OuterRef("pk"), sterilized_at__lte=timezone.now()
+    ).order_by("-valid_until")
+    Equipment.objects.update(
+        sterile_from=Subquery(latest.values("sterilized_at")[:1]),
+        sterile_until=Subquery(latest.values("valid_until")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='sterile_from',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_sterile_window, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_equipment_sterile_from'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hospital',
+            name='staff_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
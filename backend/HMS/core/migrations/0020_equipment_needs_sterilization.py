@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-19 14:50
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def flag_lapsed_items(apps, schema_editor):
+    Equipment = apps.get_model("core", "Equipment")
+    # The sweep used to take lapsed items out of service: put them back, flagged
+    lapsed = Equipment.objects.filter(sterile_until__lt=timezone.now())
+    lapsed.filter(is_available=False).update(is_available=True)
+    lapsed.update(needs_sterilization=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_hospital_staff_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='needs_sterilization',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(flag_lapsed_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-19 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_equipment_needs_sterilization'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hospital',
+            name='changelog_floor',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='changelogentry',
+            name='seq',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(condition=models.Q(('seq__isnull', True)), fields=['hospital_id', 'id'], name='changelog_unnumbered_idx'),
+        ),
+    ]
@@ -1,20 +1,28 @@
 from turtle import mode
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
-import uuid
+from core.modules.uuids import uuid7
 
 # MARK: Hospital
 
 
 class Hospital(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=255)
     code = models.CharField(max_length=50, unique=True)
     timezone = models.CharField(max_length=64, default="UTC")
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Last change-log seq, also bumped after other hospital-scoped writes
+    # (see core.modules.changelog and core.signals)
+    data_version = models.PositiveBigIntegerField(default=0)
+    # Change-log entries up to this seq were pruned (see core.modules.changelog)
+    changelog_floor = models.PositiveBigIntegerField(default=0)
+    # Bumped on writes to staff profiles and shifts only (see core.modules.shifts)
+    staff_version = models.PositiveBigIntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -44,7 +52,10 @@ class OperatingRoom(models.Model):
 
 
 class BaseUserProfile(models.Model):
-    django_user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="baseuserprofile")
+    # No DB constraint: with sharding enabled, users stay on `default` while profiles live on shards
+    django_user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="baseuserprofile", db_constraint=False
+    )
     hospital = models.ForeignKey(Hospital, on_delete=models.CASCADE, null=True)
     role = models.CharField(
         max_length=30,
@@ -56,6 +67,8 @@ class BaseUserProfile(models.Model):
             ("nurse", "Nurse"),
         ],
     )
+    # Denormalized badge count, maintained by core.modules.notifications
+    unread_notifications = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.django_user.get_username()} ({self.role})"
@@ -79,6 +92,12 @@ class StaffProfile(models.Model):
         help_text="Indicates if the staff is available for emergency surgeries outside of regular hours",
     )
 
+    class Meta:
+        indexes = [
+            # Shift lookups by time (core.modules.shifts)
+            models.Index(fields=["start_time", "end_time"], name="staff_shift_time_idx"),
+        ]
+
     def __str__(self):
         return self.base_profile.django_user.get_username()
 
@@ -115,7 +134,7 @@ class SurgeryRequest(models.Model):
         ("neuro", "Neuro"),
         ("ortho", "Orthopedic"),
     ]
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     hospital = models.ForeignKey(Hospital, on_delete=models.CASCADE)
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE)
     procedure_name = models.CharField(max_length=255)
@@ -144,6 +163,12 @@ class SurgeryRequest(models.Model):
     latest_allowed_time = models.DateTimeField()
     approved = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Admin change list filter
+            models.Index(fields=["hospital", "priority"], name="request_priority_idx"),
+        ]
+
     def is_overdue(self):
         return timezone.now() > self.latest_allowed_time
 
@@ -175,6 +200,16 @@ class SurgerySchedule(models.Model):
     notes = models.TextField(blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # Optimistic concurrency for drag-and-drop moves (core.modules.rescheduling)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            # Admin status filter and the archival scan (status, end_time < cutoff)
+            models.Index(fields=["status", "end_time"], name="schedule_status_end_idx"),
+            # Room conflict checks
+            models.Index(fields=["operating_room", "start_time"], name="schedule_room_time_idx"),
+        ]
 
     def __str__(self):
         return f"Schedule for {self.surgery_request.patient.full_name} in {self.operating_room.name}"
@@ -222,6 +257,14 @@ class Equipment(models.Model):
     equipment_type = models.CharField(max_length=100)
     location = models.CharField(max_length=100)
     is_available = models.BooleanField(default=True)
+    sterilization_cycle_hours = models.PositiveSmallIntegerField(
+        default=3, help_text="Sterilizer time needed to reprocess the item after use"
+    )
+    # Validity of the latest finished sterilization, kept by core.modules.sterilization
+    sterile_from = models.DateTimeField(null=True, blank=True, editable=False)
+    sterile_until = models.DateTimeField(null=True, blank=True, db_index=True, editable=False)
+    # Set by the sweep once sterile_until has passed; is_available stays the manual in/out of service flag
+    needs_sterilization = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         return f"{self.name} ({self.equipment_type}) in {self.location}"
@@ -239,6 +282,32 @@ class EquipmentSterilization(models.Model):
         return f"Sterilization record for {self.equipment.name} at {self.sterilized_at}"
 
 
+class EquipmentReservation(models.Model):
+    """
+    Ledger entry holding `quantity` units of `equipment_type` for a
+    schedule's [start_time, end_time) window. Maintained by
+    core.modules.reservations.
+    """
+
+    hospital = models.ForeignKey(Hospital, on_delete=models.CASCADE)
+    schedule = models.ForeignKey(
+        SurgerySchedule, on_delete=models.CASCADE, related_name="equipment_reservations"
+    )
+    equipment_type = models.CharField(max_length=100)
+    quantity = models.PositiveIntegerField(default=1)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Per-type interval index: overlap scans are bounded by the maximum reservation length
+            models.Index(fields=["hospital", "equipment_type", "start_time"], name="reservation_type_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.equipment_type} from {self.start_time} to {self.end_time}"
+
+
 # MARK: Notifications
 
 
@@ -252,5 +321,245 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Inbox keyset pagination and "mark read up to id"
+            models.Index(fields=["base_profile", "is_read", "id"], name="notification_inbox_idx"),
+        ]
+
     def __str__(self):
         return f"Notification for {self.base_profile.django_user.get_username()} - {self.severity}"
+
+
+# MARK: Sync
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of writes to hospital-scoped models, read by `/sync/changes`.
+
+    `seq` is assigned from `Hospital.data_version` once the entry has
+    committed (null until then), so it increases per hospital in commit
+    order. `hospital_id` is deliberately not a foreign key: entries are
+    written from delete signals while a hospital is being removed.
+    """
+
+    OPERATIONS = [
+        ("create", "Create"),
+        ("update", "Update"),
+        ("delete", "Delete"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    hospital_id = models.UUIDField()
+    seq = models.PositiveBigIntegerField(null=True, blank=True)
+    model = models.CharField(max_length=50)
+    object_id = models.CharField(max_length=64)
+    operation = models.CharField(max_length=10, choices=OPERATIONS)
+    data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    # Set for per-user rows (notifications) so only that user receives them
+    audience_profile_id = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["hospital_id", "seq"], name="changelog_hospital_seq_uniq"),
+        ]
+        indexes = [
+            # "is there a newer entry for this object" during compaction
+            models.Index(fields=["hospital_id", "model", "object_id", "seq"], name="changelog_object_idx"),
+            # Entries waiting for a seq
+            models.Index(
+                fields=["hospital_id", "id"], condition=models.Q(seq__isnull=True), name="changelog_unnumbered_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.operation} {self.model} {self.object_id} (seq {self.seq})"
+
+
+# MARK: Audit
+
+
+class AuditLog(models.Model):
+    """
+    Audit trail entry. Written in batches by core.modules.audit.
+
+    `hospital_id` and the actor's username are plain copies so entries
+    survive the deletion of the hospital or user they describe.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+    hospital_id = models.UUIDField(null=True, blank=True)
+    actor = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.SET_NULL, db_constraint=False
+    )
+    actor_username = models.CharField(max_length=150, blank=True)
+    action = models.CharField(max_length=50)
+    resource_type = models.CharField(max_length=50, blank=True)
+    resource_id = models.CharField(max_length=64, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=[("SUCCESS", "Success"), ("FAILURE", "Failure")],
+        default="SUCCESS",
+    )
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    details = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["hospital_id", "-id"], name="audit_hospital_idx"),
+            models.Index(fields=["hospital_id", "actor", "-id"], name="audit_actor_idx"),
+            models.Index(fields=["hospital_id", "resource_type", "resource_id", "-id"], name="audit_resource_idx"),
+            models.Index(fields=["hospital_id", "timestamp"], name="audit_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.action} by {self.actor_username or 'system'} at {self.timestamp}"
+
+
+# MARK: Jobs
+
+
+class Job(models.Model):
+    """
+    Background job, run by `manage.py run_workers` (see core.modules.jobs).
+    Always stored on the `default` database, like the audit log.
+    """
+
+    STATUSES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed"),
+        ("cancelled", "Cancelled"),
+    ]
+    ACTIVE_STATUSES = ["queued", "running"]
+
+    id = models.BigAutoField(primary_key=True)
+    task = models.CharField(max_length=100)
+    args = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    hospital_id = models.UUIDField(null=True, blank=True)
+    created_by_id = models.IntegerField(null=True, blank=True)
+    # Lower runs first
+    priority = models.SmallIntegerField(default=100)
+    # At most one queued or running job per key
+    dedup_key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUSES, default="queued")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    # Lease of the worker running it; an expired lease is retried
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claim scan: next queued job by priority
+            models.Index(fields=["status", "priority", "run_after", "id"], name="job_claim_idx"),
+            # Expired leases
+            models.Index(fields=["status", "locked_until"], name="job_lease_idx"),
+            models.Index(fields=["hospital_id", "-id"], name="job_hospital_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                condition=models.Q(status__in=["queued", "running"]),
+                name="job_active_dedup_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} {self.task} ({self.status})"
+
+
+# MARK: Sharding
+
+
+class TenantShard(models.Model):
+    """
+    Directory of hospitals that live on a non-default shard
+    (see core.modules.sharding). Always stored on the `default` database.
+    """
+
+    hospital_id = models.UUIDField(primary_key=True)
+    alias = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.hospital_id} -> {self.alias}"
+
+
+# MARK: Archive
+
+
+class ArchivedSurgerySchedule(models.Model):
+    """
+    Cold copy of a completed or cancelled `SurgerySchedule`, moved out of the
+    hot table by core.modules.archive. Keeps the original id; relations are
+    stored as plain ids so archived rows never block changes to live ones.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    hospital_id = models.UUIDField()
+    surgery_request_id = models.UUIDField()
+    operating_room_id = models.BigIntegerField()
+    surgeon_ids = models.JSONField(default=list)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    status = models.CharField(max_length=20)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["hospital_id", "start_time"], name="archived_schedule_time_idx"),
+            models.Index(fields=["surgery_request_id"], name="archived_schedule_request_idx"),
+        ]
+
+    def __str__(self):
+        return f"Archived schedule {self.id} ({self.status})"
+
+
+class ArchivedRescheduleEvent(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    hospital_id = models.UUIDField()
+    triggered_by_id = models.UUIDField()
+    affected_schedule_id = models.BigIntegerField(db_index=True)
+    reason = models.TextField()
+    timestamp = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Archived RescheduleEvent {self.id} at {self.timestamp}"
+
+
+class ArchivedNotification(models.Model):
+    """
+    Cold copy of a read `Notification`. Unread ones are never archived, so
+    `BaseUserProfile.unread_notifications` is unaffected.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    hospital_id = models.UUIDField(null=True, blank=True)
+    base_profile_id = models.BigIntegerField()
+    message = models.TextField()
+    severity = models.CharField(max_length=20)
+    is_read = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["base_profile_id", "id"], name="archived_notification_idx"),
+        ]
+
+    def __str__(self):
+        return f"Archived notification {self.id} - {self.severity}"
@@ -0,0 +1,297 @@
+"""
+Hot/cold archival.
+
+Finished schedules (SCHEDULE_STATUSES) that ended more than AFTER_DAYS ago,
+their `RescheduleEvent`s, and read notifications older than that are moved
+to the `Archived*` tables by `manage.py archive`, so the hot tables every
+live query scans only hold the last few weeks regardless of the hospital's
+age. `SurgeryRequest` rows stay hot: the queue, equipment requirements and
+other schedules' reschedule events still point at them.
+
+Rows move in chunks of CHUNK_SIZE, each in its own transaction: copy, then
+delete. Deletes are raw (no signals), so archiving writes no change log,
+audit or realtime events; offline clients simply keep their copies.
+
+Reads opt in with `?archived=include` or `?archived=only` (see
+`read_mode`); archived rows serialize with the same keys plus `archived`
+and `archived_at`.
+
+A request has no hot schedule once its schedule is archived, so "waiting
+for a slot" is not `surgeryschedule__isnull=True`: use
+`unscheduled_requests`, which treats an archived schedule as finished.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Prefetch, Q, QuerySet
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.models import (
+    ArchivedNotification,
+    ArchivedRescheduleEvent,
+    ArchivedSurgerySchedule,
+    BaseUserProfile,
+    EquipmentReservation,
+    Notification,
+    RescheduleEvent,
+    SurgeonProfile,
+    SurgeryRequest,
+    SurgerySchedule,
+)
+from core.modules.tenancy import raw_delete, tenant_db
+from core.serializers import (
+    ArchivedNotificationSerializer,
+    ArchivedSurgeryScheduleSerializer,
+    NotificationSerializer,
+    SurgeryScheduleSerializer,
+)
+
+DEFAULTS: dict[str, Any] = {
+    "AFTER_DAYS": 21,
+    "SCHEDULE_STATUSES": ["completed", "cancelled"],
+    "CHUNK_SIZE": 500,
+}
+
+READ_MODES = ("exclude", "include", "only")
+# Schedules that gave their slot up; the request needs a new one
+UNSCHEDULED_STATUSES = ["bumped", "cancelled"]
+
+SERIALIZERS: dict[type, type[serializers.ModelSerializer]] = {
+    SurgerySchedule: SurgeryScheduleSerializer,
+    ArchivedSurgerySchedule: ArchivedSurgeryScheduleSerializer,
+    Notification: NotificationSerializer,
+    ArchivedNotification: ArchivedNotificationSerializer,
+}
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "ARCHIVE", {}).get(name, DEFAULTS[name])
+
+
+def cutoff(days: Optional[int] = None) -> datetime:
+    return timezone.now() - timedelta(days=get_setting("AFTER_DAYS") if days is None else days)
+
+
+def read_mode(value: Optional[str]) -> str:
+    """
+    Parse an `archived` query parameter. Raises ValueError on unknown values.
+    """
+    if not value:
+        return "exclude"
+    if value in ("1", "true"):
+        return "include"
+    if value not in READ_MODES:
+        raise ValueError(value)
+    return value
+
+
+def serialize(rows: Iterable[Any]) -> list[dict]:
+    """
+    Serialize a mix of hot and archived rows, keeping their order.
+    """
+    return [SERIALIZERS[type(row)](row).data for row in rows]
+
+
+# ---------------------
+# Archival
+# ---------------------
+def archive_schedules(before: datetime, chunk_size: Optional[int] = None) -> tuple[int, int]:
+    """
+    Move finished schedules that ended before `before`, with their reschedule
+    events, to the archive. Returns (schedules, events) moved.
+    """
+    chunk_size = chunk_size or get_setting("CHUNK_SIZE")
+    candidates = SurgerySchedule.objects.filter(
+        status__in=get_setting("SCHEDULE_STATUSES"), end_time__lt=before
+    )
+    Surgeons = SurgerySchedule.surgeons.through
+    schedules_moved = events_moved = 0
+    while True:
+        db = tenant_db()
+        with transaction.atomic(using=db):
+            chunk = list(
+                candidates.select_for_update(of=("self",))
+                .annotate(archive_hospital_id=F("operating_room__hospital_id"))
+                .order_by("id")[:chunk_size]
+            )
+            if not chunk:
+                break
+            ids = [schedule.id for schedule in chunk]
+            surgeon_ids: dict[int, list[int]] = {schedule_id: [] for schedule_id in ids}
+            for schedule_id, surgeon_id in Surgeons.objects.filter(
+                surgeryschedule_id__in=ids
+            ).values_list("surgeryschedule_id", "surgeonprofile_id"):
+                surgeon_ids[schedule_id].append(surgeon_id)
+            hospitals = {schedule.id: schedule.archive_hospital_id for schedule in chunk}
+            events = list(RescheduleEvent.objects.filter(affected_schedule_id__in=ids))
+
+            ArchivedSurgerySchedule.objects.bulk_create(
+                [
+                    ArchivedSurgerySchedule(
+                        id=schedule.id,
+                        hospital_id=schedule.archive_hospital_id,
+                        surgery_request_id=schedule.surgery_request_id,
+                        operating_room_id=schedule.operating_room_id,
+                        surgeon_ids=sorted(surgeon_ids[schedule.id]),
+                        start_time=schedule.start_time,
+                        end_time=schedule.end_time,
+                        status=schedule.status,
+                        notes=schedule.notes,
+                        created_at=schedule.created_at,
+                    )
+                    for schedule in chunk
+                ]
+            )
+            ArchivedRescheduleEvent.objects.bulk_create(
+                [
+                    ArchivedRescheduleEvent(
+                        id=event.id,
+                        hospital_id=hospitals[event.affected_schedule_id],
+                        triggered_by_id=event.triggered_by_id,
+                        affected_schedule_id=event.affected_schedule_id,
+                        reason=event.reason,
+                        timestamp=event.timestamp,
+                    )
+                    for event in events
+                ]
+            )
+
+            # Children first; raw deletes skip signals and cascade collection
+            raw_delete(RescheduleEvent.objects.filter(affected_schedule_id__in=ids), db)
+            raw_delete(EquipmentReservation.objects.filter(schedule_id__in=ids), db)
+            raw_delete(Surgeons.objects.filter(surgeryschedule_id__in=ids), db)
+            raw_delete(SurgerySchedule.objects.filter(id__in=ids), db)
+        schedules_moved += len(chunk)
+        events_moved += len(events)
+    return schedules_moved, events_moved
+
+
+def archive_notifications(before: datetime, chunk_size: Optional[int] = None) -> int:
+    """
+    Move read notifications created before `before` to the archive.
+    Returns the number moved.
+    """
+    chunk_size = chunk_size or get_setting("CHUNK_SIZE")
+    candidates = Notification.objects.filter(is_read=True, created_at__lt=before)
+    moved = 0
+    while True:
+        db = tenant_db()
+        with transaction.atomic(using=db):
+            chunk = list(
+                candidates.select_for_update(of=("self",))
+                .annotate(archive_hospital_id=F("base_profile__hospital_id"))
+                .order_by("id")[:chunk_size]
+            )
+            if not chunk:
+                break
+            ArchivedNotification.objects.bulk_create(
+                [
+                    ArchivedNotification(
+                        id=notification.id,
+                        hospital_id=notification.archive_hospital_id,
+                        base_profile_id=notification.base_profile_id,
+                        message=notification.message,
+                        severity=notification.severity,
+                        created_at=notification.created_at,
+                    )
+                    for notification in chunk
+                ]
+            )
+            raw_delete(Notification.objects.filter(id__in=[n.id for n in chunk]), db)
+        moved += len(chunk)
+    return moved
+
+
+# ---------------------
+# Read path
+# ---------------------
+def has_archived_schedule() -> Exists:
+    """
+    True for requests (the outer `pk`) whose schedule is in the archive.
+    """
+    return Exists(ArchivedSurgerySchedule.objects.filter(surgery_request_id=OuterRef("pk")))
+
+
+def unscheduled_requests(hospital_id: Any) -> QuerySet:
+    """
+    Requests of `hospital_id` waiting for a slot: never scheduled, or whose
+    schedule was bumped or cancelled. An archived schedule means the surgery
+    is finished.
+    """
+    return (
+        SurgeryRequest.objects.filter(hospital_id=hospital_id)
+        .filter(Q(surgeryschedule__isnull=True) | Q(surgeryschedule__status__in=UNSCHEDULED_STATUSES))
+        .exclude(has_archived_schedule())
+    )
+
+
+def schedules(hospital_id: Any, mode: str) -> list[Any]:
+    """
+    The hospital's schedules: hot rows, archived rows (by start time), or both.
+    """
+    rows: list[Any] = []
+    if mode != "only":
+        rows.extend(SurgerySchedule.objects.filter(surgery_request__hospital_id=hospital_id))
+    if mode != "exclude":
+        rows.extend(ArchivedSurgerySchedule.objects.filter(hospital_id=hospital_id).order_by("start_time"))
+    return rows
+
+
+async def aschedules(hospital_id: Any, mode: str) -> list[Any]:
+    """
+    `schedules` on the async ORM. Surgeon ids are prefetched so serializing
+    the rows runs no further queries.
+    """
+    rows: list[Any] = []
+    if mode != "only":
+        hot = SurgerySchedule.objects.filter(surgery_request__hospital_id=hospital_id).prefetch_related(
+            Prefetch("surgeons", SurgeonProfile.objects.only("id"))
+        )
+        rows.extend([row async for row in hot])
+    if mode != "exclude":
+        archived = ArchivedSurgerySchedule.objects.filter(hospital_id=hospital_id).order_by("start_time")
+        rows.extend([row async for row in archived])
+    return rows
+
+
+def find_schedule(hospital_id: Any, pk: Any) -> Optional[ArchivedSurgerySchedule]:
+    return ArchivedSurgerySchedule.objects.filter(hospital_id=hospital_id, id=pk).first()
+
+
+def merge_inbox(
+    profile: BaseUserProfile,
+    page: list[Notification],
+    before_id: Optional[int],
+    limit: int,
+) -> list[Any]:
+    """
+    Merge the archived notifications of `profile` into a hot inbox page of
+    up to `limit + 1` rows, newest first. Archived rows keep their ids, so
+    one keyset cursor pages through both tables.
+    """
+    archived = ArchivedNotification.objects.filter(base_profile_id=profile.id)
+    if before_id is not None:
+        archived = archived.filter(id__lt=before_id)
+    return sorted(
+        [*page, *archived.order_by("-id")[: limit + 1]], key=lambda row: row.id, reverse=True
+    )[: limit + 1]
+
+
+async def amerge_inbox(
+    profile_id: int,
+    page: list[Notification],
+    before_id: Optional[int],
+    limit: int,
+) -> list[Any]:
+    """
+    `merge_inbox` on the async ORM.
+    """
+    archived = ArchivedNotification.objects.filter(base_profile_id=profile_id)
+    if before_id is not None:
+        archived = archived.filter(id__lt=before_id)
+    archived_page = [row async for row in archived.order_by("-id")[: limit + 1]]
+    return sorted([*page, *archived_page], key=lambda row: row.id, reverse=True)[: limit + 1]
@@ -0,0 +1,232 @@
+"""
+Audit trail (`GET /audit-logs`).
+
+`log()` builds an `AuditLog` row in the calling thread, capturing the actor
+and client IP, and hands it to a background writer. The writer collects rows
+for up to FLUSH_SECONDS or BATCH_SIZE rows and saves them with one
+bulk_create, so request latency never includes an audit INSERT.
+
+Rows are only lost if the process is killed before a flush; a normal exit
+drains the queue. When the queue is full the row is written inline instead
+of being dropped.
+
+The acting user comes from `AuditContextMiddleware`, which keeps the current
+request in a context variable. DRF copies the JWT user onto the Django
+request once it authenticates, so signal handlers see the right actor.
+"""
+
+import atexit
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.http import HttpRequest
+
+from core.models import AuditLog
+from core.modules.middleware import HybridMiddleware
+from core.modules.sqlite import serialized_writes
+from core.modules.tenancy import tenant_db
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS: dict[str, Any] = {
+    "BATCH_SIZE": 500,
+    "FLUSH_SECONDS": 1.0,
+    "QUEUE_SIZE": 10_000,
+    "SYNCHRONOUS": False,
+}
+
+_current_request: contextvars.ContextVar[Optional[HttpRequest]] = contextvars.ContextVar(
+    "audit_request", default=None
+)
+
+_STOP = object()
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "AUDIT", {}).get(name, DEFAULTS[name])
+
+
+class AuditContextMiddleware(HybridMiddleware):
+    """
+    Make the current request available to `log()` calls made deeper down
+    (signals, services) without threading it through every call.
+    """
+
+    def __call__(self, request: HttpRequest):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+    async def __acall__(self, request: HttpRequest):
+        token = _current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+
+def client_ip(request: HttpRequest) -> Optional[str]:
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR")
+
+
+class AuditWriter:
+    """
+    Background thread that saves queued audit rows in batches.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def _ensure_started(self) -> queue.Queue:
+        # Restart after fork: the parent's thread does not exist in the child
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                    self._queue = queue.Queue(get_setting("QUEUE_SIZE"))
+                    self._pid = os.getpid()
+                    self._thread = threading.Thread(
+                        target=self._run, args=(self._queue,), name="audit-writer", daemon=True
+                    )
+                    self._thread.start()
+        return self._queue
+
+    def submit(self, entry: AuditLog) -> None:
+        if get_setting("SYNCHRONOUS"):
+            self._write([entry])
+            return
+        try:
+            self._ensure_started().put_nowait(entry)
+        except queue.Full:
+            # Auditing is mandatory: pay for the INSERT rather than drop the row
+            self._write([entry])
+
+    def flush(self) -> None:
+        """
+        Block until every queued row has been written.
+        """
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        thread, pending = self._thread, self._queue
+        if thread is None or pending is None or self._pid != os.getpid():
+            return
+        pending.put(_STOP)
+        thread.join(timeout)
+
+    def _run(self, pending: queue.Queue) -> None:
+        batch_size = get_setting("BATCH_SIZE")
+        interval = get_setting("FLUSH_SECONDS")
+        stopping = False
+        while not stopping:
+            items = [pending.get()]
+            deadline = time.monotonic() + interval
+            while items[-1] is not _STOP and len(items) < batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            stopping = items[-1] is _STOP
+            while stopping:
+                # Drain whatever is left before exiting
+                try:
+                    items.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write([item for item in items if item is not _STOP])
+            finally:
+                for _ in items:
+                    pending.task_done()
+                close_old_connections()
+
+    @staticmethod
+    def _write(batch: list[AuditLog]) -> None:
+        if not batch:
+            return
+        try:
+            with serialized_writes():
+                AuditLog.objects.bulk_create(batch, batch_size=get_setting("BATCH_SIZE"))
+        except Exception:
+            logger.exception("Failed to write %d audit log entries", len(batch))
+
+
+writer = AuditWriter()
+atexit.register(writer.stop)
+
+
+def entry(
+    action: str,
+    *,
+    request: Optional[HttpRequest] = None,
+    user: Any = None,
+    hospital_id: Any = None,
+    resource: Any = None,
+    resource_type: str = "",
+    resource_id: Any = "",
+    status: str = "SUCCESS",
+    details: Optional[dict] = None,
+) -> AuditLog:
+    """
+    Build (but do not save) an audit row. Missing actor, hospital and IP are
+    taken from `request`, or the current request if none is given.
+    """
+    request = request if request is not None else _current_request.get()
+    if user is None and request is not None:
+        user = getattr(request, "user", None)
+    if user is not None and not user.is_authenticated:
+        user = None
+    if hospital_id is None and user is not None:
+        profile = getattr(user, "baseuserprofile", None)
+        hospital_id = profile.hospital_id if profile is not None else None
+    if resource is not None:
+        resource_type = resource_type or resource._meta.model_name
+        resource_id = resource_id or resource.pk
+
+    return AuditLog(
+        hospital_id=hospital_id,
+        actor=user,
+        actor_username=user.get_username() if user is not None else "",
+        action=action,
+        resource_type=resource_type,
+        resource_id=str(resource_id) if resource_id not in (None, "") else "",
+        status=status,
+        ip_address=client_ip(request) if request is not None else None,
+        details=details or {},
+    )
+
+
+def log(action: str, **kwargs: Any) -> None:
+    """
+    Queue an audit row; see `entry()` for the arguments.
+    """
+    writer.submit(entry(action, **kwargs))
+
+
+def log_on_commit(action: str, **kwargs: Any) -> None:
+    """
+    Like `log()`, but only if the surrounding transaction commits. The actor
+    is captured now, while the request context is still current.
+    """
+    row = entry(action, **kwargs)
+    transaction.on_commit(lambda: writer.submit(row), using=tenant_db())
@@ -0,0 +1,215 @@
+"""
+Change log for delta sync (`GET /sync/changes`).
+
+Writes to the models in `SERIALIZERS` append a `ChangeLogEntry` in the same
+transaction, without a seq: the writer takes no lock besides its own rows.
+`assign_seqs()` numbers a hospital's committed entries afterwards, in a short
+transaction of its own that locks the hospital row and moves
+`Hospital.data_version` to the last seq. It runs once the writer commits
+and before every read, so seqs are handed out in commit order: a reader
+never sees seq N+1 before seq N is committed.
+
+Reads are compacted: only the newest entry per object after the cursor is
+returned, so a client that was offline for hours downloads each changed row
+once regardless of how often it changed.
+
+`prune()` drops entries older than SYNC["CHANGELOG_RETENTION_DAYS"] and
+raises the hospital's `changelog_floor`; a cursor below the floor gets
+`CursorExpired`, and the client must bootstrap again.
+"""
+
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.models import (
+    ChangeLogEntry,
+    Equipment,
+    Hospital,
+    Notification,
+    OperatingRoom,
+    StaffProfile,
+    SurgeryRequest,
+    SurgerySchedule,
+)
+from core.modules.tenancy import hospital_id_for, tenant_db
+from core.serializers import (
+    EquipmentSerializer,
+    NotificationSerializer,
+    OperatingRoomSerializer,
+    StaffProfileSerializer,
+    SurgeryRequestSerializer,
+    SurgeryScheduleSerializer,
+)
+
+SERIALIZERS: dict[type, type[serializers.ModelSerializer]] = {
+    SurgeryRequest: SurgeryRequestSerializer,
+    SurgerySchedule: SurgeryScheduleSerializer,
+    OperatingRoom: OperatingRoomSerializer,
+    Equipment: EquipmentSerializer,
+    StaffProfile: StaffProfileSerializer,
+    Notification: NotificationSerializer,
+}
+
+
+DEFAULTS: dict[str, Any] = {
+    "CHANGELOG_RETENTION_DAYS": 30,
+}
+
+# Entries removed per DELETE when pruning
+PRUNE_BATCH_SIZE = 1000
+
+
+class CursorExpired(Exception):
+    """
+    The cursor is older than the pruned change log (`floor`).
+    """
+
+    def __init__(self, floor: int) -> None:
+        self.floor = floor
+        super().__init__(f"Changes up to {floor} were pruned; bootstrap again.")
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "SYNC", {}).get(name, DEFAULTS[name])
+
+
+def model_label(model: type) -> str:
+    return model._meta.model_name
+
+
+def assign_seqs(hospital_id: Any) -> Optional[int]:
+    """
+    Number the committed entries of `hospital_id` that have no seq yet and
+    return its `data_version` (the last seq), None if the hospital is gone.
+    Opens its own transaction: call it after the writer commits, not inside
+    the writer's transaction, or the hospital row stays locked until then.
+    """
+    with transaction.atomic(using=tenant_db()):
+        version = (
+            Hospital.objects.select_for_update()
+            .filter(id=hospital_id)
+            .values_list("data_version", flat=True)
+            .first()
+        )
+        if version is None:
+            return None
+        pending = list(
+            ChangeLogEntry.objects.filter(hospital_id=hospital_id, seq__isnull=True)
+            .order_by("id")
+            .only("id")
+        )
+        if pending:
+            for offset, entry in enumerate(pending, start=1):
+                entry.seq = version + offset
+            ChangeLogEntry.objects.bulk_update(pending, ["seq"], batch_size=500)
+            version += len(pending)
+            Hospital.objects.filter(id=hospital_id).update(data_version=version)
+    return version
+
+
+def _assign_on_commit(hospital_id: Any) -> None:
+    transaction.on_commit(partial(assign_seqs, hospital_id), using=tenant_db())
+
+
+def _audience(instance: Any) -> Optional[int]:
+    return instance.base_profile_id if isinstance(instance, Notification) else None
+
+
+def _entry(hospital_id: Any, instance: Any, operation: str) -> ChangeLogEntry:
+    model = type(instance)
+    return ChangeLogEntry(
+        hospital_id=hospital_id,
+        model=model_label(model),
+        object_id=str(instance.pk),
+        operation=operation,
+        data=None if operation == "delete" else _serialize(instance),
+        audience_profile_id=_audience(instance),
+    )
+
+
+def _serialize(instance: Any) -> dict:
+    return dict(SERIALIZERS[type(instance)](instance).data)
+
+
+def record(instance: Any, operation: str) -> None:
+    """
+    Append one change for `instance`.
+    """
+    hospital_id = hospital_id_for(instance)
+    if hospital_id is None:
+        return
+    _entry(hospital_id, instance, operation).save()
+    _assign_on_commit(hospital_id)
+
+
+def record_bulk(hospital_id: Any, instances: Iterable[Any], operation: str) -> None:
+    """
+    Append changes for many rows of one hospital with one INSERT, numbered
+    in order. For writers that bypass signals (bulk_create/update()).
+    """
+    instances = list(instances)
+    if not instances:
+        return
+    ChangeLogEntry.objects.bulk_create(
+        [_entry(hospital_id, instance, operation) for instance in instances],
+        batch_size=500,
+    )
+    _assign_on_commit(hospital_id)
+
+
+def changes_since(
+    hospital_id: Any, since: int, profile_id: Optional[int], limit: int
+) -> tuple[list[ChangeLogEntry], bool]:
+    """
+    Compacted page of changes after `since`: the newest entry per object,
+    ordered by seq. Returns (entries, has_more). Raises `CursorExpired` when
+    entries after `since` were pruned.
+    """
+    assign_seqs(hospital_id)
+    floor = Hospital.objects.values_list("changelog_floor", flat=True).filter(id=hospital_id).first()
+    if floor and since < floor:
+        raise CursorExpired(floor)
+    newer = ChangeLogEntry.objects.filter(
+        hospital_id=OuterRef("hospital_id"),
+        model=OuterRef("model"),
+        object_id=OuterRef("object_id"),
+        seq__gt=OuterRef("seq"),
+    )
+    entries = list(
+        ChangeLogEntry.objects.filter(hospital_id=hospital_id, seq__gt=since)
+        .filter(Q(audience_profile_id__isnull=True) | Q(audience_profile_id=profile_id))
+        .filter(~Exists(newer))
+        .order_by("seq")[: limit + 1]
+    )
+    return entries[:limit], len(entries) > limit
+
+
+def prune(hospital_id: Any, before: Optional[datetime] = None) -> int:
+    """
+    Delete the entries of `hospital_id` created before `before` (default
+    CHANGELOG_RETENTION_DAYS ago) and raise its `changelog_floor` to the last
+    seq deleted. Returns the number of entries deleted.
+    """
+    before = before or timezone.now() - timedelta(days=get_setting("CHANGELOG_RETENTION_DAYS"))
+    floor = ChangeLogEntry.objects.filter(
+        hospital_id=hospital_id, seq__isnull=False, created_at__lt=before
+    ).aggregate(floor=Max("seq"))["floor"]
+    if floor is None:
+        return 0
+    # Raised first: from now on a cursor below it is refused, not served a gap
+    Hospital.objects.filter(id=hospital_id, changelog_floor__lt=floor).update(changelog_floor=floor)
+    expired = ChangeLogEntry.objects.filter(hospital_id=hospital_id, seq__lte=floor)
+    deleted = 0
+    while True:
+        ids = list(expired.order_by("seq").values_list("id", flat=True)[:PRUNE_BATCH_SIZE])
+        if not ids:
+            return deleted
+        # No signals or cascades on ChangeLogEntry, so this is one DELETE
+        deleted += ChangeLogEntry.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,130 @@
+"""
+Read-replica routing.
+
+Reads of the apps in APPS go to a random alias from REPLICAS; writes,
+`select_for_update()` and anything inside a transaction go to the primary
+(`default`). With no replicas configured every query stays on the primary.
+
+Replicas are only used for safe (GET/HEAD/OPTIONS) requests that pass through
+`ReplicaRoutingMiddleware`. Management commands, workers and unsafe requests
+keep reading the primary.
+
+Read-your-writes: after an unsafe request the client gets a short-lived
+cookie, and its reads stay on the primary until the cookie expires, so a
+client never reads a replica that has not caught up with its own write yet.
+Once a request has written, the rest of that request reads the primary too.
+"""
+
+import contextvars
+import random
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpRequest
+
+from core.modules.middleware import HybridMiddleware
+
+DEFAULTS: dict[str, Any] = {
+    "REPLICAS": [],
+    "APPS": ["core"],
+    "STICKY_SECONDS": 5,
+    "COOKIE_NAME": "hms_use_primary",
+}
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# True while the current request may read from replicas
+_replica_reads: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "replica_reads", default=False
+)
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "DATABASE_ROUTING", {}).get(name, DEFAULTS[name])
+
+
+def pin_primary() -> None:
+    """
+    Send the rest of the current request's reads to the primary.
+    """
+    _replica_reads.set(False)
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Allow replica reads for safe requests and set the stickiness cookie
+    after unsafe ones.
+    """
+
+    def __call__(self, request: HttpRequest):
+        if self.is_async:
+            return self.__acall__(request)
+        token = self._begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        return self._finish(request, response)
+
+    async def __acall__(self, request: HttpRequest):
+        token = self._begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        return self._finish(request, response)
+
+    def _begin(self, request: HttpRequest):
+        safe = request.method in SAFE_METHODS
+        return _replica_reads.set(
+            bool(get_setting("REPLICAS")) and safe and get_setting("COOKIE_NAME") not in request.COOKIES
+        )
+
+    def _finish(self, request: HttpRequest, response):
+        if request.method not in SAFE_METHODS and get_setting("REPLICAS"):
+            response.set_cookie(
+                get_setting("COOKIE_NAME"),
+                "1",
+                max_age=get_setting("STICKY_SECONDS"),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class ReplicaRouter:
+    """
+    Database router for a single primary with read replicas.
+    """
+
+    def _routed(self, model: type) -> bool:
+        return model._meta.app_label in get_setting("APPS")
+
+    def db_for_read(self, model: type, **hints: Any) -> Optional[str]:
+        replicas = get_setting("REPLICAS")
+        if (
+            not replicas
+            or not _replica_reads.get()
+            or not self._routed(model)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model: type, **hints: Any) -> Optional[str]:
+        # Also reached by select_for_update()
+        pin_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Any, obj2: Any, **hints: Any) -> Optional[bool]:
+        aliases = {DEFAULT_DB_ALIAS, *get_setting("REPLICAS")}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> Optional[bool]:
+        # Replicas receive schema changes through replication
+        if db in get_setting("REPLICAS"):
+            return False
+        return None
@@ -0,0 +1,92 @@
+"""
+Waiting-list escalation.
+
+`escalate()` keeps one `SurgeryQueue` entry per unscheduled surgery request
+of a hospital (`archive.unscheduled_requests`: bumped and cancelled
+schedules wait again, archived ones are finished): `wait_days` since the request, and `escalated` once the wait
+reaches AFTER_DAYS for its priority or the deadline is less than
+DEADLINE_HOURS away. Escalating moves the entry's `current_priority` up one
+level (elective -> urgent -> emergency); the request keeps the priority the
+clinician gave it. Admins and schedulers get one notification per run.
+
+It runs nightly as a background job (JOBS["PERIODIC"], core.modules.jobs)
+and on demand from POST /surgery-requests/escalate/. Entries are written with
+bulk_create/bulk_update; `SurgeryQueue` is not in the sync change log.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import SurgeryQueue
+from core.modules import archive, notifications
+from core.modules.tenancy import tenant_db
+
+DEFAULTS: dict[str, Any] = {
+    "AFTER_DAYS": {"elective": 30, "urgent": 3, "emergency": 1},
+    "DEADLINE_HOURS": 24,
+}
+
+NEXT_PRIORITY = {"elective": "urgent", "urgent": "emergency"}
+NOTIFY_ROLES = ["admin", "scheduler"]
+BATCH_SIZE = 500
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "ESCALATION", {}).get(name, DEFAULTS[name])
+
+
+def escalate(hospital_id: Any, now: Optional[datetime] = None) -> dict[str, int]:
+    """
+    Refresh the hospital's waiting list. Returns counts of waiting requests,
+    entries created and updated, and entries newly escalated.
+    """
+    now = now or timezone.now()
+    after_days = {**DEFAULTS["AFTER_DAYS"], **get_setting("AFTER_DAYS")}
+    deadline = now + timedelta(hours=get_setting("DEADLINE_HOURS"))
+
+    with transaction.atomic(using=tenant_db()):
+        unscheduled = archive.unscheduled_requests(hospital_id)
+        waiting = list(
+            unscheduled.values_list("id", "priority", "requested_at", "latest_allowed_time")
+        )
+        entries = {
+            entry.surgery_request_id: entry
+            for entry in SurgeryQueue.objects.filter(surgery_request__in=unscheduled.values("id"))
+        }
+
+        created, updated = [], []
+        escalated = 0
+        for request_id, priority, requested_at, latest_allowed_time in waiting:
+            wait_days = max((now - requested_at).days, 0)
+            due = wait_days >= after_days.get(priority, 0) or latest_allowed_time <= deadline
+            entry = entries.get(request_id)
+            if entry is None:
+                entry = SurgeryQueue(surgery_request_id=request_id, current_priority=priority)
+                created.append(entry)
+            elif entry.wait_days == wait_days and (entry.escalated or not due):
+                continue
+            else:
+                updated.append(entry)
+            entry.wait_days = wait_days
+            if due and not entry.escalated:
+                entry.escalated = True
+                entry.current_priority = NEXT_PRIORITY.get(entry.current_priority, entry.current_priority)
+                escalated += 1
+
+        SurgeryQueue.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        SurgeryQueue.objects.bulk_update(
+            updated, ["wait_days", "escalated", "current_priority"], batch_size=BATCH_SIZE
+        )
+
+    if escalated:
+        notifications.notify_hospital(
+            hospital_id,
+            f"{escalated} waiting surgery request(s) escalated for waiting too long or nearing their deadline.",
+            severity="warning",
+            roles=NOTIFY_ROLES,
+        )
+    return {"waiting": len(waiting), "created": len(created), "updated": len(updated), "escalated": escalated}
@@ -0,0 +1,379 @@
+"""
+Background jobs on the database, no broker.
+
+Work that is too heavy for a request (notification fan-out, sterilization
+sweeps, waiting-list escalation) is enqueued as a `Job` row and run by
+`manage.py run_workers`, a pool of worker threads:
+
+- `enqueue()` adds a job. A `dedup_key` allows at most one queued or running
+  job per key (a partial unique constraint), so repeated clicks or periodic
+  triggers collapse into the job already waiting.
+- `claim()` takes the next queued job by (priority, run_after, id) with a
+  conditional UPDATE that only one worker can win. On PostgreSQL the
+  candidates are read with SKIP LOCKED so workers do not queue up behind
+  each other's rows; on SQLite the write queue and BEGIN IMMEDIATE
+  serialize claims. Tasks take the write queue only around their write
+  transactions, batch by batch, so a long task does not hold up the web
+  writers of the same process.
+- A claimed job holds a lease of LEASE_SECONDS. `run()` records the result,
+  or requeues the job with exponential backoff (RETRY_SECONDS * 2^n) until
+  `max_attempts` is reached. `reap()` gives the jobs of crashed workers
+  (expired leases) the same treatment.
+- `enqueue_periodic()` adds the JOBS["PERIODIC"] tasks for every active
+  hospital once per period; the period is part of the dedup key, so any
+  number of worker processes enqueue each run once.
+
+Jobs live on `default` whatever the sharding; a job with a `hospital_id` runs
+on that hospital's shard. Tasks registered with `@task` take the hospital id
+and the job's `args` and return a JSON-serializable result. Realtime events
+published by a task reach web processes only through a shared backplane
+(REALTIME["BACKPLANE"]).
+"""
+
+import logging
+import os
+import socket
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import Hospital, Job, Notification
+from core.modules import changelog, escalation, notifications, sharding, sterilization
+from core.modules.sqlite import serialized_writes
+from core.modules.tenancy import tenant_db
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS: dict[str, Any] = {
+    "POLL_SECONDS": 1.0,
+    "LEASE_SECONDS": 600,
+    "MAX_ATTEMPTS": 3,
+    "RETRY_SECONDS": 30,
+    "KEEP_DAYS": 7,
+    "PERIODIC": {
+        "escalate_queue": 24 * 3600,
+        "sterilization_sweep": 15 * 60,
+        "prune_changelog": 24 * 3600,
+    },
+}
+
+# Candidates read per claim when the database cannot skip locked rows
+CLAIM_BATCH = 8
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "JOBS", {}).get(name, DEFAULTS[name])
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: Callable[..., Any]
+    priority: int
+    max_attempts: Optional[int]
+
+
+TASKS: dict[str, Task] = {}
+
+# The job a task is running for, for tasks that resume a partial earlier attempt
+current_job: ContextVar[Optional[Job]] = ContextVar("current_job", default=None)
+
+
+def task(name: str, priority: int = 100, max_attempts: Optional[int] = None) -> Callable:
+    """
+    Register `func(hospital_id, **args)` as the task `name`. Lower
+    priorities run first.
+    """
+
+    def register(func: Callable) -> Callable:
+        TASKS[name] = Task(name, func, priority, max_attempts)
+        return func
+
+    return register
+
+
+def worker_name(index: int = 0) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+# ---------------------
+# Enqueue
+# ---------------------
+def enqueue(
+    name: str,
+    hospital_id: Any = None,
+    args: Optional[dict] = None,
+    *,
+    priority: Optional[int] = None,
+    dedup_key: Optional[str] = None,
+    run_after: Optional[datetime] = None,
+    created_by_id: Optional[int] = None,
+) -> Job:
+    """
+    Add a job for the task `name`. With `dedup_key`, returns the queued or
+    running job with that key instead if there is one.
+    """
+    if name not in TASKS:
+        raise ValueError(f"Unknown task {name!r}.")
+    registered = TASKS[name]
+    active = Job.objects.filter(dedup_key=dedup_key, status__in=Job.ACTIVE_STATUSES)
+    if dedup_key:
+        existing = active.first()
+        if existing is not None:
+            return existing
+    job = Job(
+        task=name,
+        hospital_id=hospital_id,
+        args=args or {},
+        priority=registered.priority if priority is None else priority,
+        dedup_key=dedup_key or None,
+        max_attempts=registered.max_attempts or get_setting("MAX_ATTEMPTS"),
+        run_after=run_after or timezone.now(),
+        created_by_id=created_by_id,
+    )
+    try:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            job.save(using=DEFAULT_DB_ALIAS)
+    except IntegrityError:
+        # Another enqueue of the same key won the race
+        existing = active.first() if dedup_key else None
+        if existing is None:
+            raise
+        return existing
+    return job
+
+
+def enqueue_on_commit(name: str, hospital_id: Any = None, args: Optional[dict] = None, **options: Any) -> None:
+    """
+    `enqueue` once the current tenant transaction commits, so workers never
+    see a job for rows that were rolled back.
+    """
+    transaction.on_commit(lambda: enqueue(name, hospital_id, args, **options), using=tenant_db())
+
+
+def enqueue_periodic(now: Optional[datetime] = None) -> int:
+    """
+    Enqueue each JOBS["PERIODIC"] task for every active hospital, once per
+    period. Returns the number of jobs added.
+    """
+    now = now or timezone.now()
+    periodic = {name: seconds for name, seconds in get_setting("PERIODIC").items() if seconds}
+    if not periodic:
+        return 0
+    hospital_ids = []
+    for alias in sharding.each_shard():
+        for hospital_id in Hospital.objects.filter(is_active=True).values_list("id", flat=True):
+            if not sharding.enabled() or sharding.shard_for_hospital(hospital_id) == alias:
+                hospital_ids.append(hospital_id)
+
+    added = 0
+    for name, seconds in periodic.items():
+        period = int(now.timestamp() // seconds)
+        keys = {f"{name}:{hospital_id}:{period}": hospital_id for hospital_id in hospital_ids}
+        # Keys of finished runs stay on their rows, so a period runs once
+        done = set(Job.objects.filter(dedup_key__in=keys).values_list("dedup_key", flat=True))
+        with serialized_writes():
+            for key, hospital_id in keys.items():
+                if key not in done:
+                    enqueue(name, hospital_id, dedup_key=key, run_after=now)
+                    added += 1
+    return added
+
+
+# ---------------------
+# Claim and run
+# ---------------------
+def claim(worker: str, now: Optional[datetime] = None) -> Optional[Job]:
+    """
+    Lease the next runnable job to `worker`, or None if there is none.
+    """
+    now = now or timezone.now()
+    runnable = Q(status="queued", run_after__lte=now)
+    skip_locked = connections[DEFAULT_DB_ALIAS].features.has_select_for_update_skip_locked
+    with serialized_writes(), transaction.atomic(using=DEFAULT_DB_ALIAS):
+        candidates = Job.objects.filter(runnable).order_by("priority", "run_after", "id")
+        if skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)[:1]
+        else:
+            candidates = candidates[:CLAIM_BATCH]
+        for job_id in candidates.values_list("id", flat=True):
+            won = Job.objects.filter(runnable, id=job_id).update(
+                status="running",
+                attempts=F("attempts") + 1,
+                locked_by=worker,
+                locked_until=now + timedelta(seconds=get_setting("LEASE_SECONDS")),
+                started_at=now,
+            )
+            if won:
+                return Job.objects.get(id=job_id)
+    return None
+
+
+def _retry_or_fail(job: Job, error: str, now: datetime) -> str:
+    """
+    Requeue `job` with backoff, or fail it after its last attempt. Only
+    while `job.locked_by` still holds it.
+    """
+    owned = Job.objects.filter(id=job.id, status="running", locked_by=job.locked_by)
+    if job.attempts >= job.max_attempts:
+        owned.update(status="failed", error=error, finished_at=now, locked_until=None)
+        return "failed"
+    delay = get_setting("RETRY_SECONDS") * 2 ** (job.attempts - 1)
+    owned.update(
+        status="queued",
+        error=error,
+        run_after=now + timedelta(seconds=delay),
+        locked_by="",
+        locked_until=None,
+    )
+    return "queued"
+
+
+def run(job: Job) -> str:
+    """
+    Run a claimed job and record the outcome. Returns the new status.
+    """
+    registered = TASKS.get(job.task)
+    try:
+        if registered is None:
+            raise LookupError(f"Unknown task {job.task!r}.")
+        shard = (
+            sharding.use_shard(sharding.shard_for_hospital(job.hospital_id))
+            if sharding.enabled() and job.hospital_id
+            else nullcontext()
+        )
+        token = current_job.set(job)
+        try:
+            with shard:
+                result = registered.func(job.hospital_id, **job.args)
+        finally:
+            current_job.reset(token)
+    except Exception as error:
+        logger.exception("Job %s (%s) failed on attempt %s", job.id, job.task, job.attempts)
+        with serialized_writes():
+            return _retry_or_fail(job, f"{type(error).__name__}: {error}", timezone.now())
+
+    with serialized_writes():
+        Job.objects.filter(id=job.id, status="running", locked_by=job.locked_by).update(
+            status="succeeded",
+            result=result,
+            error="",
+            finished_at=timezone.now(),
+            locked_until=None,
+        )
+    return "succeeded"
+
+
+def reap(now: Optional[datetime] = None) -> int:
+    """
+    Retry (or fail) running jobs whose lease expired: their worker died or
+    overran LEASE_SECONDS. Returns the number of jobs reaped.
+    """
+    now = now or timezone.now()
+    expired = list(Job.objects.filter(status="running", locked_until__lt=now))
+    with serialized_writes():
+        for job in expired:
+            _retry_or_fail(job, "Lease expired before the job finished.", now)
+    return len(expired)
+
+
+def prune(now: Optional[datetime] = None) -> int:
+    """
+    Delete finished jobs older than KEEP_DAYS.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=get_setting("KEEP_DAYS"))
+    with serialized_writes():
+        deleted, _ = Job.objects.filter(
+            status__in=["succeeded", "failed", "cancelled"], finished_at__lt=cutoff
+        ).delete()
+    return deleted
+
+
+def cancel(job_id: Any, hospital_id: Any) -> Optional[Job]:
+    """
+    Cancel a queued job of `hospital_id`. Returns the job (whatever its
+    status now is), or None if there is no such job.
+    """
+    Job.objects.filter(id=job_id, hospital_id=hospital_id, status="queued").update(
+        status="cancelled", finished_at=timezone.now()
+    )
+    return Job.objects.filter(id=job_id, hospital_id=hospital_id).first()
+
+
+# ---------------------
+# Tasks
+# ---------------------
+# Tasks run outside the write queue and take it around each write
+# transaction; reads and computation between them run alongside web writers.
+
+
+@task("notify_hospital", priority=10)
+def notify_hospital(hospital_id: Any, message: str, severity: str = "info", roles: Optional[list] = None) -> dict:
+    """
+    Fan out in batches of BULK_BATCH_SIZE recipients, one transaction each.
+    A retry skips the recipients an earlier attempt already delivered to.
+    """
+    profile_ids = notifications.recipients(hospital_id, roles)
+    job = current_job.get()
+    if job is not None and job.attempts > 1:
+        delivered = set(
+            Notification.objects.filter(
+                base_profile_id__in=profile_ids,
+                message=message,
+                severity=severity,
+                created_at__gte=job.created_at,
+            ).values_list("base_profile_id", flat=True)
+        )
+        profile_ids = [profile_id for profile_id in profile_ids if profile_id not in delivered]
+    batch_size = notifications.BULK_BATCH_SIZE
+    for offset in range(0, len(profile_ids), batch_size):
+        with serialized_writes():
+            notifications.deliver(hospital_id, profile_ids[offset : offset + batch_size], message, severity)
+    if profile_ids:
+        notifications.publish_created(hospital_id, message, severity, roles)
+    return {"created": len(profile_ids)}
+
+
+@task("escalate_queue", priority=50)
+def escalate_queue(hospital_id: Any) -> dict:
+    # One bulk write transaction (and a notification to a few roles)
+    with serialized_writes():
+        return escalation.escalate(hospital_id)
+
+
+@task("prune_changelog", priority=90)
+def prune_changelog(hospital_id: Any) -> dict:
+    # Batched DELETEs, each its own short write
+    with serialized_writes():
+        return {"deleted": changelog.prune(hospital_id)}
+
+
+@task("sterilization_sweep", priority=30)
+def sterilization_sweep(hospital_id: Any, record: bool = False) -> dict:
+    """
+    Flag lapsed items for sterilization and plan (with `record`, book) the
+    sterilizer cycles of the upcoming surgeries.
+    """
+    with serialized_writes():
+        expired = sterilization.expire(hospital_id)
+    if record:
+        # Booking must see the cycles booked so far: plan and record together
+        with serialized_writes(), transaction.atomic(using=tenant_db()):
+            plan = sterilization.plan(hospital_id)
+            if plan.jobs:
+                sterilization.record(plan.jobs)
+    else:
+        plan = sterilization.plan(hospital_id)
+    return {
+        "expired": expired,
+        "cycles": len(plan.jobs),
+        "booked": bool(record and plan.jobs),
+        "at_risk_schedule_ids": sorted({risk.schedule_id for risk in plan.at_risk}),
+    }
@@ -0,0 +1,27 @@
+"""
+Base for this project's middleware.
+
+Django runs a sync-only middleware under ASGI on a worker thread and keeps
+that thread for the rest of the request, async views included, so one
+sync-only middleware is enough to tie a thread to every open SSE stream or
+dashboard request. Middleware built on `HybridMiddleware` runs natively in
+both stacks: `__call__` under WSGI, `__acall__` under ASGI.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+class HybridMiddleware:
+    """
+    Subclasses implement `__call__` (sync) and `__acall__` (async), and start
+    `__call__` with ``if self.is_async: return self.__acall__(request)``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
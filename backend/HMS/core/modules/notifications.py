@@ -0,0 +1,191 @@
+"""
+Notification service.
+
+All bulk paths keep `BaseUserProfile.unread_notifications` in step with the
+`Notification` rows so the badge never needs a COUNT(*):
+- `notify_hospital` fans one message out with a single bulk INSERT and a
+  single counter UPDATE, however many recipients there are; background jobs
+  call `deliver` per batch of `recipients` instead, so no one transaction
+  holds the write lock for a whole hospital
+- `mark_read_up_to` marks a whole inbox prefix read with one UPDATE
+
+Both also append their rows to the sync change log in one bulk INSERT.
+
+Single notifications are plain `Notification.objects.create()` calls: the
+signal in `core.signals` counts and publishes them.
+"""
+
+from typing import Any, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import F, IntegerField, Value
+from django.db.models.functions import Greatest
+
+from core.models import BaseUserProfile, Notification
+from core.modules import archive, changelog, realtime
+from core.modules.tenancy import tenant_db
+
+BULK_BATCH_SIZE = 500
+EMERGENCY_ROLES = ["admin", "surgeon", "scheduler", "room_manager"]
+
+
+def notify_hospital(
+    hospital_id: Any,
+    message: str,
+    severity: str = "info",
+    roles: Optional[Iterable[str]] = None,
+) -> int:
+    """
+    Create one notification per profile in `hospital_id` (optionally only
+    `roles`). Returns the number of notifications created.
+    """
+    roles = list(roles) if roles is not None else None
+    with transaction.atomic(using=tenant_db()):
+        profile_ids = recipients(hospital_id, roles)
+        if not profile_ids:
+            return 0
+        deliver(hospital_id, profile_ids, message, severity)
+
+    # One event for the whole group instead of one per recipient
+    transaction.on_commit(
+        lambda: publish_created(hospital_id, message, severity, roles),
+        using=tenant_db(),
+    )
+    return len(profile_ids)
+
+
+def recipients(hospital_id: Any, roles: Optional[Iterable[str]] = None) -> list[int]:
+    """
+    Ids of the profiles in `hospital_id` (optionally only `roles`).
+    """
+    profiles = BaseUserProfile.objects.filter(hospital_id=hospital_id)
+    if roles is not None:
+        profiles = profiles.filter(role__in=list(roles))
+    return list(profiles.order_by("id").values_list("id", flat=True))
+
+
+def deliver(
+    hospital_id: Any, profile_ids: list[int], message: str, severity: str = "info"
+) -> list[Notification]:
+    """
+    Create the notifications of `profile_ids` with their counter bump and
+    change-log entries in one transaction. Publishes nothing.
+    """
+    with transaction.atomic(using=tenant_db()):
+        created = Notification.objects.bulk_create(
+            [
+                Notification(base_profile_id=profile_id, message=message, severity=severity)
+                for profile_id in profile_ids
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        BaseUserProfile.objects.filter(id__in=profile_ids).update(
+            unread_notifications=F("unread_notifications") + 1
+        )
+        changelog.record_bulk(hospital_id, created, "create")
+    return created
+
+
+def publish_created(
+    hospital_id: Any, message: str, severity: str, roles: Optional[Iterable[str]] = None
+) -> None:
+    realtime.publish(
+        hospital_id,
+        "NOTIFICATION_CREATED",
+        {"message": message, "severity": severity},
+        roles=list(roles) if roles is not None else None,
+    )
+
+
+def mark_read_up_to(profile: BaseUserProfile, up_to_id: int) -> int:
+    """
+    Mark every unread notification of `profile` with id <= `up_to_id` read.
+    Returns the number of notifications marked.
+    """
+    with transaction.atomic(using=tenant_db()):
+        to_mark = Notification.objects.filter(
+            base_profile=profile, is_read=False, id__lte=up_to_id
+        )
+        # Locked rows for the change log; ids only grow, so the UPDATE below
+        # cannot pick up rows inserted after this read.
+        unread = list(to_mark.select_for_update())
+        marked = to_mark.update(is_read=True)
+        if marked:
+            for notification in unread:
+                notification.is_read = True
+            changelog.record_bulk(profile.hospital_id, unread, "update")
+            BaseUserProfile.objects.filter(id=profile.id).update(
+                unread_notifications=Greatest(
+                    F("unread_notifications") - marked,
+                    Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+    return marked
+
+
+def unread_count(profile: BaseUserProfile) -> int:
+    return (
+        BaseUserProfile.objects.filter(id=profile.id)
+        .values_list("unread_notifications", flat=True)
+        .get()
+    )
+
+
+def inbox_page(
+    profile: BaseUserProfile,
+    before_id: Optional[int] = None,
+    limit: int = 50,
+    unread_only: bool = False,
+    include_archived: bool = False,
+) -> tuple[list[Any], Optional[int]]:
+    """
+    Keyset page of `profile`'s notifications, newest first.
+
+    Returns (notifications, next_before_id); pass `next_before_id` back as
+    `before_id` for the next page. It is None on the last page.
+    """
+    notifications = Notification.objects.filter(base_profile=profile)
+    if unread_only:
+        notifications = notifications.filter(is_read=False)
+    if before_id is not None:
+        notifications = notifications.filter(id__lt=before_id)
+
+    page = list(notifications.order_by("-id")[: limit + 1])
+    if include_archived and not unread_only:
+        # Only read notifications are archived
+        page = archive.merge_inbox(profile, page, before_id, limit)
+    next_before_id = page[limit - 1].id if len(page) > limit else None
+    return page[:limit], next_before_id
+
+
+async def aunread_count(profile_id: int) -> int:
+    return (
+        await BaseUserProfile.objects.filter(id=profile_id)
+        .values_list("unread_notifications", flat=True)
+        .aget()
+    )
+
+
+async def ainbox_page(
+    profile_id: int,
+    before_id: Optional[int] = None,
+    limit: int = 50,
+    unread_only: bool = False,
+    include_archived: bool = False,
+) -> tuple[list[Any], Optional[int]]:
+    """
+    `inbox_page` on the async ORM, for the profile id an async view gets
+    from `core.modules.sockets.aauthenticate_token`.
+    """
+    notifications = Notification.objects.filter(base_profile_id=profile_id)
+    if unread_only:
+        notifications = notifications.filter(is_read=False)
+    if before_id is not None:
+        notifications = notifications.filter(id__lt=before_id)
+
+    page = [row async for row in notifications.order_by("-id")[: limit + 1]]
+    if include_archived and not unread_only:
+        page = await archive.amerge_inbox(profile_id, page, before_id, limit)
+    next_before_id = page[limit - 1].id if len(page) > limit else None
+    return page[:limit], next_before_id
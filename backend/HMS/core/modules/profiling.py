@@ -0,0 +1,329 @@
+"""
+On-demand request profiling.
+
+`ProfilingMiddleware` profiles a request when an admin sends the PROFILING
+header (`X-Profile: 1`, or `cprofile` / `sampling` to pick the profiler), or
+when it falls in the PROFILING["SAMPLE_RATE"] fraction of requests under
+PROFILING["SAMPLE_PATHS"] and not under SAMPLE_EXCLUDE_PATHS (login and
+token refresh by default). Each profile is saved under OUTPUT_DIR as one
+directory of artifacts:
+
+- `profile.pstats`: cProfile stats (`python -m pstats`, snakeviz)
+- `stacks.collapsed`: sampled stacks in collapsed format ("a;b;c 12"), the
+  input of flamegraph.pl, speedscope and inferno
+- `sql.json`: every query run, with alias and duration; parameters are
+  replaced by their type names, so no passwords, tokens or patient data
+  reach the disk
+- `meta.json`: request (path without query string), timings and totals
+
+The response carries `X-Profile-Id`; admins fetch the artifacts from
+`/profiles`. Only one request per process is profiled at a time, others
+run normally.
+"""
+
+import cProfile
+import json
+import random
+import re
+import secrets
+import shutil
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+from types import FrameType
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+
+from core.modules.middleware import HybridMiddleware
+
+DEFAULTS: dict[str, Any] = {
+    "ENABLED": True,
+    "HEADER": "X-Profile",
+    "SAMPLE_RATE": 0.0,
+    "SAMPLE_PATHS": ["/api/"],
+    "SAMPLE_EXCLUDE_PATHS": ["/api/v1/auth/"],
+    "PROFILER": "cprofile",
+    "SAMPLE_INTERVAL_MS": 2,
+    "OUTPUT_DIR": Path(settings.BASE_DIR) / "var" / "profiles",
+    "KEEP": 200,
+}
+PROFILERS = ("cprofile", "sampling")
+ARTIFACTS = {
+    "pstats": "profile.pstats",
+    "collapsed": "stacks.collapsed",
+    "sql": "sql.json",
+    "meta": "meta.json",
+}
+PROFILE_ID = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{6}$")
+
+_busy = threading.Lock()
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "PROFILING", {}).get(name, DEFAULTS[name])
+
+
+def output_dir() -> Path:
+    return Path(get_setting("OUTPUT_DIR"))
+
+
+def profile_dir(profile_id: str) -> Optional[Path]:
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = output_dir() / profile_id
+    return path if path.is_dir() else None
+
+
+def load_meta(profile_id: str) -> Optional[dict]:
+    path = profile_dir(profile_id)
+    if path is None:
+        return None
+    try:
+        return json.loads((path / ARTIFACTS["meta"]).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def list_profiles(hospital_id: Optional[str] = None) -> list[dict]:
+    """
+    Saved profiles, newest first. With `hospital_id`, only requests made by
+    that hospital's users.
+    """
+    root = output_dir()
+    if not root.is_dir():
+        return []
+    profiles = []
+    for path in sorted(root.iterdir(), reverse=True):
+        meta = load_meta(path.name)
+        if meta is None:
+            continue
+        if hospital_id is None or meta.get("hospital_id") == hospital_id:
+            profiles.append(meta)
+    return profiles
+
+
+# ---------------------
+# Capture
+# ---------------------
+def redact_params(params: Any) -> Any:
+    """
+    Placeholders for query parameters: each value becomes "<type name>".
+    """
+    if isinstance(params, dict):
+        return {name: f"<{type(value).__name__}>" for name, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [f"<{type(value).__name__}>" for value in params]
+    return None if params is None else f"<{type(params).__name__}>"
+
+
+class SQLTrace:
+    """
+    `execute_wrapper` recording every query on every connection, with the
+    parameters redacted.
+    """
+
+    def __init__(self) -> None:
+        self.queries: list[dict] = []
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: dict) -> Any:
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if many:
+                # executemany parameters can be huge; keep the row count only
+                params = f"<{len(params) if hasattr(params, '__len__') else '?'} rows>"
+            else:
+                params = redact_params(params)
+            self.queries.append(
+                {
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "params": params,
+                    "many": many,
+                    "ms": round((time.perf_counter() - started) * 1000, 3),
+                }
+            )
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples one thread's Python stack every `interval` seconds, counting
+    stacks from `root` (a code object on that stack) down.
+    """
+
+    def __init__(self, thread_id: int, interval: float, root: Any) -> None:
+        super().__init__(name="hms-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root = root
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        names = []
+        while frame is not None and frame.f_code is not self.root:
+            names.append(_frame_name(frame))
+            frame = frame.f_back
+        if names:
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _frame_name(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)}"
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """
+    Profile admin requests carrying the PROFILING header, plus a sampled
+    fraction of all requests. Place after AuthenticationMiddleware.
+    """
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_async:
+            return self.__acall__(request)
+        if not get_setting("ENABLED"):
+            return self.get_response(request)
+        trigger, profiler = self._trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        user = _request_user(request)
+        if trigger == "header" and not _is_admin(user):
+            return self.get_response(request)
+        if not _busy.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self._profile(request, trigger, profiler, user)
+        finally:
+            _busy.release()
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        # Not profiled: the stack sampler and cProfile follow one thread,
+        # and an ASGI request moves between the event loop and workers
+        return await self.get_response(request)
+
+    def _trigger(self, request: HttpRequest) -> tuple[Optional[str], str]:
+        value = request.headers.get(get_setting("HEADER"), "").strip().lower()
+        default = get_setting("PROFILER")
+        if value and value not in ("0", "false", "off"):
+            return "header", value if value in PROFILERS else default
+        rate = get_setting("SAMPLE_RATE")
+        if rate and random.random() < rate:
+            path = request.path
+            if any(path.startswith(prefix) for prefix in get_setting("SAMPLE_PATHS")) and not any(
+                path.startswith(prefix) for prefix in get_setting("SAMPLE_EXCLUDE_PATHS")
+            ):
+                return "sample", default
+        return None, default
+
+    def _profile(self, request: HttpRequest, trigger: str, profiler: str, user: Any) -> HttpResponse:
+        trace = SQLTrace()
+        sampler = StackSampler(
+            threading.get_ident(),
+            get_setting("SAMPLE_INTERVAL_MS") / 1000,
+            self._profile.__func__.__code__,
+        )
+        profile = cProfile.Profile() if profiler == "cprofile" else None
+        started_at = timezone.now()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(trace))
+            sampler.start()
+            if profile is not None:
+                profile.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profile is not None:
+                    profile.disable()
+                sampler.stop()
+        duration = time.perf_counter() - started
+        if not sampler.stacks:
+            # Faster than one sampling interval; record where it ended at least
+            sampler.stacks[_frame_name(sys._getframe())] += 1
+
+        profile_id = f"{started_at:%Y%m%dT%H%M%S}-{secrets.token_hex(3)}"
+        profile_user = getattr(user, "baseuserprofile", None) if user is not None else None
+        meta = {
+            "id": profile_id,
+            "created_at": started_at.isoformat(),
+            "method": request.method,
+            # The query string may carry a token (EventSource cannot send headers)
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "trigger": trigger,
+            "profiler": profiler,
+            "user": user.get_username() if user is not None else None,
+            "hospital_id": str(profile_user.hospital_id) if profile_user and profile_user.hospital_id else None,
+            "queries": len(trace.queries),
+            "sql_ms": round(sum(query["ms"] for query in trace.queries), 3),
+            "samples": sum(sampler.stacks.values()),
+            "artifacts": ["collapsed", "sql", "meta"] + (["pstats"] if profile is not None else []),
+        }
+        _save(profile_id, meta, profile, sampler.stacks, trace.queries)
+        response["X-Profile-Id"] = profile_id
+        return response
+
+
+def _request_user(request: HttpRequest) -> Any:
+    # Middleware runs before DRF authentication, so JWT users are resolved here
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user
+    from rest_framework.exceptions import APIException
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except APIException:
+        return None
+    return result[0] if result else None
+
+
+def _is_admin(user: Any) -> bool:
+    if user is None:
+        return False
+    if user.is_superuser:
+        return True
+    profile = getattr(user, "baseuserprofile", None)
+    return profile is not None and profile.role == "admin"
+
+
+def _save(
+    profile_id: str, meta: dict, profile: Optional[cProfile.Profile], stacks: Counter, queries: list[dict]
+) -> None:
+    root = output_dir()
+    path = root / profile_id
+    path.mkdir(parents=True, exist_ok=True)
+    if profile is not None:
+        profile.dump_stats(path / ARTIFACTS["pstats"])
+    with open(path / ARTIFACTS["collapsed"], "w") as out:
+        for stack, count in stacks.most_common():
+            out.write(f"{stack} {count}\n")
+    with open(path / ARTIFACTS["sql"], "w") as out:
+        json.dump(queries, out, indent=1, default=str)
+    # meta.json last: list_profiles() skips directories without it
+    with open(path / ARTIFACTS["meta"], "w") as out:
+        json.dump(meta, out, indent=1)
+
+    for old in sorted(root.iterdir(), reverse=True)[get_setting("KEEP") :]:
+        shutil.rmtree(old, ignore_errors=True)
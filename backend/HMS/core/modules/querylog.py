@@ -0,0 +1,238 @@
+"""
+Slow-query log and N+1 detection.
+
+`QueryLogMiddleware` wraps every database connection for the length of a
+request (`connection.execute_wrapper`) and times each query:
+
+- queries slower than QUERYLOG["SLOW_MS"] are logged with the view that ran
+  them and the application frames (this project's code, not Django's) that
+  issued them;
+- statements are fingerprinted (literals, placeholders and IN/VALUES lists
+  collapsed), and when one fingerprint runs DUPLICATE_THRESHOLD or more times
+  in a request the endpoint gets an N+1 warning with where the first one came
+  from. Repeats of the same finding on the same endpoint are folded into one
+  report per REPORT_SECONDS.
+
+With STRUCTURED, each log message is a JSON object; the same dict is always
+attached to the record as `query_log` for JSON formatters.
+
+Commands and background jobs can use `monitor("name")` the same way.
+"""
+
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+from core.modules.middleware import HybridMiddleware
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS: dict[str, Any] = {
+    "ENABLED": True,
+    "SLOW_MS": 200,
+    "DUPLICATE_THRESHOLD": 5,
+    "REPORT_SECONDS": 300,
+    "STACK_DEPTH": 6,
+    "STRUCTURED": False,
+}
+
+APP_ROOT = str(Path(settings.BASE_DIR).resolve())
+_THIS_FILE = __file__
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?|NULL)\s*,?)+\)", re.IGNORECASE)
+_VALUES = re.compile(r"\bVALUES\s*(\((?:[^()]|\([^()]*\))*\))(?:\s*,\s*\((?:[^()]|\([^()]*\))*\))*", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+# (endpoint, fingerprint) -> [last reported at, occurrences since]
+_reported: dict[tuple[str, str], list] = {}
+_reported_lock = threading.Lock()
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "QUERYLOG", {}).get(name, DEFAULTS[name])
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    """
+    Shape of a statement: the same query with different values, or a
+    different number of IN/VALUES items, has the same fingerprint.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _VALUES.sub(r"VALUES \1", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def app_stack(depth: Optional[int] = None) -> list[str]:
+    """
+    Innermost-first "path:line in function" of this project's own frames.
+    """
+    depth = depth or get_setting("STACK_DEPTH")
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None and len(frames) < depth:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_ROOT) and filename != _THIS_FILE and "site-packages" not in filename:
+            frames.append(
+                f"{filename[len(APP_ROOT) + 1:]}:{frame.f_lineno} in {frame.f_code.co_name}"
+            )
+        frame = frame.f_back
+    return frames
+
+
+def _emit(level: int, message: str, record: dict) -> None:
+    if get_setting("STRUCTURED"):
+        message = json.dumps(record, default=str)
+    logger.log(level, message, extra={"query_log": record})
+
+
+class QueryMonitor:
+    """
+    `execute_wrapper` timing and fingerprinting every query of one unit of
+    work (a request, a command).
+    """
+
+    def __init__(self, endpoint: str = "?") -> None:
+        self.endpoint = endpoint
+        self.slow_ms = get_setting("SLOW_MS")
+        self.count = 0
+        self.total_ms = 0.0
+        # fingerprint -> [count, total ms, stack of the first one, sql of the first one]
+        self.statements: dict[str, list] = {}
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: dict) -> Any:
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.total_ms += ms
+            key = fingerprint(sql)
+            seen = self.statements.get(key)
+            stack = None
+            if seen is None:
+                stack = app_stack()
+                self.statements[key] = [1, ms, stack, sql]
+            else:
+                seen[0] += 1
+                seen[1] += ms
+            if ms >= self.slow_ms:
+                self._slow(sql, ms, context["connection"].alias, stack or app_stack())
+
+    def _slow(self, sql: str, ms: float, alias: str, stack: list[str]) -> None:
+        record = {
+            "event": "slow_query",
+            "endpoint": self.endpoint,
+            "alias": alias,
+            "ms": round(ms, 1),
+            "sql": sql,
+            "stack": stack,
+        }
+        where = stack[0] if stack else "unknown caller"
+        _emit(logging.WARNING, f"Slow query ({ms:.0f} ms) in {self.endpoint} at {where}: {sql}", record)
+
+    def report(self) -> None:
+        """
+        Log the statements that ran DUPLICATE_THRESHOLD or more times.
+        """
+        threshold = get_setting("DUPLICATE_THRESHOLD")
+        duplicates = [
+            (key, seen) for key, seen in self.statements.items() if seen[0] >= threshold
+        ]
+        if not duplicates:
+            return
+        now = time.monotonic()
+        window = get_setting("REPORT_SECONDS")
+        for key, (count, ms, stack, sql) in sorted(duplicates, key=lambda item: -item[1][0]):
+            with _reported_lock:
+                state = _reported.setdefault((self.endpoint, key), [float("-inf"), 0])
+                state[1] += 1
+                if now - state[0] < window:
+                    continue
+                occurrences, state[0], state[1] = state[1], now, 0
+            record = {
+                "event": "duplicate_queries",
+                "endpoint": self.endpoint,
+                "count": count,
+                "ms": round(ms, 1),
+                "request_queries": self.count,
+                "request_ms": round(self.total_ms, 1),
+                "occurrences": occurrences,
+                "fingerprint": key,
+                "sql": sql,
+                "stack": stack,
+            }
+            where = stack[0] if stack else "unknown caller"
+            _emit(
+                logging.WARNING,
+                f"N+1 in {self.endpoint}: {count} of {self.count} queries are "
+                f"{key[:200]} ({ms:.0f} ms, first at {where}; seen in {occurrences} "
+                f"request(s) since the last report)",
+                record,
+            )
+
+
+@contextmanager
+def monitor(endpoint: str) -> Iterator[QueryMonitor]:
+    """
+    Monitor every connection's queries for the duration of the block.
+    """
+    query_monitor = QueryMonitor(endpoint)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(query_monitor))
+        yield query_monitor
+    query_monitor.report()
+
+
+def view_name(request: HttpRequest, view_func: Callable) -> str:
+    # DRF viewsets: "StaffViewSet.list" rather than the generic view function
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return f"{request.method} {view_func.__module__}.{view_func.__qualname__}"
+    actions = getattr(view_func, "actions", None) or {}
+    handler = actions.get(request.method.lower(), request.method.lower())
+    return f"{request.method} {cls.__name__}.{handler}"
+
+
+class QueryLogMiddleware(HybridMiddleware):
+    """
+    Slow-query and N+1 logging for every request.
+    """
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_async:
+            return self.__acall__(request)
+        if not get_setting("ENABLED"):
+            return self.get_response(request)
+        with monitor(f"{request.method} {request.path}") as query_monitor:
+            request._query_monitor = query_monitor
+            return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        # Not monitored: the execute wrappers are per connection, and an
+        # ASGI request's queries run on connections of other threads
+        return await self.get_response(request)
+
+    def process_view(self, request: HttpRequest, view_func: Callable, view_args, view_kwargs) -> None:
+        query_monitor = getattr(request, "_query_monitor", None)
+        if query_monitor is not None:
+            query_monitor.endpoint = view_name(request, view_func)
@@ -0,0 +1,283 @@
+"""
+In-process pub/sub hub for real-time events.
+
+Subscribers are grouped by (hospital_id, role). Publishers call `publish()`
+from any thread (sync views, signals, workers); delivery is handed to each
+subscriber's event loop with `call_soon_threadsafe`, so nothing here blocks
+the request.
+
+With more than one process, events go through a backplane: `LocalBackplane`
+delivers straight to this process, `RedisBackplane` fans out over a
+Redis-compatible pub/sub channel so every process sees every event.
+
+Each hospital also keeps a short in-memory history with a sequence number
+per event, so SSE reconnects (`Last-Event-ID`) and long-poll cursors can
+catch up without touching the DB. `RedisBackplane` numbers each event in
+Redis as it publishes it, so every process sees the same sequence and a
+cursor from one process resumes on another; `LocalBackplane` leaves the
+numbering to the hub.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS: dict[str, Any] = {
+    "BACKPLANE": "core.modules.realtime.LocalBackplane",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "CHANNEL": "hms:events",
+    "QUEUE_SIZE": 100,
+    "HISTORY_SIZE": 200,
+    "KEEPALIVE_SECONDS": 15,
+    "LONG_POLL_SECONDS": 25,
+    "STERILIZATION_WATCH_SECONDS": 300,
+    "STERILIZATION_WARNING_MINUTES": 60,
+}
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "REALTIME", {}).get(name, DEFAULTS[name])
+
+
+def _matches(
+    role: str,
+    profile_id: Optional[int],
+    target_roles: Optional[list[str]],
+    target_profile_id: Optional[int],
+) -> bool:
+    return (target_roles is None or role in target_roles) and (
+        target_profile_id is None or profile_id == target_profile_id
+    )
+
+
+@dataclass(eq=False)
+class Subscriber:
+    """
+    One connected client. Events are pushed onto `queue` on `loop`.
+    """
+
+    hospital_id: str
+    role: str
+    profile_id: Optional[int]
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(get_setting("QUEUE_SIZE")))
+
+    def accepts(self, roles: Optional[list[str]], profile_id: Optional[int]) -> bool:
+        return _matches(self.role, self.profile_id, roles, profile_id)
+
+    def push(self, payload: dict) -> None:
+        # Runs on the subscriber's loop. Slow clients lose their oldest event
+        # instead of growing memory without bound.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(payload)
+
+
+class Hub:
+    """
+    Subscriber registry keyed by (hospital_id, role).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._groups: dict[tuple[str, str], set[Subscriber]] = {}
+        self._history: dict[str, deque] = {}
+        self._seq: dict[str, int] = {}
+
+    def subscribe(
+        self, hospital_id: Any, role: str, profile_id: Optional[int] = None
+    ) -> Subscriber:
+        subscriber = Subscriber(
+            hospital_id=str(hospital_id),
+            role=role,
+            profile_id=profile_id,
+            loop=asyncio.get_running_loop(),
+        )
+        with self._lock:
+            self._groups.setdefault((subscriber.hospital_id, role), set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        key = (subscriber.hospital_id, subscriber.role)
+        with self._lock:
+            group = self._groups.get(key)
+            if group is not None:
+                group.discard(subscriber)
+                if not group:
+                    del self._groups[key]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(group) for group in self._groups.values())
+
+    def deliver(self, message: dict) -> None:
+        """
+        Deliver a backplane message to matching local subscribers. A message
+        numbered by the backplane (`seq`) keeps its number.
+        """
+        hospital_id = str(message["hospital_id"])
+        roles: Optional[list[str]] = message.get("roles")
+        profile_id: Optional[int] = message.get("profile_id")
+        payload: dict = message["payload"]
+
+        with self._lock:
+            seq = message.get("seq") or self._seq.get(hospital_id, 0) + 1
+            self._seq[hospital_id] = max(seq, self._seq.get(hospital_id, 0))
+            payload = {"seq": seq, **payload}
+            history = self._history.get(hospital_id)
+            if history is None:
+                history = self._history[hospital_id] = deque(maxlen=get_setting("HISTORY_SIZE"))
+            history.append((seq, roles, profile_id, payload))
+
+            targets = [
+                subscriber
+                for (group_hospital, _), group in self._groups.items()
+                if group_hospital == hospital_id
+                for subscriber in group
+                if subscriber.accepts(roles, profile_id)
+            ]
+
+        for subscriber in targets:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.push, payload)
+            except RuntimeError:
+                # Loop already closed; the connection is going away.
+                self.unsubscribe(subscriber)
+
+    def history(
+        self, hospital_id: Any, role: str, profile_id: Optional[int], after_seq: int
+    ) -> list[dict]:
+        """
+        Buffered events for this hospital/role/profile newer than `after_seq`.
+        """
+        with self._lock:
+            history = list(self._history.get(str(hospital_id), ()))
+        return [
+            payload
+            for seq, roles, target_profile_id, payload in history
+            if seq > after_seq and _matches(role, profile_id, roles, target_profile_id)
+        ]
+
+    def current_seq(self, hospital_id: Any) -> int:
+        with self._lock:
+            return self._seq.get(str(hospital_id), 0)
+
+
+class LocalBackplane:
+    """
+    Single-process backplane: publishing delivers directly to the local hub.
+    """
+
+    def __init__(self, deliver: Callable[[dict], None]) -> None:
+        self.deliver = deliver
+
+    def publish(self, message: dict) -> None:
+        self.deliver(message)
+
+
+class RedisBackplane:
+    """
+    Multi-process backplane over Redis pub/sub.
+
+    A Lua script takes the hospital's next sequence number and publishes
+    the message in one step, so the numbers arrive in order everywhere.
+    `client` may be any object with the redis-py `eval`/`pubsub` API, so a
+    local stand-in can be passed in tests.
+    """
+
+    # KEYS[1] = the hospital's counter, ARGV = channel, JSON message
+    PUBLISH_SCRIPT = """
+local seq = redis.call("INCR", KEYS[1])
+redis.call("PUBLISH", ARGV[1], '{"seq": ' .. seq .. ', ' .. string.sub(ARGV[2], 2))
+return seq
+"""
+
+    def __init__(self, deliver: Callable[[dict], None], client: Any = None) -> None:
+        if client is None:
+            import redis  # optional dependency, only needed for this backplane
+
+            client = redis.Redis.from_url(get_setting("REDIS_URL"))
+        self.deliver = deliver
+        self.client = client
+        self.channel = get_setting("CHANNEL")
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+
+    def publish(self, message: dict) -> None:
+        self.client.eval(
+            self.PUBLISH_SCRIPT,
+            1,
+            f"{self.channel}:seq:{message['hospital_id']}",
+            self.channel,
+            json.dumps(message, default=str),
+        )
+
+    def _listen(self) -> None:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for raw in pubsub.listen():
+            if raw.get("type") != "message":
+                continue
+            try:
+                self.deliver(json.loads(raw["data"]))
+            except Exception:
+                logger.exception("Dropping malformed realtime message")
+
+
+hub = Hub()
+_backplane = None
+_backplane_lock = threading.Lock()
+
+
+def get_backplane():
+    global _backplane
+    if _backplane is None:
+        with _backplane_lock:
+            if _backplane is None:
+                _backplane = import_string(get_setting("BACKPLANE"))(hub.deliver)
+    return _backplane
+
+
+def set_backplane(backplane) -> None:
+    """
+    Swap the backplane (e.g. a local stand-in in tests).
+    """
+    global _backplane
+    with _backplane_lock:
+        _backplane = backplane
+
+
+def publish(
+    hospital_id: Any,
+    event: str,
+    data: Optional[dict] = None,
+    roles: Optional[Iterable[str]] = None,
+    profile_id: Optional[int] = None,
+) -> None:
+    """
+    Publish `event` to every subscriber of `hospital_id`.
+
+    `roles` narrows delivery to those roles, `profile_id` to a single user.
+    """
+    if hospital_id is None:
+        return
+    message = {
+        "hospital_id": str(hospital_id),
+        "roles": list(roles) if roles is not None else None,
+        "profile_id": profile_id,
+        "payload": {"event": event, **(data or {})},
+    }
+    try:
+        get_backplane().publish(message)
+    except Exception:
+        # Real-time delivery is best effort; never fail the write that triggered it.
+        logger.exception("Failed to publish realtime event %s", event)
@@ -0,0 +1,271 @@
+"""
+Drag-and-drop rescheduling with optimistic concurrency.
+
+The client sends the `version` of the schedule it dragged. The move runs in
+one short transaction:
+
+1. a lock is taken on every (room, day) and (surgeon, day) the old and the
+   new window touch, all in one sorted pass, so coordinators only wait for
+   each other when they move from or onto the same room or surgeon on the
+   same day, and cannot deadlock;
+2. the schedule row is locked and its version compared: a different version
+   means someone else changed it first, and the move is refused with the
+   current row (STALE) instead of being retried;
+3. room, surgeon and equipment conflicts are re-checked and all of them are
+   reported together;
+4. the row is saved with version + 1 and its equipment reservations move
+   with it (core.modules.reservations).
+
+New schedules (`book`) take the same calendar locks and run the same room
+and surgeon checks before they are inserted.
+
+The (room, day) locks are PostgreSQL transaction-level advisory locks. SQLite
+runs one write transaction at a time (BEGIN IMMEDIATE), so there they are not
+needed.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Iterable, Optional
+
+from django.db import connections, transaction
+
+from core.models import OperatingRoom, SurgerySchedule
+from core.modules import reservations
+from core.modules.tenancy import tenant_db
+
+
+class RescheduleConflict(Exception):
+    """
+    The move was refused; `errors` lists {"type", "code", "message", ...}
+    and `schedule` is the current row (None if it no longer exists).
+    """
+
+    def __init__(self, errors: list[dict], schedule: Optional[SurgerySchedule] = None) -> None:
+        self.errors = errors
+        self.schedule = schedule
+        super().__init__("; ".join(error["message"] for error in errors))
+
+
+def _days(start: datetime, end: datetime) -> list[str]:
+    first = start.astimezone(dt_timezone.utc).date()
+    last = (end - timedelta.resolution).astimezone(dt_timezone.utc).date()
+    return [(first + timedelta(days=offset)).isoformat() for offset in range((last - first).days + 1)]
+
+
+def lock_key(kind: str, object_id: Any, day: str) -> int:
+    # Signed 64-bit, the type pg_advisory_xact_lock takes
+    digest = hashlib.blake2b(f"{kind}:{object_id}:{day}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def calendar_keys(room_id: Any, surgeon_ids: Iterable[Any], start: datetime, end: datetime) -> set[int]:
+    """
+    Lock keys of the room-days and surgeon-days [start, end) touches.
+    """
+    days = _days(start, end)
+    keys = {lock_key("room", room_id, day) for day in days}
+    keys.update(lock_key("surgeon", surgeon_id, day) for surgeon_id in surgeon_ids for day in days)
+    return keys
+
+
+def lock_calendar(keys: Iterable[int], using: Optional[str] = None) -> list[int]:
+    """
+    Lock `keys` (from `calendar_keys`) until the end of the transaction. All
+    of a transaction's keys must be passed in one call: they are taken in
+    sorted order, which only prevents deadlocks if no key is taken later.
+    """
+    keys = sorted(set(keys))
+    connection = connections[using or tenant_db()]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            for key in keys:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [key])
+    return keys
+
+
+def _overlapping(start: datetime, end: datetime, schedule_id: int):
+    return SurgerySchedule.objects.filter(
+        status="scheduled", start_time__lt=end, end_time__gt=start
+    ).exclude(id=schedule_id)
+
+
+def conflicts(
+    schedule: SurgerySchedule, room: OperatingRoom, surgeon_ids: list[int], start: datetime, end: datetime
+) -> list[dict]:
+    """
+    Room and surgeon hard-constraint violations of moving `schedule` to
+    `room` for [start, end).
+    """
+    errors = []
+    if not room.is_available or (room.maintenance_until and room.maintenance_until > start):
+        errors.append(
+            {
+                "type": "HARD_CONSTRAINT",
+                "code": "ROOM_UNAVAILABLE",
+                "message": f"{room.name} is not available at that time.",
+                "operating_room_id": room.id,
+            }
+        )
+
+    room_clashes = list(
+        _overlapping(start, end, schedule.id)
+        .filter(operating_room_id=room.id)
+        .order_by("start_time")
+        .values_list("id", flat=True)
+    )
+    if room_clashes:
+        errors.append(
+            {
+                "type": "HARD_CONSTRAINT",
+                "code": "ROOM_CONFLICT",
+                "message": f"{room.name} is already booked in that window.",
+                "schedule_ids": room_clashes,
+            }
+        )
+
+    if surgeon_ids:
+        surgeon_clashes: dict[int, list[int]] = {}
+        for other_id, surgeon_id in (
+            _overlapping(start, end, schedule.id)
+            .filter(surgeons__in=surgeon_ids)
+            .order_by("start_time")
+            .values_list("id", "surgeons")
+        ):
+            surgeon_clashes.setdefault(surgeon_id, []).append(other_id)
+        for surgeon_id, other_ids in sorted(surgeon_clashes.items()):
+            errors.append(
+                {
+                    "type": "HARD_CONSTRAINT",
+                    "code": "SURGEON_CONFLICT",
+                    "message": "Surgeon is already scheduled in that window.",
+                    "surgeon_id": surgeon_id,
+                    "schedule_ids": other_ids,
+                }
+            )
+    return errors
+
+
+def book(serializer: Any) -> SurgerySchedule:
+    """
+    Save a validated SurgeryScheduleSerializer and reserve its equipment.
+    Raises ValueError for an invalid window, RescheduleConflict for a room or
+    surgeon clash, or reservations.EquipmentUnavailable.
+    """
+    data = serializer.validated_data
+    room = data["operating_room"]
+    surgeon_ids = sorted(surgeon.id for surgeon in data.get("surgeons", []))
+    start, end = data["start_time"], data["end_time"]
+    if end <= start:
+        raise ValueError("end_time must be after start_time.")
+
+    with transaction.atomic(using=tenant_db()):
+        lock_calendar(calendar_keys(room.id, surgeon_ids, start, end))
+        if data.get("status", "scheduled") == "scheduled":
+            errors = conflicts(SurgerySchedule(), room, surgeon_ids, start, end)
+            if errors:
+                raise RescheduleConflict(errors)
+        # The schedule only exists if its equipment could be reserved
+        schedule = serializer.save()
+        reservations.reserve(schedule)
+    return schedule
+
+
+def reschedule(
+    schedule_id: Any,
+    hospital_id: Any,
+    version: int,
+    start: datetime,
+    end: Optional[datetime] = None,
+    operating_room_id: Any = None,
+) -> SurgerySchedule:
+    """
+    Move a schedule of `hospital_id` to [start, end) (same duration if `end`
+    is None), optionally into another room. Raises SurgerySchedule.DoesNotExist,
+    OperatingRoom.DoesNotExist, ValueError for an invalid window, or
+    RescheduleConflict.
+    """
+    schedules = SurgerySchedule.objects.filter(id=schedule_id, operating_room__hospital_id=hospital_id)
+    # Unlocked read: which rooms, surgeons and days to lock
+    schedule = schedules.get()
+    surgeon_ids = sorted(schedule.surgeons.values_list("id", flat=True))
+    if end is None:
+        end = start + (schedule.end_time - schedule.start_time)
+    if end <= start:
+        raise ValueError("end_time must be after start_time.")
+    room_id = operating_room_id if operating_room_id is not None else schedule.operating_room_id
+    room = OperatingRoom.objects.get(id=room_id, hospital_id=hospital_id)
+
+    seen = (schedule.operating_room_id, schedule.start_time, schedule.end_time, surgeon_ids)
+    keys = calendar_keys(schedule.operating_room_id, surgeon_ids, schedule.start_time, schedule.end_time)
+    keys |= calendar_keys(room.id, surgeon_ids, start, end)
+
+    with transaction.atomic(using=tenant_db()):
+        lock_calendar(keys)
+        # of=self: the join must not lock the room row for every day
+        schedule = schedules.select_for_update(of=("self",)).first()
+        if schedule is None:
+            raise RescheduleConflict(
+                [
+                    {
+                        "type": "CONCURRENT_EDIT",
+                        "code": "DELETED",
+                        "message": "The schedule was deleted by someone else.",
+                    }
+                ]
+            )
+        current = (
+            schedule.operating_room_id,
+            schedule.start_time,
+            schedule.end_time,
+            sorted(schedule.surgeons.values_list("id", flat=True)),
+        )
+        # A change since the unlocked read that kept the version (a plain
+        # update) moved the calendar days to lock; taking more locks now
+        # could deadlock, so it is refused like any concurrent edit
+        if schedule.version != version or current != seen:
+            raise RescheduleConflict(
+                [
+                    {
+                        "type": "CONCURRENT_EDIT",
+                        "code": "STALE",
+                        "message": "The schedule was changed by someone else; reload and try again.",
+                        "expected_version": version,
+                        "current_version": schedule.version,
+                    }
+                ],
+                schedule,
+            )
+        if schedule.status != "scheduled":
+            raise RescheduleConflict(
+                [
+                    {
+                        "type": "HARD_CONSTRAINT",
+                        "code": "NOT_SCHEDULED",
+                        "message": f"A {schedule.status} surgery cannot be moved.",
+                    }
+                ],
+                schedule,
+            )
+        errors = conflicts(schedule, room, surgeon_ids, start, end)
+        try:
+            reservations.reschedule(schedule, start, end)
+        except reservations.EquipmentUnavailable as error:
+            errors.append(
+                {
+                    "type": "HARD_CONSTRAINT",
+                    "code": "EQUIPMENT_UNAVAILABLE",
+                    "message": "Required equipment is not available for this time window.",
+                    "shortages": error.shortages,
+                }
+            )
+        if errors:
+            # Leaving the block rolls back the ledger move
+            raise RescheduleConflict(errors, schedule)
+
+        schedule.operating_room = room
+        schedule.start_time = start
+        schedule.end_time = end
+        schedule.version += 1
+        schedule.save(update_fields=["operating_room", "start_time", "end_time", "version"])
+    return schedule
@@ -0,0 +1,262 @@
+"""
+Equipment reservation ledger.
+
+Each `Equipment` row is one unit of its `equipment_type`. A schedule whose
+request has `SurgeryEquipmentRequirement`s holds, for its [start, end)
+window, `quantity_required` units of each required item's type as
+`EquipmentReservation` rows.
+
+"Can N units of type T be reserved for [start, end)?" is answered from the
+(hospital, equipment_type, start_time) index: no reservation is longer than
+RESERVATIONS["MAX_HOURS"], so every overlapping one starts in
+[start - MAX_HOURS, end) and the scan never reaches older history. The peak
+concurrent use in the window is found with a sweep over those rows.
+
+Writers lock the hospital's equipment rows of the types involved
+(`select_for_update`), so call `reserve()` / `reschedule()` inside
+`transaction.atomic()`.
+"""
+
+from collections import defaultdict
+from copy import copy
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.db.models import Sum
+
+from core.models import (
+    Equipment,
+    EquipmentReservation,
+    SurgeryEquipmentRequirement,
+    SurgerySchedule,
+)
+
+DEFAULTS: dict[str, Any] = {
+    "MAX_HOURS": 24,
+    "RELEASE_STATUSES": ["cancelled", "bumped"],
+}
+
+
+class EquipmentUnavailable(Exception):
+    """
+    Not enough free units; `shortages` lists
+    {"equipment_type", "required", "available"} per missing type.
+    """
+
+    def __init__(self, shortages: list[dict]) -> None:
+        self.shortages = shortages
+        super().__init__(
+            ", ".join(
+                f"{s['equipment_type']}: {s['required']} required, {s['available']} available"
+                for s in shortages
+            )
+        )
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "RESERVATIONS", {}).get(name, DEFAULTS[name])
+
+
+def max_span() -> timedelta:
+    return timedelta(hours=get_setting("MAX_HOURS"))
+
+
+def check_window(start: datetime, end: datetime) -> None:
+    if end <= start:
+        raise ValueError("end_time must be after start_time.")
+    if end - start > max_span():
+        raise ValueError(f"Equipment cannot be reserved for more than {get_setting('MAX_HOURS')} hours.")
+
+
+# ---------------------
+# Queries
+# ---------------------
+def capacity(hospital_id: Any, equipment_type: str) -> int:
+    return Equipment.objects.filter(
+        hospital_id=hospital_id, equipment_type=equipment_type, is_available=True
+    ).count()
+
+
+def _overlapping(
+    hospital_id: Any,
+    equipment_type: str,
+    start: datetime,
+    end: datetime,
+    exclude_schedule_id: Optional[int] = None,
+):
+    reservations = EquipmentReservation.objects.filter(
+        hospital_id=hospital_id,
+        equipment_type=equipment_type,
+        start_time__gte=start - max_span(),
+        start_time__lt=end,
+        end_time__gt=start,
+    )
+    if exclude_schedule_id is not None:
+        reservations = reservations.exclude(schedule_id=exclude_schedule_id)
+    return reservations
+
+
+def peak_usage(intervals: Iterable[tuple[datetime, datetime, int]], start: datetime, end: datetime) -> int:
+    """
+    Most units held at any instant of [start, end) by (start, end, quantity)
+    intervals.
+    """
+    events = []
+    for interval_start, interval_end, quantity in intervals:
+        events.append((max(interval_start, start), quantity))
+        events.append((min(interval_end, end), -quantity))
+    # Half-open intervals: releases at an instant come before acquisitions
+    events.sort(key=lambda event: (event[0], event[1]))
+    peak = held = 0
+    for _, delta in events:
+        held += delta
+        peak = max(peak, held)
+    return peak
+
+
+def reserved(
+    hospital_id: Any,
+    equipment_type: str,
+    start: datetime,
+    end: datetime,
+    exclude_schedule_id: Optional[int] = None,
+) -> int:
+    intervals = _overlapping(
+        hospital_id, equipment_type, start, end, exclude_schedule_id
+    ).values_list("start_time", "end_time", "quantity")
+    return peak_usage(intervals, start, end)
+
+
+def available(
+    hospital_id: Any,
+    equipment_type: str,
+    start: datetime,
+    end: datetime,
+    exclude_schedule_id: Optional[int] = None,
+) -> int:
+    """
+    Units of `equipment_type` free for the whole of [start, end).
+    """
+    return capacity(hospital_id, equipment_type) - reserved(
+        hospital_id, equipment_type, start, end, exclude_schedule_id
+    )
+
+
+def can_reserve(
+    hospital_id: Any,
+    equipment_type: str,
+    quantity: int,
+    start: datetime,
+    end: datetime,
+    exclude_schedule_id: Optional[int] = None,
+) -> bool:
+    return available(hospital_id, equipment_type, start, end, exclude_schedule_id) >= quantity
+
+
+def requirements(surgery_request_id: Any) -> dict[str, int]:
+    """
+    Units needed per equipment type by a surgery request.
+    """
+    rows = (
+        SurgeryEquipmentRequirement.objects.filter(surgery_request_id=surgery_request_id)
+        .values("equipment__equipment_type")
+        .annotate(quantity=Sum("quantity_required"))
+    )
+    return {row["equipment__equipment_type"]: row["quantity"] for row in rows if row["quantity"] > 0}
+
+
+# ---------------------
+# Ledger writes
+# ---------------------
+def _lock(hospital_id: Any, equipment_types: Iterable[str]) -> None:
+    # Serializes reservations of the same types (no-op on SQLite, whose writers are serialized)
+    list(
+        Equipment.objects.select_for_update()
+        .filter(hospital_id=hospital_id, equipment_type__in=sorted(equipment_types))
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def _shortages(
+    hospital_id: Any, needs: dict[str, int], start: datetime, end: datetime, schedule_id: int
+) -> list[dict]:
+    shortages = []
+    for equipment_type, quantity in sorted(needs.items()):
+        free = available(hospital_id, equipment_type, start, end, exclude_schedule_id=schedule_id)
+        if free < quantity:
+            shortages.append(
+                {"equipment_type": equipment_type, "required": quantity, "available": max(free, 0)}
+            )
+    return shortages
+
+
+def reserve(schedule: SurgerySchedule, hospital_id: Any = None) -> list[EquipmentReservation]:
+    """
+    (Re)build `schedule`'s ledger rows from its request's equipment
+    requirements. Raises EquipmentUnavailable, or ValueError for a window the
+    ledger cannot hold.
+    """
+    needs = requirements(schedule.surgery_request_id)
+    if not needs:
+        EquipmentReservation.objects.filter(schedule_id=schedule.id).delete()
+        return []
+    check_window(schedule.start_time, schedule.end_time)
+    if hospital_id is None:
+        hospital_id = schedule.operating_room.hospital_id
+
+    _lock(hospital_id, needs)
+    shortages = _shortages(hospital_id, needs, schedule.start_time, schedule.end_time, schedule.id)
+    if shortages:
+        raise EquipmentUnavailable(shortages)
+
+    EquipmentReservation.objects.filter(schedule_id=schedule.id).delete()
+    return EquipmentReservation.objects.bulk_create(
+        [
+            EquipmentReservation(
+                hospital_id=hospital_id,
+                schedule_id=schedule.id,
+                equipment_type=equipment_type,
+                quantity=quantity,
+                start_time=schedule.start_time,
+                end_time=schedule.end_time,
+            )
+            for equipment_type, quantity in sorted(needs.items())
+        ]
+    )
+
+
+def reschedule(schedule: SurgerySchedule, start: datetime, end: datetime) -> int:
+    """
+    Move `schedule`'s reservations to [start, end) if the same units are free
+    there. Returns the number of ledger rows moved (or built: a schedule
+    that holds nothing yet is reserved from its requirements).
+    """
+    held = list(EquipmentReservation.objects.filter(schedule_id=schedule.id))
+    if not held:
+        # Booked before the ledger existed; reserve() checks the new window
+        moved = copy(schedule)
+        moved.start_time, moved.end_time = start, end
+        return len(reserve(moved))
+    check_window(start, end)
+    hospital_id = held[0].hospital_id
+    needs: dict[str, int] = defaultdict(int)
+    for reservation in held:
+        needs[reservation.equipment_type] += reservation.quantity
+
+    _lock(hospital_id, needs)
+    shortages = _shortages(hospital_id, needs, start, end, schedule.id)
+    if shortages:
+        raise EquipmentUnavailable(shortages)
+    return EquipmentReservation.objects.filter(schedule_id=schedule.id).update(
+        start_time=start, end_time=end
+    )
+
+
+def release(schedule_ids: Iterable[int]) -> int:
+    """
+    Drop the reservations of cancelled/bumped (or deleted) schedules.
+    """
+    deleted, _ = EquipmentReservation.objects.filter(schedule_id__in=list(schedule_ids)).delete()
+    return deleted
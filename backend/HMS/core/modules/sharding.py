@@ -0,0 +1,234 @@
+"""
+Opt-in tenant sharding: each hospital's rows live on one database alias.
+
+With SHARDING["ENABLED"], every core model except GLOBAL_MODELS is routed to
+the shard of the current hospital. Django users, the token blacklist, the
+audit log, the job queue and the shard directory stay on `default`.
+
+- The directory (`TenantShard`, on `default`) maps hospital -> alias. A
+  hospital without an entry lives on DEFAULT_SHARD. It is cached per process
+  and reloaded every DIRECTORY_TTL seconds, so moves are picked up without a
+  restart.
+- The current hospital is set per request by the logged-in base views (and
+  by `TenantShardMiddleware` for session users), then every query without an
+  explicit `.using()` goes to that hospital's shard.
+- `user.baseuserprofile` is resolved before any hospital is known, so reads
+  reached through a `User` find the user's shard themselves.
+
+Code that runs outside a request (commands, watchers) uses `use_shard()` or
+`each_shard()`. Transactions must be opened on `tenancy.tenant_db()`, not on
+`default`.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpRequest
+
+from core.modules.middleware import HybridMiddleware
+
+DEFAULTS: dict[str, Any] = {
+    "ENABLED": False,
+    "SHARDS": [DEFAULT_DB_ALIAS],
+    "DEFAULT_SHARD": DEFAULT_DB_ALIAS,
+    "DIRECTORY_TTL": 30,
+    "ID_BLOCK_SIZE": 10**12,
+}
+
+# Core models that are not tenant data
+GLOBAL_MODELS = {"auditlog", "job", "tenantshard"}
+# Apps whose tables core's earlier migrations point at; created (empty) on shards too
+SCHEMA_DEPENDENCIES = {"auth", "contenttypes"}
+
+_current_shard: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_shard", default=None
+)
+
+_lock = threading.Lock()
+_directory: dict[str, str] = {}
+_directory_loaded_at = float("-inf")
+_user_hospitals: dict[int, Optional[str]] = {}
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "SHARDING", {}).get(name, DEFAULTS[name])
+
+
+def enabled() -> bool:
+    return bool(get_setting("ENABLED"))
+
+
+def is_sharded(model: type) -> bool:
+    return model._meta.app_label == "core" and model._meta.model_name not in GLOBAL_MODELS
+
+
+def _load_directory() -> dict[str, str]:
+    global _directory, _directory_loaded_at
+    from core.models import TenantShard
+
+    with _lock:
+        if time.monotonic() - _directory_loaded_at < get_setting("DIRECTORY_TTL"):
+            return _directory
+        _directory = {
+            str(hospital_id): alias
+            for hospital_id, alias in TenantShard.objects.using(DEFAULT_DB_ALIAS).values_list(
+                "hospital_id", "alias"
+            )
+        }
+        _directory_loaded_at = time.monotonic()
+        return _directory
+
+
+def invalidate_directory() -> None:
+    global _directory_loaded_at
+    with _lock:
+        _directory_loaded_at = float("-inf")
+
+
+def shard_for_hospital(hospital_id: Any) -> str:
+    if hospital_id is None:
+        return get_setting("DEFAULT_SHARD")
+    return _load_directory().get(str(hospital_id), get_setting("DEFAULT_SHARD"))
+
+
+def hospital_for_user(user_id: int) -> Optional[str]:
+    """
+    Hospital id of a user's profile, found by asking each shard once per
+    process. Users do not change hospital, so hits are cached for good.
+    """
+    if user_id in _user_hospitals:
+        return _user_hospitals[user_id]
+    from core.models import BaseUserProfile
+
+    for alias in get_setting("SHARDS"):
+        found = list(
+            BaseUserProfile.objects.using(alias)
+            .filter(django_user_id=user_id)
+            .values_list("hospital_id", flat=True)[:1]
+        )
+        if found:
+            hospital_id = str(found[0]) if found[0] else None
+            _user_hospitals[user_id] = hospital_id
+            return hospital_id
+    return None
+
+
+def shard_for_user(user_id: int) -> str:
+    return shard_for_hospital(hospital_for_user(user_id))
+
+
+def current_shard() -> str:
+    return _current_shard.get() or get_setting("DEFAULT_SHARD")
+
+
+def activate(hospital_id: Any) -> None:
+    """
+    Route the rest of the current request to `hospital_id`'s shard.
+    """
+    if enabled():
+        _current_shard.set(shard_for_hospital(hospital_id))
+
+
+@contextmanager
+def use_shard(alias: str) -> Iterator[str]:
+    token = _current_shard.set(alias)
+    try:
+        yield alias
+    finally:
+        _current_shard.reset(token)
+
+
+def each_shard() -> Iterator[str]:
+    """
+    Run the loop body once per shard with that shard active; once with no
+    shard when sharding is disabled.
+    """
+    if not enabled():
+        yield DEFAULT_DB_ALIAS
+        return
+    for alias in get_setting("SHARDS"):
+        with use_shard(alias):
+            yield alias
+
+
+class TenantShardMiddleware(HybridMiddleware):
+    """
+    Scope each request to its own shard. Session users (the Django admin) are
+    routed here; JWT users once the logged-in base views authenticate them.
+    """
+
+    def __call__(self, request: HttpRequest):
+        if self.is_async:
+            return self.__acall__(request)
+        alias = None
+        user = getattr(request, "user", None)
+        if enabled() and user is not None and user.is_authenticated:
+            alias = shard_for_user(user.pk)
+        token = _current_shard.set(alias)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_shard.reset(token)
+
+    async def __acall__(self, request: HttpRequest):
+        alias = None
+        if enabled():
+            user = await request.auser()
+            if user.is_authenticated:
+                alias = await sync_to_async(shard_for_user)(user.pk)
+        token = _current_shard.set(alias)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_shard.reset(token)
+
+
+class TenantRouter:
+    """
+    Database router for SHARDING. Does nothing while sharding is disabled.
+    """
+
+    def _db(self, model: type, hints: dict) -> Optional[str]:
+        if not enabled() or not is_sharded(model):
+            return None
+        instance = hints.get("instance")
+        if instance is not None:
+            if isinstance(instance, User):
+                return shard_for_user(instance.pk)
+            if is_sharded(type(instance)) and instance._state.db:
+                return instance._state.db
+        return current_shard()
+
+    def db_for_read(self, model: type, **hints: Any) -> Optional[str]:
+        return self._db(model, hints)
+
+    def db_for_write(self, model: type, **hints: Any) -> Optional[str]:
+        return self._db(model, hints)
+
+    def allow_relation(self, obj1: Any, obj2: Any, **hints: Any) -> Optional[bool]:
+        if not enabled():
+            return None
+        if is_sharded(type(obj1)) and is_sharded(type(obj2)):
+            return obj1._state.db == obj2._state.db
+        # Profiles on a shard point at users on `default`
+        return True
+
+    def allow_migrate(
+        self, db: str, app_label: str, model_name: Optional[str] = None, **hints: Any
+    ) -> Optional[bool]:
+        if not enabled():
+            return None
+        if app_label == "core":
+            if model_name in GLOBAL_MODELS:
+                return db == DEFAULT_DB_ALIAS
+            return db in get_setting("SHARDS")
+        if app_label in SCHEMA_DEPENDENCIES:
+            return None
+        return db == DEFAULT_DB_ALIAS
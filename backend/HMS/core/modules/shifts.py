@@ -0,0 +1,188 @@
+"""
+Shift lookups: who is on duty at a time, who is on call for a window.
+
+Shifts are `StaffProfile` rows ([start_time, end_time), `is_on_call`). Each
+process keeps one `ShiftIndex` per hospital holding the shifts that overlap
+[today - PAST_DAYS, today + FUTURE_DAYS]. It is loaded through the
+(start_time, end_time) index and rebuilt when the hospital's `staff_version`
+or the day changes, so a lookup costs one primary-key read plus a bisect.
+`staff_version` only moves on staff and profile writes (see `touch`), so
+schedule or equipment traffic does not throw the index away, and a rebuild
+only blocks lookups for the same hospital.
+
+Shifts are kept sorted by start. No shift is longer than the longest one in
+the index, so every shift containing T starts in [T - longest, T] and the
+scan never leaves that slice. Times outside the indexed days are answered
+from the database with the same predicate.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Hospital, StaffProfile
+
+DEFAULTS: dict[str, Any] = {
+    "PAST_DAYS": 1,
+    "FUTURE_DAYS": 7,
+}
+
+_indexes: dict[Any, "ShiftIndex"] = {}
+_locks: dict[Any, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "SHIFTS", {}).get(name, DEFAULTS[name])
+
+
+@dataclass(frozen=True)
+class Shift:
+    id: int
+    base_profile_id: int
+    username: str
+    role: str
+    start_time: datetime
+    end_time: datetime
+    is_on_call: bool
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class ShiftIndex:
+    """
+    Immutable interval index over one hospital's shifts in [start, end).
+    """
+
+    def __init__(self, shifts: Iterable[Shift], start: datetime, end: datetime, key: tuple = ()) -> None:
+        self.shifts = sorted(shifts, key=lambda shift: (shift.start_time, shift.id))
+        self.starts = [shift.start_time for shift in self.shifts]
+        self.longest = max(
+            (shift.end_time - shift.start_time for shift in self.shifts), default=timedelta(0)
+        )
+        self.start = start
+        self.end = end
+        self.key = key
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return self.start <= start and end <= self.end
+
+    def at(self, moment: datetime) -> list[Shift]:
+        lo = bisect_left(self.starts, moment - self.longest)
+        hi = bisect_right(self.starts, moment)
+        return [shift for shift in self.shifts[lo:hi] if shift.end_time > moment]
+
+    def overlapping(self, start: datetime, end: datetime) -> list[Shift]:
+        lo = bisect_left(self.starts, start - self.longest)
+        hi = bisect_left(self.starts, end)
+        return [shift for shift in self.shifts[lo:hi] if shift.end_time > start]
+
+
+def _load(hospital_id: Any, start: datetime, end: datetime) -> list[Shift]:
+    rows = list(
+        StaffProfile.objects.filter(
+            base_profile__hospital_id=hospital_id, start_time__lt=end, end_time__gt=start
+        ).values_list(
+            "id",
+            "base_profile_id",
+            "base_profile__django_user_id",
+            "base_profile__role",
+            "start_time",
+            "end_time",
+            "is_on_call",
+        )
+    )
+    # Users stay on `default` when sharded, so no join
+    usernames = dict(
+        User.objects.filter(id__in={row[2] for row in rows}).values_list("id", "username")
+    )
+    return [
+        Shift(shift_id, profile_id, usernames.get(user_id, ""), role, shift_start, shift_end, on_call)
+        for shift_id, profile_id, user_id, role, shift_start, shift_end, on_call in rows
+    ]
+
+
+def touch(hospital_id: Any) -> None:
+    """
+    Move the hospital's `staff_version` forward after a staff or profile
+    write. Code that writes those with bulk_create/update() must call this.
+    """
+    if hospital_id is not None:
+        Hospital.objects.filter(id=hospital_id).update(staff_version=F("staff_version") + 1)
+
+
+def _lock_for(hospital_id: Any) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(hospital_id, threading.Lock())
+
+
+def index_for(hospital_id: Any) -> ShiftIndex:
+    """
+    The hospital's current index, rebuilt if staff changed or the day rolled.
+    """
+    staff_version = (
+        Hospital.objects.filter(id=hospital_id).values_list("staff_version", flat=True).first()
+    )
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    key = (staff_version, today)
+    index = _indexes.get(hospital_id)
+    if index is not None and index.key == key:
+        return index
+    with _lock_for(hospital_id):
+        index = _indexes.get(hospital_id)
+        if index is None or index.key != key:
+            start = today - timedelta(days=get_setting("PAST_DAYS"))
+            end = today + timedelta(days=get_setting("FUTURE_DAYS") + 1)
+            index = ShiftIndex(_load(hospital_id, start, end), start, end, key)
+            _indexes[hospital_id] = index
+    return index
+
+
+def on_duty(hospital_id: Any, moment: datetime, role: Optional[str] = None) -> list[Shift]:
+    """
+    Shifts (on call or not) running at `moment`, optionally of one role.
+    """
+    index = index_for(hospital_id)
+    if index.covers(moment, moment + timedelta.resolution):
+        shifts = index.at(moment)
+    else:
+        shifts = _load(hospital_id, moment, moment + timedelta.resolution)
+    return [shift for shift in shifts if role is None or shift.role == role]
+
+
+def on_call(hospital_id: Any, start: datetime, end: datetime, role: Optional[str] = None) -> list[list[Shift]]:
+    """
+    Staff whose on-call shifts, back to back, cover all of [start, end).
+    One list of shifts per person, in the order the cover begins.
+    """
+    index = index_for(hospital_id)
+    if index.covers(start, end):
+        shifts = index.overlapping(start, end)
+    else:
+        shifts = _load(hospital_id, start, end)
+
+    by_profile: dict[int, list[Shift]] = defaultdict(list)
+    for shift in sorted(shifts, key=lambda shift: shift.start_time):
+        if shift.is_on_call and (role is None or shift.role == role):
+            by_profile[shift.base_profile_id].append(shift)
+
+    covering = []
+    for profile_shifts in by_profile.values():
+        reached = start
+        for position, shift in enumerate(profile_shifts):
+            if shift.start_time > reached:
+                break  # gap in the cover
+            reached = max(reached, shift.end_time)
+            if reached >= end:
+                covering.append(profile_shifts[: position + 1])
+                break
+    return sorted(covering, key=lambda cover: (cover[0].start_time, cover[0].username))
@@ -0,0 +1,165 @@
+"""
+Precomputed `/sync/bootstrap` snapshots.
+
+A snapshot is the gzip-compressed JSON of everything an offline client needs
+for one hospital. It is built at most once per (hospital, data_version, day)
+and stored on disk, so a shift's worth of tablets bootstrapping at once costs
+one serialization plus N sendfile()s. The day is part of the key because
+"upcoming schedule" moves with the clock even when no data changes.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import (
+    Equipment,
+    Hospital,
+    OperatingRoom,
+    StaffProfile,
+    SurgeonProfile,
+    SurgeryRequest,
+    SurgerySchedule,
+)
+from core.modules import archive
+from core.serializers import (
+    EquipmentSerializer,
+    HospitalSerializer,
+    OperatingRoomSerializer,
+    StaffProfileSerializer,
+    SurgeonProfileSerializer,
+    SurgeryRequestSerializer,
+    SurgeryScheduleSerializer,
+)
+
+DEFAULTS: dict[str, Any] = {
+    "SNAPSHOT_DIR": Path(settings.BASE_DIR) / "var" / "snapshots",
+    "SCHEDULE_HORIZON_DAYS": 14,
+    "COMPRESSION_LEVEL": 6,
+}
+
+_build_locks: dict[str, threading.Lock] = {}
+_build_locks_guard = threading.Lock()
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "SYNC", {}).get(name, DEFAULTS[name])
+
+
+def snapshot_key(hospital: Hospital) -> str:
+    return f"{hospital.id}-{hospital.data_version}-{timezone.now():%Y%m%d}"
+
+
+def snapshot_path(key: str) -> Path:
+    return Path(get_setting("SNAPSHOT_DIR")) / f"{key}.json.gz"
+
+
+def _sections(hospital: Hospital) -> Iterable[tuple[str, Any]]:
+    now = timezone.now()
+    horizon = now + timedelta(days=get_setting("SCHEDULE_HORIZON_DAYS"))
+
+    yield "hospital", HospitalSerializer(hospital).data
+    yield "operating_rooms", OperatingRoomSerializer(
+        OperatingRoom.objects.filter(hospital=hospital), many=True
+    ).data
+    yield "surgeons", SurgeonProfileSerializer(
+        SurgeonProfile.objects.filter(base_profile__hospital=hospital).select_related(
+            "base_profile__django_user"
+        ),
+        many=True,
+    ).data
+    yield "staff", StaffProfileSerializer(
+        StaffProfile.objects.filter(base_profile__hospital=hospital).select_related(
+            "base_profile__django_user"
+        ),
+        many=True,
+    ).data
+    yield "equipment", EquipmentSerializer(
+        Equipment.objects.filter(hospital=hospital), many=True
+    ).data
+    yield "surgery_requests", SurgeryRequestSerializer(
+        SurgeryRequest.objects.filter(hospital=hospital)
+        .filter(
+            Q(surgeryschedule__isnull=True)
+            | Q(surgeryschedule__status__in=["scheduled", "bumped"])
+        )
+        # An archived schedule means the request is finished, not unscheduled
+        .exclude(archive.has_archived_schedule()),
+        many=True,
+    ).data
+    yield "schedule", SurgeryScheduleSerializer(
+        SurgerySchedule.objects.filter(
+            operating_room__hospital=hospital,
+            status__in=["scheduled", "bumped"],
+            end_time__gte=now,
+            start_time__lt=horizon,
+        )
+        .order_by("start_time")
+        .prefetch_related("surgeons"),
+        many=True,
+    ).data
+
+
+def build_snapshot(hospital: Hospital, path: Path) -> None:
+    """
+    Serialize `hospital` into `path`, written atomically via rename.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(
+            fileobj=raw, mode="wb", compresslevel=get_setting("COMPRESSION_LEVEL")
+        ) as out:
+            out.write(b"{")
+            out.write(b'"data_version": %d, ' % hospital.data_version)
+            out.write(b'"generated_at": %s' % json.dumps(timezone.now(), cls=DjangoJSONEncoder).encode())
+            for name, data in _sections(hospital):
+                out.write(b', "%s": ' % name.encode())
+                out.write(json.dumps(data, cls=DjangoJSONEncoder).encode())
+            out.write(b"}")
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def _remove_stale(hospital: Hospital, keep: Path) -> None:
+    for old in keep.parent.glob(f"{hospital.id}-*.json.gz"):
+        if old != keep:
+            try:
+                old.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def open_snapshot(hospital: Hospital) -> tuple[str, BinaryIO]:
+    """
+    Return (key, open file) of the current snapshot, building it if needed.
+    Concurrent callers in this process wait for a single build.
+    """
+    key = snapshot_key(hospital)
+    path = snapshot_path(key)
+    try:
+        # Opening (not just checking) keeps the file readable even if a newer
+        # build removes it right after.
+        return key, open(path, "rb")
+    except FileNotFoundError:
+        pass
+
+    with _build_locks_guard:
+        lock = _build_locks.setdefault(str(hospital.id), threading.Lock())
+    with lock:
+        if not path.exists():
+            build_snapshot(hospital, path)
+            _remove_stale(hospital, path)
+        return key, open(path, "rb")
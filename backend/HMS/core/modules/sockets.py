@@ -0,0 +1,147 @@
+"""
+Plain ASGI WebSocket endpoints (no Channels dependency).
+
+Clients connect with ``/ws/notifications?token=<access JWT>`` and receive
+JSON events published through `core.modules.realtime`.
+"""
+
+import asyncio
+import json
+from typing import Optional
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.models import BaseUserProfile
+from core.modules import sharding
+from core.modules.realtime import hub
+
+CLOSE_UNAUTHORIZED = 4401
+
+
+def authenticate_token(token: Optional[str]) -> Optional[tuple[str, str, int]]:
+    """
+    Resolve an access token to (hospital_id, role, profile_id).
+    """
+    if not token:
+        return None
+    auth = JWTAuthentication()
+    try:
+        user = auth.get_user(auth.get_validated_token(token))
+        profile = user.baseuserprofile
+    except (InvalidToken, TokenError, AttributeError):
+        return None
+    if not profile.hospital_id:
+        return None
+    return str(profile.hospital_id), profile.role, profile.id
+
+
+async def aauthenticate_token(token: Optional[str]) -> Optional[tuple[str, str, int]]:
+    """
+    `authenticate_token` on the async ORM: no worker thread is held while
+    the user and profile are read.
+    """
+    if not token:
+        return None
+    try:
+        validated = JWTAuthentication().get_validated_token(token)
+        user_id = validated[api_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        return None
+    user = await User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None or (api_settings.CHECK_USER_IS_ACTIVE and not user.is_active):
+        return None
+    if api_settings.CHECK_REVOKE_TOKEN and validated.get(
+        api_settings.REVOKE_TOKEN_CLAIM
+    ) != get_md5_hash_password(user.password):
+        return None
+
+    profiles = BaseUserProfile.objects.only("id", "hospital_id", "role")
+    if sharding.enabled():
+        # Cached after the first lookup of each user
+        profiles = profiles.using(await sync_to_async(sharding.shard_for_user)(user.pk))
+    profile = await profiles.filter(django_user_id=user.pk).afirst()
+    if profile is None or not profile.hospital_id:
+        return None
+    return str(profile.hospital_id), profile.role, profile.id
+
+
+def _authenticate_and_close(token: Optional[str]) -> Optional[tuple[str, str, int]]:
+    try:
+        return authenticate_token(token)
+    finally:
+        # A shared pool thread outside any request: nothing else closes these
+        connections.close_all()
+
+
+async def authenticate_long_lived(token: Optional[str]) -> Optional[tuple[str, str, int]]:
+    """
+    `authenticate_token` for connections that stay open. ORM calls made from
+    an ASGI request run on that request's own thread, and the connection they
+    open stays open until the response ends: every idle event stream would
+    pin a database connection. This runs on the shared executor and closes
+    what it opened.
+    """
+    return await sync_to_async(_authenticate_and_close, thread_sensitive=False)(token)
+
+
+async def notifications_socket(scope, receive, send) -> None:
+    """
+    WS /ws/notifications — push hospital events to the connected user.
+    """
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+
+    query = parse_qs(scope.get("query_string", b"").decode())
+    identity = await authenticate_long_lived(query.get("token", [None])[0])
+    if identity is None:
+        await send({"type": "websocket.close", "code": CLOSE_UNAUTHORIZED})
+        return
+
+    hospital_id, role, profile_id = identity
+    await send({"type": "websocket.accept"})
+    subscriber = hub.subscribe(hospital_id, role, profile_id)
+
+    receiver = asyncio.ensure_future(_drain_until_disconnect(receive))
+    try:
+        while not receiver.done():
+            getter = asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait(
+                {getter, receiver}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter not in done:
+                getter.cancel()
+                break
+            await send({"type": "websocket.send", "text": json.dumps(getter.result(), default=str)})
+    finally:
+        hub.unsubscribe(subscriber)
+        receiver.cancel()
+
+
+async def _drain_until_disconnect(receive) -> None:
+    # Client messages are ignored; we only care about the disconnect.
+    while True:
+        message = await receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+WEBSOCKET_ROUTES = {
+    "/ws/notifications": notifications_socket,
+}
+
+
+async def websocket_application(scope, receive, send) -> None:
+    handler = WEBSOCKET_ROUTES.get(scope["path"].rstrip("/"))
+    if handler is None:
+        await receive()
+        await send({"type": "websocket.close", "code": 4404})
+        return
+    await handler(scope, receive, send)
@@ -0,0 +1,155 @@
+"""
+SQLite production profile.
+
+- `configure_connection` runs on every new SQLite connection and applies the
+  pragmas in SQLITE (WAL, synchronous=NORMAL, mmap, busy timeout, ...).
+  WAL lets readers run alongside the single writer.
+- `WriteQueue` serializes writers inside a process. SQLite allows one writer
+  at a time; without the queue, concurrent writers poll the file lock with
+  busy_timeout's backoff sleeps and fail with "database is locked" once it
+  runs out. With it they block on an in-process lock and never contend for
+  the file lock within a process. `SQLiteWriteQueueMiddleware` routes every
+  unsafe request through it, except WRITE_QUEUE_EXEMPT paths: their views do
+  CPU-bound work (password hashing, token signing) around a few small writes,
+  and take the queue around those writes only (see jwt_auth/tokens.py).
+
+Persistent connections (CONN_MAX_AGE) and BEGIN IMMEDIATE transactions are
+configured in DATABASES; see HMS/settings.py.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpRequest
+
+from core.modules.middleware import HybridMiddleware
+
+DEFAULTS: dict[str, Any] = {
+    "JOURNAL_MODE": "WAL",
+    "SYNCHRONOUS": "NORMAL",
+    "BUSY_TIMEOUT_MS": 5000,
+    "MMAP_SIZE": 256 * 1024 * 1024,
+    "CACHE_SIZE": -64000,  # negative = KiB
+    "TEMP_STORE": "MEMORY",
+    "JOURNAL_SIZE_LIMIT": 64 * 1024 * 1024,
+    "WRITE_QUEUE": True,
+    "WRITE_QUEUE_TIMEOUT": 30,
+    "WRITE_QUEUE_EXEMPT": ["/api/v1/auth/"],
+}
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "SQLITE", {}).get(name, DEFAULTS[name])
+
+
+def pragmas() -> list[str]:
+    return [
+        f"PRAGMA journal_mode={get_setting('JOURNAL_MODE')}",
+        f"PRAGMA synchronous={get_setting('SYNCHRONOUS')}",
+        f"PRAGMA busy_timeout={int(get_setting('BUSY_TIMEOUT_MS'))}",
+        f"PRAGMA mmap_size={int(get_setting('MMAP_SIZE'))}",
+        f"PRAGMA cache_size={int(get_setting('CACHE_SIZE'))}",
+        f"PRAGMA temp_store={get_setting('TEMP_STORE')}",
+        f"PRAGMA journal_size_limit={int(get_setting('JOURNAL_SIZE_LIMIT'))}",
+    ]
+
+
+def configure_connection(dbapi_connection: Any) -> None:
+    """
+    Apply the profile to a DB-API sqlite3 connection.
+    """
+    for pragma in pragmas():
+        dbapi_connection.execute(pragma)
+
+
+@receiver(connection_created)
+def sqlite_connection_created(sender, connection, **kwargs) -> None:
+    if connection.vendor == "sqlite":
+        configure_connection(connection.connection)
+
+
+class WriteQueue:
+    """
+    Re-entrant single-writer lock. Waiting writers block instead of polling
+    SQLite's busy handler. It is deliberately not strict FIFO: handing the
+    turn to a specific waiter forces a thread switch per transaction under
+    the GIL (a lock convoy), which `sqlite_stress` measured at several times
+    lower throughput than letting the running thread go again.
+
+    A waiter that times out proceeds unserialized (busy_timeout still
+    applies), so a stuck writer cannot stall the process forever.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        return self._lock.acquire(timeout=-1 if timeout is None else timeout)
+
+    def release(self) -> None:
+        self._lock.release()
+
+
+write_queue = WriteQueue()
+
+
+def queue_enabled() -> bool:
+    return bool(get_setting("WRITE_QUEUE")) and connections[DEFAULT_DB_ALIAS].vendor == "sqlite"
+
+
+@contextmanager
+def serialized_writes(queue: Optional[WriteQueue] = None) -> Iterator[None]:
+    """
+    Run the block as this process's only writer.
+    """
+    if queue is None:
+        if not queue_enabled():
+            yield
+            return
+        queue = write_queue
+    acquired = queue.acquire(get_setting("WRITE_QUEUE_TIMEOUT"))
+    try:
+        yield
+    finally:
+        if acquired:
+            queue.release()
+
+
+class SQLiteWriteQueueMiddleware(HybridMiddleware):
+    """
+    Serialize unsafe requests (outside WRITE_QUEUE_EXEMPT) through the
+    write queue; reads run freely.
+    """
+
+    def __call__(self, request: HttpRequest):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self._queued(request):
+            return self.get_response(request)
+        with serialized_writes():
+            return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest):
+        if not self._queued(request):
+            return await self.get_response(request)
+        # The queue lock belongs to a thread: take it on the thread the
+        # (sync) view runs on, which sync_to_async reuses below
+        return await sync_to_async(self._serialized)(request)
+
+    @staticmethod
+    def _queued(request: HttpRequest) -> bool:
+        return request.method not in SAFE_METHODS and not request.path.startswith(
+            tuple(get_setting("WRITE_QUEUE_EXEMPT"))
+        )
+
+    def _serialized(self, request: HttpRequest):
+        with serialized_writes():
+            return async_to_sync(self.get_response)(request)
@@ -0,0 +1,382 @@
+"""
+Sterilization planner.
+
+Given a hospital's upcoming schedules and their equipment requirements,
+works out which items must go through a sterilizer, on which sterilizer and
+when, so every item is sterile at incision time. STERILIZATION["STERILIZERS"]
+machines run one cycle (`Equipment.sterilization_cycle_hours`) at a time; a
+cycle leaves the item sterile for VALID_HOURS; using an item makes it dirty.
+
+The plan is one pass over the schedules' start/end events in time order:
+
+- an end event returns the schedule's items to the pool, dirty;
+- a start event assigns `quantity_required` free units per requirement (the
+  named item first, then sterile units, then the ones free longest) and, for
+  each unit that will not be sterile at the start, books the earliest cycle
+  on the machine that frees up first, no earlier than the item comes back.
+
+Starts are processed in order, so cycles are booked earliest-deadline first.
+A cycle that cannot finish before the start, or a requirement with no free
+unit, is reported in `at_risk`. Existing sterilization records with a future
+`sterilized_at` are cycles already booked and keep their machine time.
+
+`Equipment.sterile_from`/`sterile_until` mirror the latest *finished* record
+(`sterilized_at` <= now) so "sterile at T" is one indexed predicate
+(`sterile_from__lte=T, sterile_until__gte=T`); a booked cycle counts only
+once it has run. Writers of sterilization records keep them current: the
+signals for single rows, `refresh_validity()` after bulk inserts, and
+`finish_cycles()` when booked cycles end. `expire()` flags items whose
+validity has run out `needs_sterilization` in one UPDATE; a finished cycle
+clears the flag. The flag does not take an item out of service:
+`is_available` is the manual flag reservations count, since a lapsed item
+is reprocessed before the surgery that books it.
+"""
+
+import heapq
+import logging
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from core.models import (
+    Equipment,
+    EquipmentSterilization,
+    SurgeryEquipmentRequirement,
+    SurgerySchedule,
+)
+from core.modules import changelog
+from core.modules.tenancy import tenant_db
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS: dict[str, Any] = {
+    "STERILIZERS": 2,
+    "VALID_HOURS": 72,
+    "HORIZON_HOURS": 48,
+}
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "STERILIZATION", {}).get(name, DEFAULTS[name])
+
+
+@dataclass
+class Job:
+    equipment_id: int
+    equipment_name: str
+    sterilizer: int
+    start: datetime
+    end: datetime
+    valid_until: datetime
+    needed_by: Optional[datetime] = None
+    schedule_id: Optional[int] = None
+    late: bool = False
+
+
+@dataclass
+class Risk:
+    schedule_id: int
+    start_time: datetime
+    equipment_type: str
+    reason: str  # NOT_READY (cycle ends after the start) or NO_UNIT
+    equipment_id: Optional[int] = None
+    ready_at: Optional[datetime] = None
+
+
+@dataclass
+class Plan:
+    hospital_id: Any
+    generated_at: datetime
+    horizon_end: datetime
+    sterilizers: int
+    jobs: list[Job] = field(default_factory=list)
+    at_risk: list[Risk] = field(default_factory=list)
+    # schedule id -> equipment ids it will use
+    assignments: dict[int, list[int]] = field(default_factory=dict)
+    # when each sterilizer is next free after the planned jobs
+    sterilizer_free: list[datetime] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class _Item:
+    id: int
+    name: str
+    equipment_type: str
+    cycle: timedelta
+    free_at: datetime
+    sterile_from: Optional[datetime] = None
+    sterile_until: Optional[datetime] = None
+    in_use: bool = False
+
+    def sterile_at(self, moment: datetime) -> bool:
+        return (
+            self.sterile_from is not None
+            and self.sterile_from <= moment <= self.sterile_until
+        )
+
+
+def _load_items(hospital_id: Any, now: datetime) -> tuple[dict[int, _Item], list[tuple[datetime, datetime]]]:
+    """
+    Current state of every available item, plus the machine time of cycles
+    already booked (sterilized_at in the future).
+    """
+    latest = EquipmentSterilization.objects.filter(equipment=OuterRef("pk")).order_by("-sterilized_at")
+    rows = (
+        Equipment.objects.filter(hospital_id=hospital_id, is_available=True)
+        .annotate(
+            sterilized_at=Subquery(latest.values("sterilized_at")[:1]),
+            valid_until=Subquery(latest.values("valid_until")[:1]),
+        )
+        .values_list("id", "name", "equipment_type", "sterilization_cycle_hours", "sterilized_at", "valid_until")
+    )
+    items: dict[int, _Item] = {}
+    booked = []
+    for item_id, name, equipment_type, cycle_hours, sterilized_at, valid_until in rows:
+        cycle = timedelta(hours=cycle_hours)
+        items[item_id] = _Item(
+            item_id, name, equipment_type, cycle, now, sterilized_at, valid_until
+        )
+        if sterilized_at is not None and sterilized_at > now:
+            booked.append((sterilized_at - cycle, sterilized_at))
+
+    # Items named by a surgery that finished after their last cycle are dirty
+    used = (
+        SurgeryEquipmentRequirement.objects.filter(
+            equipment_id__in=list(items),
+            surgery_request__surgeryschedule__end_time__lte=now,
+            surgery_request__surgeryschedule__status="completed",
+        )
+        .values("equipment_id")
+        .annotate(last_used=Max("surgery_request__surgeryschedule__end_time"))
+    )
+    for row in used:
+        item = items[row["equipment_id"]]
+        if item.sterile_from is not None and item.sterile_from < row["last_used"]:
+            item.sterile_from = item.sterile_until = None
+    return items, booked
+
+
+def _pick(item_ids: list[int], items: dict[int, _Item], start: datetime, quantity: int) -> list[_Item]:
+    free = [items[item_id] for item_id in item_ids if not items[item_id].in_use]
+    # Sterile units first, then the ones back from use earliest
+    free.sort(key=lambda item: (not item.sterile_at(start), item.free_at, item.id))
+    return free[:quantity]
+
+
+def plan(hospital_id: Any, now: Optional[datetime] = None, horizon: Optional[timedelta] = None) -> Plan:
+    """
+    Sterilization plan for `hospital_id` covering schedules that start
+    before now + `horizon` (default HORIZON_HOURS).
+    """
+    now = now or timezone.now()
+    horizon = horizon or timedelta(hours=get_setting("HORIZON_HOURS"))
+    valid = timedelta(hours=get_setting("VALID_HOURS"))
+    sterilizers = max(1, int(get_setting("STERILIZERS")))
+    result = Plan(hospital_id, now, now + horizon, sterilizers)
+
+    items, booked = _load_items(hospital_id, now)
+    by_type: dict[str, list[int]] = defaultdict(list)
+    for item in items.values():
+        by_type[item.equipment_type].append(item.id)
+
+    # Machines start free now, except for cycles already booked
+    machines = [(now, index) for index in range(sterilizers)]
+    heapq.heapify(machines)
+    for booked_start, booked_end in sorted(booked):
+        free_at, index = heapq.heappop(machines)
+        heapq.heappush(machines, (max(free_at, booked_start) + (booked_end - booked_start), index))
+
+    schedules = {
+        schedule_id: (start, end, request_id)
+        for schedule_id, start, end, request_id in SurgerySchedule.objects.filter(
+            operating_room__hospital_id=hospital_id,
+            status="scheduled",
+            end_time__gt=now,
+            start_time__lt=result.horizon_end,
+        ).values_list("id", "start_time", "end_time", "surgery_request_id")
+    }
+    needs: dict[Any, list[tuple[int, str, int]]] = defaultdict(list)
+    for request_id, equipment_id, equipment_type, quantity in SurgeryEquipmentRequirement.objects.filter(
+        surgery_request_id__in=[request_id for _, _, request_id in schedules.values()]
+    ).values_list("surgery_request_id", "equipment_id", "equipment__equipment_type", "quantity_required"):
+        needs[request_id].append((equipment_id, equipment_type, quantity))
+
+    # Ends sort before starts at the same instant: [start, end) windows
+    events = sorted(
+        [(start, 1, schedule_id) for schedule_id, (start, _, _) in schedules.items()]
+        + [(end, 0, schedule_id) for schedule_id, (_, end, _) in schedules.items()]
+    )
+    for moment, is_start, schedule_id in events:
+        start, end, request_id = schedules[schedule_id]
+        if not is_start:
+            for item_id in result.assignments.get(schedule_id, []):
+                item = items[item_id]
+                item.in_use = False
+                item.free_at = end
+                item.sterile_from = item.sterile_until = None
+            continue
+
+        assigned = result.assignments.setdefault(schedule_id, [])
+        for equipment_id, equipment_type, quantity in needs[request_id]:
+            if quantity <= 0:
+                continue
+            pool = by_type[equipment_type]
+            # The named item is preferred when it is free
+            if equipment_id in items and not items[equipment_id].in_use:
+                others = [item_id for item_id in pool if item_id != equipment_id]
+                chosen = [items[equipment_id]] + _pick(others, items, start, quantity - 1)
+            else:
+                chosen = _pick(pool, items, start, quantity)
+            if len(chosen) < quantity:
+                result.at_risk.append(Risk(schedule_id, start, equipment_type, "NO_UNIT"))
+
+            for item in chosen:
+                item.in_use = True
+                assigned.append(item.id)
+                if start < now or item.sterile_at(start):
+                    continue  # already running, or sterile in time
+                free_at, index = heapq.heappop(machines)
+                job_start = max(free_at, item.free_at, now)
+                job_end = job_start + item.cycle
+                heapq.heappush(machines, (job_end, index))
+                item.sterile_from, item.sterile_until = job_end, job_end + valid
+                job = Job(
+                    item.id,
+                    item.name,
+                    index,
+                    job_start,
+                    job_end,
+                    job_end + valid,
+                    needed_by=start,
+                    schedule_id=schedule_id,
+                    late=job_end > start,
+                )
+                result.jobs.append(job)
+                if job.late:
+                    result.at_risk.append(
+                        Risk(schedule_id, start, equipment_type, "NOT_READY", item.id, job_end)
+                    )
+
+    result.jobs.sort(key=lambda job: (job.start, job.sterilizer))
+    result.sterilizer_free = [free_at for free_at, _ in sorted(machines, key=lambda machine: machine[1])]
+    return result
+
+
+def record(jobs: list[Job]) -> list[EquipmentSterilization]:
+    """
+    Book planned cycles as sterilization records (sterilized_at = cycle end).
+    """
+    records = EquipmentSterilization.objects.bulk_create(
+        [
+            EquipmentSterilization(
+                equipment_id=job.equipment_id, sterilized_at=job.end, valid_until=job.valid_until
+            )
+            for job in jobs
+        ]
+    )
+    refresh_validity(job.equipment_id for job in jobs)
+    return records
+
+
+def _log_changes(equipment_ids: list[int]) -> None:
+    by_hospital = defaultdict(list)
+    for item in Equipment.objects.filter(id__in=equipment_ids):
+        by_hospital[item.hospital_id].append(item)
+    for hospital_id, items in by_hospital.items():
+        changelog.record_bulk(hospital_id, items, "update")
+
+
+def refresh_validity(equipment_ids: Iterable[int], now: Optional[datetime] = None) -> int:
+    """
+    Recompute `sterile_from`/`sterile_until` of `equipment_ids` from their
+    finished records and clear `needs_sterilization` on the ones sterile
+    again. Cycles booked to end after `now` are left for `finish_cycles()`.
+    """
+    equipment_ids = sorted(set(equipment_ids))
+    if not equipment_ids:
+        return 0
+    now = now or timezone.now()
+    latest = EquipmentSterilization.objects.filter(
+        equipment=OuterRef("pk"), sterilized_at__lte=now
+    ).order_by("-valid_until")
+    items = Equipment.objects.filter(id__in=equipment_ids)
+    with transaction.atomic(using=tenant_db()):
+        updated = items.update(
+            sterile_from=Subquery(latest.values("sterilized_at")[:1]),
+            sterile_until=Subquery(latest.values("valid_until")[:1]),
+        )
+        items.filter(needs_sterilization=True, sterile_until__gt=now).update(needs_sterilization=False)
+        _log_changes(equipment_ids)
+    return updated
+
+
+def finish_cycles(hospital_id: Any = None, now: Optional[datetime] = None) -> int:
+    """
+    Refresh the items (of `hospital_id`, default all) whose booked cycle has
+    ended since their validity was last computed. Returns the number of
+    items refreshed.
+    """
+    now = now or timezone.now()
+    finished = EquipmentSterilization.objects.filter(
+        equipment=OuterRef("pk"), sterilized_at__lte=now
+    ).filter(
+        Q(equipment__sterile_until__isnull=True) | Q(valid_until__gt=OuterRef("sterile_until"))
+    )
+    items = Equipment.objects.filter(Exists(finished))
+    if hospital_id is not None:
+        items = items.filter(hospital_id=hospital_id)
+    return refresh_validity(list(items.values_list("id", flat=True)), now)
+
+
+def expire(hospital_id: Any = None, now: Optional[datetime] = None) -> int:
+    """
+    Flag every item (of `hospital_id`, default all) whose sterilization has
+    run out `needs_sterilization`. Returns the number of items flagged.
+    """
+    now = now or timezone.now()
+    # Items whose booked cycle just ended are sterile again, not lapsed
+    finish_cycles(hospital_id, now)
+    lapsed = Equipment.objects.filter(needs_sterilization=False, sterile_until__lt=now)
+    if hospital_id is not None:
+        lapsed = lapsed.filter(hospital_id=hospital_id)
+    with transaction.atomic(using=tenant_db()):
+        # Locked so a cycle recorded meanwhile is not overwritten
+        equipment_ids = list(lapsed.select_for_update().values_list("id", flat=True))
+        if not equipment_ids:
+            return 0
+        Equipment.objects.filter(id__in=equipment_ids).update(needs_sterilization=True)
+        _log_changes(equipment_ids)
+    logger.info("Flagged %d item(s) with expired sterilization", len(equipment_ids))
+    return len(equipment_ids)
+
+
+def schedule_item(equipment: Equipment, now: Optional[datetime] = None) -> tuple[EquipmentSterilization, Job]:
+    """
+    Book `equipment`'s next cycle: the planned one if upcoming surgeries need
+    it, otherwise the first free sterilizer slot.
+    """
+    now = now or timezone.now()
+    current = plan(equipment.hospital_id, now)
+    job = next((job for job in current.jobs if job.equipment_id == equipment.id), None)
+    if job is None:
+        index = min(range(current.sterilizers), key=lambda i: current.sterilizer_free[i])
+        start = max(current.sterilizer_free[index], now)
+        end = start + timedelta(hours=equipment.sterilization_cycle_hours)
+        job = Job(
+            equipment.id,
+            equipment.name,
+            index,
+            start,
+            end,
+            end + timedelta(hours=get_setting("VALID_HOURS")),
+        )
+    return record([job])[0], job
@@ -0,0 +1,443 @@
+"""
+Batched offline push (`POST /sync/push`).
+
+A push is a list of queued mutations::
+
+    {"client_id": "c1", "model": "surgeryrequest", "op": "update",
+     "id": "<pk>", "base_seq": 41, "data": {...}}
+
+`base_seq` is the change-log seq the client's copy of the row is based on
+(the bootstrap `data_version` or the `seq` of the last change it applied).
+The whole push runs in one transaction:
+1. every touched row is loaded and locked (SELECT ... FOR UPDATE) with one
+   query per model, then the latest change-log seq of every touched object
+   is read with one more query; a concurrent writer of the same rows has
+   committed its change-log entry by then, and an entry not numbered yet
+   counts as newer than any base_seq
+2. conflicts are detected in memory; the server wins, so a conflicting
+   mutation is skipped and the current server row is returned instead
+3. the rest is validated against the related rows it names, loaded with one
+   query per model, then applied with bulk_create / bulk_update / one DELETE
+   per model and appended to the change log in bulk; the audit, real-time and
+   job hooks the signals run for single rows run for these rows as well
+4. schedules reserve their equipment (core.modules.reservations); a create or
+   time change that cannot is rejected as an EQUIPMENT_UNAVAILABLE conflict
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Iterable, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Max, Q, Value
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+
+from core.models import (
+    BaseUserProfile,
+    ChangeLogEntry,
+    Equipment,
+    Notification,
+    OperatingRoom,
+    SurgeryRequest,
+    SurgerySchedule,
+)
+from core import signals
+from core.modules import changelog, reservations
+from core.modules.tenancy import HOSPITAL_PATHS, raw_delete, tenant_db
+
+PUSHABLE_MODELS: dict[str, type] = {
+    changelog.model_label(model): model
+    for model in [SurgeryRequest, SurgerySchedule, OperatingRoom, Equipment, Notification]
+}
+# Non-admins may only sync their own notification read state
+NON_ADMIN_MODELS = {"notification"}
+NOTIFICATION_FIELDS = {"is_read"}
+OPERATIONS = {"create", "update", "delete"}
+MAX_MUTATIONS = 1000
+# Seq an entry that is committed but not numbered yet compares as
+UNNUMBERED = 2**63 - 1
+
+
+@dataclass
+class Mutation:
+    index: int
+    client_id: Any
+    model_name: str
+    operation: str
+    object_id: Optional[str]
+    base_seq: int
+    data: dict
+    result: dict = field(default_factory=dict)
+
+    @property
+    def model(self) -> type:
+        return PUSHABLE_MODELS[self.model_name]
+
+
+def _result(mutation: Mutation, status: str, **extra: Any) -> None:
+    mutation.result = {"client_id": mutation.client_id, "status": status, **extra}
+
+
+def _normalize_id(mutation: Mutation) -> bool:
+    # Match the str(pk) form used by the change log
+    try:
+        mutation.object_id = str(mutation.model._meta.pk.to_python(mutation.object_id))
+    except ValidationError:
+        return False
+    return True
+
+
+def _parse(raw_changes: list, profile: BaseUserProfile) -> list[Mutation]:
+    mutations = []
+    for index, raw in enumerate(raw_changes):
+        raw = raw if isinstance(raw, dict) else {}
+        mutation = Mutation(
+            index=index,
+            client_id=raw.get("client_id", index),
+            model_name=str(raw.get("model", "")).lower(),
+            operation=raw.get("op", ""),
+            object_id=str(raw["id"]) if raw.get("id") is not None else None,
+            base_seq=raw.get("base_seq") or 0,
+            data=raw.get("data") or {},
+        )
+        if mutation.model_name not in PUSHABLE_MODELS or mutation.operation not in OPERATIONS:
+            _result(mutation, "error", errors={"detail": "Unknown model or op."})
+        elif profile.role != "admin" and mutation.model_name not in NON_ADMIN_MODELS:
+            _result(mutation, "error", errors={"detail": "Not allowed for your role."})
+        elif mutation.operation != "create" and mutation.object_id is None:
+            _result(mutation, "error", errors={"detail": "id is required."})
+        elif mutation.object_id is not None and not _normalize_id(mutation):
+            _result(mutation, "error", errors={"detail": "Invalid id."})
+        elif not isinstance(mutation.base_seq, int) or not isinstance(mutation.data, dict):
+            _result(mutation, "error", errors={"detail": "Malformed mutation."})
+        elif mutation.model_name == "notification" and (
+            mutation.operation != "update" or not set(mutation.data) <= NOTIFICATION_FIELDS
+        ):
+            _result(mutation, "error", errors={"detail": "Only is_read can be synced for notifications."})
+        mutations.append(mutation)
+    return mutations
+
+
+def _scope(model: type, hospital_id: Any, profile: BaseUserProfile):
+    queryset = model.objects.filter(**{HOSPITAL_PATHS[model]: hospital_id})
+    if model is Notification:
+        queryset = queryset.filter(base_profile=profile)
+    return queryset
+
+
+def _load_rows(
+    pending: list[Mutation], hospital_id: Any, profile: BaseUserProfile
+) -> dict[tuple[str, str], Any]:
+    ids_by_model: dict[str, set[str]] = defaultdict(set)
+    for mutation in pending:
+        if mutation.object_id is not None:
+            ids_by_model[mutation.model_name].add(mutation.object_id)
+
+    rows: dict[tuple[str, str], Any] = {}
+    # Locked in one fixed order (model, pk) so concurrent pushes cannot deadlock
+    for model_name, ids in sorted(ids_by_model.items()):
+        model = PUSHABLE_MODELS[model_name]
+        queryset = (
+            _scope(model, hospital_id, profile)
+            .filter(pk__in=ids)
+            .select_for_update(of=("self",))
+            .order_by("pk")
+        )
+        if model is SurgerySchedule:
+            queryset = queryset.prefetch_related("surgeons")
+        for row in queryset:
+            rows[(model_name, str(row.pk))] = row
+    return rows
+
+
+def _load_seqs(pending: list[Mutation], hospital_id: Any) -> dict[tuple[str, str], int]:
+    ids_by_model: dict[str, set[str]] = defaultdict(set)
+    for mutation in pending:
+        if mutation.object_id is not None:
+            ids_by_model[mutation.model_name].add(mutation.object_id)
+    if not ids_by_model:
+        return {}
+    match = Q()
+    for model_name, ids in ids_by_model.items():
+        match |= Q(model=model_name, object_id__in=ids)
+    latest = (
+        ChangeLogEntry.objects.filter(hospital_id=hospital_id)
+        .filter(match)
+        .values("model", "object_id")
+        .annotate(last_seq=Max(Coalesce("seq", Value(UNNUMBERED))))
+    )
+    return {(row["model"], row["object_id"]): row["last_seq"] for row in latest}
+
+
+def _load_related(pending: list[Mutation], hospital_id: Any) -> dict[type, dict[str, Any]]:
+    """
+    The rows the mutations' foreign keys point at, one query per related
+    model and only within the hospital: {model: {str(pk): row}}.
+    """
+    ids_by_model: dict[type, set[str]] = defaultdict(set)
+    for mutation in pending:
+        if mutation.operation == "delete":
+            continue
+        for model_field in mutation.model._meta.fields + mutation.model._meta.many_to_many:
+            if model_field.name == "hospital":
+                # Set by _validated: the user's own hospital on create, never on update
+                value = hospital_id if mutation.operation == "create" else None
+            else:
+                value = mutation.data.get(model_field.name)
+            if not model_field.is_relation or value is None:
+                continue
+            related_model = model_field.related_model
+            for pk in value if isinstance(value, list) else [value]:
+                try:
+                    ids_by_model[related_model].add(str(related_model._meta.pk.to_python(pk)))
+                except (TypeError, ValidationError):
+                    pass  # reported by the serializer field
+
+    related: dict[type, dict[str, Any]] = {}
+    for model, ids in ids_by_model.items():
+        queryset = model.objects.filter(pk__in=ids)
+        if model in HOSPITAL_PATHS:
+            queryset = queryset.filter(**{HOSPITAL_PATHS[model]: hospital_id})
+        related[model] = {str(row.pk): row for row in queryset}
+    return related
+
+
+def _loaded_row(relation: serializers.PrimaryKeyRelatedField, rows: dict[str, Any], data: Any) -> Any:
+    # PrimaryKeyRelatedField.to_internal_value without the query
+    model = relation.queryset.model
+    try:
+        row = rows.get(str(model._meta.pk.to_python(data)))
+    except (TypeError, ValidationError):
+        relation.fail("incorrect_type", data_type=type(data).__name__)
+    if row is None:
+        relation.fail("does_not_exist", pk_value=data)
+    return row
+
+
+def _server_copy(row: Any) -> Optional[dict]:
+    return dict(changelog.SERIALIZERS[type(row)](row).data) if row is not None else None
+
+
+def _conflict(mutation: Mutation, row: Any, reason: str) -> None:
+    _result(
+        mutation,
+        "conflict",
+        id=mutation.object_id,
+        conflict=True,
+        resolution_strategy="SERVER_WINS",
+        reason=reason,
+        server=_server_copy(row),
+    )
+
+
+def _validated(
+    mutation: Mutation, row: Any, hospital_id: Any, related: dict[type, dict[str, Any]]
+) -> Optional[dict]:
+    data = dict(mutation.data)
+    if "hospital" in {f.name for f in mutation.model._meta.fields}:
+        # Rows cannot move between hospitals; updates skip the FK lookup
+        data.pop("hospital", None)
+        if row is None:
+            data["hospital"] = str(hospital_id)
+    serializer_class = changelog.SERIALIZERS[mutation.model]
+    serializer = serializer_class(row, data=data, partial=row is not None)
+    # Related rows come from `related`, which only holds the user's hospital
+    for serializer_field in serializer.fields.values():
+        relation = getattr(serializer_field, "child_relation", serializer_field)
+        if isinstance(relation, serializers.PrimaryKeyRelatedField) and relation.queryset is not None:
+            rows = related.get(relation.queryset.model, {})
+            relation.to_internal_value = partial(_loaded_row, relation, rows)
+    if not serializer.is_valid():
+        _result(mutation, "error", id=mutation.object_id, errors=serializer.errors)
+        return None
+    return dict(serializer.validated_data)
+
+
+def apply_push(raw_changes: list, profile: BaseUserProfile) -> list[dict]:
+    """
+    Apply a batch of offline mutations for `profile`'s hospital.
+    Returns one result per mutation, in input order.
+    """
+    hospital_id = profile.hospital_id
+    mutations = _parse(raw_changes, profile)
+    pending = [m for m in mutations if not m.result]
+
+    with transaction.atomic(using=tenant_db()):
+        rows = _load_rows(pending, hospital_id, profile)
+        seqs = _load_seqs(pending, hospital_id)
+        related = _load_related(pending, hospital_id)
+
+        creates: dict[type, list[tuple[Mutation, Any, dict]]] = defaultdict(list)
+        updates: dict[type, dict[str, Any]] = defaultdict(dict)
+        update_fields: dict[type, set[str]] = defaultdict(set)
+        m2m_updates: dict[type, dict[str, dict]] = defaultdict(dict)
+        deletes: dict[type, dict[str, Any]] = defaultdict(dict)
+        read_delta = 0
+
+        for mutation in pending:
+            key = (mutation.model_name, mutation.object_id)
+            row = rows.get(key) if mutation.object_id is not None else None
+
+            if mutation.operation == "create":
+                if row is not None:
+                    _conflict(mutation, row, "ALREADY_EXISTS")
+                    continue
+                validated = _validated(mutation, None, hospital_id, related)
+                if validated is None:
+                    continue
+                m2m = {
+                    name: validated.pop(name)
+                    for name in [f.name for f in mutation.model._meta.many_to_many]
+                    if name in validated
+                }
+                instance = mutation.model(**validated)
+                if mutation.object_id is not None and mutation.model is SurgeryRequest:
+                    instance.pk = mutation.object_id  # client-generated UUID
+                creates[mutation.model].append((mutation, instance, m2m))
+                continue
+
+            if row is None or mutation.object_id in deletes[mutation.model]:
+                _conflict(mutation, None, "DELETED")
+                continue
+            if seqs.get(key, 0) > mutation.base_seq:
+                _conflict(mutation, row, "STALE")
+                continue
+
+            if mutation.operation == "delete":
+                deletes[mutation.model][mutation.object_id] = row
+                updates[mutation.model].pop(mutation.object_id, None)
+                _result(mutation, "applied", id=mutation.object_id)
+                continue
+
+            validated = _validated(mutation, row, hospital_id, related)
+            if validated is None:
+                continue
+            if mutation.model is SurgerySchedule and not _move_reservations(mutation, row, validated):
+                continue
+            if mutation.model is Notification and "is_read" in validated:
+                if validated["is_read"] != row.is_read:
+                    read_delta += 1 if validated["is_read"] else -1
+            for name in [f.name for f in mutation.model._meta.many_to_many]:
+                if name in validated:
+                    m2m_updates[mutation.model][mutation.object_id] = {name: validated.pop(name)}
+            for name, value in validated.items():
+                setattr(row, name, value)
+            update_fields[mutation.model].update(validated)
+            if mutation.model is SurgerySchedule:
+                # Invalidates drag-and-drop moves based on the old row
+                row.version += 1
+                update_fields[mutation.model].add("version")
+            updates[mutation.model][mutation.object_id] = row
+            _result(mutation, "applied", id=mutation.object_id)
+
+        _apply_creates(creates, hospital_id)
+        _apply_updates(updates, update_fields, m2m_updates, hospital_id)
+        for model, doomed in deletes.items():
+            if doomed:
+                # Per-row delete signals record the change log entries
+                model.objects.filter(pk__in=list(doomed)).delete()
+
+        if read_delta:
+            BaseUserProfile.objects.filter(id=profile.id).update(
+                unread_notifications=F("unread_notifications") - read_delta
+            )
+
+    return [m.result for m in mutations]
+
+
+def _move_reservations(mutation: Mutation, row: SurgerySchedule, validated: dict) -> bool:
+    """
+    Apply a schedule update to the equipment ledger before the row itself.
+    False (and a conflict result) when the new window lacks equipment.
+    """
+    if validated.get("status", row.status) in reservations.get_setting("RELEASE_STATUSES"):
+        reservations.release([row.id])
+        return True
+    start = validated.get("start_time", row.start_time)
+    end = validated.get("end_time", row.end_time)
+    if (start, end) == (row.start_time, row.end_time):
+        return True
+    try:
+        reservations.reschedule(row, start, end)
+    except reservations.EquipmentUnavailable as error:
+        _conflict(mutation, row, "EQUIPMENT_UNAVAILABLE")
+        mutation.result["shortages"] = error.shortages
+        return False
+    except ValueError as error:
+        _result(mutation, "error", id=mutation.object_id, errors={"detail": str(error)})
+        return False
+    return True
+
+
+def _reserve_created(items: list, instances: list, hospital_id: Any) -> tuple[list, list]:
+    # New schedules that cannot get their equipment are removed again
+    kept_items, kept_instances, rejected = [], [], []
+    for item, instance in zip(items, instances):
+        try:
+            reservations.reserve(instance, hospital_id=hospital_id)
+        except (reservations.EquipmentUnavailable, ValueError) as error:
+            mutation = item[0]
+            if isinstance(error, ValueError):
+                _result(mutation, "error", errors={"detail": str(error)})
+            else:
+                _conflict(mutation, None, "EQUIPMENT_UNAVAILABLE")
+                mutation.result["shortages"] = error.shortages
+            rejected.append(instance.pk)
+            continue
+        kept_items.append(item)
+        kept_instances.append(instance)
+    if rejected:
+        # Never announced and still childless (surgeons are added below)
+        raw_delete(SurgerySchedule.objects.filter(pk__in=rejected))
+    return kept_items, kept_instances
+
+
+def _apply_creates(creates: dict, hospital_id: Any) -> None:
+    for model, items in creates.items():
+        instances = model.objects.bulk_create([instance for _, instance, _ in items])
+        if model is SurgerySchedule:
+            items, instances = _reserve_created(items, instances, hospital_id)
+        through_rows = []
+        for (mutation, _, m2m), instance in zip(items, instances):
+            for name, related in m2m.items():
+                m2m_field = model._meta.get_field(name)
+                source = f"{m2m_field.m2m_field_name()}_id"
+                target = f"{m2m_field.m2m_reverse_field_name()}_id"
+                through_rows.extend(
+                    m2m_field.remote_field.through(**{source: instance.pk, target: other.pk})
+                    for other in related
+                )
+            _result(mutation, "applied", id=str(instance.pk))
+        if through_rows:
+            type(through_rows[0]).objects.bulk_create(through_rows)
+        changelog.record_bulk(hospital_id, instances, "create")
+        _run_hooks(model, instances, True, hospital_id)
+
+
+def _apply_updates(
+    updates: dict, update_fields: dict, m2m_updates: dict, hospital_id: Any
+) -> None:
+    for model, rows_by_id in updates.items():
+        if not rows_by_id:
+            continue
+        fields = sorted(update_fields[model])
+        if fields:
+            model.objects.bulk_update(list(rows_by_id.values()), fields)
+        for object_id, m2m in m2m_updates[model].items():
+            for name, related in m2m.items():
+                # .set() is a single diffed write per row; rare in offline edits
+                getattr(rows_by_id[object_id], name).set(related)
+        changelog.record_bulk(hospital_id, rows_by_id.values(), "update")
+        _run_hooks(model, rows_by_id.values(), False, hospital_id)
+
+
+def _run_hooks(model: type, instances: Iterable[Any], created: bool, hospital_id: Any) -> None:
+    # Bulk writes skip post_save: run what its receivers would have
+    for instance in instances:
+        if model is SurgeryRequest and created:
+            signals.surgery_request_created(instance)
+        elif model is SurgerySchedule:
+            signals.surgery_schedule_changed(instance, created, hospital_id)
@@ -0,0 +1,102 @@
+"""
+Helpers for resolving which `Hospital` a row belongs to.
+
+Every model in core.models is scoped to a hospital, directly or through a
+foreign key. `HOSPITAL_PATHS` records that path once so signals, sync and
+routing code do not each re-derive it.
+"""
+
+from typing import Any, Optional
+
+from django.db import models, router
+
+from core.models import (
+    ArchivedNotification,
+    ArchivedRescheduleEvent,
+    ArchivedSurgerySchedule,
+    BaseUserProfile,
+    Equipment,
+    EquipmentReservation,
+    EquipmentSterilization,
+    Hospital,
+    Notification,
+    OperatingRoom,
+    Patient,
+    RescheduleEvent,
+    StaffProfile,
+    SurgeonProfile,
+    SurgeryEquipmentRequirement,
+    SurgeryQueue,
+    SurgeryRequest,
+    SurgerySchedule,
+)
+
+# Model -> ORM lookup path to the hospital id
+HOSPITAL_PATHS: dict[type[models.Model], str] = {
+    Hospital: "id",
+    OperatingRoom: "hospital_id",
+    BaseUserProfile: "hospital_id",
+    SurgeonProfile: "base_profile__hospital_id",
+    StaffProfile: "base_profile__hospital_id",
+    Patient: "hospital_id",
+    SurgeryRequest: "hospital_id",
+    SurgerySchedule: "operating_room__hospital_id",
+    RescheduleEvent: "triggered_by__hospital_id",
+    SurgeryQueue: "surgery_request__hospital_id",
+    SurgeryEquipmentRequirement: "surgery_request__hospital_id",
+    Equipment: "hospital_id",
+    EquipmentSterilization: "equipment__hospital_id",
+    EquipmentReservation: "hospital_id",
+    Notification: "base_profile__hospital_id",
+    ArchivedSurgerySchedule: "hospital_id",
+    ArchivedRescheduleEvent: "hospital_id",
+    ArchivedNotification: "hospital_id",
+}
+
+
+def hospital_id_for(instance: models.Model) -> Optional[Any]:
+    """
+    Hospital id of `instance`, following cached relations where possible.
+    """
+    path = HOSPITAL_PATHS.get(type(instance))
+    if path is None:
+        return None
+    *relations, field = path.split("__")
+    obj: Any = instance
+    for relation in relations:
+        if getattr(obj, f"{relation}_id", None) is None:
+            return None
+        obj = getattr(obj, relation)
+    return getattr(obj, field)
+
+
+def touch_hospital(hospital_id: Any) -> None:
+    """
+    Move the hospital's `data_version` forward after a write has committed.
+    Code that writes with bulk_create/update() (no signals) must call this
+    itself.
+    """
+    if hospital_id is not None:
+        Hospital.objects.filter(id=hospital_id).update(
+            data_version=models.F("data_version") + 1
+        )
+
+
+def tenant_db() -> str:
+    """
+    Alias that hospital data is written to right now: `default`, or the
+    current shard when sharding is enabled. Open transactions on this alias.
+    """
+    return router.db_for_write(Hospital)
+
+
+def raw_delete(queryset: models.QuerySet, using: Optional[str] = None) -> int:
+    """
+    Delete `queryset`'s rows in one DELETE (on `using`, default `tenant_db()`)
+    and return how many went. No pre/post_delete signals run, so no change
+    log, audit or realtime events, and no cascade is collected: the caller
+    deletes children first and only uses this where skipping the hooks is the
+    point (moving or archiving rows, undoing rows never announced).
+    """
+    # The one caller of Django's private QuerySet._raw_delete
+    return queryset._raw_delete(using or tenant_db())
@@ -0,0 +1,84 @@
+from datetime import datetime, time
+from typing import Optional
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.models import AuditLog
+from core.serializers import AuditLogSerializer
+
+from core.views import BaseLoggedInView
+
+MAX_PAGE_SIZE = 500
+
+
+def _parse_bound(value: str, end: bool) -> Optional[datetime]:
+    # Accept full timestamps or plain dates (a date end bound covers the whole day)
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.max if end else time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class AuditLogsView(BaseLoggedInView):
+    """
+    Audit trail of the admin's hospital.
+
+    Only admins can access.
+    """
+
+    required_roles = ["admin"]
+
+    def get(self, request: Request) -> Response:
+        """
+        GET /audit-logs?user=&action=&resource_type=&resource_id=&start_date=&end_date=&before=&limit=
+        — keyset-paginated audit entries, newest first.
+        """
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id:
+            return Response(
+                {"detail": "Cannot list audit logs without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        params = request.query_params
+        logs = AuditLog.objects.filter(hospital_id=hospital_id)
+        try:
+            if params.get("user"):
+                user = params["user"]
+                logs = logs.filter(actor_id=int(user)) if user.isdigit() else logs.filter(actor_username=user)
+            if params.get("action"):
+                logs = logs.filter(action=params["action"])
+            if params.get("resource_type"):
+                logs = logs.filter(resource_type=params["resource_type"])
+            if params.get("resource_id"):
+                logs = logs.filter(resource_id=params["resource_id"])
+            if params.get("start_date"):
+                logs = logs.filter(timestamp__gte=_parse_bound(params["start_date"], end=False))
+            if params.get("end_date"):
+                logs = logs.filter(timestamp__lte=_parse_bound(params["end_date"], end=True))
+            if params.get("before"):
+                logs = logs.filter(id__lt=int(params["before"]))
+            limit = max(1, min(int(params.get("limit", 100)), MAX_PAGE_SIZE))
+        except ValueError:
+            return Response(
+                {"detail": "Invalid filter value."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        page = list(logs.order_by("-id")[: limit + 1])
+        next_before = page[limit - 1].id if len(page) > limit else None
+        return Response(
+            {
+                "results": AuditLogSerializer(page[:limit], many=True).data,
+                "next_before": next_before,
+            }
+        )
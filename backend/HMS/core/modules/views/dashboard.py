@@ -0,0 +1,249 @@
+from datetime import date, datetime, time, timedelta
+from functools import wraps
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from asgiref.sync import sync_to_async
+from django.db.models import Case, IntegerField, Value, When
+from django.http import HttpRequest, JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.models import Hospital, OperatingRoom, SurgerySchedule
+from core.modules import archive, notifications, sharding
+from core.modules.sockets import aauthenticate_token
+
+# Async twins of the read-heavy dashboard endpoints. Like the event views they
+# are plain async Django views (DRF is sync-only) and read through the async
+# ORM, so under HMS.asgi a request waiting on the database holds no worker
+# thread. They still work under WSGI, one event loop per request.
+
+CALENDAR_STATUSES = ["scheduled", "completed"]
+PRIORITY_RANK = {"emergency": 0, "urgent": 1, "elective": 2}
+MAX_PAGE_SIZE = 200
+MAX_QUEUE_SIZE = 500
+
+
+def _bad_request(detail: str) -> JsonResponse:
+    return JsonResponse({"detail": detail}, status=400)
+
+
+def dashboard_view(roles: Optional[list[str]] = None) -> Callable:
+    """
+    Authenticate the Bearer token, check the role (any role if `roles` is
+    None) and scope the database to the user's shard. The view is called as
+    view(request, hospital_id, role, profile_id).
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        async def wrapper(request: HttpRequest) -> JsonResponse:
+            header = request.headers.get("Authorization", "")
+            token = header[len("Bearer "):] if header.startswith("Bearer ") else None
+            identity = await aauthenticate_token(token)
+            if identity is None:
+                return JsonResponse({"detail": "Authentication required"}, status=401)
+            hospital_id, role, profile_id = identity
+            if roles is not None and role not in roles:
+                return JsonResponse(
+                    {"detail": "You do not have permission to perform this action."}, status=403
+                )
+            if not sharding.enabled():
+                return await view(request, hospital_id, role, profile_id)
+            alias = await sync_to_async(sharding.shard_for_hospital)(hospital_id)
+            with sharding.use_shard(alias):
+                return await view(request, hospital_id, role, profile_id)
+
+        return wrapper
+
+    return decorator
+
+
+async def _hospital_tz(hospital_id: str) -> ZoneInfo:
+    name = await Hospital.objects.filter(id=hospital_id).values_list("timezone", flat=True).afirst()
+    try:
+        return ZoneInfo(name or "UTC")
+    except ZoneInfoNotFoundError:
+        return ZoneInfo("UTC")
+
+
+def _midnight(day: date, tz: ZoneInfo) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=tz)
+
+
+async def _calendar(hospital_id: str, first_day: date, days: int, tz: ZoneInfo) -> dict:
+    start = _midnight(first_day, tz)
+    end = _midnight(first_day + timedelta(days=days), tz)
+
+    rooms = {
+        room["id"]: {**room, "schedules": []}
+        async for room in OperatingRoom.objects.filter(hospital_id=hospital_id)
+        .order_by("name")
+        .values("id", "name", "operating_room_type", "is_available", "maintenance_until")
+    }
+    schedules = [
+        schedule
+        async for schedule in SurgerySchedule.objects.filter(
+            operating_room__hospital_id=hospital_id,
+            status__in=CALENDAR_STATUSES,
+            start_time__lt=end,
+            end_time__gt=start,
+        )
+        .order_by("start_time")
+        .values(
+            "id",
+            "operating_room_id",
+            "surgery_request_id",
+            "surgery_request__procedure_name",
+            "surgery_request__priority",
+            "start_time",
+            "end_time",
+            "status",
+            "version",
+        )
+    ]
+    surgeons: dict[int, list[int]] = {}
+    async for schedule_id, surgeon_id in SurgerySchedule.surgeons.through.objects.filter(
+        surgeryschedule_id__in=[schedule["id"] for schedule in schedules]
+    ).values_list("surgeryschedule_id", "surgeonprofile_id"):
+        surgeons.setdefault(schedule_id, []).append(surgeon_id)
+
+    for schedule in schedules:
+        room = rooms.get(schedule.pop("operating_room_id"))
+        if room is None:
+            continue
+        schedule["procedure_name"] = schedule.pop("surgery_request__procedure_name")
+        schedule["priority"] = schedule.pop("surgery_request__priority")
+        schedule["surgeons"] = sorted(surgeons.get(schedule["id"], []))
+        room["schedules"].append(schedule)
+    return {"start": start, "end": end, "timezone": tz.key, "rooms": list(rooms.values())}
+
+
+@dashboard_view()
+async def calendar_day(request: HttpRequest, hospital_id: str, role: str, profile_id: int) -> JsonResponse:
+    """
+    GET /calendar/day?date=YYYY-MM-DD — operating rooms with their scheduled
+    and completed surgeries on one day (hospital time, default today).
+    """
+    tz = await _hospital_tz(hospital_id)
+    day = timezone.now().astimezone(tz).date()
+    if request.GET.get("date"):
+        try:
+            day = parse_date(request.GET["date"])
+        except ValueError:
+            day = None
+        if day is None:
+            return _bad_request("date must be YYYY-MM-DD.")
+    return JsonResponse(await _calendar(hospital_id, day, 1, tz))
+
+
+@dashboard_view()
+async def calendar_week(request: HttpRequest, hospital_id: str, role: str, profile_id: int) -> JsonResponse:
+    """
+    GET /calendar/week?start=YYYY-MM-DD — seven days from `start` (default:
+    this week's Monday, hospital time).
+    """
+    tz = await _hospital_tz(hospital_id)
+    today = timezone.now().astimezone(tz).date()
+    first_day = today - timedelta(days=today.weekday())
+    if request.GET.get("start"):
+        try:
+            first_day = parse_date(request.GET["start"])
+        except ValueError:
+            first_day = None
+        if first_day is None:
+            return _bad_request("start must be YYYY-MM-DD.")
+    return JsonResponse(await _calendar(hospital_id, first_day, 7, tz))
+
+
+@dashboard_view(roles=["admin", "scheduler"])
+async def priority_queue(request: HttpRequest, hospital_id: str, role: str, profile_id: int) -> JsonResponse:
+    """
+    GET /priority-queue?limit=<n> — unscheduled surgery requests (including
+    bumped and cancelled ones), emergencies first, then by deadline.
+    """
+    try:
+        limit = min(max(1, int(request.GET.get("limit", 100))), MAX_QUEUE_SIZE)
+    except ValueError:
+        return _bad_request("limit must be an integer.")
+
+    now = timezone.now()
+    rank = Case(
+        *(When(priority=priority, then=Value(value)) for priority, value in PRIORITY_RANK.items()),
+        default=Value(len(PRIORITY_RANK)),
+        output_field=IntegerField(),
+    )
+    queue = []
+    async for row in (
+        archive.unscheduled_requests(hospital_id)
+        .annotate(rank=rank)
+        .order_by("rank", "latest_allowed_time", "requested_at")
+        .values(
+            "id",
+            "procedure_name",
+            "priority",
+            "approved",
+            "requested_at",
+            "latest_allowed_time",
+            "surgeryqueue__escalated",
+            "surgeryqueue__wait_days",
+        )[:limit]
+    ):
+        queue.append(
+            {
+                "surgery_id": row["id"],
+                "procedure_name": row["procedure_name"],
+                "priority": row["priority"],
+                "approved": row["approved"],
+                "requested_at": row["requested_at"],
+                "latest_allowed_time": row["latest_allowed_time"],
+                "deadline_hours": round((row["latest_allowed_time"] - now).total_seconds() / 3600, 1),
+                "escalated": bool(row["surgeryqueue__escalated"]),
+                "wait_days": row["surgeryqueue__wait_days"] or 0,
+            }
+        )
+    return JsonResponse({"results": queue})
+
+
+@dashboard_view(roles=["admin"])
+async def schedule_list(request: HttpRequest, hospital_id: str, role: str, profile_id: int) -> JsonResponse:
+    """
+    GET /async/schedule?archived=include|only — async twin of GET /schedule/.
+    """
+    try:
+        mode = archive.read_mode(request.GET.get("archived"))
+    except ValueError:
+        return _bad_request("archived must be one of include, only.")
+    rows = await archive.aschedules(hospital_id, mode)
+    return JsonResponse(archive.serialize(rows), safe=False)
+
+
+@dashboard_view()
+async def notification_list(request: HttpRequest, hospital_id: str, role: str, profile_id: int) -> JsonResponse:
+    """
+    GET /async/notifications?before=<id>&limit=<n>&unread=1&archived=1 — async
+    twin of GET /notifications/.
+    """
+    try:
+        before: Optional[int] = int(request.GET["before"]) if "before" in request.GET else None
+        limit = min(int(request.GET.get("limit", 50)), MAX_PAGE_SIZE)
+        mode = archive.read_mode(request.GET.get("archived"))
+        if mode == "only":
+            raise ValueError(mode)
+    except ValueError:
+        return _bad_request("before and limit must be integers, archived 1 or include.")
+
+    page, next_before = await notifications.ainbox_page(
+        profile_id,
+        before_id=before,
+        limit=max(1, limit),
+        unread_only=request.GET.get("unread") in ("1", "true"),
+        include_archived=mode != "exclude",
+    )
+    return JsonResponse(
+        {
+            "results": archive.serialize(page),
+            "next_before": next_before,
+            "unread_count": await notifications.aunread_count(profile_id),
+        }
+    )
@@ -1,16 +1,24 @@
+from datetime import timedelta
 from typing import Optional
 from uuid import UUID
 
-from django.contrib.admin import action
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.request import Request
 from rest_framework.response import Response
 
 from core.models import BaseUserProfile, Equipment
-from core.serializers import EquipmentSerializer
+from core.modules import jobs, reservations, sterilization
+from core.modules.tenancy import tenant_db
+from core.serializers import EquipmentSerializer, EquipmentSterilizationSerializer, JobSerializer
 
 from core.views import BaseLoggedInViewSet
 
+MAX_PLAN_HOURS = 24 * 30
+
 
 class EquipmentViewSet(BaseLoggedInViewSet):
     """
@@ -24,7 +32,8 @@ class EquipmentViewSet(BaseLoggedInViewSet):
 
     def list(self, request: Request) -> Response:
         """
-        GET /equipment/ — list equipment the admin can access.
+        GET /equipment/?sterile_at= — list equipment the admin can access,
+        optionally only items still sterile at the given time.
         """
         # Multi-tenant: admins can only see their hospital
         hospital_id: str = request.user.baseuserprofile.hospital_id
@@ -37,6 +46,17 @@ class EquipmentViewSet(BaseLoggedInViewSet):
         if hospital_id:
             equipment = Equipment.objects.filter(hospital_id=hospital_id)
 
+        if "sterile_at" in request.query_params:
+            sterile_at = parse_datetime(request.query_params["sterile_at"])
+            if sterile_at is None:
+                return Response(
+                    {"detail": "sterile_at must be an ISO 8601 timestamp."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(sterile_at):
+                sterile_at = timezone.make_aware(sterile_at)
+            equipment = equipment.filter(sterile_from__lte=sterile_at, sterile_until__gte=sterile_at)
+
         serializer = EquipmentSerializer(equipment, many=True)
         return Response(serializer.data)
 
@@ -94,3 +114,130 @@ class EquipmentViewSet(BaseLoggedInViewSet):
             return Response({"detail": "Deleted"}, status=status.HTTP_204_NO_CONTENT)
         except Equipment.DoesNotExist:
             return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    @action(detail=False, methods=["get"])
+    def availability(self, request: Request) -> Response:
+        """
+        GET /equipment/availability/?start=&end=&type=&quantity= — free units per
+        equipment type for the whole [start, end) window.
+        """
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id:
+            return Response(
+                {"detail": "Cannot check equipment without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        params = request.query_params
+        start = parse_datetime(params.get("start", ""))
+        end = parse_datetime(params.get("end", ""))
+        try:
+            quantity = int(params.get("quantity", 1))
+            if start is None or end is None:
+                raise ValueError("start and end must be ISO 8601 timestamps.")
+            start, end = (
+                timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+                for moment in (start, end)
+            )
+            reservations.check_window(start, end)
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if params.get("type"):
+            equipment_types = [params["type"]]
+        else:
+            equipment_types = sorted(
+                Equipment.objects.filter(hospital_id=hospital_id)
+                .values_list("equipment_type", flat=True)
+                .distinct()
+            )
+        results = []
+        for equipment_type in equipment_types:
+            capacity = reservations.capacity(hospital_id, equipment_type)
+            reserved = reservations.reserved(hospital_id, equipment_type, start, end)
+            results.append(
+                {
+                    "equipment_type": equipment_type,
+                    "capacity": capacity,
+                    "reserved": reserved,
+                    "available": max(capacity - reserved, 0),
+                    "can_reserve": capacity - reserved >= quantity,
+                }
+            )
+        return Response({"start": start, "end": end, "quantity": quantity, "results": results})
+
+    @action(detail=True, methods=["post"])
+    def sterilize(self, request: Request, pk: Optional[str] = None) -> Response:
+        """
+        POST /equipment/<pk>/sterilize/ — book the item's next sterilization cycle
+        (the planned one if upcoming surgeries need it, else the first free sterilizer).
+        """
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id:
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        with transaction.atomic(using=tenant_db()):
+            # One booking at a time per item
+            equipment = (
+                Equipment.objects.select_for_update()
+                .filter(id=pk, hospital_id=hospital_id)
+                .first()
+            )
+            if equipment is None:
+                return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+            record, job = sterilization.schedule_item(equipment)
+
+        return Response(
+            {
+                "sterilization": EquipmentSterilizationSerializer(record).data,
+                "job": job.__dict__,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["get"], url_path="sterilization-plan")
+    def sterilization_plan(self, request: Request) -> Response:
+        """
+        GET /equipment/sterilization-plan/?hours= — planned sterilizer cycles and
+        surgeries at risk for the admin's hospital.
+        """
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id:
+            return Response(
+                {"detail": "Cannot plan sterilization without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            hours = float(request.query_params.get("hours", sterilization.get_setting("HORIZON_HOURS")))
+        except ValueError:
+            hours = None
+        # Also refuses nan and inf, which compare false
+        if hours is None or not 0 < hours <= MAX_PLAN_HOURS:
+            return Response(
+                {"detail": f"hours must be a number in (0, {MAX_PLAN_HOURS}]."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        plan = sterilization.plan(hospital_id, horizon=timedelta(hours=hours))
+        return Response(plan.as_dict())
+
+    @action(detail=False, methods=["post"], url_path="sterilization-sweep")
+    def sterilization_sweep(self, request: Request) -> Response:
+        """
+        POST /equipment/sterilization-sweep/ {"record": bool} — in the background,
+        flag lapsed items for sterilization and plan (with record, book) sterilizer cycles.
+        """
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id:
+            return Response(
+                {"detail": "Cannot sweep without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        job = jobs.enqueue(
+            "sterilization_sweep",
+            hospital_id,
+            {"record": bool(request.data.get("record", False))},
+            dedup_key=f"sterilization_sweep:{hospital_id}",
+            created_by_id=request.user.baseuserprofile.id,
+        )
+        return Response({"job": JobSerializer(job).data}, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import time
+from typing import Optional
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, JsonResponse, StreamingHttpResponse
+
+from core.modules import realtime
+from core.modules.realtime import hub
+from core.modules.sockets import authenticate_long_lived
+from core.modules.watchers import ensure_watchers
+
+# These are plain async Django views rather than DRF views: DRF is sync-only
+# and would pin a worker thread for the lifetime of every idle connection.
+# Serve them from HMS.asgi.
+
+
+def _token_from_request(request: HttpRequest) -> Optional[str]:
+    # EventSource cannot set headers, so `?token=` is accepted as well
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        return header[len("Bearer "):]
+    return request.GET.get("token")
+
+
+def _int_param(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def _cursor(value: Optional[str], hospital_id: str) -> Optional[int]:
+    cursor = _int_param(value)
+    if cursor is not None and cursor > hub.current_seq(hospital_id):
+        # Ahead of this process (it restarted, or the local backplane numbers
+        # per process): replay the buffer
+        return 0
+    return cursor
+
+
+def _sse_message(payload: dict) -> str:
+    return f"id: {payload['seq']}\nevent: {payload['event']}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+async def event_stream(request: HttpRequest):
+    """
+    GET /events/stream — Server-Sent Events feed of the user's hospital events.
+
+    Reconnecting clients send `Last-Event-ID` (or `?cursor=`) and get the
+    buffered events they missed first. Only served under ASGI: WSGI would
+    buffer the endless response in memory.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "The event stream needs the ASGI server; use /events/poll instead."},
+            status=503,
+        )
+    identity = await authenticate_long_lived(_token_from_request(request))
+    if identity is None:
+        return JsonResponse({"detail": "Authentication required"}, status=401)
+    hospital_id, role, profile_id = identity
+    ensure_watchers()
+
+    cursor = _cursor(
+        request.headers.get("Last-Event-ID") or request.GET.get("cursor"), hospital_id
+    )
+    keepalive = realtime.get_setting("KEEPALIVE_SECONDS")
+
+    async def stream():
+        subscriber = hub.subscribe(hospital_id, role, profile_id)
+        try:
+            yield "retry: 3000\n: connected\n\n"
+            last_seq = cursor if cursor is not None else hub.current_seq(hospital_id)
+            for payload in hub.history(hospital_id, role, profile_id, last_seq):
+                last_seq = payload["seq"]
+                yield _sse_message(payload)
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscriber.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if payload["seq"] <= last_seq:
+                    continue  # already replayed from history
+                last_seq = payload["seq"]
+                yield _sse_message(payload)
+        finally:
+            hub.unsubscribe(subscriber)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # disable nginx buffering
+    return response
+
+
+async def event_poll(request: HttpRequest):
+    """
+    GET /events/poll?cursor=<seq>&timeout=<s> — long-poll fallback.
+
+    Returns buffered events after `cursor` right away, otherwise waits up to
+    `timeout` seconds for the next one. Without a cursor it returns the
+    current cursor immediately so the client can start polling from there.
+    """
+    identity = await authenticate_long_lived(_token_from_request(request))
+    if identity is None:
+        return JsonResponse({"detail": "Authentication required"}, status=401)
+    hospital_id, role, profile_id = identity
+    ensure_watchers()
+
+    cursor = _cursor(request.GET.get("cursor"), hospital_id)
+    if cursor is None:
+        return JsonResponse({"events": [], "cursor": hub.current_seq(hospital_id)})
+
+    max_wait = realtime.get_setting("LONG_POLL_SECONDS")
+    timeout = min(_int_param(request.GET.get("timeout")) or max_wait, max_wait)
+
+    # Subscribe before reading history so nothing slips in between
+    subscriber = hub.subscribe(hospital_id, role, profile_id)
+    try:
+        events = hub.history(hospital_id, role, profile_id, cursor)
+        deadline = time.monotonic() + timeout
+        while not events:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                payload = await asyncio.wait_for(subscriber.queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if payload["seq"] > cursor:
+                events.append(payload)
+        # Drain anything else that is already queued
+        while not subscriber.queue.empty():
+            payload = subscriber.queue.get_nowait()
+            if payload["seq"] > (events[-1]["seq"] if events else cursor):
+                events.append(payload)
+    finally:
+        hub.unsubscribe(subscriber)
+
+    next_cursor = events[-1]["seq"] if events else cursor
+    return JsonResponse({"events": events, "cursor": next_cursor})
@@ -0,0 +1,87 @@
+from typing import Optional
+
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.models import Job
+from core.modules import jobs
+from core.serializers import JobSerializer
+
+from core.views import BaseLoggedInViewSet
+
+MAX_PAGE_SIZE = 200
+
+
+class JobViewSet(BaseLoggedInViewSet):
+    """
+    Background job status ViewSet.
+
+    Only admins can access, and only their hospital's jobs.
+    """
+
+    required_roles = ["admin"]
+
+    def list(self, request: Request) -> Response:
+        """
+        GET /jobs/?status=&task=&before=<id>&limit=<n> — the hospital's jobs, newest first.
+        """
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id:
+            return Response(
+                {"detail": "Cannot list jobs without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        params = request.query_params
+        queryset = Job.objects.filter(hospital_id=hospital_id)
+        if params.get("status"):
+            queryset = queryset.filter(status=params["status"])
+        if params.get("task"):
+            queryset = queryset.filter(task=params["task"])
+        try:
+            if params.get("before"):
+                queryset = queryset.filter(id__lt=int(params["before"]))
+            limit = max(1, min(int(params.get("limit", 50)), MAX_PAGE_SIZE))
+        except ValueError:
+            return Response(
+                {"detail": "before and limit must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        page = list(queryset.order_by("-id")[: limit + 1])
+        return Response(
+            {
+                "results": JobSerializer(page[:limit], many=True).data,
+                "next_before": page[limit - 1].id if len(page) > limit else None,
+            }
+        )
+
+    def retrieve(self, request: Request, pk: Optional[str] = None) -> Response:
+        """
+        GET /jobs/<pk>/ — status and result of one job.
+        """
+        if not str(pk).isdigit():
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        job = Job.objects.filter(id=pk, hospital_id=request.user.baseuserprofile.hospital_id).first()
+        if job is None:
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(JobSerializer(job).data)
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request: Request, pk: Optional[str] = None) -> Response:
+        """
+        POST /jobs/<pk>/cancel/ — cancel a job that has not started yet.
+        """
+        if not str(pk).isdigit():
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        job = jobs.cancel(pk, request.user.baseuserprofile.hospital_id)
+        if job is None:
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        if job.status != "cancelled":
+            return Response(
+                {"detail": f"A {job.status} job cannot be cancelled.", "job": JobSerializer(job).data},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(JobSerializer(job).data)
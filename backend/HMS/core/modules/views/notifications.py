@@ -0,0 +1,131 @@
+from typing import Optional
+
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.modules import archive, jobs, notifications
+from core.serializers import JobSerializer
+
+from core.views import BaseLoggedInViewSet
+
+MAX_PAGE_SIZE = 200
+
+
+class NotificationViewSet(BaseLoggedInViewSet):
+    """
+    Notification inbox ViewSet.
+
+    Every logged-in user can read their own inbox.
+    Only admins can broadcast.
+    """
+
+    required_roles: list = []  # all roles
+
+    def list(self, request: Request) -> Response:
+        """
+        GET /notifications/?before=<id>&limit=<n>&unread=1&archived=1 — keyset-paginated inbox, newest first.
+        """
+        profile = request.user.baseuserprofile
+        try:
+            before: Optional[int] = (
+                int(request.query_params["before"])
+                if "before" in request.query_params
+                else None
+            )
+            limit = min(int(request.query_params.get("limit", 50)), MAX_PAGE_SIZE)
+            mode = archive.read_mode(request.query_params.get("archived"))
+            if mode == "only":
+                raise ValueError(mode)
+        except ValueError:
+            return Response(
+                {"detail": "before and limit must be integers, archived 1 or include."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        page, next_before = notifications.inbox_page(
+            profile,
+            before_id=before,
+            limit=max(1, limit),
+            unread_only=request.query_params.get("unread") in ("1", "true"),
+            include_archived=mode != "exclude",
+        )
+        return Response(
+            {
+                "results": archive.serialize(page),
+                "next_before": next_before,
+                "unread_count": notifications.unread_count(profile),
+            }
+        )
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request: Request) -> Response:
+        """
+        GET /notifications/unread-count/ — badge count, no COUNT(*) involved.
+        """
+        return Response(
+            {"unread_count": notifications.unread_count(request.user.baseuserprofile)}
+        )
+
+    @action(detail=False, methods=["post"], url_path="mark-read")
+    def mark_read(self, request: Request) -> Response:
+        """
+        POST /notifications/mark-read/ — mark every notification up to `up_to_id` read.
+        """
+        try:
+            up_to_id = int(request.data.get("up_to_id"))
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "Please give a valid up_to_id."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        profile = request.user.baseuserprofile
+        marked = notifications.mark_read_up_to(profile, up_to_id)
+        return Response(
+            {"marked": marked, "unread_count": notifications.unread_count(profile)}
+        )
+
+    @action(detail=False, methods=["post"])
+    def broadcast(self, request: Request) -> Response:
+        """
+        POST /notifications/broadcast/ — notify every user (or `roles`) in the admin's hospital.
+        The fan-out runs as a background job; poll GET /jobs/<id>/ for the count.
+        """
+        if self.role != "admin":
+            return Response(
+                {"detail": "Only admins can broadcast."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id:
+            return Response(
+                {"detail": "Cannot broadcast without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        message = request.data.get("message")
+        severity = request.data.get("severity", "info")
+        if not message or severity not in ("info", "warning", "critical"):
+            return Response(
+                {"detail": "Please give a message and a valid severity."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        roles = request.data.get("roles")
+        if roles is not None and (
+            not isinstance(roles, list) or not all(isinstance(role, str) for role in roles)
+        ):
+            return Response(
+                {"detail": "roles must be a list of role names."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        job = jobs.enqueue(
+            "notify_hospital",
+            hospital_id,
+            {"message": message, "severity": severity, "roles": roles},
+            created_by_id=request.user.baseuserprofile.id,
+        )
+        return Response({"job": JobSerializer(job).data}, status=status.HTTP_202_ACCEPTED)
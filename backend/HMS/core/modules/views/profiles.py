@@ -0,0 +1,79 @@
+from django.http import FileResponse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.modules import profiling
+
+from core.views import BaseLoggedInView
+
+CONTENT_TYPES = {
+    "pstats": "application/octet-stream",
+    "collapsed": "text/plain",
+    "sql": "application/json",
+    "meta": "application/json",
+}
+
+
+def _visible_hospital(request: Request):
+    # Superusers see every profile, hospital admins their hospital's requests
+    if request.user.is_superuser:
+        return None
+    return str(request.user.baseuserprofile.hospital_id)
+
+
+class ProfilesView(BaseLoggedInView):
+    """
+    Saved request profiles (see core.modules.profiling).
+
+    Only admins can access.
+    """
+
+    required_roles = ["admin"]
+
+    def get(self, request: Request) -> Response:
+        """
+        GET /profiles?limit= — profile metadata, newest first.
+        """
+        try:
+            limit = max(1, int(request.query_params.get("limit", 50)))
+        except ValueError:
+            return Response(
+                {"detail": "Invalid limit."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"results": profiling.list_profiles(_visible_hospital(request))[:limit]})
+
+
+class ProfileArtifactView(BaseLoggedInView):
+    """
+    Download one artifact of a saved profile.
+
+    Only admins can access.
+    """
+
+    required_roles = ["admin"]
+
+    def get(self, request: Request, profile_id: str, artifact: str):
+        """
+        GET /profiles/<id>/<pstats|collapsed|sql|meta> — the artifact file.
+        """
+        meta = profiling.load_meta(profile_id)
+        hospital_id = _visible_hospital(request)
+        if (
+            meta is None
+            or artifact not in profiling.ARTIFACTS
+            or (hospital_id is not None and meta.get("hospital_id") != hospital_id)
+        ):
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        file = profiling.profile_dir(profile_id) / profiling.ARTIFACTS[artifact]
+        if not file.is_file():
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return FileResponse(
+            open(file, "rb"),
+            as_attachment=artifact != "meta",
+            filename=f"{profile_id}-{file.name}",
+            content_type=CONTENT_TYPES[artifact],
+        )
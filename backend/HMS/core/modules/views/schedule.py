@@ -1,12 +1,15 @@
 from typing import Optional
 from uuid import UUID
 
-from django.contrib.admin import action
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from core.models import SurgerySchedule
+from core.models import OperatingRoom, SurgerySchedule
+from core.modules import archive, reservations, rescheduling
 from core.serializers import SurgeryScheduleSerializer
 
 from core.views import BaseLoggedInViewSet
@@ -24,7 +27,7 @@ class SurgeryScheduleViewSet(BaseLoggedInViewSet):
 
     def list(self, request: Request) -> Response:
         """
-        GET /schedule/ — list surgery schedules the admin can access.
+        GET /schedule/?archived=include|only — list surgery schedules the admin can access.
         """
         # Multi-tenant: admins can only see their hospital
         hospital_id: str = request.user.baseuserprofile.hospital_id
@@ -34,11 +37,15 @@ class SurgeryScheduleViewSet(BaseLoggedInViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if hospital_id:
-            surgery_schedules = SurgerySchedule.objects.filter(surgery_request__hospital_id=hospital_id)
+        try:
+            mode = archive.read_mode(request.query_params.get("archived"))
+        except ValueError:
+            return Response(
+                {"detail": "archived must be one of include, only."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        serializer = SurgeryScheduleSerializer(surgery_schedules, many=True)
-        return Response(serializer.data)
+        return Response(archive.serialize(archive.schedules(hospital_id, mode)))
 
     def create(self, request: Request) -> Response:
         """
@@ -56,7 +63,23 @@ class SurgeryScheduleViewSet(BaseLoggedInViewSet):
 
         serializer = SurgeryScheduleSerializer(data=data)
         serializer.is_valid(raise_exception=True)
-        surgery_schedule = serializer.save()
+        try:
+            surgery_schedule = rescheduling.book(serializer)
+        except rescheduling.RescheduleConflict as conflict:
+            return Response(
+                {"detail": str(conflict), "errors": conflict.errors},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except reservations.EquipmentUnavailable as error:
+            return Response(
+                {
+                    "detail": "Required equipment is not available for this time window.",
+                    "shortages": error.shortages,
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(
             SurgeryScheduleSerializer(surgery_schedule).data,
             status=status.HTTP_201_CREATED,
@@ -75,7 +98,80 @@ class SurgeryScheduleViewSet(BaseLoggedInViewSet):
                 
             surgery_schedule = SurgerySchedule.objects.get(id=pk)
         except SurgerySchedule.DoesNotExist:
+            # Old finished schedules live in the archive
+            archived = archive.find_schedule(hospital_id, pk) if str(pk).isdigit() else None
+            if archived is None:
+                return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(archive.serialize([archived])[0])
+        except ValueError:
             return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
 
         serializer = SurgeryScheduleSerializer(surgery_schedule)
         return Response(serializer.data)
+
+    @action(detail=True, methods=["patch"])
+    def reschedule(self, request: Request, pk: Optional[str] = None) -> Response:
+        """
+        PATCH /schedule/<pk>/reschedule/ — move a schedule (drag and drop).
+
+        Body: {"version", "new_start_time", "new_end_time"?, "operating_room"?}.
+        `version` is the one the client last saw; 409 with structured errors
+        if it is stale or the new slot violates a hard constraint.
+        """
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id or not str(pk).isdigit():
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        data = request.data
+        times = {}
+        for name in ("new_start_time", "new_end_time"):
+            value = data.get(name)
+            moment = parse_datetime(value) if isinstance(value, str) else None
+            if value and moment is None:
+                return Response(
+                    {"detail": f"{name} must be an ISO 8601 timestamp."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if moment is not None and timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            times[name] = moment
+        if times["new_start_time"] is None:
+            return Response(
+                {"detail": "new_start_time is required."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            version = int(data.get("version"))
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "version is required."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            surgery_schedule = rescheduling.reschedule(
+                pk,
+                hospital_id,
+                version,
+                times["new_start_time"],
+                times["new_end_time"],
+                operating_room_id=data.get("operating_room"),
+            )
+        except (SurgerySchedule.DoesNotExist, OperatingRoom.DoesNotExist):
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        except rescheduling.RescheduleConflict as conflict:
+            return Response(
+                {
+                    "success": False,
+                    "errors": conflict.errors,
+                    "schedule": (
+                        SurgeryScheduleSerializer(conflict.schedule).data
+                        if conflict.schedule is not None
+                        else None
+                    ),
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"success": True, "schedule": SurgeryScheduleSerializer(surgery_schedule).data}
+        )
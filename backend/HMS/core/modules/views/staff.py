@@ -1,12 +1,16 @@
+from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from django.contrib.admin import action
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.request import Request
 from rest_framework.response import Response
 
 from core.models import BaseUserProfile, StaffProfile
+from core.modules import shifts
 from core.serializers import StaffProfileSerializer
 
 from core.views import BaseLoggedInViewSet
@@ -37,7 +41,7 @@ class StaffViewSet(BaseLoggedInViewSet):
         if hospital_id:
             staff_profiles = StaffProfile.objects.filter(
                 base_profile__hospital_id=hospital_id
-            )
+            ).select_related("base_profile__django_user")
 
         serializer = StaffProfileSerializer(staff_profiles, many=True)
         return Response(serializer.data)
@@ -94,3 +98,68 @@ class StaffViewSet(BaseLoggedInViewSet):
 
         serializer = StaffProfileSerializer(staff_profile)
         return Response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="on-duty")
+    def on_duty(self, request: Request) -> Response:
+        """
+        GET /staff/on-duty/?at=&role= — staff whose shift is running at `at`
+        (default now).
+        """
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id:
+            return Response(
+                {"detail": "Cannot look up staff without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        moment = _parse_time(request.query_params.get("at"))
+        if moment is None:
+            return Response(
+                {"detail": "at must be an ISO 8601 timestamp."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        role = request.query_params.get("role") or None
+        results = [shift.as_dict() for shift in shifts.on_duty(hospital_id, moment, role)]
+        return Response({"at": moment, "role": role, "results": results})
+
+    @action(detail=False, methods=["get"], url_path="on-call")
+    def on_call(self, request: Request) -> Response:
+        """
+        GET /staff/on-call/?from=&to=&role= — on-call staff who cover the whole
+        [from, to) window, with the shifts that cover it.
+        """
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id:
+            return Response(
+                {"detail": "Cannot look up staff without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        start = _parse_time(request.query_params.get("from"))
+        end = _parse_time(request.query_params.get("to"))
+        if start is None or end is None or end <= start:
+            return Response(
+                {"detail": "from and to must be ISO 8601 timestamps, from before to."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        role = request.query_params.get("role") or None
+        results = [
+            {
+                "base_profile_id": cover[0].base_profile_id,
+                "username": cover[0].username,
+                "role": cover[0].role,
+                "shifts": [shift.as_dict() for shift in cover],
+            }
+            for cover in shifts.on_call(hospital_id, start, end, role)
+        ]
+        return Response({"from": start, "to": end, "role": role, "results": results})
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    # Missing means now; unparsable means None
+    if not value:
+        return timezone.now()
+    moment = parse_datetime(value)
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
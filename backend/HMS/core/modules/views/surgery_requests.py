@@ -1,13 +1,14 @@
 from typing import Optional
 from uuid import UUID
 
-from django.contrib.admin import action
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.request import Request
 from rest_framework.response import Response
 
 from core.models import SurgeryRequest
-from core.serializers import SurgeryRequestSerializer
+from core.modules import jobs
+from core.serializers import JobSerializer, SurgeryRequestSerializer
 
 from core.views import BaseLoggedInViewSet
 
@@ -78,3 +79,23 @@ class SurgeryRequestViewSet(BaseLoggedInViewSet):
             return Response(serializer.data)
         except SurgeryRequest.DoesNotExist:
             return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    @action(detail=False, methods=["post"])
+    def escalate(self, request: Request) -> Response:
+        """
+        POST /surgery-requests/escalate/ — refresh waiting times and escalate
+        long-waiting requests in the background (also runs nightly).
+        """
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id:
+            return Response(
+                {"detail": "Cannot escalate without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        job = jobs.enqueue(
+            "escalate_queue",
+            hospital_id,
+            dedup_key=f"escalate_queue:{hospital_id}",
+            created_by_id=request.user.baseuserprofile.id,
+        )
+        return Response({"job": JobSerializer(job).data}, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,164 @@
+import gzip
+
+from django.http import FileResponse, HttpResponseNotModified, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.models import Hospital
+from core.modules import changelog, snapshots, sync_push
+
+from core.views import BaseLoggedInView
+
+MAX_CHANGES_PAGE = 2000
+
+
+class SyncBootstrapView(BaseLoggedInView):
+    """
+    Offline-first bootstrap for the user's hospital.
+
+    Accessible by all authenticated users with a hospital.
+    """
+
+    required_roles: list = []  # all roles
+
+    def get(self, request: Request):
+        """
+        GET /sync/bootstrap — gzip-compressed snapshot of rooms, staff, equipment,
+        open requests and the upcoming schedule.
+        """
+        hospital_id = request.user.baseuserprofile.hospital_id
+        if not hospital_id:
+            return Response(
+                {"detail": "Cannot bootstrap without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Number committed changes first so the snapshot's version covers them
+        changelog.assign_seqs(hospital_id)
+        hospital = Hospital.objects.get(id=hospital_id)
+        etag = f'"{snapshots.snapshot_key(hospital)}"'
+        if request.headers.get("If-None-Match") == etag:
+            return HttpResponseNotModified(headers={"ETag": etag})
+
+        key, snapshot = snapshots.open_snapshot(hospital)
+        etag = f'"{key}"'
+
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            # Served straight from disk (sendfile under WSGI)
+            response = FileResponse(snapshot, content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = StreamingHttpResponse(
+                gzip.GzipFile(fileobj=snapshot, mode="rb"),
+                content_type="application/json",
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        response["Vary"] = "Accept-Encoding"
+        response["X-Data-Version"] = str(hospital.data_version)
+        return response
+
+
+class SyncChangesView(BaseLoggedInView):
+    """
+    Delta sync for the user's hospital.
+
+    Accessible by all authenticated users with a hospital.
+    """
+
+    required_roles: list = []  # all roles
+
+    def get(self, request: Request) -> Response:
+        """
+        GET /sync/changes?since=<cursor>&limit=<n> — compacted changes after `since`.
+
+        Use the bootstrap snapshot's `data_version` as the first cursor, then
+        the returned `cursor` until `has_more` is false. A cursor older than
+        the pruned log gets 410 with `resync_required`: bootstrap again.
+        """
+        profile = request.user.baseuserprofile
+        if not profile.hospital_id:
+            return Response(
+                {"detail": "Cannot sync without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            since = int(request.query_params["since"])
+            limit = min(int(request.query_params.get("limit", 500)), MAX_CHANGES_PAGE)
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Please give an integer since cursor."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            entries, has_more = changelog.changes_since(
+                profile.hospital_id, since, profile.id, max(1, limit)
+            )
+        except changelog.CursorExpired as error:
+            return Response(
+                {"detail": str(error), "resync_required": True, "floor": error.floor},
+                status=status.HTTP_410_GONE,
+            )
+        return Response(
+            {
+                "changes": [
+                    {
+                        "seq": entry.seq,
+                        "model": entry.model,
+                        "id": entry.object_id,
+                        "op": entry.operation,
+                        "data": entry.data,
+                    }
+                    for entry in entries
+                ],
+                "cursor": entries[-1].seq if entries else since,
+                "has_more": has_more,
+            }
+        )
+
+
+class SyncPushView(BaseLoggedInView):
+    """
+    Push queued offline changes for the user's hospital.
+
+    Accessible by all authenticated users with a hospital; non-admins can only
+    sync notification read state.
+    """
+
+    required_roles: list = []  # all roles
+
+    def post(self, request: Request) -> Response:
+        """
+        POST /sync/push — apply a batch of mutations in one transaction (SERVER_WINS).
+        """
+        profile = request.user.baseuserprofile
+        if not profile.hospital_id:
+            return Response(
+                {"detail": "Cannot sync without hospital."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        changes = request.data.get("changes")
+        if not isinstance(changes, list):
+            return Response(
+                {"detail": "changes must be a list."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(changes) > sync_push.MAX_MUTATIONS:
+            return Response(
+                {"detail": f"At most {sync_push.MAX_MUTATIONS} changes per push."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = sync_push.apply_push(changes, profile)
+        return Response(
+            {
+                "results": results,
+                "conflict": any(result["status"] == "conflict" for result in results),
+                "resolution_strategy": "SERVER_WINS",
+                "cursor": changelog.assign_seqs(profile.hospital_id),
+            }
+        )
@@ -0,0 +1,78 @@
+"""
+Process-wide background watchers that turn DB state into realtime events.
+
+They run once per process (not per connection), so thousands of idle SSE or
+WebSocket clients never translate into DB polling. They only read: flagging
+lapsed items is the periodic `sterilization_sweep` job's (core.modules.jobs).
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from core.models import Equipment
+from core.modules import realtime, sharding
+
+logger = logging.getLogger(__name__)
+
+_announced: set[tuple[int, datetime]] = set()
+_sterilization_task: Optional[asyncio.Task] = None
+
+
+def announce_expiring_sterilizations(window: Optional[timedelta] = None) -> int:
+    """
+    Publish EQUIPMENT_STERILIZATION_EXPIRING for every item whose latest
+    sterilization runs out within `window`. Each expiry is announced once.
+    """
+    now = timezone.now()
+    if window is None:
+        window = timedelta(minutes=realtime.get_setting("STERILIZATION_WARNING_MINUTES"))
+
+    expiring = []
+    for _ in sharding.each_shard():
+        expiring.extend(
+            Equipment.objects.filter(sterile_until__gt=now, sterile_until__lte=now + window)
+            .values_list("id", "hospital_id", "name", "sterile_until")
+        )
+
+    announced = 0
+    for equipment_id, hospital_id, name, valid_until in expiring:
+        if (equipment_id, valid_until) in _announced:
+            continue
+        _announced.add((equipment_id, valid_until))
+        realtime.publish(
+            hospital_id,
+            "EQUIPMENT_STERILIZATION_EXPIRING",
+            {"equipment_id": equipment_id, "name": name, "valid_until": valid_until.isoformat()},
+        )
+        announced += 1
+
+    # Forget expiries that have passed so the set stays small
+    for key in [key for key in _announced if key[1] <= now]:
+        _announced.discard(key)
+    return announced
+
+
+async def _sterilization_loop() -> None:
+    interval = realtime.get_setting("STERILIZATION_WATCH_SECONDS")
+    while True:
+        try:
+            await sync_to_async(announce_expiring_sterilizations)()
+        except Exception:
+            logger.exception("Sterilization watcher failed")
+        await asyncio.sleep(interval)
+
+
+def ensure_watchers() -> None:
+    """
+    Start the watchers on the running loop if they are not running yet.
+    """
+    global _sterilization_task
+    if not realtime.get_setting("STERILIZATION_WATCH_SECONDS"):
+        return
+    if _sterilization_task is None or _sterilization_task.done():
+        _sterilization_task = asyncio.get_running_loop().create_task(_sterilization_loop())
@@ -14,6 +14,10 @@ from .models import (
     Equipment,
     EquipmentSterilization,
     Notification,
+    AuditLog,
+    Job,
+    ArchivedSurgerySchedule,
+    ArchivedNotification,
 )
 
 
@@ -105,3 +109,95 @@ class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = "__all__"
+
+
+class ArchivedSurgeryScheduleSerializer(serializers.ModelSerializer):
+    """
+    Same keys as `SurgeryScheduleSerializer`, plus `archived` and `archived_at`.
+    """
+
+    surgery_request = serializers.UUIDField(source="surgery_request_id")
+    operating_room = serializers.IntegerField(source="operating_room_id")
+    surgeons = serializers.ListField(source="surgeon_ids", child=serializers.IntegerField())
+    archived = serializers.BooleanField(default=True, read_only=True)
+
+    class Meta:
+        model = ArchivedSurgerySchedule
+        fields = [
+            "id",
+            "surgery_request",
+            "operating_room",
+            "surgeons",
+            "start_time",
+            "end_time",
+            "status",
+            "notes",
+            "created_at",
+            "archived",
+            "archived_at",
+        ]
+
+
+class ArchivedNotificationSerializer(serializers.ModelSerializer):
+    """
+    Same keys as `NotificationSerializer`, plus `archived` and `archived_at`.
+    """
+
+    base_profile = serializers.IntegerField(source="base_profile_id")
+    archived = serializers.BooleanField(default=True, read_only=True)
+
+    class Meta:
+        model = ArchivedNotification
+        fields = [
+            "id",
+            "message",
+            "severity",
+            "is_read",
+            "created_at",
+            "base_profile",
+            "archived",
+            "archived_at",
+        ]
+
+
+class AuditLogSerializer(serializers.ModelSerializer):
+    user_id = serializers.IntegerField(source="actor_id", read_only=True)
+    user_name = serializers.CharField(source="actor_username", read_only=True)
+
+    class Meta:
+        model = AuditLog
+        fields = [
+            "id",
+            "timestamp",
+            "hospital_id",
+            "user_id",
+            "user_name",
+            "action",
+            "resource_type",
+            "resource_id",
+            "status",
+            "ip_address",
+            "details",
+        ]
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "task",
+            "args",
+            "hospital_id",
+            "created_by_id",
+            "priority",
+            "status",
+            "attempts",
+            "max_attempts",
+            "run_after",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
@@ -0,0 +1,258 @@
+"""
+Model signals that publish real-time events (see core.modules.realtime).
+
+Events are published on commit so clients never see rows that were rolled back.
+Schedule changes and emergency requests are also written to the audit trail.
+The unread-notification counter, `Equipment.sterile_until`,
+`Hospital.data_version` and `Hospital.staff_version` are also kept here for
+single-row writes; bulk paths maintain them themselves. `data_version` moves
+after the commit, so writers never hold the hospital row.
+"""
+
+from functools import partial
+from typing import Any
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import (
+    BaseUserProfile,
+    Equipment,
+    EquipmentSterilization,
+    Notification,
+    OperatingRoom,
+    RescheduleEvent,
+    StaffProfile,
+    SurgeonProfile,
+    SurgeryRequest,
+    SurgerySchedule,
+)
+from core.modules import (
+    audit,
+    changelog,
+    jobs,
+    notifications,
+    realtime,
+    reservations,
+    shifts,
+    sterilization,
+)
+from core.modules.tenancy import hospital_id_for, tenant_db, touch_hospital
+
+# Models whose writes invalidate the hospital's /sync/bootstrap snapshot
+VERSIONED_MODELS = [
+    OperatingRoom,
+    BaseUserProfile,
+    SurgeonProfile,
+    StaffProfile,
+    Equipment,
+    SurgeryRequest,
+    SurgerySchedule,
+]
+
+SCHEDULE_STATUS_EVENTS = {
+    "bumped": "SCHEDULE_BUMPED",
+    "cancelled": "SCHEDULE_CANCELLED",
+    "completed": "SCHEDULE_COMPLETED",
+}
+
+
+def publish_on_commit(*args, **kwargs) -> None:
+    transaction.on_commit(lambda: realtime.publish(*args, **kwargs), using=tenant_db())
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance: Notification, created: bool, **kwargs) -> None:
+    if not created:
+        return
+    if not instance.is_read:
+        BaseUserProfile.objects.filter(id=instance.base_profile_id).update(
+            unread_notifications=F("unread_notifications") + 1
+        )
+    # No query when the caller handed over the profile; one to fetch it otherwise
+    publish_on_commit(
+        hospital_id_for(instance),
+        "NOTIFICATION_CREATED",
+        {
+            "notification_id": instance.id,
+            "message": instance.message,
+            "severity": instance.severity,
+        },
+        profile_id=instance.base_profile_id,
+    )
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance: Notification, **kwargs) -> None:
+    if not instance.is_read:
+        BaseUserProfile.objects.filter(
+            id=instance.base_profile_id, unread_notifications__gt=0
+        ).update(unread_notifications=F("unread_notifications") - 1)
+
+
+@receiver(post_save, sender=SurgeryRequest)
+def surgery_request_saved(sender, instance: SurgeryRequest, created: bool, **kwargs) -> None:
+    if created:
+        surgery_request_created(instance)
+
+
+def surgery_request_created(instance: SurgeryRequest) -> None:
+    """
+    Audit, publish and fan out a new emergency request. Bulk writers
+    (core.modules.sync_push) call it for the rows they create.
+    """
+    if instance.priority == "emergency":
+        audit.log_on_commit(
+            "EMERGENCY_REQUESTED",
+            hospital_id=instance.hospital_id,
+            resource=instance,
+            details={"procedure_name": instance.procedure_name},
+        )
+        publish_on_commit(
+            instance.hospital_id,
+            "EMERGENCY_CREATED",
+            {"surgery_id": str(instance.id)},
+        )
+        # Fan-out runs on the workers, ahead of every other job
+        jobs.enqueue_on_commit(
+            "notify_hospital",
+            instance.hospital_id,
+            {
+                "message": f"Emergency surgery requested: {instance.procedure_name}",
+                "severity": "critical",
+                "roles": notifications.EMERGENCY_ROLES,
+            },
+            priority=0,
+        )
+
+
+@receiver(post_save, sender=SurgerySchedule)
+def surgery_schedule_saved(sender, instance: SurgerySchedule, created: bool, **kwargs) -> None:
+    surgery_schedule_changed(instance, created, instance.operating_room.hospital_id)
+    if not created and instance.status in reservations.get_setting("RELEASE_STATUSES"):
+        reservations.release([instance.id])
+
+
+def surgery_schedule_changed(instance: SurgerySchedule, created: bool, hospital_id: Any) -> None:
+    """
+    Audit and publish a created or updated schedule. Bulk writers
+    (core.modules.sync_push) call it for their rows and keep the equipment
+    ledger themselves.
+    """
+    if created:
+        event = "SCHEDULE_CREATED"
+    else:
+        event = SCHEDULE_STATUS_EVENTS.get(instance.status, "SCHEDULE_UPDATED")
+    data = {
+        "schedule_id": instance.id,
+        "surgery_id": str(instance.surgery_request_id),
+        "operating_room_id": instance.operating_room_id,
+        "start_time": instance.start_time,
+        "end_time": instance.end_time,
+        "status": instance.status,
+    }
+    audit.log_on_commit(event, hospital_id=hospital_id, resource=instance, details=data)
+    publish_on_commit(hospital_id, event, data)
+
+
+@receiver(post_delete, sender=SurgerySchedule)
+def surgery_schedule_deleted(sender, instance: SurgerySchedule, **kwargs) -> None:
+    try:
+        hospital_id = hospital_id_for(instance)
+    except ObjectDoesNotExist:
+        hospital_id = None
+    audit.log_on_commit(
+        "SCHEDULE_DELETED",
+        hospital_id=hospital_id,
+        resource=instance,
+        details={"surgery_id": str(instance.surgery_request_id)},
+    )
+
+
+@receiver(post_save, sender=EquipmentSterilization)
+def sterilization_saved(sender, instance: EquipmentSterilization, raw: bool = False, **kwargs) -> None:
+    if not raw:
+        sterilization.refresh_validity([instance.equipment_id])
+
+
+@receiver(post_delete, sender=EquipmentSterilization)
+def sterilization_deleted(sender, instance: EquipmentSterilization, origin=None, **kwargs) -> None:
+    if not isinstance(origin, Equipment):  # the item itself is being deleted
+        sterilization.refresh_validity([instance.equipment_id])
+
+
+@receiver(post_save, sender=RescheduleEvent)
+def reschedule_event_saved(sender, instance: RescheduleEvent, created: bool, **kwargs) -> None:
+    if not created:
+        return
+    data = {
+        "schedule_id": instance.affected_schedule_id,
+        "surgery_id": str(instance.triggered_by_id),
+        "reason": instance.reason,
+    }
+    # A reschedule is an emergency overriding an existing booking
+    audit.log_on_commit(
+        "EMERGENCY_OVERRIDE",
+        hospital_id=instance.triggered_by.hospital_id,
+        resource_type="surgeryschedule",
+        resource_id=instance.affected_schedule_id,
+        details=data,
+    )
+    publish_on_commit(instance.triggered_by.hospital_id, "SURGERY_RESCHEDULED", data)
+
+
+def bump_data_version(sender, instance, **kwargs) -> None:
+    try:
+        hospital_id = hospital_id_for(instance)
+    except ObjectDoesNotExist:
+        # Parent already removed by a cascade; its own signal bumped the version
+        return
+    transaction.on_commit(partial(touch_hospital, hospital_id), using=tenant_db())
+
+
+def bump_staff_version(sender, instance, **kwargs) -> None:
+    try:
+        hospital_id = hospital_id_for(instance)
+    except ObjectDoesNotExist:
+        # Profile already removed by a cascade; its own signal bumped the version
+        return
+    shifts.touch(hospital_id)
+
+
+def record_save(sender, instance, created: bool, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return  # loaddata
+    changelog.record(instance, "create" if created else "update")
+
+
+def record_delete(sender, instance, **kwargs) -> None:
+    try:
+        changelog.record(instance, "delete")
+    except ObjectDoesNotExist:
+        pass
+
+
+# Change-logged models move the version when their entries are numbered
+for model in VERSIONED_MODELS:
+    if model in changelog.SERIALIZERS:
+        continue
+    post_save.connect(bump_data_version, sender=model, dispatch_uid=f"version-save-{model.__name__}")
+    post_delete.connect(bump_data_version, sender=model, dispatch_uid=f"version-delete-{model.__name__}")
+
+# Shift lookups index staff rows with their profile's role (see core.modules.shifts)
+for model in (BaseUserProfile, StaffProfile):
+    post_save.connect(bump_staff_version, sender=model, dispatch_uid=f"staff-save-{model.__name__}")
+    post_delete.connect(bump_staff_version, sender=model, dispatch_uid=f"staff-delete-{model.__name__}")
+
+for model in changelog.SERIALIZERS:
+    post_save.connect(record_save, sender=model, dispatch_uid=f"changelog-save-{model.__name__}")
+    post_delete.connect(record_delete, sender=model, dispatch_uid=f"changelog-delete-{model.__name__}")
+
+
+@receiver(m2m_changed, sender=SurgerySchedule.surgeons.through)
+def schedule_surgeons_changed(sender, instance, action: str, **kwargs) -> None:
+    if action.startswith("post_") and isinstance(instance, SurgerySchedule):
+        changelog.record(instance, "update")
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import (
+    BaseUserProfile,
+    ChangeLogEntry,
+    Hospital,
+    OperatingRoom,
+    Patient,
+    SurgeonProfile,
+    SurgeryEquipmentRequirement,
+    SurgeryRequest,
+    SurgerySchedule,
+)
+from core.modules import changelog
+
+
+@override_settings(AUDIT={"SYNCHRONOUS": True})
+class HospitalTestCase(TestCase):
+    """
+    One hospital with an admin, a surgeon, a room and a patient.
+    """
+
+    def setUp(self) -> None:
+        self.hospital = Hospital.objects.create(name="General", code="GEN")
+        self.admin_user = User.objects.create_user("admin", password="pw")
+        self.admin = BaseUserProfile.objects.create(
+            django_user=self.admin_user, hospital=self.hospital, role="admin"
+        )
+        surgeon_user = User.objects.create_user("surgeon", password="pw")
+        self.surgeon = SurgeonProfile.objects.create(
+            base_profile=BaseUserProfile.objects.create(
+                django_user=surgeon_user, hospital=self.hospital, role="surgeon"
+            ),
+            specialization="general",
+        )
+        self.room = OperatingRoom.objects.create(
+            hospital=self.hospital, name="OR1", operating_room_type="general"
+        )
+        self.patient = Patient.objects.create(
+            hospital=self.hospital,
+            medical_record_number="MRN-1",
+            full_name="Patient",
+            date_of_birth="1990-01-01",
+            gender="male",
+        )
+        self.day = timezone.now().replace(hour=8, minute=0, second=0, microsecond=0) + timedelta(days=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin_user)
+        # Test transactions never commit: number the entries by hand
+        changelog.assign_seqs(self.hospital.id)
+
+    def at(self, hours: float):
+        return self.day + timedelta(hours=hours)
+
+    def request(self, equipment: dict = None) -> SurgeryRequest:
+        surgery_request = SurgeryRequest.objects.create(
+            hospital=self.hospital,
+            patient=self.patient,
+            procedure_name="Appendectomy",
+            procedure_type="general",
+            complexity=1,
+            priority="elective",
+            latest_allowed_time=self.at(24 * 7),
+        )
+        for item, quantity in (equipment or {}).items():
+            SurgeryEquipmentRequirement.objects.create(
+                surgery_request=surgery_request, equipment=item, quantity_required=quantity
+            )
+        return surgery_request
+
+    def schedule(self, start: float, end: float, equipment: dict = None, room=None) -> SurgerySchedule:
+        schedule = SurgerySchedule.objects.create(
+            surgery_request=self.request(equipment),
+            operating_room=room or self.room,
+            start_time=self.at(start),
+            end_time=self.at(end),
+        )
+        schedule.surgeons.set([self.surgeon])
+        return schedule
+
+    def last_seq(self, instance) -> int:
+        changelog.assign_seqs(self.hospital.id)
+        return (
+            ChangeLogEntry.objects.filter(
+                model=changelog.model_label(type(instance)), object_id=str(instance.pk)
+            )
+            .order_by("-seq")
+            .values_list("seq", flat=True)
+            .first()
+        )
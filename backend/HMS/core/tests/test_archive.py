@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import (
+    ArchivedNotification,
+    ArchivedSurgerySchedule,
+    ChangeLogEntry,
+    Notification,
+    RescheduleEvent,
+    SurgeryQueue,
+    SurgerySchedule,
+)
+from core.modules import archive, escalation
+from core.tests.base import HospitalTestCase
+
+
+class ArchiveTests(HospitalTestCase):
+    def finished(self, status: str = "completed") -> SurgerySchedule:
+        # Ended well before the archive cutoff
+        schedule = self.schedule(-24 * 40, -24 * 40 + 2)
+        schedule.status = status
+        schedule.save()
+        return schedule
+
+    def test_finished_schedules_move_with_their_events(self):
+        old = self.finished()
+        RescheduleEvent.objects.create(triggered_by=self.request(), affected_schedule=old, reason="moved")
+        upcoming = self.schedule(0, 2)
+
+        self.assertEqual(archive.archive_schedules(archive.cutoff()), (1, 1))
+        # Archiving is not a delete offline clients should replay
+        self.assertFalse(ChangeLogEntry.objects.filter(operation="delete").exists())
+        self.assertFalse(SurgerySchedule.objects.filter(id=old.id).exists())
+        self.assertTrue(SurgerySchedule.objects.filter(id=upcoming.id).exists())
+        archived = ArchivedSurgerySchedule.objects.get(id=old.id)
+        self.assertEqual((archived.hospital_id, archived.surgeon_ids), (self.hospital.id, [self.surgeon.id]))
+        self.assertEqual(
+            [row.id for row in archive.schedules(self.hospital.id, "include")], [upcoming.id, old.id]
+        )
+        self.assertEqual([row.id for row in archive.schedules(self.hospital.id, "only")], [old.id])
+
+    def test_only_read_notifications_are_archived(self):
+        read = Notification.objects.create(base_profile=self.admin, message="read", is_read=True)
+        unread = Notification.objects.create(base_profile=self.admin, message="unread")
+        Notification.objects.filter(id__in=[read.id, unread.id]).update(
+            created_at=timezone.now() - timedelta(days=60)
+        )
+
+        self.assertEqual(archive.archive_notifications(archive.cutoff()), 1)
+        self.assertEqual(list(Notification.objects.values_list("id", flat=True)), [unread.id])
+        self.assertTrue(ArchivedNotification.objects.filter(id=read.id).exists())
+
+    def test_unscheduled_requests_skip_archived_and_booked_ones(self):
+        waiting = self.request()
+        self.schedule(0, 2)
+        bumped = self.schedule(3, 5)
+        bumped.status = "bumped"
+        bumped.save()
+        cancelled = self.schedule(6, 8)
+        cancelled.status = "cancelled"
+        cancelled.save()
+        self.finished()
+        archive.archive_schedules(archive.cutoff())
+
+        self.assertEqual(
+            set(archive.unscheduled_requests(self.hospital.id).values_list("id", flat=True)),
+            {waiting.id, bumped.surgery_request_id, cancelled.surgery_request_id},
+        )
+
+    def test_escalation_leaves_archived_requests_alone(self):
+        done = self.finished()
+        archive.archive_schedules(archive.cutoff())
+        waiting = self.request()
+
+        result = escalation.escalate(self.hospital.id)
+        self.assertEqual(result["waiting"], 1)
+        self.assertEqual(
+            list(SurgeryQueue.objects.values_list("surgery_request_id", flat=True)), [waiting.id]
+        )
+        self.assertFalse(SurgeryQueue.objects.filter(surgery_request_id=done.surgery_request_id).exists())
+
+    def test_priority_queue_lists_only_waiting_requests(self):
+        self.finished()
+        archive.archive_schedules(archive.cutoff())
+        bumped = self.schedule(0, 2)
+        bumped.status = "bumped"
+        bumped.save()
+        self.schedule(3, 5)
+        waiting = self.request()
+
+        response = self.client.get(
+            "/api/v1/priority-queue",
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.admin_user)}",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {row["surgery_id"] for row in response.json()["results"]},
+            {str(waiting.id), str(bumped.surgery_request_id)},
+        )
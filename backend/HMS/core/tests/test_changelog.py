@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from core.models import ChangeLogEntry, Hospital, Notification, OperatingRoom
+from core.modules import changelog
+from core.tests.base import HospitalTestCase
+
+
+class ChangeLogTests(HospitalTestCase):
+    def add_room(self, name: str) -> OperatingRoom:
+        return OperatingRoom.objects.create(hospital=self.hospital, name=name, operating_room_type="general")
+
+    def test_entries_are_numbered_after_the_commit(self):
+        base = changelog.assign_seqs(self.hospital.id)
+        with self.captureOnCommitCallbacks() as callbacks:
+            room = self.add_room("OR2")
+            entry = ChangeLogEntry.objects.get(model="operatingroom", object_id=str(room.id))
+            # The writer's transaction holds no seq and leaves the hospital row alone
+            self.assertIsNone(entry.seq)
+            self.assertEqual(Hospital.objects.get(id=self.hospital.id).data_version, base)
+
+        for callback in callbacks:
+            callback()
+        entry.refresh_from_db()
+        self.assertEqual(entry.seq, base + 1)
+        self.assertEqual(Hospital.objects.get(id=self.hospital.id).data_version, base + 1)
+
+    def test_seqs_follow_commit_order_and_data_version(self):
+        base = changelog.assign_seqs(self.hospital.id)
+        first = self.add_room("OR2")
+        second = self.add_room("OR3")
+        first.name = "OR2b"
+        first.save()
+
+        entries, has_more = changelog.changes_since(self.hospital.id, base, self.admin.id, limit=10)
+        self.assertFalse(has_more)
+        self.assertEqual(Hospital.objects.get(id=self.hospital.id).data_version, base + 3)
+        # Compacted: one entry per object, the newest, in seq order
+        self.assertEqual(
+            [(entry.object_id, entry.seq) for entry in entries],
+            [(str(second.id), base + 2), (str(first.id), base + 3)],
+        )
+        self.assertEqual(entries[1].data["name"], "OR2b")
+
+    def test_bulk_record_numbers_a_contiguous_range(self):
+        rooms = OperatingRoom.objects.bulk_create(
+            [OperatingRoom(hospital=self.hospital, name=f"B{i}", operating_room_type="general") for i in range(3)]
+        )
+        base = changelog.assign_seqs(self.hospital.id)
+        changelog.record_bulk(self.hospital.id, rooms, "create")
+        changelog.assign_seqs(self.hospital.id)
+
+        entries = ChangeLogEntry.objects.filter(hospital_id=self.hospital.id, seq__gt=base).order_by("seq")
+        self.assertEqual(
+            [(entry.seq, entry.object_id) for entry in entries],
+            [(base + offset + 1, str(room.id)) for offset, room in enumerate(rooms)],
+        )
+
+    def test_private_rows_only_reach_their_owner(self):
+        base = changelog.assign_seqs(self.hospital.id)
+        Notification.objects.create(base_profile=self.admin, message="mine")
+
+        own, _ = changelog.changes_since(self.hospital.id, base, self.admin.id, limit=10)
+        other, _ = changelog.changes_since(self.hospital.id, base, self.surgeon.base_profile_id, limit=10)
+        self.assertEqual([entry.model for entry in own], ["notification"])
+        self.assertEqual(other, [])
+
+    def test_pruned_cursor_must_resync(self):
+        old = self.add_room("OR2")
+        floor = self.last_seq(old)
+        ChangeLogEntry.objects.filter(seq__lte=floor).update(created_at=timezone.now() - timedelta(days=40))
+        recent = self.add_room("OR3")
+        expired = ChangeLogEntry.objects.filter(seq__lte=floor).count()
+
+        self.assertEqual(changelog.prune(self.hospital.id), expired)
+        self.assertFalse(ChangeLogEntry.objects.filter(seq__lte=floor).exists())
+        self.assertEqual(Hospital.objects.get(id=self.hospital.id).changelog_floor, floor)
+        with self.assertRaises(changelog.CursorExpired):
+            changelog.changes_since(self.hospital.id, floor - 1, self.admin.id, limit=10)
+        entries, _ = changelog.changes_since(self.hospital.id, floor, self.admin.id, limit=10)
+        self.assertEqual([entry.object_id for entry in entries], [str(recent.id)])
+
+        response = self.client.get("/api/v1/sync/changes", {"since": 0})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual((response.data["resync_required"], response.data["floor"]), (True, floor))
@@ -0,0 +1,71 @@
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Notification
+from core.tests.base import HospitalTestCase
+
+
+class DashboardViewTests(HospitalTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.hospital.timezone = "America/New_York"
+        self.hospital.save()
+        self.local_day = self.day.astimezone(ZoneInfo("America/New_York")).date()
+
+    async def get(self, path: str, user=None, **params):
+        token = await sync_to_async(AccessToken.for_user)(user or self.admin_user)
+        return await self.async_client.get(
+            f"/api/v1/{path}", params, headers={"authorization": f"Bearer {token}"}
+        )
+
+    async def test_token_and_role_are_checked(self):
+        anonymous = await self.async_client.get("/api/v1/calendar/day")
+        self.assertEqual(anonymous.status_code, 401)
+        surgeon_user = await sync_to_async(lambda: self.surgeon.base_profile.django_user)()
+        self.assertEqual((await self.get("priority-queue", surgeon_user)).status_code, 403)
+        self.assertEqual((await self.get("calendar/day", surgeon_user)).status_code, 200)
+
+    async def test_calendar_day_groups_schedules_by_room_in_hospital_time(self):
+        schedule = await sync_to_async(self.schedule)(0, 2)
+        response = await self.get("calendar/day", date=self.local_day.isoformat())
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["timezone"], "America/New_York")
+        [room] = body["rooms"]
+        self.assertEqual(
+            [(row["id"], row["surgeons"]) for row in room["schedules"]], [(schedule.id, [self.surgeon.id])]
+        )
+
+        next_day = await self.get("calendar/day", date=(self.local_day + timedelta(days=1)).isoformat())
+        self.assertEqual(next_day.json()["rooms"][0]["schedules"], [])
+        self.assertEqual((await self.get("calendar/day", date="someday")).status_code, 400)
+
+    async def test_calendar_week_spans_seven_days(self):
+        await sync_to_async(self.schedule)(0, 2)
+        response = await self.get("calendar/week", start=self.local_day.isoformat())
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(len(body["rooms"][0]["schedules"]), 1)
+        self.assertTrue(body["end"].startswith((self.local_day + timedelta(days=7)).isoformat()))
+
+    async def test_notifications_page_backwards(self):
+        await sync_to_async(
+            lambda: [Notification.objects.create(base_profile=self.admin, message=str(i)) for i in range(3)]
+        )()
+        first = (await self.get("async/notifications", limit=2)).json()
+        self.assertEqual([row["message"] for row in first["results"]], ["2", "1"])
+        self.assertEqual(first["unread_count"], 3)
+
+        rest = (await self.get("async/notifications", limit=2, before=first["next_before"])).json()
+        self.assertEqual([row["message"] for row in rest["results"]], ["0"])
+        self.assertIsNone(rest["next_before"])
+        self.assertEqual((await self.get("async/notifications", limit="many")).status_code, 400)
+
+    async def test_async_schedule_list_matches_the_sync_one(self):
+        await sync_to_async(self.schedule)(0, 2)
+        response = await self.get("async/schedule")
+        expected = await sync_to_async(lambda: self.client.get("/api/v1/schedule/").json())()
+        self.assertEqual(response.json(), expected)
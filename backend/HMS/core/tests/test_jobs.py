@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Job
+from core.modules import jobs
+
+
+calls: dict[str, int] = {}
+
+
+@jobs.task("test_flaky", max_attempts=2)
+def flaky_task(hospital_id, fail_times: int = 0) -> dict:
+    calls["count"] = calls.get("count", 0) + 1
+    if calls["count"] <= fail_times:
+        raise RuntimeError("temporary failure")
+    return {"calls": calls["count"]}
+
+
+class JobQueueTests(TestCase):
+    def setUp(self) -> None:
+        calls.clear()
+
+    def test_claim_leases_the_job_to_one_worker(self):
+        job = jobs.enqueue("test_flaky")
+        claimed = jobs.claim("worker-a")
+
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts), ("running", "worker-a", 1))
+        self.assertIsNotNone(claimed.locked_until)
+        self.assertIsNone(jobs.claim("worker-b"))
+
+        self.assertEqual(jobs.run(claimed), "succeeded")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), ("succeeded", {"calls": 1}))
+
+    def test_failure_is_retried_with_backoff_then_succeeds(self):
+        job = jobs.enqueue("test_flaky", args={"fail_times": 1})
+        with self.assertLogs(jobs.logger, "ERROR"):
+            self.assertEqual(jobs.run(jobs.claim("worker-a")), "queued")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), ("queued", 1, ""))
+        self.assertIn("temporary failure", job.error)
+        self.assertGreater(job.run_after, timezone.now())
+        # Backing off: not runnable yet
+        self.assertIsNone(jobs.claim("worker-a"))
+
+        retry = jobs.claim("worker-b", now=job.run_after)
+        self.assertEqual(jobs.run(retry), "succeeded")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), ("succeeded", 2, ""))
+
+    def test_last_attempt_fails_the_job(self):
+        job = jobs.enqueue("test_flaky", args={"fail_times": 5})
+        with self.assertLogs(jobs.logger, "ERROR"):
+            jobs.run(jobs.claim("worker-a"))
+            job.refresh_from_db()
+            self.assertEqual(jobs.run(jobs.claim("worker-a", now=job.run_after)), "failed")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 2))
+
+    def test_expired_lease_is_reaped_and_the_old_worker_cannot_finish(self):
+        job = jobs.enqueue("test_flaky")
+        stuck = jobs.claim("worker-a")
+        later = stuck.locked_until + timedelta(seconds=1)
+
+        self.assertEqual(jobs.reap(now=later), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ("queued", "Lease expired before the job finished."))
+
+        taken_over = jobs.claim("worker-b", now=job.run_after)
+        # The first worker's late result is dropped; the lease moved on
+        jobs.run(stuck)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ("running", "worker-b"))
+        self.assertEqual(jobs.run(taken_over), "succeeded")
+
+    def test_dedup_key_collapses_active_jobs(self):
+        first = jobs.enqueue("test_flaky", dedup_key="once")
+        self.assertEqual(jobs.enqueue("test_flaky", dedup_key="once").id, first.id)
+        jobs.run(jobs.claim("worker-a"))
+        self.assertNotEqual(jobs.enqueue("test_flaky", dedup_key="once").id, first.id)
+
+    def test_unknown_task_is_refused(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue("no_such_task")
+        self.assertFalse(Job.objects.exists())
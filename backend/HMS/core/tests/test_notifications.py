@@ -0,0 +1,58 @@
+from unittest import mock
+
+from core.models import BaseUserProfile, Notification
+from core.modules import notifications
+from core.tests.base import HospitalTestCase
+
+
+class NotificationTests(HospitalTestCase):
+    def unread(self, profile: BaseUserProfile) -> int:
+        return notifications.unread_count(profile)
+
+    def test_single_create_counts_and_publishes_to_its_owner(self):
+        with mock.patch("core.modules.realtime.publish") as publish, self.captureOnCommitCallbacks(execute=True):
+            # No profile instance handed over: the hospital is looked up
+            notification = Notification.objects.create(
+                base_profile_id=self.admin.id, message="hello", severity="info"
+            )
+
+        self.assertEqual(self.unread(self.admin), 1)
+        publish.assert_called_once_with(
+            self.hospital.id,
+            "NOTIFICATION_CREATED",
+            {"notification_id": notification.id, "message": "hello", "severity": "info"},
+            profile_id=self.admin.id,
+        )
+
+    def test_fan_out_by_role_is_one_event(self):
+        with mock.patch("core.modules.realtime.publish") as publish, self.captureOnCommitCallbacks(execute=True):
+            sent = notifications.notify_hospital(self.hospital.id, "OR1 closed", "warning", roles=["surgeon"])
+
+        self.assertEqual(sent, 1)
+        self.assertEqual(self.unread(self.surgeon.base_profile), 1)
+        self.assertEqual(self.unread(self.admin), 0)
+        publish.assert_called_once_with(
+            self.hospital.id,
+            "NOTIFICATION_CREATED",
+            {"message": "OR1 closed", "severity": "warning"},
+            roles=["surgeon"],
+        )
+
+    def test_mark_read_up_to_keeps_the_counter(self):
+        created = [Notification.objects.create(base_profile=self.admin, message=str(i)) for i in range(3)]
+
+        response = self.client.post("/api/v1/notifications/mark-read/", {"up_to_id": created[1].id}, format="json")
+        self.assertEqual(response.json(), {"marked": 2, "unread_count": 1})
+        self.assertEqual(
+            list(Notification.objects.filter(is_read=False).values_list("id", flat=True)), [created[2].id]
+        )
+
+    def test_inbox_pages_by_keyset(self):
+        created = [Notification.objects.create(base_profile=self.admin, message=str(i)) for i in range(3)]
+
+        first = self.client.get("/api/v1/notifications/", {"limit": 2}).json()
+        self.assertEqual([row["id"] for row in first["results"]], [created[2].id, created[1].id])
+        self.assertEqual(first["unread_count"], 3)
+        second = self.client.get("/api/v1/notifications/", {"limit": 2, "before": first["next_before"]}).json()
+        self.assertEqual([row["id"] for row in second["results"]], [created[0].id])
+        self.assertIsNone(second["next_before"])
@@ -0,0 +1,50 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.test import override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.modules import profiling
+from core.tests.base import HospitalTestCase
+
+
+class ProfilingTests(HospitalTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.output = tempfile.TemporaryDirectory()
+        self.addCleanup(self.output.cleanup)
+        self.client = APIClient()
+
+    def test_saved_queries_carry_no_parameter_values(self):
+        with override_settings(PROFILING={"OUTPUT_DIR": self.output.name}):
+            response = self.client.get(
+                "/api/v1/notifications/?before=424242",
+                HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.admin_user)}",
+                HTTP_X_PROFILE="sampling",
+            )
+
+        profile_id = response["X-Profile-Id"]
+        path = Path(self.output.name) / profile_id
+        queries = json.loads((path / "sql.json").read_text())
+        self.assertTrue(queries)
+        self.assertNotIn("424242", (path / "sql.json").read_text())
+        self.assertTrue(
+            all(param.startswith("<") for query in queries for param in query["params"] or [])
+        )
+        self.assertEqual(json.loads((path / "meta.json").read_text())["path"], "/api/v1/notifications/")
+
+    def test_auth_paths_are_never_sampled(self):
+        with override_settings(PROFILING={"OUTPUT_DIR": self.output.name, "SAMPLE_RATE": 1.0}):
+            login = self.client.post("/api/v1/auth/login/", {"username": "admin", "password": "pw"}, format="json")
+            sampled = self.client.get("/api/v1/notifications/")
+
+        self.assertEqual(login.status_code, 200)
+        self.assertNotIn("X-Profile-Id", login)
+        self.assertIn("X-Profile-Id", sampled)
+
+    def test_redact_params(self):
+        self.assertEqual(profiling.redact_params(("secret", 5, None)), ["<str>", "<int>", "<NoneType>"])
+        self.assertEqual(profiling.redact_params({"jti": "abc"}), {"jti": "<str>"})
+        self.assertIsNone(profiling.redact_params(None))
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from HMS.asgi import application
+from core.models import BaseUserProfile, Hospital, Notification
+from core.modules import realtime
+
+
+def message(event: str, hospital_id: str = "h1", roles=None, profile_id=None) -> dict:
+    return {"hospital_id": hospital_id, "roles": roles, "profile_id": profile_id, "payload": {"event": event}}
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the redis-py pub/sub API, shared by several
+    backplanes the way one Redis server is shared by several processes.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.subscribers: dict[str, list[queue.Queue]] = {}
+        self.counters: dict[str, int] = {}
+
+    def eval(self, script: str, numkeys: int, key: str, channel: str, data: str) -> int:
+        # RedisBackplane.PUBLISH_SCRIPT, atomic like a script on the server
+        with self.lock:
+            seq = self.counters[key] = self.counters.get(key, 0) + 1
+            self.publish(channel, f'{{"seq": {seq}, {data[1:]}')
+        return seq
+
+    def publish(self, channel: str, data: str) -> int:
+        inboxes = list(self.subscribers.get(channel, ()))
+        for inbox in inboxes:
+            inbox.put({"type": "message", "data": data})
+        return len(inboxes)
+
+    def pubsub(self, ignore_subscribe_messages: bool = False) -> "FakePubSub":
+        return FakePubSub(self)
+
+    def subscriber_count(self, channel: str) -> int:
+        with self.lock:
+            return len(self.subscribers.get(channel, ()))
+
+
+class FakePubSub:
+    def __init__(self, server: FakeRedis) -> None:
+        self.server = server
+        self.inbox: queue.Queue = queue.Queue()
+
+    def subscribe(self, channel: str) -> None:
+        with self.server.lock:
+            self.server.subscribers.setdefault(channel, []).append(self.inbox)
+
+    def listen(self):
+        while True:
+            yield self.inbox.get()
+
+
+class BackplaneTests(TestCase):
+    def redis_processes(self, count: int, deliver_to) -> list[realtime.RedisBackplane]:
+        server = FakeRedis()
+        backplanes = [realtime.RedisBackplane(deliver_to(index), client=server) for index in range(count)]
+        deadline = time.monotonic() + 5
+        while server.subscriber_count(backplanes[0].channel) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return backplanes
+
+    def test_redis_backplane_fans_out_to_every_process(self):
+        received = [[], []]
+        done = threading.Event()
+
+        def deliver_to(index):
+            def deliver(message):
+                received[index].append(message)
+                if all(received):
+                    done.set()
+
+            return deliver
+
+        backplanes = self.redis_processes(2, deliver_to)
+        backplanes[0].publish(message("PING"))
+        self.assertTrue(done.wait(5))
+        for messages in received:
+            self.assertEqual([message["payload"] for message in messages], [{"event": "PING"}])
+
+    def test_redis_backplane_numbers_events_the_same_everywhere(self):
+        hubs = [realtime.Hub(), realtime.Hub()]
+        backplanes = self.redis_processes(2, lambda index: hubs[index].deliver)
+
+        for index, event in enumerate(["ONE", "TWO", "THREE"]):
+            backplanes[index % 2].publish(message(event))
+        deadline = time.monotonic() + 5
+        while any(hub.current_seq("h1") < 3 for hub in hubs) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        for hub in hubs:
+            self.assertEqual(
+                [(event["seq"], event["event"]) for event in hub.history("h1", "nurse", None, 0)],
+                [(1, "ONE"), (2, "TWO"), (3, "THREE")],
+            )
+            # A cursor handed out by the other process resumes here
+            self.assertEqual([event["event"] for event in hub.history("h1", "nurse", None, 2)], ["THREE"])
+
+    def test_local_backplane_delivers_to_the_hub_in_order(self):
+        hub = realtime.Hub()
+        previous = realtime.get_backplane()
+        realtime.set_backplane(realtime.LocalBackplane(hub.deliver))
+        try:
+            realtime.publish("h1", "FIRST")
+            realtime.publish("h1", "PRIVATE", profile_id=7)
+            realtime.publish("h1", "ADMINS", roles=["admin"])
+            realtime.publish(None, "DROPPED")
+        finally:
+            realtime.set_backplane(previous)
+
+        self.assertEqual(hub.current_seq("h1"), 3)
+        self.assertEqual(
+            [(event["seq"], event["event"]) for event in hub.history("h1", "nurse", 7, 0)],
+            [(1, "FIRST"), (2, "PRIVATE")],
+        )
+        self.assertEqual(
+            [event["event"] for event in hub.history("h1", "admin", 8, 1)], ["ADMINS"]
+        )
+
+
+class HubTests(TestCase):
+    async def next_event(self, subscriber: realtime.Subscriber) -> dict:
+        return await asyncio.wait_for(subscriber.queue.get(), 1)
+
+    async def test_fans_out_by_hospital_role_and_profile(self):
+        hub = realtime.Hub()
+        nurse = hub.subscribe("h1", "nurse", 1)
+        admin = hub.subscribe("h1", "admin", 2)
+        elsewhere = hub.subscribe("h2", "admin", 3)
+
+        # Publishers run on other threads (sync views, workers)
+        await asyncio.to_thread(hub.deliver, message("EVERYONE"))
+        await asyncio.to_thread(hub.deliver, message("ADMINS", roles=["admin"]))
+        await asyncio.to_thread(hub.deliver, message("NURSE_ONLY", profile_id=1))
+
+        self.assertEqual(
+            [(await self.next_event(nurse))["event"] for _ in range(2)], ["EVERYONE", "NURSE_ONLY"]
+        )
+        self.assertEqual(
+            [(await self.next_event(admin))["event"] for _ in range(2)], ["EVERYONE", "ADMINS"]
+        )
+        await asyncio.sleep(0)
+        self.assertTrue(nurse.queue.empty())
+        self.assertTrue(admin.queue.empty())
+        self.assertTrue(elsewhere.queue.empty())
+
+    async def test_unsubscribed_clients_get_nothing(self):
+        hub = realtime.Hub()
+        subscriber = hub.subscribe("h1", "nurse", 1)
+        hub.unsubscribe(subscriber)
+        self.assertEqual(hub.subscriber_count(), 0)
+
+        hub.deliver(message("LATE"))
+        await asyncio.sleep(0)
+        self.assertTrue(subscriber.queue.empty())
+
+    @override_settings(REALTIME={"QUEUE_SIZE": 2})
+    async def test_slow_client_loses_its_oldest_events(self):
+        hub = realtime.Hub()
+        subscriber = hub.subscribe("h1", "nurse", 1)
+        for event in ("ONE", "TWO", "THREE"):
+            hub.deliver(message(event))
+        await asyncio.sleep(0)
+
+        self.assertEqual(
+            [subscriber.queue.get_nowait()["event"] for _ in range(2)], ["TWO", "THREE"]
+        )
+
+
+@override_settings(AUDIT={"SYNCHRONOUS": True})
+class NotificationSocketTests(TransactionTestCase):
+    def setUp(self) -> None:
+        self.hospital = Hospital.objects.create(name="General", code="GEN")
+        user = User.objects.create_user("nurse", password="pw")
+        self.profile = BaseUserProfile.objects.create(django_user=user, hospital=self.hospital, role="nurse")
+        self.token = str(AccessToken.for_user(user))
+
+    async def connect(self, path: str, query: str):
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "websocket", "path": path, "query_string": query.encode()}
+        task = asyncio.ensure_future(application(scope, inbox.get, outbox.put))
+        await inbox.put({"type": "websocket.connect"})
+        return task, inbox, outbox
+
+    async def test_created_notification_is_pushed_to_its_owner(self):
+        task, inbox, outbox = await self.connect("/ws/notifications", f"token={self.token}")
+        self.assertEqual(await asyncio.wait_for(outbox.get(), 5), {"type": "websocket.accept"})
+
+        created = await Notification.objects.acreate(base_profile=self.profile, message="hello")
+        sent = await asyncio.wait_for(outbox.get(), 5)
+        payload = json.loads(sent["text"])
+        self.assertEqual(payload["event"], "NOTIFICATION_CREATED")
+        self.assertEqual(payload["notification_id"], created.id)
+
+        await inbox.put({"type": "websocket.disconnect"})
+        await asyncio.wait_for(task, 5)
+        self.assertEqual(realtime.hub.subscriber_count(), 0)
+
+    async def test_bad_token_is_refused(self):
+        task, _, outbox = await self.connect("/ws/notifications", "token=nope")
+        self.assertEqual(
+            await asyncio.wait_for(outbox.get(), 5), {"type": "websocket.close", "code": 4401}
+        )
+        await task
+
+    async def test_unknown_path_is_closed(self):
+        task, _, outbox = await self.connect("/ws/nowhere", "")
+        self.assertEqual(
+            await asyncio.wait_for(outbox.get(), 5), {"type": "websocket.close", "code": 4404}
+        )
+        await task
+
+
+@override_settings(AUDIT={"SYNCHRONOUS": True}, REALTIME={"STERILIZATION_WATCH_SECONDS": 0})
+class EventViewTests(TransactionTestCase):
+    def setUp(self) -> None:
+        self.hospital = Hospital.objects.create(name="General", code="GEN")
+        user = User.objects.create_user("nurse", password="pw")
+        BaseUserProfile.objects.create(django_user=user, hospital=self.hospital, role="nurse")
+        self.token = str(AccessToken.for_user(user))
+
+    def test_stream_is_refused_under_wsgi(self):
+        response = self.client.get("/api/v1/events/stream", {"token": self.token})
+        self.assertEqual(response.status_code, 503)
+
+    async def test_stream_replays_from_last_event_id(self):
+        cursor = realtime.hub.current_seq(self.hospital.id)
+        for event in ("MISSED", "ALSO_MISSED"):
+            realtime.publish(self.hospital.id, event)
+
+        response = await AsyncClient().get(
+            "/api/v1/events/stream",
+            headers={"Authorization": f"Bearer {self.token}", "Last-Event-ID": str(cursor)},
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertIn(b": connected", await anext(chunks))
+        replayed = [await anext(chunks) for _ in range(2)]
+        self.assertEqual(
+            replayed,
+            [
+                f"id: {cursor + index + 1}\nevent: {event}\ndata: ".encode()
+                + json.dumps({"seq": cursor + index + 1, "event": event}).encode()
+                + b"\n\n"
+                for index, event in enumerate(["MISSED", "ALSO_MISSED"])
+            ],
+        )
+        await chunks.aclose()
+
+    async def test_poll_waits_for_the_next_event(self):
+        client = AsyncClient()
+        start = await client.get("/api/v1/events/poll", {"token": self.token})
+        cursor = start.json()["cursor"]
+
+        poll = asyncio.ensure_future(
+            client.get("/api/v1/events/poll", {"token": self.token, "cursor": cursor, "timeout": 5})
+        )
+        await asyncio.sleep(0.2)
+        await asyncio.to_thread(realtime.publish, self.hospital.id, "PING")
+        response = await asyncio.wait_for(poll, 5)
+        self.assertEqual(response.json(), {"events": [{"seq": cursor + 1, "event": "PING"}], "cursor": cursor + 1})
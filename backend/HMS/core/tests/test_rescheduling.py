@@ -0,0 +1,80 @@
+from core.models import SurgerySchedule
+from core.modules import rescheduling
+from core.tests.base import HospitalTestCase
+
+
+class RescheduleTests(HospitalTestCase):
+    def test_move_bumps_the_version(self):
+        schedule = self.schedule(0, 2)
+        moved = rescheduling.reschedule(schedule.id, self.hospital.id, schedule.version, self.at(4))
+        self.assertEqual((moved.start_time, moved.end_time), (self.at(4), self.at(6)))
+        self.assertEqual(moved.version, schedule.version + 1)
+
+    def test_stale_version_is_refused(self):
+        schedule = self.schedule(0, 2)
+        rescheduling.reschedule(schedule.id, self.hospital.id, schedule.version, self.at(4))
+
+        with self.assertRaises(rescheduling.RescheduleConflict) as raised:
+            rescheduling.reschedule(schedule.id, self.hospital.id, schedule.version, self.at(8))
+        [error] = raised.exception.errors
+        self.assertEqual((error["type"], error["code"]), ("CONCURRENT_EDIT", "STALE"))
+        self.assertEqual(error["current_version"], schedule.version + 1)
+        self.assertEqual(SurgerySchedule.objects.get(id=schedule.id).start_time, self.at(4))
+
+    def test_endpoint_answers_409_with_the_current_row(self):
+        schedule = self.schedule(0, 2)
+        url = f"/api/v1/schedule/{schedule.id}/reschedule/"
+        ok = self.client.patch(
+            url, {"version": schedule.version, "new_start_time": self.at(4).isoformat()}, format="json"
+        )
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(ok.data["schedule"]["version"], schedule.version + 1)
+
+        stale = self.client.patch(
+            url, {"version": schedule.version, "new_start_time": self.at(8).isoformat()}, format="json"
+        )
+        self.assertEqual(stale.status_code, 409)
+        self.assertFalse(stale.data["success"])
+        self.assertEqual([error["code"] for error in stale.data["errors"]], ["STALE"])
+        self.assertEqual(stale.data["schedule"]["version"], schedule.version + 1)
+
+    def test_room_clash_is_a_409(self):
+        schedule = self.schedule(0, 2)
+        self.schedule(3, 5)
+        response = self.client.patch(
+            f"/api/v1/schedule/{schedule.id}/reschedule/",
+            {"version": schedule.version, "new_start_time": self.at(4).isoformat()},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("HARD_CONSTRAINT", {error["type"] for error in response.data["errors"]})
+        self.assertEqual(SurgerySchedule.objects.get(id=schedule.id).version, schedule.version)
+
+    def create(self, start: float, end: float):
+        return self.client.post(
+            "/api/v1/schedule/",
+            {
+                "surgery_request": str(self.request().id),
+                "operating_room": self.room.id,
+                "surgeons": [self.surgeon.id],
+                "start_time": self.at(start).isoformat(),
+                "end_time": self.at(end).isoformat(),
+            },
+            format="json",
+        )
+
+    def test_create_refuses_a_booked_room_and_surgeon(self):
+        booked = self.schedule(0, 2)
+        response = self.create(1, 3)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            [(error["code"], error["schedule_ids"]) for error in response.data["errors"]],
+            [("ROOM_CONFLICT", [booked.id]), ("SURGEON_CONFLICT", [booked.id])],
+        )
+        self.assertEqual(SurgerySchedule.objects.count(), 1)
+
+    def test_create_books_a_free_slot(self):
+        self.schedule(0, 2)
+        response = self.create(2, 4)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["surgeons"], [self.surgeon.id])
@@ -0,0 +1,62 @@
+from core.models import Equipment, EquipmentReservation, SurgerySchedule
+from core.modules import reservations
+from core.tests.base import HospitalTestCase
+
+
+class ReservationTests(HospitalTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.c_arm = Equipment.objects.create(
+            hospital=self.hospital, name="C-arm 1", equipment_type="c-arm", location="store"
+        )
+
+    def reserve(self, start: float, end: float) -> SurgerySchedule:
+        schedule = self.schedule(start, end, {self.c_arm: 1})
+        reservations.reserve(schedule, self.hospital.id)
+        return schedule
+
+    def test_overlapping_reservation_reports_the_shortage(self):
+        self.reserve(0, 2)
+        overlapping = self.schedule(1, 3, {self.c_arm: 1})
+
+        with self.assertRaises(reservations.EquipmentUnavailable) as raised:
+            reservations.reserve(overlapping, self.hospital.id)
+        self.assertEqual(
+            raised.exception.shortages, [{"equipment_type": "c-arm", "required": 1, "available": 0}]
+        )
+        self.assertFalse(EquipmentReservation.objects.filter(schedule_id=overlapping.id).exists())
+
+    def test_back_to_back_windows_do_not_overlap(self):
+        self.reserve(0, 2)
+        self.reserve(2, 4)
+        self.assertEqual(reservations.available(self.hospital.id, "c-arm", self.at(1), self.at(3)), 0)
+        self.assertEqual(reservations.available(self.hospital.id, "c-arm", self.at(4), self.at(5)), 1)
+
+    def test_reschedule_moves_the_ledger_rows(self):
+        schedule = self.reserve(0, 2)
+        self.reserve(3, 5)
+
+        with self.assertRaises(reservations.EquipmentUnavailable):
+            reservations.reschedule(schedule, self.at(4), self.at(6))
+        self.assertEqual(reservations.reschedule(schedule, self.at(6), self.at(8)), 1)
+        self.assertEqual(
+            list(EquipmentReservation.objects.filter(schedule_id=schedule.id).values_list("start_time", "end_time")),
+            [(self.at(6), self.at(8))],
+        )
+
+    def test_reschedule_without_ledger_rows_checks_the_new_window(self):
+        self.reserve(3, 5)
+        unreserved = self.schedule(0, 2, {self.c_arm: 1})
+
+        with self.assertRaises(reservations.EquipmentUnavailable):
+            reservations.reschedule(unreserved, self.at(4), self.at(6))
+        self.assertEqual(reservations.reschedule(unreserved, self.at(6), self.at(8)), 1)
+        self.assertTrue(
+            EquipmentReservation.objects.filter(schedule_id=unreserved.id, start_time=self.at(6)).exists()
+        )
+
+    def test_cancelling_releases_the_equipment(self):
+        schedule = self.reserve(0, 2)
+        schedule.status = "cancelled"
+        schedule.save()
+        self.assertEqual(reservations.available(self.hospital.id, "c-arm", self.at(0), self.at(2)), 1)
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+
+from core.models import BaseUserProfile, StaffProfile
+from core.modules import shifts
+from core.tests.base import HospitalTestCase
+
+
+class ShiftTests(HospitalTestCase):
+    def shift(self, username: str, start: float, end: float, on_call: bool = False, role: str = "staff"):
+        profile = BaseUserProfile.objects.filter(django_user__username=username).first()
+        if profile is None:
+            profile = BaseUserProfile.objects.create(
+                django_user=User.objects.create_user(username, password="pw"), hospital=self.hospital, role=role
+            )
+        return StaffProfile.objects.create(
+            base_profile=profile, start_time=self.at(start), end_time=self.at(end), is_on_call=on_call
+        )
+
+    def names(self, found) -> list[str]:
+        return sorted(shift.username for shift in found)
+
+    def test_long_shift_is_found_behind_shorter_ones(self):
+        self.shift("night", -12, 12)
+        self.shift("early", 0, 2)
+        self.shift("late", 3, 5)
+
+        self.assertEqual(self.names(shifts.on_duty(self.hospital.id, self.at(1))), ["early", "night"])
+        self.assertEqual(self.names(shifts.on_duty(self.hospital.id, self.at(2))), ["night"])
+        self.assertEqual(shifts.on_duty(self.hospital.id, self.at(12)), [])
+
+    def test_staff_write_rebuilds_the_index(self):
+        self.shift("early", 0, 2)
+        before = shifts.index_for(self.hospital.id)
+        self.assertIs(shifts.index_for(self.hospital.id), before)
+
+        self.shift("nurse", 0, 4, role="nurse")
+        self.assertIsNot(shifts.index_for(self.hospital.id), before)
+        self.assertEqual(self.names(shifts.on_duty(self.hospital.id, self.at(1), role="nurse")), ["nurse"])
+
+    def test_times_outside_the_index_come_from_the_database(self):
+        self.shift("later", 24 * 30, 24 * 30 + 8)
+        index = shifts.index_for(self.hospital.id)
+        self.assertFalse(index.covers(self.at(24 * 30 + 1), self.at(24 * 30 + 1) + timedelta.resolution))
+        self.assertEqual(self.names(shifts.on_duty(self.hospital.id, self.at(24 * 30 + 1))), ["later"])
+
+    def test_on_call_needs_back_to_back_cover(self):
+        self.shift("relay", 0, 4, on_call=True)
+        self.shift("relay", 4, 8, on_call=True)
+        self.shift("gap", 0, 3, on_call=True)
+        self.shift("gap", 5, 8, on_call=True)
+        self.shift("off", 0, 8)
+
+        [cover] = shifts.on_call(self.hospital.id, self.at(1), self.at(7))
+        self.assertEqual([(shift.username, shift.start_time) for shift in cover], [("relay", self.at(0)), ("relay", self.at(4))])
+
+    def test_endpoints_validate_their_times(self):
+        self.shift("early", 0, 2)
+        response = self.client.get("/api/v1/staff/on-duty/", {"at": self.at(1).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["username"] for row in response.data["results"]], ["early"])
+
+        self.assertEqual(self.client.get("/api/v1/staff/on-duty/", {"at": "tomorrow"}).status_code, 400)
+        backwards = {"from": self.at(2).isoformat(), "to": self.at(1).isoformat()}
+        self.assertEqual(self.client.get("/api/v1/staff/on-call/", backwards).status_code, 400)
@@ -0,0 +1,72 @@
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+from django.test import override_settings
+
+from core.modules import snapshots
+from core.tests.base import HospitalTestCase
+
+
+class BootstrapTests(HospitalTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.snapshot_dir = Path(tmp.name)
+        settings = override_settings(SYNC={"SNAPSHOT_DIR": self.snapshot_dir})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def get(self, **headers):
+        response = self.client.get("/api/v1/sync/bootstrap", headers=headers)
+        if response.status_code == 200:
+            body = b"".join(response.streaming_content)
+            response.close()
+            if response.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            response.payload = json.loads(body)
+        return response
+
+    def test_snapshot_is_served_compressed_or_plain(self):
+        self.schedule(0, 2)
+        compressed = self.get(accept_encoding="gzip")
+        self.assertEqual(compressed.status_code, 200)
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(compressed.payload["data_version"], int(compressed["X-Data-Version"]))
+        self.assertEqual([room["name"] for room in compressed.payload["operating_rooms"]], ["OR1"])
+        self.assertEqual(len(compressed.payload["schedule"]), 1)
+
+        plain = self.get()
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(plain.payload, compressed.payload)
+        self.assertEqual(len(list(self.snapshot_dir.glob("*.json.gz"))), 1)
+
+    def test_unchanged_snapshot_is_not_resent(self):
+        first = self.get()
+        self.assertEqual(self.get(if_none_match=first["ETag"]).status_code, 304)
+
+    def test_write_replaces_the_snapshot(self):
+        first = self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.name = "OR-renamed"
+            self.room.save()
+
+        second = self.get(if_none_match=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.payload["operating_rooms"][0]["name"], "OR-renamed")
+        self.assertEqual(
+            [path.name for path in self.snapshot_dir.glob("*.json.gz")],
+            [snapshots.snapshot_path(second["ETag"].strip('"')).name],
+        )
+
+    def test_finished_requests_are_left_out(self):
+        waiting = self.request()
+        done = self.schedule(-2, -1)
+        done.status = "completed"
+        done.save()
+
+        requests = self.get().payload["surgery_requests"]
+        self.assertEqual([row["id"] for row in requests], [str(waiting.id)])
@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from core.models import Equipment, EquipmentSterilization
+from core.modules import reservations, sterilization
+from core.tests.base import HospitalTestCase
+
+
+class SterilizationTests(HospitalTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.now = timezone.now()
+        self.scope = Equipment.objects.create(
+            hospital=self.hospital, name="Scope 1", equipment_type="scope", location="store"
+        )
+
+    def sterilize(self, ended_hours_ago: float, valid_hours: float) -> EquipmentSterilization:
+        sterilized_at = self.now - timedelta(hours=ended_hours_ago)
+        return EquipmentSterilization.objects.create(
+            equipment=self.scope,
+            sterilized_at=sterilized_at,
+            valid_until=sterilized_at + timedelta(hours=valid_hours),
+        )
+
+    def test_insert_keeps_the_validity_window_current(self):
+        record = self.sterilize(1, 72)
+        self.scope.refresh_from_db()
+        self.assertEqual((self.scope.sterile_from, self.scope.sterile_until), (record.sterilized_at, record.valid_until))
+
+        response = self.client.get("/api/v1/equipment/", {"sterile_at": (self.now + timedelta(hours=80)).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_sweep_flags_lapsed_items_without_taking_them_out_of_service(self):
+        self.sterilize(80, 72)
+
+        self.assertEqual(sterilization.expire(self.hospital.id, self.now), 1)
+        self.assertEqual(sterilization.expire(self.hospital.id, self.now), 0)
+        self.scope.refresh_from_db()
+        self.assertTrue(self.scope.needs_sterilization)
+        self.assertTrue(self.scope.is_available)
+
+        # A future surgery can still book it; the planner reprocesses it in time
+        schedule = self.schedule(0, 2, {self.scope: 1})
+        self.assertEqual(len(reservations.reserve(schedule, self.hospital.id)), 1)
+        plan = sterilization.plan(self.hospital.id, self.now, timedelta(hours=72))
+        self.assertEqual([(job.equipment_id, job.schedule_id) for job in plan.jobs], [(self.scope.id, schedule.id)])
+        self.assertEqual(plan.at_risk, [])
+
+    def test_finished_cycle_clears_the_flag(self):
+        self.sterilize(80, 72)
+        sterilization.expire(self.hospital.id, self.now)
+        self.sterilize(0.5, 72)
+
+        self.scope.refresh_from_db()
+        self.assertFalse(self.scope.needs_sterilization)
+
+    def test_manual_out_of_service_is_kept(self):
+        self.scope.is_available = False
+        self.scope.save()
+        self.sterilize(1, 72)
+
+        self.scope.refresh_from_db()
+        self.assertFalse(self.scope.is_available)
+        self.assertEqual(reservations.capacity(self.hospital.id, "scope"), 0)
+
+    def test_booked_cycle_counts_once_it_has_run(self):
+        sterilization.record(
+            [
+                sterilization.Job(
+                    self.scope.id,
+                    self.scope.name,
+                    0,
+                    self.now - timedelta(hours=1),
+                    self.now + timedelta(hours=2),
+                    self.now + timedelta(hours=74),
+                )
+            ]
+        )
+        self.scope.refresh_from_db()
+        self.assertIsNone(self.scope.sterile_until)
+
+        self.assertEqual(sterilization.finish_cycles(self.hospital.id, self.now + timedelta(hours=3)), 1)
+        self.scope.refresh_from_db()
+        self.assertEqual(self.scope.sterile_until, self.now + timedelta(hours=74))
+
+
+@override_settings(STERILIZATION={"STERILIZERS": 1})
+class PlannerTests(HospitalTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.scopes = [
+            Equipment.objects.create(
+                hospital=self.hospital,
+                name=f"Scope {number}",
+                equipment_type="scope",
+                location="store",
+                sterilization_cycle_hours=2,
+            )
+            for number in (1, 2)
+        ]
+
+    def test_cycles_are_booked_before_each_surgery(self):
+        first = self.schedule(0, 2, {self.scopes[0]: 1})
+        second = self.schedule(3, 5, {self.scopes[1]: 1})
+
+        plan = sterilization.plan(self.hospital.id, self.at(-10))
+        self.assertEqual(
+            [(job.schedule_id, job.start, job.end, job.late) for job in plan.jobs],
+            [(first.id, self.at(-10), self.at(-8), False), (second.id, self.at(-8), self.at(-6), False)],
+        )
+        self.assertEqual(plan.assignments, {first.id: [self.scopes[0].id], second.id: [self.scopes[1].id]})
+        self.assertEqual(plan.at_risk, [])
+
+    def test_late_cycles_and_missing_units_are_at_risk(self):
+        late = self.schedule(0, 2, {self.scopes[0]: 1})
+        short = self.schedule(3, 5, {self.scopes[1]: 3})
+
+        # One sterilizer: the second scope's cycle waits for the first one
+        plan = sterilization.plan(self.hospital.id, self.at(-1))
+        self.assertEqual(
+            [(risk.schedule_id, risk.reason, risk.ready_at) for risk in plan.at_risk],
+            [(late.id, "NOT_READY", self.at(1)), (short.id, "NO_UNIT", None), (short.id, "NOT_READY", self.at(5))],
+        )
+
+    def test_endpoint_refuses_unbounded_horizons(self):
+        self.schedule(0, 2, {self.scopes[0]: 1})
+        url = "/api/v1/equipment/sterilization-plan/"
+        for hours in ("nan", "inf", "1e12", "0", "-5", "soon"):
+            self.assertEqual(self.client.get(url, {"hours": hours}).status_code, 400, hours)
+
+        response = self.client.get(url, {"hours": "72"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job["equipment_id"] for job in response.json()["jobs"]], [self.scopes[0].id])
@@ -0,0 +1,183 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import (
+    AuditLog,
+    ChangeLogEntry,
+    Equipment,
+    Hospital,
+    Job,
+    OperatingRoom,
+    Patient,
+    SurgerySchedule,
+)
+from core.modules import sync_push
+from core.tests.base import HospitalTestCase
+
+
+class SyncPushTests(HospitalTestCase):
+    def push(self, *changes):
+        return sync_push.apply_push(list(changes), self.admin)
+
+    def request_data(self, **fields) -> dict:
+        return {
+            "patient": self.patient.id,
+            "procedure_name": "Appendectomy",
+            "procedure_type": "general",
+            "complexity": 1,
+            "priority": "elective",
+            "latest_allowed_time": self.at(24).isoformat(),
+            **fields,
+        }
+
+    def test_stale_update_loses_to_the_server(self):
+        base = self.last_seq(self.room)
+        self.room.name = "server"
+        self.room.save()
+
+        [result] = self.push(
+            {"client_id": "c1", "model": "operatingroom", "op": "update", "id": self.room.id,
+             "base_seq": base, "data": {"name": "offline"}}
+        )
+        self.assertEqual(result["status"], "conflict")
+        self.assertEqual(result["reason"], "STALE")
+        self.assertEqual(result["resolution_strategy"], "SERVER_WINS")
+        self.assertEqual(result["server"]["name"], "server")
+        self.assertEqual(OperatingRoom.objects.get(id=self.room.id).name, "server")
+
+    def test_current_update_is_applied_and_logged(self):
+        [result] = self.push(
+            {"client_id": "c1", "model": "operatingroom", "op": "update", "id": self.room.id,
+             "base_seq": self.last_seq(self.room), "data": {"name": "offline"}}
+        )
+        self.assertEqual(result["status"], "applied")
+        self.assertEqual(OperatingRoom.objects.get(id=self.room.id).name, "offline")
+        self.assertEqual(
+            ChangeLogEntry.objects.filter(model="operatingroom", object_id=str(self.room.id))
+            .order_by("-id")
+            .first()
+            .data["name"],
+            "offline",
+        )
+
+    def test_update_after_delete_in_the_same_push_conflicts(self):
+        base = self.last_seq(self.room)
+        deleted, updated = self.push(
+            {"client_id": "d", "model": "operatingroom", "op": "delete", "id": self.room.id, "base_seq": base},
+            {"client_id": "u", "model": "operatingroom", "op": "update", "id": self.room.id,
+             "base_seq": base, "data": {"name": "late"}},
+        )
+        self.assertEqual(deleted["status"], "applied")
+        self.assertEqual((updated["status"], updated["reason"]), ("conflict", "DELETED"))
+        self.assertFalse(OperatingRoom.objects.filter(id=self.room.id).exists())
+
+    def test_invalid_mutation_does_not_block_the_rest(self):
+        other = OperatingRoom.objects.create(hospital=self.hospital, name="OR2", operating_room_type="general")
+        bad, good = self.push(
+            {"client_id": "bad", "model": "operatingroom", "op": "update", "id": self.room.id,
+             "base_seq": self.last_seq(self.room), "data": {"operating_room_type": "nope"}},
+            {"client_id": "good", "model": "operatingroom", "op": "update", "id": other.id,
+             "base_seq": self.last_seq(other), "data": {"name": "renamed"}},
+        )
+        self.assertEqual(bad["status"], "error")
+        self.assertEqual(good["status"], "applied")
+
+    def test_unnumbered_change_counts_as_newer(self):
+        base = self.last_seq(self.room)
+        # Committed by another writer whose entry has no seq yet
+        self.room.name = "server"
+        self.room.save()
+        self.assertIsNone(ChangeLogEntry.objects.order_by("-id").first().seq)
+
+        [result] = self.push(
+            {"client_id": "c1", "model": "operatingroom", "op": "update", "id": self.room.id,
+             "base_seq": base, "data": {"name": "offline"}}
+        )
+        self.assertEqual((result["status"], result["reason"]), ("conflict", "STALE"))
+
+    def test_push_endpoint_reports_conflicts(self):
+        base = self.last_seq(self.room)
+        self.room.name = "server"
+        self.room.save()
+        response = self.client.post(
+            "/api/v1/sync/push",
+            {"changes": [{"client_id": "c1", "model": "operatingroom", "op": "update",
+                          "id": self.room.id, "base_seq": base, "data": {"name": "offline"}}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["conflict"])
+        self.assertEqual(response.data["cursor"], Hospital.objects.get(id=self.hospital.id).data_version)
+
+    def test_pushed_emergency_runs_the_signal_hooks(self):
+        with mock.patch("core.modules.realtime.publish") as publish, self.captureOnCommitCallbacks(execute=True):
+            [result] = self.push(
+                {"client_id": "e", "model": "surgeryrequest", "op": "create",
+                 "data": self.request_data(priority="emergency")}
+            )
+
+        self.assertEqual(result["status"], "applied")
+        publish.assert_any_call(self.hospital.id, "EMERGENCY_CREATED", {"surgery_id": result["id"]})
+        self.assertTrue(AuditLog.objects.filter(action="EMERGENCY_REQUESTED", resource_id=result["id"]).exists())
+        self.assertTrue(Job.objects.filter(task="notify_hospital", hospital_id=self.hospital.id).exists())
+
+    def test_pushed_status_change_is_published_and_audited(self):
+        schedule = self.schedule(0, 2)
+        with mock.patch("core.modules.realtime.publish") as publish, self.captureOnCommitCallbacks(execute=True):
+            [result] = self.push(
+                {"client_id": "c", "model": "surgeryschedule", "op": "update", "id": schedule.id,
+                 "base_seq": self.last_seq(schedule), "data": {"status": "cancelled"}}
+            )
+
+        self.assertEqual(result["status"], "applied")
+        self.assertEqual(
+            [call.args[1] for call in publish.call_args_list if call.args[1].startswith("SCHEDULE")],
+            ["SCHEDULE_CANCELLED"],
+        )
+        self.assertTrue(
+            AuditLog.objects.filter(action="SCHEDULE_CANCELLED", resource_id=str(schedule.id)).exists()
+        )
+
+    def test_related_rows_are_loaded_once_per_model(self):
+        changes = [
+            {"client_id": str(i), "model": "surgeryrequest", "op": "create", "data": self.request_data()}
+            for i in range(3)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            results = self.push(*changes)
+
+        self.assertEqual([result["status"] for result in results], ["applied"] * 3)
+        patient_reads = [
+            query["sql"] for query in queries
+            if query["sql"].startswith("SELECT") and f'FROM "{Patient._meta.db_table}"' in query["sql"]
+        ]
+        self.assertEqual(len(patient_reads), 1)
+
+    def test_related_row_of_another_hospital_is_not_found(self):
+        other = Hospital.objects.create(name="Other", code="OTH")
+        stranger = Patient.objects.create(
+            hospital=other, medical_record_number="MRN-2", full_name="Other", date_of_birth="1990-01-01", gender="male"
+        )
+        [result] = self.push(
+            {"client_id": "x", "model": "surgeryrequest", "op": "create", "data": self.request_data(patient=stranger.id)}
+        )
+        self.assertEqual(result["status"], "error")
+        self.assertIn("patient", result["errors"])
+
+    def test_schedule_without_equipment_is_removed_silently(self):
+        scope = Equipment.objects.create(
+            hospital=self.hospital, name="Scope", equipment_type="scope", location="store", is_available=False
+        )
+        surgery_request = self.request({scope: 1})
+        [result] = self.push(
+            {"client_id": "s", "model": "surgeryschedule", "op": "create",
+             "data": {"surgery_request": surgery_request.id, "operating_room": self.room.id,
+                      "surgeons": [self.surgeon.id], "start_time": self.at(0).isoformat(),
+                      "end_time": self.at(2).isoformat()}}
+        )
+
+        self.assertEqual((result["status"], result["reason"]), ("conflict", "EQUIPMENT_UNAVAILABLE"))
+        self.assertFalse(SurgerySchedule.objects.exists())
+        self.assertFalse(ChangeLogEntry.objects.filter(model="surgeryschedule").exists())
@@ -10,6 +10,8 @@ router.register(r"staff", StaffViewSet, basename="staff")
 router.register(r"equipment", EquipmentViewSet, basename="equipment")
 router.register(r"surgery-requests", SurgeryRequestViewSet, basename="surgeryrequest")
 router.register(r"schedule", SurgeryScheduleViewSet, basename="schedule")
+router.register(r"notifications", NotificationViewSet, basename="notification")
+router.register(r"jobs", JobViewSet, basename="job")
 
 # # Additional APIViews that are not simple viewsets:
 # additional_urlpatterns = [
@@ -19,15 +21,28 @@ router.register(r"schedule", SurgeryScheduleViewSet, basename="schedule")
 #         SchedulerEmergencyView.as_view(),
 #         name="scheduler_emergency",
 #     ),
-#     path("calendar/day", CalendarDayView.as_view(), name="calendar_day"),
-#     path("calendar/week", CalendarWeekView.as_view(), name="calendar_week"),
-#     path("priority-queue", PriorityQueueView.as_view(), name="priority_queue"),
-#     path("sync/push", SyncPushView.as_view(), name="sync_push"),
-#     path("audit-logs", AuditLogsView.as_view(), name="audit_logs"),
 # ]
 
 # Final urlpatterns you can include in your core.urls or project urls.py
 urlpatterns = [
     path("", include(router.urls)),
+    # Async views, serve through HMS.asgi
+    path("events/stream", event_stream, name="events_stream"),
+    path("events/poll", event_poll, name="events_poll"),
+    path("calendar/day", calendar_day, name="calendar_day"),
+    path("calendar/week", calendar_week, name="calendar_week"),
+    path("priority-queue", priority_queue, name="priority_queue"),
+    path("async/schedule", schedule_list, name="async_schedule"),
+    path("async/notifications", notification_list, name="async_notifications"),
+    path("sync/bootstrap", SyncBootstrapView.as_view(), name="sync_bootstrap"),
+    path("sync/changes", SyncChangesView.as_view(), name="sync_changes"),
+    path("sync/push", SyncPushView.as_view(), name="sync_push"),
+    path("audit-logs", AuditLogsView.as_view(), name="audit_logs"),
+    path("profiles", ProfilesView.as_view(), name="profiles"),
+    path(
+        "profiles/<str:profile_id>/<str:artifact>",
+        ProfileArtifactView.as_view(),
+        name="profile_artifact",
+    ),
 ]
 # ] + additional_urlpatterns
@@ -8,6 +8,7 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from jwt_auth.permissions import IsRole
 from core.models import Hospital
+from core.modules import sharding
 from core.serializers import HospitalSerializer
 
 
@@ -26,6 +27,7 @@ class BaseLoggedInView(views.APIView):
         super().initial(request, *args, **kwargs)
         try:
             self.role = request.user.baseuserprofile.role
+            sharding.activate(request.user.baseuserprofile.hospital_id)
         except AttributeError:
             self.role = "unknown"
 
@@ -77,6 +79,7 @@ class BaseLoggedInViewSet(viewsets.ViewSet):
         super().initial(request, *args, **kwargs)
         try:
             self.role = request.user.baseuserprofile.role
+            sharding.activate(request.user.baseuserprofile.hospital_id)
         except AttributeError:
             self.role = "unknown"
 
@@ -118,3 +121,16 @@ from core.modules.views.staff import StaffViewSet
 from core.modules.views.equipment import EquipmentViewSet
 from core.modules.views.surgery_requests import SurgeryRequestViewSet
 from core.modules.views.schedule import SurgeryScheduleViewSet
+from core.modules.views.notifications import NotificationViewSet
+from core.modules.views.jobs import JobViewSet
+from core.modules.views.events import event_stream, event_poll
+from core.modules.views.dashboard import (
+    calendar_day,
+    calendar_week,
+    priority_queue,
+    schedule_list,
+    notification_list,
+)
+from core.modules.views.sync import SyncBootstrapView, SyncChangesView, SyncPushView
+from core.modules.views.audit import AuditLogsView
+from core.modules.views.profiles import ProfilesView, ProfileArtifactView
@@ -0,0 +1,176 @@
+"""
+In-memory front for the refresh-token blacklist.
+
+Every refresh (and logout) checks ``token_blacklist_blacklistedtoken`` for
+the token's JTI. Almost all of those lookups are misses, so we keep a bloom
+filter of blacklisted JTIs per process. A "maybe" is checked against the
+table; a miss is only checked against the rows the filter has not seen yet
+(ids above the last sync less ``SYNC_ID_MARGIN``), a short primary-key range,
+so a token another process blacklisted a moment ago is still refused.
+
+The filter is kept fresh in two ways:
+- every ``SYNC_SECONDS`` we pull rows blacklisted since the last seen id
+  (a primary key range scan). Ids are allocated before their transaction
+  commits, so on PostgreSQL a lower id can become visible after a higher
+  one; each sync re-reads the last ``SYNC_ID_MARGIN`` ids to catch those
+- every ``REBUILD_SECONDS`` we rebuild it from scratch so pruned tokens drop
+  out and the filter is resized to the current table size
+
+Tokens blacklisted by this process are added to the filter immediately.
+One thread refreshes at a time; the others keep answering from the current
+filter meanwhile.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from typing import Iterable, Optional
+
+from django.conf import settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+DEFAULTS: dict[str, float] = {
+    "REBUILD_SECONDS": 300,
+    "SYNC_SECONDS": 2,
+    "FALSE_POSITIVE_RATE": 0.001,
+    "MIN_CAPACITY": 10_000,
+    "SYNC_ID_MARGIN": 500,
+}
+
+
+def get_setting(name: str) -> float:
+    return getattr(settings, "TOKEN_BLACKLIST_FILTER", {}).get(name, DEFAULTS[name])
+
+
+class BloomFilter:
+    """
+    Fixed-size bloom filter over strings.
+
+    Uses double hashing on a single blake2b digest to derive `k` bit positions.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float) -> None:
+        capacity = max(1, capacity)
+        self.size = max(
+            8,
+            int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)),
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str) -> Iterable[int]:
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, value: str) -> None:
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class BlacklistChecker:
+    """
+    Process-wide blacklist lookups backed by a `BloomFilter`.
+    """
+
+    def __init__(self) -> None:
+        # _refresh_lock serializes rebuild/sync/reset; _lock guards the fields
+        self._refresh_lock = threading.RLock()
+        self._lock = threading.Lock()
+        self._filter: Optional[BloomFilter] = None
+        self._last_id = 0
+        self._built_at = 0.0
+        self._synced_at = 0.0
+
+    def rebuild(self) -> None:
+        """
+        Rebuild the filter from every blacklisted JTI currently in the DB.
+        """
+        with self._refresh_lock:
+            rows = list(
+                BlacklistedToken.objects.values_list("id", "token__jti").order_by("id")
+            )
+            capacity = max(int(get_setting("MIN_CAPACITY")), len(rows) * 2)
+            bloom = BloomFilter(capacity, get_setting("FALSE_POSITIVE_RATE"))
+            for _, jti in rows:
+                bloom.add(jti)
+
+            now = time.monotonic()
+            with self._lock:
+                self._filter = bloom
+                self._last_id = rows[-1][0] if rows else 0
+                self._built_at = self._synced_at = now
+
+    def sync(self) -> None:
+        """
+        Add JTIs blacklisted (by any process) since the last rebuild/sync.
+        """
+        with self._refresh_lock:
+            if self._filter is None:
+                self.rebuild()
+                return
+            # Re-adding a JTI is harmless; missing a late commit is not
+            since = self._last_id - int(get_setting("SYNC_ID_MARGIN"))
+            rows = list(
+                BlacklistedToken.objects.filter(id__gt=since)
+                .values_list("id", "token__jti")
+                .order_by("id")
+            )
+            with self._lock:
+                for row_id, jti in rows:
+                    self._filter.add(jti)
+                    self._last_id = max(self._last_id, row_id)
+                self._synced_at = time.monotonic()
+
+    def _refresh(self) -> tuple[BloomFilter, int]:
+        """
+        Refresh when due and return the filter with the last id it has seen.
+        """
+        # Only the first build makes other threads wait
+        if self._refresh_lock.acquire(blocking=self._filter is None):
+            try:
+                now = time.monotonic()
+                if self._filter is None or now - self._built_at >= get_setting("REBUILD_SECONDS"):
+                    self.rebuild()
+                elif now - self._synced_at >= get_setting("SYNC_SECONDS"):
+                    self.sync()
+            finally:
+                self._refresh_lock.release()
+        with self._lock:
+            bloom, last_id = self._filter, self._last_id
+        if bloom is None:  # reset() in between
+            return self._refresh()
+        return bloom, last_id
+
+    def add(self, jti: str) -> None:
+        """
+        Record a JTI blacklisted by this process.
+        """
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+
+    def is_blacklisted(self, jti: str) -> bool:
+        """
+        Exact answer. A filter miss only looks at the rows blacklisted since
+        the last sync.
+        """
+        bloom, last_id = self._refresh()
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti)
+        if jti not in bloom:
+            blacklisted = blacklisted.filter(id__gt=last_id - int(get_setting("SYNC_ID_MARGIN")))
+        return blacklisted.exists()
+
+    def reset(self) -> None:
+        with self._refresh_lock, self._lock:
+            self._filter = None
+            self._last_id = 0
+
+
+checker = BlacklistChecker()
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired OutstandingToken/BlacklistedToken rows in small chunks "
+        "so the blacklist tables stay bounded without long write locks."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of outstanding tokens deleted per transaction.",
+        )
+        parser.add_argument(
+            "--grace-minutes",
+            type=int,
+            default=0,
+            help="Only prune tokens that expired at least this many minutes ago.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many tokens would be deleted.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        chunk_size: int = max(1, options["chunk_size"])
+        cutoff = timezone.now() - timedelta(minutes=options["grace_minutes"])
+        expired = OutstandingToken.objects.filter(expires_at__lte=cutoff)
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Would delete {expired.count()} outstanding tokens "
+                f"({BlacklistedToken.objects.filter(token__expires_at__lte=cutoff).count()} blacklisted)."
+            )
+            return
+
+        total_outstanding = 0
+        total_blacklisted = 0
+        last_id = 0
+        while True:
+            ids = list(
+                expired.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            # Children first, so each count is the model's own; the cascade
+            # collector then only sees this chunk's ids.
+            with transaction.atomic():
+                blacklisted, _ = BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                outstanding, _ = OutstandingToken.objects.filter(id__in=ids).delete()
+            total_blacklisted += blacklisted
+            total_outstanding += outstanding
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {total_outstanding} outstanding and "
+                f"{total_blacklisted} blacklisted tokens."
+            )
+        )
@@ -1,6 +1,13 @@
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+
+from jwt_auth.tokens import FilteredRefreshToken
 
 class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = FilteredRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
@@ -12,3 +19,7 @@ class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
             role = "unknown"
         token["role"] = role
         return token
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
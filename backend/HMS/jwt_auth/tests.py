@@ -1,3 +1,156 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from jwt_auth.blacklist import BlacklistChecker, BloomFilter, checker
+from jwt_auth.tokens import FilteredRefreshToken
+
+
+class BloomFilterTests(TestCase):
+    def test_added_values_are_always_found(self):
+        bloom = BloomFilter(100, 0.01)
+        values = [f"jti-{i}" for i in range(100)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+        misses = sum(f"other-{i}" in bloom for i in range(1000))
+        self.assertLess(misses, 50)
+
+
+class BlacklistCheckerTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user("nurse", password="pw")
+
+    def token(self) -> FilteredRefreshToken:
+        return FilteredRefreshToken.for_user(self.user)
+
+    def blacklist_elsewhere(self, token: FilteredRefreshToken, **fields) -> BlacklistedToken:
+        # Another process blacklisted it: this checker's filter is not told
+        return BlacklistedToken.objects.create(
+            token=OutstandingToken.objects.get(jti=token["jti"]), **fields
+        )
+
+    def test_rebuild_loads_the_table(self):
+        revoked, valid = self.token(), self.token()
+        self.blacklist_elsewhere(revoked)
+        local = BlacklistChecker()
+        local.rebuild()
+
+        self.assertTrue(local.is_blacklisted(revoked["jti"]))
+        self.assertFalse(local.is_blacklisted(valid["jti"]))
+
+    def test_sync_picks_up_other_processes(self):
+        local = BlacklistChecker()
+        local.rebuild()
+        token = self.token()
+        self.blacklist_elsewhere(token)
+        self.assertNotIn(token["jti"], local._filter)
+
+        local.sync()
+        self.assertTrue(local.is_blacklisted(token["jti"]))
+
+    @override_settings(TOKEN_BLACKLIST_FILTER={"SYNC_SECONDS": 3600})
+    def test_miss_is_confirmed_before_the_next_sync(self):
+        local = BlacklistChecker()
+        local.rebuild()
+        revoked, valid = self.token(), self.token()
+        self.blacklist_elsewhere(revoked)
+
+        self.assertNotIn(revoked["jti"], local._filter)
+        self.assertTrue(local.is_blacklisted(revoked["jti"]))
+        self.assertFalse(local.is_blacklisted(valid["jti"]))
+
+    def test_reset_is_rebuilt_on_the_next_check(self):
+        local = BlacklistChecker()
+        local.rebuild()
+        local.reset()
+        token = self.token()
+        self.blacklist_elsewhere(token)
+
+        local.sync()
+        self.assertTrue(local.is_blacklisted(token["jti"]))
+        local.reset()
+        self.assertTrue(local.is_blacklisted(token["jti"]))
+
+    @override_settings(TOKEN_BLACKLIST_FILTER={"SYNC_ID_MARGIN": 10})
+    def test_sync_rescans_ids_that_committed_late(self):
+        first, late, last = self.token(), self.token(), self.token()
+        self.blacklist_elsewhere(first, id=100)
+        self.blacklist_elsewhere(last, id=105)
+        local = BlacklistChecker()
+        local.rebuild()
+
+        # Id 103 was allocated before 105 but its transaction committed after
+        self.blacklist_elsewhere(late, id=103)
+        local.sync()
+        self.assertTrue(local.is_blacklisted(late["jti"]))
+
+    def test_local_blacklist_is_seen_at_once(self):
+        checker.reset()
+        token = self.token()
+        checker.rebuild()
+        token.blacklist()
+        with self.assertRaises(TokenError):
+            token.check_blacklist()
+
+    def test_prune_deletes_expired_tokens_in_chunks(self):
+        expired = [self.token() for _ in range(3)]
+        live = self.token()
+        self.blacklist_elsewhere(expired[0])
+        OutstandingToken.objects.filter(jti__in=[token["jti"] for token in expired]).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        out = StringIO()
+        call_command("prune_tokens", chunk_size=2, stdout=out)
+        self.assertIn("Deleted 3 outstanding and 1 blacklisted tokens.", out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), [live["jti"]])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+@override_settings(AUDIT={"SYNCHRONOUS": True})
+class TokenFlowTests(TestCase):
+    def setUp(self) -> None:
+        checker.reset()
+        User.objects.create_user("nurse", password="pw")
+        self.client = APIClient()
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        tokens = self.client.post(
+            "/api/v1/auth/token/", {"username": "nurse", "password": "pw"}, format="json"
+        ).data
+        rotated = self.client.post(
+            "/api/v1/auth/token/refresh/", {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(rotated.status_code, 200)
+
+        reused = self.client.post(
+            "/api/v1/auth/token/refresh/", {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(reused.status_code, 401)
+        again = self.client.post(
+            "/api/v1/auth/token/refresh/", {"refresh": rotated.data["refresh"]}, format="json"
+        )
+        self.assertEqual(again.status_code, 200)
+
+    def test_logout_revokes_the_cookie_token(self):
+        login = self.client.post(
+            "/api/v1/auth/login/", {"username": "nurse", "password": "pw"}, format="json"
+        )
+        self.assertEqual(login.status_code, 200)
+        refresh = login.cookies["refresh_token"].value
+
+        self.assertEqual(self.client.post("/api/v1/auth/logout/").status_code, 200)
+        self.assertEqual(
+            self.client.post(
+                "/api/v1/auth/token/refresh/", {"refresh": refresh}, format="json"
+            ).status_code,
+            401,
+        )
@@ -0,0 +1,35 @@
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.modules.sqlite import serialized_writes
+from jwt_auth.blacklist import checker
+
+
+class FilteredRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist check goes through the in-memory filter.
+
+    The auth views are exempt from the SQLite write queue (password hashing
+    and signing need no lock), so the token table writes take it here.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        with serialized_writes():
+            return super().for_user(user)
+
+    def outstand(self):
+        with serialized_writes():
+            return super().outstand()
+
+    def check_blacklist(self) -> None:
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if checker.is_blacklisted(jti):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        with serialized_writes():
+            result = super().blacklist()
+        checker.add(self.payload[api_settings.JTI_CLAIM])
+        return result
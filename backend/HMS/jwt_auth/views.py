@@ -2,11 +2,15 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.contrib.auth import authenticate, logout
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.contrib.auth.models import User
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from core.models import BaseUserProfile
+from core.modules import audit
 from jwt_auth.serializers import RoleTokenObtainPairSerializer
+from jwt_auth.tokens import FilteredRefreshToken
 
 
 class RoleTokenObtainPairView(TokenObtainPairView):
@@ -26,18 +30,28 @@ class LoginView(APIView):
 
         user = authenticate(request, username=username, password=password)
         if user is None:
+            # Attribute the attempt to the targeted account's hospital
+            profile = BaseUserProfile.objects.filter(django_user__username=username).first()
+            audit.log(
+                "LOGIN_FAILED",
+                request=request,
+                hospital_id=profile.hospital_id if profile else None,
+                status="FAILURE",
+                details={"username": username},
+            )
             return Response(
                 {"detail": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED
             )
 
         # Generate tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = FilteredRefreshToken.for_user(user)
         try:
             role = user.baseuserprofile.role
         except AttributeError:
             role = "unknown"
         refresh["role"] = role
         access = refresh.access_token
+        audit.log("LOGIN", request=request, user=user)
 
         # Set refresh token in HttpOnly cookie
         response = Response(
@@ -71,14 +85,22 @@ class LogoutView(APIView):
             )
 
         try:
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
         except Exception:
+            audit.log("LOGOUT", request=request, status="FAILURE")
             return Response(
                 {"detail": "Invalid refresh token"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        audit.log(
+            "LOGOUT",
+            request=request,
+            user=User.objects.select_related("baseuserprofile")
+            .filter(id=token.get(api_settings.USER_ID_CLAIM))
+            .first(),
+        )
         response = Response(
             {"detail": "Logged out successfully"},
             status=status.HTTP_200_OK,
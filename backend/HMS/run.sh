@@ -34,4 +34,5 @@ fi
 
 echo -e "${CYAN}Starting local server at localhost:8000${RESET}"
 
-python manage.py runserver
+# ASGI: the event stream and WebSockets need it (runserver is WSGI)
+uvicorn HMS.asgi:application --reload --port 8000